@@ -3,6 +3,7 @@
 Router principal da API v1 - Vers?o simplificada com SSO
 """
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import text
 from sqlalchemy.sql import func
@@ -20,6 +21,8 @@ from app.core.security import (
     authenticate_via_sso_token,
     create_sso_login_url
 )
+from app.core import principal_cache
+from app.services.odometro import LeituraRegressiva
 
 # Router principal
 api_router = APIRouter()
@@ -116,6 +119,9 @@ def login(payload: schemas.LoginRequest, db: Session = Depends(get_db)):
 
         # JWT com subject = user.id
         token = create_access_token({"sub": str(user.id), "email": user.email}, user_obj=user)
+
+        # Nova sess?o: permiss?es recompiladas a partir do estado atual
+        principal_cache.invalidar_usuario(user.id)
         return {"access_token": token, "token_type": "bearer", "user": user}
 
     except Exception as e:
@@ -202,6 +208,33 @@ def get_sso_links(current_user: models.Usuario = Depends(get_current_user)):
 def get_me(current_user: models.Usuario = Depends(get_current_user)):
     return current_user
 
+@api_router.get("/users/me/permissions")
+def get_my_permissions(
+    current_user: models.Usuario = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Matriz de permiss?es do usu?rio atual (m?dulo x a??o) para checagem local.
+
+    ``modulos`` traz um bitmap por m?dulo, com um bit por a??o na ordem de
+    ``acoes``; ``extras`` lista a??es fora desse vocabul?rio ("modulo:acao").
+    """
+    from app.security import obter_matriz_permissoes, permissao_na_matriz
+
+    if not is_database_available() or db is None:
+        raise HTTPException(status_code=503, detail="Banco de dados não disponível")
+
+    matriz = obter_matriz_permissoes(current_user, db)
+    return {
+        "usuario_id": current_user.id,
+        "papel": current_user.papel,
+        **matriz,
+        "permissoes": {
+            modulo: [acao for acao in matriz["acoes"] if permissao_na_matriz(matriz, modulo, acao)]
+            for modulo in matriz["modulos"]
+        },
+    }
+
 # Gerenciamento de usu?rios
 @api_router.get("/users")
 def list_users(
@@ -361,12 +394,10 @@ def update_vehicle(vehicle_id: int, body: dict, db: Session = Depends(get_db)):
 
     try:
         # Atualizar campos b?sicos
-        for field in ['placa', 'modelo', 'ano', 'km_atual', 'renavam', 'observacoes_manutencao']:
+        for field in ['placa', 'modelo', 'ano', 'renavam', 'observacoes_manutencao']:
             if field in body and body[field] is not None:
                 if field == 'ano' and body[field]:
                     setattr(veiculo, field, int(body[field]))
-                elif field == 'km_atual' and body[field]:
-                    setattr(veiculo, field, int(body[field]))
                 else:
                     setattr(veiculo, field, body[field])
 
@@ -383,14 +414,125 @@ def update_vehicle(vehicle_id: int, body: dict, db: Session = Depends(get_db)):
                 value = value.lower() in ('true', '1', 'on', 'yes')
             veiculo.em_manutencao = bool(value)
 
+        if body.get('km_atual'):
+            # Odômetro do cadastro entra como leitura manual (não regride)
+            from app.services.odometro import registrar_leitura
+            db.flush()
+            registrar_leitura(db, veiculo.id, int(body['km_atual']), "manual", estrito=True)
+
         db.commit()
         db.refresh(veiculo)
         return veiculo
 
+    except LeituraRegressiva as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Erro ao atualizar ve?culo: {str(e)}")
 
+
+class LeituraOdometroCreate(BaseModel):
+    km: int
+    data_leitura: Optional[str] = None
+    observacoes: Optional[str] = None
+
+
+def _leitura_odometro(leitura) -> dict:
+    return {
+        "id": leitura.id,
+        "km": leitura.km_atual,
+        "km_anterior": leitura.km_anterior,
+        "diferenca_km": leitura.diferenca_km,
+        "fonte": leitura.fonte,
+        "referencia_id": leitura.referencia_id,
+        "data_leitura": leitura.data_leitura.isoformat() if leitura.data_leitura else None,
+        "observacoes": leitura.observacoes,
+    }
+
+
+@api_router.get("/vehicles/{vehicle_id}/odometro")
+def get_vehicle_odometro(
+    vehicle_id: int,
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
+    """Última leitura de odômetro (cache) e leituras mais recentes do veículo"""
+    if not is_database_available() or db is None:
+        raise HTTPException(status_code=503, detail="Banco de dados não disponível")
+
+    veiculo = db.query(models.Veiculo).filter(models.Veiculo.id == vehicle_id).first()
+    if not veiculo:
+        raise HTTPException(status_code=404, detail="Veículo não encontrado")
+
+    ultima = db.get(models.OdometroAtual, vehicle_id)
+    leituras = (
+        db.query(models.HistoricoOdometro)
+        .filter(models.HistoricoOdometro.veiculo_id == vehicle_id)
+        .order_by(models.HistoricoOdometro.data_leitura.desc(), models.HistoricoOdometro.id.desc())
+        .limit(limit)
+        .all()
+    )
+    return {
+        "veiculo_id": veiculo.id,
+        "placa": veiculo.placa,
+        "km_atual": veiculo.km_atual,
+        "ultima_leitura": {
+            "km": ultima.km,
+            "data_leitura": ultima.data_leitura.isoformat(),
+            "fonte": ultima.fonte,
+            "referencia_id": ultima.referencia_id,
+        } if ultima else None,
+        "leituras": [_leitura_odometro(leitura) for leitura in leituras],
+    }
+
+
+@api_router.post("/vehicles/{vehicle_id}/odometro", status_code=201)
+def create_vehicle_odometro(
+    vehicle_id: int,
+    body: LeituraOdometroCreate,
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(get_current_user),
+):
+    """Lançamento manual de odômetro (leitura menor que a atual é rejeitada)"""
+    if not is_database_available() or db is None:
+        raise HTTPException(status_code=503, detail="Banco de dados não disponível")
+
+    from datetime import datetime
+    from app.services.odometro import registrar_leitura
+
+    if not db.query(models.Veiculo.id).filter(models.Veiculo.id == vehicle_id).first():
+        raise HTTPException(status_code=404, detail="Veículo não encontrado")
+    if body.km <= 0:
+        raise HTTPException(status_code=400, detail="Odômetro inválido")
+    try:
+        data_leitura = datetime.fromisoformat(body.data_leitura) if body.data_leitura else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Data da leitura inválida")
+
+    try:
+        leitura = registrar_leitura(
+            db, vehicle_id, body.km, "manual", estrito=True,
+            data_leitura=data_leitura,
+            observacoes=body.observacoes,
+            usuario_id=current_user.id,
+        )
+        db.commit()
+    except (LeituraRegressiva, ValueError) as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        print(f"Erro ao registrar odômetro do veículo {vehicle_id}: {e}")
+        raise HTTPException(status_code=500, detail="Erro ao registrar leitura de odômetro")
+
+    km_atual = db.query(models.Veiculo.km_atual).filter(models.Veiculo.id == vehicle_id).scalar()
+    return {
+        "veiculo_id": vehicle_id,
+        "km_atual": km_atual,
+        "leitura": _leitura_odometro(leitura) if leitura else None,
+    }
+
 # Motoristas
 @api_router.get("/drivers", response_model=List[schemas.MotoristaResponse])
 def list_drivers(db: Session = Depends(get_db)):
@@ -533,6 +675,42 @@ def get_driver(driver_id: int, db: Session = Depends(get_db)):
     return motorista
 
 # Checklists
+def _filtrar_checklists(query, veiculo_id=None, motorista_id=None, status=None, tipo=None,
+                        data_inicio=None, data_fim=None):
+    """Filtros comuns da listagem e da exportação de checklists"""
+    from datetime import datetime, timedelta
+
+    if veiculo_id:
+        query = query.filter(models.Checklist.veiculo_id == veiculo_id)
+
+    if motorista_id:
+        query = query.filter(models.Checklist.motorista_id == motorista_id)
+
+    if status:
+        query = query.filter(models.Checklist.status == status)
+
+    if tipo:
+        query = query.filter(models.Checklist.tipo == tipo)
+
+    if data_inicio:
+        try:
+            data_inicio_dt = datetime.strptime(data_inicio, '%Y-%m-%d')
+            query = query.filter(models.Checklist.dt_inicio >= data_inicio_dt)
+        except ValueError:
+            pass  # Ignorar se formato de data inv?lido
+
+    if data_fim:
+        try:
+            data_fim_dt = datetime.strptime(data_fim, '%Y-%m-%d')
+            # Adicionar 23:59:59 para incluir todo o dia
+            data_fim_dt = data_fim_dt + timedelta(days=1) - timedelta(seconds=1)
+            query = query.filter(models.Checklist.dt_inicio <= data_fim_dt)
+        except ValueError:
+            pass  # Ignorar se formato de data inv?lido
+
+    return query
+
+
 @api_router.get("/checklist")
 def list_checklists(
     page: int = 1,
@@ -545,8 +723,18 @@ def list_checklists(
     data_fim: Optional[str] = Query(None),
     limit: Optional[int] = Query(None),
     offset: Optional[int] = Query(None),
+    cursor: Optional[str] = Query(None, description="Cursor opaco (keyset); envie vazio para a primeira página"),
+    total_mode: Optional[str] = Query(None, pattern="^(exact|estimated|none)$"),
     db: Session = Depends(get_db)
 ):
+    """
+    Lista checklists.
+
+    Modo clássico: page/per_page (ou limit/offset), com total exato.
+    Modo cursor: informe ``cursor`` (vazio na primeira página) e use o
+    ``next_cursor`` retornado; ordenação por (dt_inicio, id) decrescente.
+    ``total_mode`` controla o total: exact, estimated ou none.
+    """
     # Check database availability first
     if not is_database_available() or db is None:
         return {
@@ -559,8 +747,6 @@ def list_checklists(
         }
 
     try:
-        from datetime import datetime
-
         # Usar limit e offset se fornecidos, sen?o usar page e per_page
         if limit is not None and offset is not None:
             actual_limit = limit
@@ -584,38 +770,43 @@ def list_checklists(
         query = db.query(models.Checklist)
 
         # Aplicar filtros
-        if veiculo_id:
-            query = query.filter(models.Checklist.veiculo_id == veiculo_id)
-
-        if motorista_id:
-            query = query.filter(models.Checklist.motorista_id == motorista_id)
-
-        if status:
-            query = query.filter(models.Checklist.status == status)
-
-        if tipo:
-            query = query.filter(models.Checklist.tipo == tipo)
+        query = _filtrar_checklists(query, veiculo_id, motorista_id, status, tipo, data_inicio, data_fim)
 
-        if data_inicio:
-            try:
-                data_inicio_dt = datetime.strptime(data_inicio, '%Y-%m-%d')
-                query = query.filter(models.Checklist.dt_inicio >= data_inicio_dt)
-            except ValueError:
-                pass  # Ignorar se formato de data inv?lido
+        from app.core.pagination import (
+            encode_cursor, keyset_filter, estimate_table_count, estimate_query_count
+        )
 
-        if data_fim:
-            try:
-                data_fim_dt = datetime.strptime(data_fim, '%Y-%m-%d')
-                # Adicionar 23:59:59 para incluir todo o dia
-                from datetime import timedelta
-                data_fim_dt = data_fim_dt + timedelta(days=1) - timedelta(seconds=1)
-                query = query.filter(models.Checklist.dt_inicio <= data_fim_dt)
-            except ValueError:
-                pass  # Ignorar se formato de data inv?lido
-
-        # Buscar dados com filtros e pagina??o
-        total = query.count()
-        checklists = query.offset(actual_offset).limit(actual_limit).all()
+        use_cursor = cursor is not None
+        if total_mode is None:
+            total_mode = "none" if use_cursor else "exact"
+
+        # Total: exato, estimado (estatísticas do planner) ou omitido
+        total = None
+        total_estimado = False
+        if total_mode == "estimated":
+            has_filters = any([veiculo_id, motorista_id, status, tipo, data_inicio, data_fim])
+            if has_filters:
+                total = estimate_query_count(db, query)
+            else:
+                total = estimate_table_count(db, models.Checklist.__tablename__)
+            total_estimado = total is not None
+        if total_mode == "exact" or (total_mode == "estimated" and total is None):
+            total = query.count()
+
+        # Ordenação estável para as duas formas de paginação
+        query = query.order_by(models.Checklist.dt_inicio.desc(), models.Checklist.id.desc())
+
+        next_cursor = None
+        if use_cursor:
+            if cursor:
+                query = keyset_filter(query, models.Checklist.dt_inicio, models.Checklist.id, cursor)
+            checklists = query.limit(per_page + 1).all()
+            if len(checklists) > per_page:
+                checklists = checklists[:per_page]
+                last = checklists[-1]
+                next_cursor = encode_cursor(last.dt_inicio, last.id)
+        else:
+            checklists = query.offset(actual_offset).limit(actual_limit).all()
 
         # Load related data
         veiculo_ids = {c.veiculo_id for c in checklists if c.veiculo_id}
@@ -663,21 +854,80 @@ def list_checklists(
                 "dt_fim": c.dt_fim.isoformat() if c.dt_fim else None,
                 "odometro_ini": c.odometro_ini,
                 "odometro_fim": c.odometro_fim,
+                "score_aprovacao": c.score_aprovacao,
+                "itens_ok": c.itens_ok,
+                "itens_nok": c.itens_nok,
+                "itens_na": c.itens_na,
+                "tem_bloqueios": c.tem_bloqueios,
             })
 
+        if use_cursor:
+            return {
+                "checklists": checklist_data,
+                "pagination": {
+                    "per_page": per_page,
+                    "next_cursor": next_cursor,
+                    "has_more": next_cursor is not None,
+                    "total": total,
+                    "total_estimado": total_estimado
+                }
+            }
+
         return {
             "checklists": checklist_data,
             "pagination": {
                 "page": page,
                 "per_page": per_page,
                 "total": total,
-                "pages": (total + per_page - 1) // per_page
+                "pages": (total + per_page - 1) // per_page if total is not None else None,
+                "total_estimado": total_estimado
             }
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error listing checklists: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.get("/checklist/export.csv")
+def export_checklists_csv(
+    veiculo_id: Optional[int] = Query(None),
+    motorista_id: Optional[int] = Query(None),
+    status: Optional[str] = Query(None),
+    tipo: Optional[str] = Query(None),
+    data_inicio: Optional[str] = Query(None),
+    data_fim: Optional[str] = Query(None)
+):
+    """Exporta checklists em CSV (streaming, sem limite de linhas)"""
+    if not is_database_available():
+        raise HTTPException(status_code=503, detail="Banco de dados não disponível")
+
+    from datetime import datetime
+    from app.core.database import SessionLocal
+    from app.services.csv_export import streaming_csv
+
+    c = models.Checklist
+
+    # Score e contadores persistidos na linha do checklist (sem ler checklist_respostas)
+    def montar_query(sessao):
+        query = sessao.query(
+            c.id, c.codigo, models.Veiculo.placa, models.Motorista.nome, models.ChecklistModelo.nome,
+            c.tipo, c.status, c.dt_inicio, c.dt_fim, c.odometro_ini, c.odometro_fim,
+            c.score_aprovacao, c.itens_ok, c.itens_nok, c.itens_na, c.tem_bloqueios
+        ).outerjoin(models.Veiculo, models.Veiculo.id == c.veiculo_id) \
+         .outerjoin(models.Motorista, models.Motorista.id == c.motorista_id) \
+         .outerjoin(models.ChecklistModelo, models.ChecklistModelo.id == c.modelo_id)
+        query = _filtrar_checklists(query, veiculo_id, motorista_id, status, tipo, data_inicio, data_fim)
+        return query.order_by(c.dt_inicio.desc(), c.id.desc())
+
+    return streaming_csv(
+        SessionLocal,
+        montar_query,
+        ["ID", "Código", "Veículo", "Motorista", "Modelo", "Tipo", "Status", "Data Início", "Data Fim",
+         "Odômetro Inicial", "Odômetro Final", "Score (%)", "Itens OK", "Itens NOK", "Itens N/A", "Tem Bloqueios"],
+        f"checklists_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
+    )
+
 @api_router.post("/checklist/complete")
 def complete_checklist(checklist_data: dict, db: Session = Depends(get_db)):
     """Endpoint para finalizar um checklist com respostas"""
@@ -742,6 +992,7 @@ def complete_checklist(checklist_data: dict, db: Session = Depends(get_db)):
 
         # Salvar respostas
         item_counter = 1
+        itens_criados = False
         for item_id, response_data in checklist_data.get('responses', {}).items():
             # Criar ou buscar item do checklist
             item = db.query(models.ChecklistItem).filter(
@@ -760,6 +1011,7 @@ def complete_checklist(checklist_data: dict, db: Session = Depends(get_db)):
                 )
                 db.add(item)
                 db.flush()
+                itens_criados = True
 
             # Salvar respostas selecionadas
             selected_options = response_data.get('selected', [])
@@ -782,6 +1034,13 @@ def complete_checklist(checklist_data: dict, db: Session = Depends(get_db)):
 
             item_counter += 1
 
+        if itens_criados:
+            from app.services.checklist_templates import nova_versao
+            nova_versao(db, modelo.id)
+
+        from app.services.checklist_scoring import atualizar_metricas
+        atualizar_metricas(db, checklist)
+
         db.commit()
         return {"message": "Checklist salvo com sucesso", "checklist_id": checklist.id}
 
@@ -810,8 +1069,10 @@ def kpi_summary(db: Session = Depends(get_db)):
         }
 
     try:
-        total = db.query(models.Checklist).count()
-        aprovados = db.query(models.Checklist).filter(models.Checklist.status == "aprovado").count()
+        total, aprovados = db.query(
+            func.count(models.Checklist.id),
+            func.count(models.Checklist.id).filter(models.Checklist.status == "aprovado"),
+        ).one()
         return {
             "total": total,
             "aprovados": aprovados,
@@ -830,7 +1091,7 @@ def kpi_summary(db: Session = Depends(get_db)):
 
 # Checklist stats para testes
 @api_router.get("/checklist/stats/summary")
-def checklist_stats_summary(db: Session = Depends(get_db)):
+def checklist_stats_summary(dias: Optional[int] = Query(None, ge=1), db: Session = Depends(get_db)):
     if not is_database_available() or db is None:
         # Return demo stats for offline mode
         return {
@@ -842,14 +1103,14 @@ def checklist_stats_summary(db: Session = Depends(get_db)):
         }
 
     try:
-        total = db.query(models.Checklist).count()
-        aprovados = db.query(models.Checklist).filter(models.Checklist.status == "aprovado").count()
-        reprovados = db.query(models.Checklist).filter(models.Checklist.status == "reprovado").count()
+        from app.services.checklist_rollups import carregar_linhas, resumir
+
+        resumo = resumir(carregar_linhas(db, dias=dias))
         return {
-            "total_checklists": total,
-            "aprovados": aprovados,
-            "reprovados": reprovados,
-            "taxa_aprovacao": (aprovados / total * 100) if total > 0 else 0,
+            "total_checklists": resumo["total_checklists"],
+            "aprovados": resumo["aprovados"],
+            "reprovados": resumo["reprovados"],
+            "taxa_aprovacao": resumo["taxa_aprovacao"],
         }
     except Exception as e:
         print(f"Database error in checklist_stats_summary: {e}")
@@ -874,7 +1135,47 @@ def checklist_stats_resumo(dias: int = 30, db: Session = Depends(get_db)):
             "taxa_aprovacao": 80.0,
             "offline_mode": True
         }
-    return checklist_stats_summary(db)
+    return checklist_stats_summary(dias=dias, db=db)
+
+# KPIs da p?gina inicial em uma ?nica consulta; evolu??o semanal pelo agregado di?rio
+@api_router.get("/dashboard/kpis")
+def dashboard_kpis(
+    dias: int = Query(30, ge=1, le=3650),
+    veiculo_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """KPIs do dashboard e evolu??o dos ?ltimos 7 dias"""
+    if not is_database_available() or db is None:
+        return {
+            "total_checklists": 0,
+            "aprovados": 0,
+            "reprovados": 0,
+            "pendentes": 0,
+            "taxa_aprovacao": 0.0,
+            "checklists_rapidos": 0,
+            "colaboradores_ativos": 0,
+            "veiculos_inspecionados": 0,
+            "duracao_media_segundos": None,
+            "media_checklists_dia": 0.0,
+            "evolucao_semanal": [],
+            "dias": dias,
+            "offline_mode": True
+        }
+
+    from app.services.checklist_rollups import calcular_kpis, carregar_linhas, evolucao_diaria
+
+    try:
+        kpis = calcular_kpis(db, dias, veiculo_id=veiculo_id)
+        semana = carregar_linhas(db, dias=6, veiculo_id=veiculo_id, por_dia=True)
+    except Exception as e:
+        print(f"Database error in dashboard_kpis: {e}")
+        raise HTTPException(status_code=500, detail="Erro ao calcular KPIs do dashboard")
+
+    return {
+        **kpis,
+        "evolucao_semanal": evolucao_diaria(semana, 7),
+        "dias": dias
+    }
 
 @api_router.get("/metrics/top-itens-reprovados")
 def metrics_top_itens_reprovados(dias: int = 30, db: Session = Depends(get_db)):
@@ -925,16 +1226,87 @@ def checklist_pending(db: Session = Depends(get_db)):
 # M?DULO DE ABASTECIMENTO
 # ===============================
 
+def _resposta_cupom(data: dict) -> dict:
+    """Monta a resposta do upload de cupom a partir dos dados extraídos"""
+    import logging
+    logger = logging.getLogger(__name__)
+
+    # Log para debug
+    logger.info(f"OCR extraction completed")
+    logger.info(f"Extracted data keys: {list(data.keys())}")
+    logger.info(f"Posto: {data.get('posto')}")
+    logger.info(f"Litros: {data.get('litros')}")
+    logger.info(f"Valor litro: {data.get('valor_litro')}")
+    logger.info(f"Valor total: {data.get('valor_total')}")
+    logger.info(f"Has raw_text: {bool(data.get('raw_text'))}")
+    if data.get('raw_text'):
+        logger.info(f"Raw text length: {len(data.get('raw_text', ''))}")
+        logger.info(f"Raw text preview (first 200 chars): {data.get('raw_text', '')[:200]}")
+
+    # Verificar qualidade da extração
+    campos_importantes = ['litros', 'valor_litro', 'valor_total', 'data_abastecimento']
+    campos_extraidos = sum(1 for campo in campos_importantes if data.get(campo))
+
+    message = "Cupom processado com sucesso"
+    warning = None
+
+    if campos_extraidos == 0:
+        warning = "Não foi possível extrair dados importantes do cupom. Verifique a qualidade da imagem e tente novamente com uma foto mais nítida e bem iluminada."
+    elif campos_extraidos < len(campos_importantes):
+        warning = f"Apenas {campos_extraidos} de {len(campos_importantes)} campos foram extraídos. Revise os dados e preencha os campos faltantes manualmente."
+
+    return {
+        "success": True,
+        "data": data,
+        "message": message,
+        "warning": warning,
+        "campos_extraidos": campos_extraidos,
+        "total_campos": len(campos_importantes)
+    }
+
+
+def _duplicidade_cupom(data: dict, sha: str, mesmo_arquivo: bool, db: Session) -> dict:
+    """Indícios de que o cupom já foi enviado (mesmo arquivo, mesmo número ou já lançado)"""
+    from app.services import ocr_cache
+
+    numero = data.get('numero_cupom')
+    outros_arquivos = ocr_cache.arquivos_com_numero(numero, exceto=sha)
+    abastecimento_id = None
+    if numero and is_database_available() and db is not None:
+        try:
+            abastecimento_id = db.query(models.Abastecimento.id).filter(
+                models.Abastecimento.numero_cupom == str(numero)
+            ).order_by(models.Abastecimento.id.desc()).limit(1).scalar()
+        except Exception:
+            db.rollback()
+
+    return {
+        "possivel_duplicado": bool(mesmo_arquivo or outros_arquivos or abastecimento_id),
+        "mesmo_arquivo": mesmo_arquivo,
+        "outros_arquivos_mesmo_numero": len(outros_arquivos),
+        "abastecimento_id": abastecimento_id,
+    }
+
+
 @api_router.post("/abastecimentos/upload-cupom")
-async def upload_cupom_fiscal(request: Request):
+async def upload_cupom_fiscal(
+    request: Request,
+    assincrono: bool = Query(False, description="Retorna um job_id imediatamente; consultar em GET /abastecimentos/upload-cupom/{job_id}"),
+    db: Session = Depends(get_db)
+):
     """
     Processa upload de cupom fiscal e extrai dados usando OCR
+
+    O OCR roda em um pool de processos limitado; com a fila cheia retorna 429
+    e, se o processamento passar do tempo limite, 503. Arquivos já lidos
+    (mesmo SHA-256) são respondidos do cache sem novo OCR.
     """
+    import asyncio
     import logging
     logger = logging.getLogger(__name__)
 
     try:
-        from app.services.cupom_extractor import extract_cupom_data
+        from app.services import ocr_cache, ocr_pool
 
         # Receber arquivo da requisição
         form = await request.form()
@@ -946,42 +1318,48 @@ async def upload_cupom_fiscal(request: Request):
         # Ler conteúdo do arquivo
         file_content = await file_upload.read()
 
-        # Extrair dados do cupom
-        data = extract_cupom_data(file_content)
-
-        # Log para debug
-        logger.info(f"OCR extraction completed")
-        logger.info(f"Extracted data keys: {list(data.keys())}")
-        logger.info(f"Posto: {data.get('posto')}")
-        logger.info(f"Litros: {data.get('litros')}")
-        logger.info(f"Valor litro: {data.get('valor_litro')}")
-        logger.info(f"Valor total: {data.get('valor_total')}")
-        logger.info(f"Has raw_text: {bool(data.get('raw_text'))}")
-        if data.get('raw_text'):
-            logger.info(f"Raw text length: {len(data.get('raw_text', ''))}")
-            logger.info(f"Raw text preview (first 200 chars): {data.get('raw_text', '')[:200]}")
-
-        # Verificar qualidade da extração
-        campos_importantes = ['litros', 'valor_litro', 'valor_total', 'data_abastecimento']
-        campos_extraidos = sum(1 for campo in campos_importantes if data.get(campo))
-
-        message = "Cupom processado com sucesso"
-        warning = None
-
-        if campos_extraidos == 0:
-            warning = "Não foi possível extrair dados importantes do cupom. Verifique a qualidade da imagem e tente novamente com uma foto mais nítida e bem iluminada."
-        elif campos_extraidos < len(campos_importantes):
-            warning = f"Apenas {campos_extraidos} de {len(campos_importantes)} campos foram extraídos. Revise os dados e preencha os campos faltantes manualmente."
+        sha = ocr_cache.chave(file_content)
+        data = ocr_cache.obter(sha)
+        if data is not None:
+            logger.info(f"Cupom {sha[:12]} servido do cache de OCR")
+            duplicidade = await asyncio.to_thread(_duplicidade_cupom, data, sha, True, db)
+            return {**_resposta_cupom(data), "cache": True, "duplicidade": duplicidade}
 
-        return {
-            "success": True,
-            "data": data,
-            "message": message,
-            "warning": warning,
-            "campos_extraidos": campos_extraidos,
-            "total_campos": len(campos_importantes)
-        }
+        # Extrair dados do cupom fora do event loop
+        try:
+            job_id = ocr_pool.submeter(file_content, chave=sha)
+        except ocr_pool.FilaOcrCheia:
+            raise HTTPException(
+                status_code=429,
+                detail="Muitos cupons em processamento. Tente novamente em alguns segundos.",
+                headers={"Retry-After": "5"}
+            )
+        ocr_pool.adicionar_callback(job_id, lambda dados: ocr_cache.guardar(sha, dados))
+
+        if assincrono:
+            return JSONResponse(status_code=202, content={
+                "success": True,
+                "job_id": job_id,
+                "status": "na_fila",
+                "message": "Cupom recebido; consulte o resultado pelo job_id"
+            })
+
+        try:
+            data = await ocr_pool.aguardar(job_id)
+        except asyncio.TimeoutError:
+            # Job expirado é descartado do pool; o cupom precisa ser reenviado
+            logger.warning(f"OCR do job {job_id} excedeu {ocr_pool.OCR_TIMEOUT}s")
+            raise HTTPException(
+                status_code=503,
+                detail="Tempo limite de processamento do cupom excedido. Envie o cupom novamente.",
+                headers={"Retry-After": "10"}
+            )
+
+        duplicidade = await asyncio.to_thread(_duplicidade_cupom, data, sha, False, db)
+        return {**_resposta_cupom(data), "cache": False, "duplicidade": duplicidade}
 
+    except HTTPException:
+        raise
     except ImportError as e:
         logger.error(f"Erro de importação OCR: {str(e)}")
         raise HTTPException(
@@ -992,22 +1370,48 @@ async def upload_cupom_fiscal(request: Request):
         logger.error(f"Erro ao processar cupom: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Erro ao processar cupom: {str(e)}")
 
-@api_router.get("/abastecimentos")
-def list_abastecimentos(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
-    veiculo_id: int = Query(None),
-    motorista_id: int = Query(None),
-    data_inicio: str = Query(None),
-    data_fim: str = Query(None),
-    db: Session = Depends(get_db)
-):
-    """Lista abastecimentos com filtros e relacionamentos"""
-    query = db.query(models.Abastecimento).options(
-        joinedload(models.Abastecimento.veiculo),
-        joinedload(models.Abastecimento.motorista),
-        joinedload(models.Abastecimento.fornecedor)
-    )
+
+@api_router.get("/abastecimentos/upload-cupom/{job_id}")
+def status_upload_cupom(job_id: str, db: Session = Depends(get_db)):
+    """Consulta um job de OCR enviado com assincrono=true"""
+    from app.services import ocr_pool
+
+    job = ocr_pool.consultar(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job de OCR não encontrado ou expirado")
+    if job["status"] == "concluido":
+        duplicidade = _duplicidade_cupom(job["data"], job["chave"], False, db)
+        return {"job_id": job_id, "status": "concluido", **_resposta_cupom(job["data"]), "duplicidade": duplicidade}
+    if job["status"] == "erro":
+        raise HTTPException(status_code=400, detail=f"Erro ao processar cupom: {job['erro']}")
+    if job["status"] == "expirado":
+        raise HTTPException(
+            status_code=503,
+            detail="Tempo limite de processamento do cupom excedido. Envie o cupom novamente.",
+            headers={"Retry-After": "10"}
+        )
+    return JSONResponse(status_code=202, content=job)
+
+_CAMPOS_NUMERICOS = ("litros", "valor_litro", "valor_total", "quantidade", "valor_unitario")
+
+
+def _valor_numerico(valor):
+    """Converte valores vindos como texto ("12,5", "1.234,56") para float (colunas NUMERIC)"""
+    if valor is None or isinstance(valor, (int, float)):
+        return valor
+    texto = str(valor).strip()
+    if not texto:
+        return None
+    if "," in texto:
+        texto = texto.replace(".", "").replace(",", ".")
+    try:
+        return float(texto)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Valor numérico inválido: {valor}")
+
+def _filtrar_abastecimentos(query, veiculo_id=None, motorista_id=None, data_inicio=None, data_fim=None):
+    """Filtros comuns da listagem e da exportação de abastecimentos"""
+    from datetime import datetime
 
     if veiculo_id:
         query = query.filter(models.Abastecimento.veiculo_id == veiculo_id)
@@ -1017,7 +1421,6 @@ def list_abastecimentos(
 
     if data_inicio:
         try:
-            from datetime import datetime
             data_inicio_dt = datetime.fromisoformat(data_inicio)
             query = query.filter(models.Abastecimento.data_abastecimento >= data_inicio_dt)
         except:
@@ -1025,12 +1428,33 @@ def list_abastecimentos(
 
     if data_fim:
         try:
-            from datetime import datetime
             data_fim_dt = datetime.fromisoformat(data_fim)
             query = query.filter(models.Abastecimento.data_abastecimento <= data_fim_dt)
         except:
             pass
 
+    return query
+
+
+@api_router.get("/abastecimentos")
+def list_abastecimentos(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    veiculo_id: int = Query(None),
+    motorista_id: int = Query(None),
+    data_inicio: str = Query(None),
+    data_fim: str = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Lista abastecimentos com filtros e relacionamentos"""
+    query = db.query(models.Abastecimento).options(
+        joinedload(models.Abastecimento.veiculo),
+        joinedload(models.Abastecimento.motorista),
+        joinedload(models.Abastecimento.fornecedor)
+    )
+
+    query = _filtrar_abastecimentos(query, veiculo_id, motorista_id, data_inicio, data_fim)
+
     abastecimentos = query.order_by(models.Abastecimento.data_abastecimento.desc()).offset(skip).limit(limit).all()
 
     result = []
@@ -1098,9 +1522,9 @@ def create_abastecimento(abastecimento_data: dict, db: Session = Depends(get_db)
             fornecedor_id=abastecimento_data.get("fornecedor_id"),
             data_abastecimento=datetime.fromisoformat(abastecimento_data.get("data_abastecimento", datetime.now().isoformat())),
             odometro=abastecimento_data["odometro"],
-            litros=str(abastecimento_data["litros"]),
-            valor_litro=str(abastecimento_data["valor_litro"]),
-            valor_total=str(abastecimento_data["valor_total"]),
+            litros=_valor_numerico(abastecimento_data["litros"]),
+            valor_litro=_valor_numerico(abastecimento_data["valor_litro"]),
+            valor_total=_valor_numerico(abastecimento_data["valor_total"]),
             posto=abastecimento_data.get("posto"),
             tipo_combustivel=abastecimento_data.get("tipo_combustivel", "Diesel"),
             numero_cupom=abastecimento_data.get("numero_cupom"),
@@ -1108,6 +1532,14 @@ def create_abastecimento(abastecimento_data: dict, db: Session = Depends(get_db)
         )
 
         db.add(abastecimento)
+        db.flush()
+
+        from app.services.odometro import registrar_leitura
+        registrar_leitura(
+            db, abastecimento.veiculo_id, abastecimento.odometro, "abastecimento", abastecimento.id,
+            data_leitura=abastecimento.data_abastecimento,
+        )
+
         db.commit()
         db.refresh(abastecimento)
 
@@ -1116,6 +1548,81 @@ def create_abastecimento(abastecimento_data: dict, db: Session = Depends(get_db)
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Erro ao criar abastecimento: {str(e)}")
 
+@api_router.get("/abastecimentos/resumo")
+def abastecimentos_resumo(
+    veiculo_id: int = Query(None),
+    motorista_id: int = Query(None),
+    data_inicio: str = Query(None),
+    data_fim: str = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Totais, consumo por veículo e série mensal calculados no banco (mesmos filtros da listagem)"""
+    if not is_database_available() or db is None:
+        raise HTTPException(status_code=503, detail="Banco de dados não disponível")
+
+    from app.services.resumos import resumo_abastecimentos
+
+    return resumo_abastecimentos(
+        db, lambda query: _filtrar_abastecimentos(query, veiculo_id, motorista_id, data_inicio, data_fim)
+    )
+
+@api_router.get("/abastecimentos/analytics")
+def abastecimentos_analytics(
+    veiculo_id: int = Query(None),
+    motorista_id: int = Query(None),
+    data_inicio: str = Query(None),
+    data_fim: str = Query(None),
+    limite_anomalias: int = Query(200, ge=0, le=1000),
+    db: Session = Depends(get_db)
+):
+    """km/L, custo/km por veículo e por mês e abastecimentos atípicos (janela LAG no banco)"""
+    if not is_database_available() or db is None:
+        raise HTTPException(status_code=503, detail="Banco de dados não disponível")
+
+    from app.services.analise_abastecimentos import analisar_abastecimentos
+
+    return analisar_abastecimentos(
+        db,
+        lambda query: _filtrar_abastecimentos(query, veiculo_id, motorista_id, data_inicio, data_fim),
+        limite_anomalias=limite_anomalias,
+    )
+
+@api_router.get("/abastecimentos/export.csv")
+def export_abastecimentos_csv(
+    veiculo_id: int = Query(None),
+    motorista_id: int = Query(None),
+    data_inicio: str = Query(None),
+    data_fim: str = Query(None)
+):
+    """Exporta abastecimentos em CSV (streaming, sem limite de linhas)"""
+    if not is_database_available():
+        raise HTTPException(status_code=503, detail="Banco de dados não disponível")
+
+    from datetime import datetime
+    from app.core.database import SessionLocal
+    from app.services.csv_export import streaming_csv
+
+    a = models.Abastecimento
+
+    def montar_query(sessao):
+        query = sessao.query(
+            a.data_abastecimento,
+            func.trim(func.coalesce(models.Veiculo.marca, '') + ' ' + func.coalesce(models.Veiculo.modelo, '')),
+            models.Veiculo.placa, models.Motorista.nome, a.posto, a.odometro, a.litros, a.valor_litro,
+            a.valor_total, a.tipo_combustivel, a.numero_cupom, a.observacoes
+        ).outerjoin(models.Veiculo, models.Veiculo.id == a.veiculo_id) \
+         .outerjoin(models.Motorista, models.Motorista.id == a.motorista_id)
+        query = _filtrar_abastecimentos(query, veiculo_id, motorista_id, data_inicio, data_fim)
+        return query.order_by(a.data_abastecimento.desc(), a.id.desc())
+
+    return streaming_csv(
+        SessionLocal,
+        montar_query,
+        ["Data", "Veículo", "Placa", "Motorista", "Posto", "Odômetro", "Litros", "Valor/Litro",
+         "Valor Total", "Tipo Combustível", "Número Cupom", "Observações"],
+        f"relatorio_abastecimentos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    )
+
 @api_router.get("/abastecimentos/{abastecimento_id}")
 def get_abastecimento(abastecimento_id: int, db: Session = Depends(get_db)):
     """Busca abastecimento por ID com relacionamentos"""
@@ -1197,9 +1704,19 @@ def update_abastecimento(
             if hasattr(abastecimento, campo):
                 if campo == "data_abastecimento" and valor:
                     setattr(abastecimento, campo, datetime.fromisoformat(valor))
+                elif campo in _CAMPOS_NUMERICOS:
+                    setattr(abastecimento, campo, _valor_numerico(valor))
                 else:
                     setattr(abastecimento, campo, valor)
 
+        if "odometro" in abastecimento_data or "veiculo_id" in abastecimento_data:
+            from app.services.odometro import registrar_leitura
+            db.flush()
+            registrar_leitura(
+                db, abastecimento.veiculo_id, abastecimento.odometro, "abastecimento", abastecimento.id,
+                data_leitura=abastecimento.data_abastecimento,
+            )
+
         db.commit()
         db.refresh(abastecimento)
 
@@ -1344,6 +1861,7 @@ class OrdemServicoCreate(BaseModel):
     descricao_servico: Optional[str] = None
     valor_total: Optional[float] = None
     observacoes: Optional[str] = None
+    plano_item_ids: Optional[List[int]] = None  # itens de plano executados (OS preventiva)
 
 class OrdemServicoUpdate(BaseModel):
     veiculo_id: Optional[int] = None
@@ -1358,6 +1876,9 @@ class OrdemServicoUpdate(BaseModel):
     valor_total: Optional[float] = None
     observacoes: Optional[str] = None
 
+def _os_concluida(status) -> bool:
+    return bool(status) and status.strip().lower().startswith("conclu")
+
 @api_router.post("/ordens-servico")
 def create_ordem_servico(ordem_data: OrdemServicoCreate, db: Session = Depends(get_db)):
     """Cria nova ordem de servi?o"""
@@ -1381,7 +1902,7 @@ def create_ordem_servico(ordem_data: OrdemServicoCreate, db: Session = Depends(g
             'odometro': ordem_data.odometro,
             'descricao_problema': ordem_data.descricao_problema,
             'descricao_servico': ordem_data.descricao_servico,
-            'valor_total': str(ordem_data.valor_total) if ordem_data.valor_total else None,
+            'valor_total': ordem_data.valor_total if ordem_data.valor_total else None,
             'observacoes': ordem_data.observacoes
         }
 
@@ -1391,6 +1912,12 @@ def create_ordem_servico(ordem_data: OrdemServicoCreate, db: Session = Depends(g
         ordem = models.OrdemServico(**ordem_dict)
 
         db.add(ordem)
+        db.flush()
+
+        if _os_concluida(ordem.status):
+            from app.services.manutencao_estado import registrar_manutencao
+            registrar_manutencao(db, ordem, ordem_data.plano_item_ids)
+
         db.commit()
         db.refresh(ordem)
 
@@ -1401,6 +1928,16 @@ def create_ordem_servico(ordem_data: OrdemServicoCreate, db: Session = Depends(g
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Erro ao criar ordem de servi?o: {str(e)}")
 
+@api_router.get("/ordens-servico/resumo")
+def ordens_servico_resumo(db: Session = Depends(get_db)):
+    """Totais por status, valor total e série mensal das ordens de serviço (calculados no banco)"""
+    if not is_database_available() or db is None:
+        raise HTTPException(status_code=503, detail="Banco de dados não disponível")
+
+    from app.services.resumos import resumo_ordens_servico
+
+    return resumo_ordens_servico(db)
+
 @api_router.get("/ordens-servico/{ordem_id}")
 def get_ordem_servico(ordem_id: int, db: Session = Depends(get_db)):
     """Busca ordem de servi?o por ID com itens"""
@@ -1468,6 +2005,8 @@ def update_ordem_servico(
                 if valor is not None:
                     clean_data[campo] = valor
 
+        concluida_antes = _os_concluida(ordem.status)
+
         # Atualizar apenas os campos filtrados
         for campo, valor in clean_data.items():
             if hasattr(ordem, campo):
@@ -1477,9 +2016,16 @@ def update_ordem_servico(
                         setattr(ordem, campo, datetime.fromisoformat(valor))
                     else:
                         setattr(ordem, campo, valor)
+                elif campo in _CAMPOS_NUMERICOS:
+                    setattr(ordem, campo, _valor_numerico(valor))
                 else:
                     setattr(ordem, campo, valor)
 
+        if _os_concluida(ordem.status) and not concluida_antes:
+            from app.services.manutencao_estado import registrar_manutencao
+            db.flush()
+            registrar_manutencao(db, ordem, ordem_data.get("plano_item_ids"))
+
         db.commit()
         db.refresh(ordem)
 
@@ -1709,58 +2255,53 @@ def check_user_permission(
         "permitido": permitido
     }
 
-@api_router.post("/users/activity")
+@api_router.post("/users/activity", status_code=202)
 def register_user_activity(
     activity_data: dict,
-    current_user: models.Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: models.Usuario = Depends(get_current_user)
 ):
-    """Registra atividade do usu?rio para auditoria"""
-    try:
-        log = models.LogAcesso(
-            usuario_id=current_user.id,
-            ip_acesso=activity_data.get('ip', ''),
-            user_agent=activity_data.get('user_agent', ''),
-            url_acessada=activity_data.get('url', ''),
-            metodo_http=activity_data.get('method', ''),
-            sucesso=True
-        )
-        db.add(log)
+    """Registra atividade do usu?rio para auditoria (gravação em lote, fora da requisição)"""
+    from app.services import audit_log
 
-        # Atualizar ?ltima atividade do usu?rio
-        current_user.ultimo_acesso = func.now()
-        if activity_data.get('ip'):
-            current_user.ultimo_ip = activity_data['ip']
+    aceito = audit_log.registrar(current_user.id, activity_data)
+    return {"message": "Atividade registrada com sucesso", "enfileirado": aceito}
 
-        db.commit()
-        return {"message": "Atividade registrada com sucesso"}
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Erro ao registrar atividade: {str(e)}")
+@api_router.post("/users/activity/batch", status_code=202)
+def register_user_activity_batch(
+    batch_data: dict,
+    current_user: models.Usuario = Depends(get_current_user)
+):
+    """Registra vários eventos de auditoria do usuário de uma vez (enviados pelo dashboard)"""
+    from app.services import audit_log
+
+    eventos = batch_data.get("eventos") or []
+    if not isinstance(eventos, list):
+        raise HTTPException(status_code=400, detail="Campo 'eventos' deve ser uma lista")
+
+    aceitos = sum(1 for evento in eventos if isinstance(evento, dict) and audit_log.registrar(current_user.id, evento))
+    return {"recebidos": len(eventos), "enfileirados": aceitos, "descartados": len(eventos) - aceitos}
 
-@api_router.post("/users/log-action")
+@api_router.get("/users/activity/stats")
+def get_activity_pipeline_stats(
+    current_user: models.Usuario = Depends(get_current_user)
+):
+    """Contadores do pipeline de auditoria (eventos gravados, pendentes e descartados)"""
+    from app.services import audit_log
+
+    if current_user.papel != "admin":
+        raise HTTPException(status_code=403, detail="Acesso negado")
+    return audit_log.estatisticas()
+
+@api_router.post("/users/log-action", status_code=202)
 def log_user_action(
     action_data: dict,
-    current_user: models.Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: models.Usuario = Depends(get_current_user)
 ):
     """Registra a??o importante do usu?rio"""
-    try:
-        log = models.LogAcesso(
-            usuario_id=current_user.id,
-            ip_acesso=action_data.get('ip', ''),
-            user_agent=action_data.get('user_agent', ''),
-            url_acessada=action_data.get('url', ''),
-            metodo_http=action_data.get('method', ''),
-            sucesso=True,
-            # Pode adicionar campo de detalhes se necess?rio
-        )
-        db.add(log)
-        db.commit()
-        return {"message": "A??o registrada com sucesso"}
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Erro ao registrar a??o: {str(e)}")
+    from app.services import audit_log
+
+    aceito = audit_log.registrar(current_user.id, action_data)
+    return {"message": "Ação registrada com sucesso", "enfileirado": aceito}
 
 @api_router.get("/users/session-check")
 def check_user_session(
@@ -1965,6 +2506,7 @@ def update_user(
         if permissions_updated:
             db.commit()
 
+        principal_cache.invalidar_usuario(user_id)
         return {"id": user.id, "message": "Usu?rio atualizado com sucesso"}
 
     except Exception as e:
@@ -1990,6 +2532,7 @@ def activate_user(
     user.bloqueado_ate = None
 
     db.commit()
+    principal_cache.invalidar_usuario(user_id)
     return {"message": "Usu?rio ativado com sucesso"}
 
 @api_router.post("/users/{user_id}/deactivate")
@@ -2008,6 +2551,7 @@ def deactivate_user(
 
     user.ativo = False
     db.commit()
+    principal_cache.invalidar_usuario(user_id)
     return {"message": "Usu?rio desativado com sucesso"}
 
 @api_router.get("/users/{user_id}/permissions")
@@ -2075,6 +2619,7 @@ def update_user_permissions(
                     db.add(permissao)
 
         db.commit()
+        principal_cache.invalidar_usuario(user_id)
         return {"message": "Permiss?es atualizadas com sucesso"}
 
     except Exception as e:
@@ -2114,6 +2659,7 @@ def delete_user(
         # Excluir o usu?rio
         db.delete(user)
         db.commit()
+        principal_cache.invalidar_usuario(user_id)
 
         return {"message": f"Usu?rio {user.nome} exclu?do com sucesso"}
 
@@ -2165,6 +2711,103 @@ def initialize_default_profiles(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao criar perfis: {str(e)}")
 
+@api_router.get("/maintenance/estado")
+def get_maintenance_estado(
+    status: Optional[str] = Query(None, description="Status separados por vírgula: em_dia, vencendo, vencida"),
+    veiculo_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Estado de manutenção por veículo x item de plano (mantido por services/manutencao_estado)"""
+    if not is_database_available() or db is None:
+        raise HTTPException(status_code=503, detail="Banco de dados não disponível")
+
+    mc = models.ManutencaoControle
+    i = models.PlanoManutencaoItem
+    p = models.PlanoManutencao
+    query = (
+        db.query(
+            p.id.label("plano_id"), p.descricao.label("plano"), i.id.label("item_id"),
+            i.descricao.label("item"), i.controle_por, models.Veiculo.id.label("veiculo_id"),
+            models.Veiculo.placa, func.coalesce(models.Veiculo.km_atual, 0).label("km_atual"),
+            mc.km_proxima_manutencao, mc.data_proxima_manutencao, mc.status,
+            models.OdometroAtual.km_por_dia,
+        )
+        .join(i, (i.id == mc.plano_item_id) & i.ativo.is_(True))
+        .join(p, (p.id == i.plano_id) & p.ativo.is_(True))
+        .join(models.Veiculo, (models.Veiculo.id == mc.veiculo_id) & models.Veiculo.ativo.is_(True))
+        .outerjoin(models.OdometroAtual, models.OdometroAtual.veiculo_id == mc.veiculo_id)
+    )
+    if status:
+        query = query.filter(mc.status.in_([s.strip() for s in status.split(",") if s.strip()]))
+    if veiculo_id:
+        query = query.filter(mc.veiculo_id == veiculo_id)
+
+    linhas = query.order_by(p.criado_em.desc(), p.id, models.Veiculo.placa, i.ordem).all()
+    return [
+        {
+            **linha._asdict(),
+            "data_proxima_manutencao": (
+                linha.data_proxima_manutencao.isoformat() if linha.data_proxima_manutencao else None
+            ),
+        }
+        for linha in linhas
+    ]
+
+@api_router.post("/maintenance/estado/recalcular")
+def recalcular_maintenance_estado(
+    body: dict = None,
+    current_user: models.Usuario = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Recalcula o estado de manutenção de um veículo, de um plano ou de toda a frota"""
+    if current_user.papel not in ["admin", "gestor", "mecanico"]:
+        raise HTTPException(status_code=403, detail="Sem permissão para recalcular manutenções")
+
+    if not is_database_available() or db is None:
+        raise HTTPException(status_code=503, detail="Banco de dados não disponível")
+
+    from app.services import manutencao_estado
+
+    body = body or {}
+    if body.get("veiculo_id"):
+        manutencao_estado.recalcular_veiculo(db, int(body["veiculo_id"]))
+        veiculos = 1
+    elif body.get("plano_id"):
+        veiculos = manutencao_estado.recalcular_plano(db, int(body["plano_id"]))
+    else:
+        veiculos = manutencao_estado.recalcular_todos(db)
+    db.commit()
+    return {"veiculos_recalculados": veiculos}
+
+@api_router.get("/documentos/vencendo")
+def list_documentos_vencendo(
+    page: int = Query(1, ge=1),
+    per_page: int = Query(50, ge=1, le=200),
+    dias: Optional[int] = Query(None, ge=0, le=180, description="Janela fixa; sem ela vale o dias_alerta de cada documento"),
+    entidade_tipo: Optional[str] = Query(None, description="veiculo, motorista ou empresa"),
+    incluir_vencidos: bool = Query(True),
+    db: Session = Depends(get_db)
+):
+    """Documentos e CNHs vencidos ou dentro da janela de alerta, por data de vencimento"""
+    if not is_database_available() or db is None:
+        raise HTTPException(status_code=503, detail="Banco de dados não disponível")
+
+    from app.services.documentos_vencimento import listar_vencendo
+
+    total, documentos = listar_vencendo(
+        db, page=page, per_page=per_page,
+        dias=dias, entidade_tipo=entidade_tipo, incluir_vencidos=incluir_vencidos,
+    )
+    return {
+        "documentos": documentos,
+        "pagination": {
+            "page": page,
+            "per_page": per_page,
+            "total": total,
+            "pages": (total + per_page - 1) // per_page,
+        }
+    }
+
 # Maintenance alerts endpoint
 @api_router.get("/maintenance/alerts-data")
 def get_maintenance_alerts(db: Session = Depends(get_db)):
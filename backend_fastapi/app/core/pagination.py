@@ -0,0 +1,73 @@
+# backend_fastapi/app/core/pagination.py
+"""
+Utilitários de paginação por cursor (keyset)
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, text
+from sqlalchemy.orm import Session
+
+
+def encode_cursor(dt: datetime, row_id: int) -> str:
+    """Gera cursor opaco a partir da chave (data, id) do último registro"""
+    raw = json.dumps([dt.isoformat(), row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decodifica cursor opaco; levanta 400 se inválido"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        dt_iso, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(dt_iso), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor de paginação inválido")
+
+
+def keyset_filter(query, dt_column, id_column, cursor: str):
+    """Aplica filtro keyset para ordenação (dt DESC, id DESC)"""
+    cursor_dt, cursor_id = decode_cursor(cursor)
+    return query.filter(
+        or_(
+            dt_column < cursor_dt,
+            and_(dt_column == cursor_dt, id_column < cursor_id),
+        )
+    )
+
+
+def estimate_table_count(db: Session, table_name: str) -> Optional[int]:
+    """Total estimado pelas estatísticas do PostgreSQL (pg_class.reltuples)"""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    try:
+        value = db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:t)"),
+            {"t": table_name},
+        ).scalar()
+    except Exception:
+        return None
+    # reltuples = -1 quando a tabela nunca foi analisada
+    if value is None or value < 0:
+        return None
+    return int(value)
+
+
+def estimate_query_count(db: Session, query) -> Optional[int]:
+    """Total estimado pelo planner (EXPLAIN) para consultas com filtros"""
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+    try:
+        compiled = query.statement.compile(dialect=bind.dialect)
+        plan = db.connection().exec_driver_sql(
+            "EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception:
+        return None
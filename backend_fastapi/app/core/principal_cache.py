@@ -0,0 +1,118 @@
+# backend_fastapi/app/core/principal_cache.py
+"""
+Cache curto do usuário autenticado (principal), indexado pelo hash do token
+
+Evita decodificar o JWT e consultar ``users`` a cada requisição. Guarda um
+retrato das colunas do usuário (nunca a instância ligada à sessão) e, por
+usuário, a matriz de permissões compilada (app.security). Alterações de
+usuário ou de permissões chamam ``invalidar_usuario``; em vários processos o
+TTL limita o tempo em que um retrato antigo pode ser servido.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.models import Usuario
+
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "5000"))
+
+_entradas: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_por_usuario: Dict[int, set] = {}
+_matrizes: Dict[int, Dict[str, Any]] = {}
+_lock = threading.Lock()
+
+
+def chave_token(token: str) -> str:
+    """SHA-256 do token (o token em si não fica em memória)"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _remover(chave: str) -> None:
+    entrada = _entradas.pop(chave, None)
+    if entrada is not None:
+        chaves = _por_usuario.get(entrada["usuario_id"])
+        if chaves is not None:
+            chaves.discard(chave)
+            if not chaves:
+                del _por_usuario[entrada["usuario_id"]]
+
+
+def _retrato(usuario: Usuario) -> Dict[str, Any]:
+    return {coluna.key: getattr(usuario, coluna.key) for coluna in Usuario.__table__.columns}
+
+
+def _entrada_valida(chave: str) -> Optional[Dict[str, Any]]:
+    entrada = _entradas.get(chave)
+    if entrada is None:
+        return None
+    if entrada["expira_em"] <= time.time():
+        _remover(chave)
+        return None
+    _entradas.move_to_end(chave)
+    return entrada
+
+
+def obter_usuario(token: str) -> Optional[Usuario]:
+    """Usuário em cache para o token (instância transitória), ou None"""
+    with _lock:
+        entrada = _entrada_valida(chave_token(token))
+        if entrada is None:
+            return None
+        retrato = dict(entrada["usuario"])
+    return Usuario(**retrato)
+
+
+def guardar_usuario(token: str, usuario: Usuario, expira_token: Optional[float] = None) -> None:
+    """Registra o usuário resolvido para o token (validade limitada à do token)"""
+    expira_em = time.time() + PRINCIPAL_CACHE_TTL
+    if expira_token:
+        expira_em = min(expira_em, float(expira_token))
+    chave = chave_token(token)
+    with _lock:
+        _remover(chave)
+        _entradas[chave] = {
+            "usuario_id": usuario.id,
+            "usuario": _retrato(usuario),
+            "expira_em": expira_em,
+        }
+        _por_usuario.setdefault(usuario.id, set()).add(chave)
+        while len(_entradas) > PRINCIPAL_CACHE_SIZE:
+            _remover(next(iter(_entradas)))
+
+
+def obter_matriz(usuario_id: int) -> Optional[Dict[str, Any]]:
+    """Matriz de permissões compilada do usuário, ou None"""
+    with _lock:
+        entrada = _matrizes.get(usuario_id)
+        if entrada is None or entrada["expira_em"] <= time.time():
+            _matrizes.pop(usuario_id, None)
+            return None
+        return entrada["matriz"]
+
+
+def guardar_matriz(usuario_id: int, matriz: Dict[str, Any]) -> None:
+    """Registra a matriz de permissões compilada do usuário"""
+    with _lock:
+        _matrizes[usuario_id] = {"matriz": matriz, "expira_em": time.time() + PRINCIPAL_CACHE_TTL}
+        while len(_matrizes) > PRINCIPAL_CACHE_SIZE:
+            del _matrizes[next(iter(_matrizes))]
+
+
+def invalidar_usuario(usuario_id: int) -> None:
+    """Descarta os tokens e a matriz de permissões em cache de um usuário"""
+    with _lock:
+        for chave in list(_por_usuario.get(usuario_id, ())):
+            _remover(chave)
+        _matrizes.pop(usuario_id, None)
+
+
+def limpar() -> None:
+    """Esvazia o cache"""
+    with _lock:
+        _entradas.clear()
+        _por_usuario.clear()
+        _matrizes.clear()
@@ -15,6 +15,7 @@ from sqlalchemy.orm import Session
 
 from .config import get_settings
 from .database import get_db
+from . import principal_cache
 from app.models import Usuario
 
 # Importar o novo sistema de autenticacao
@@ -196,6 +197,12 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     token = credentials.credentials
+
+    # Principal em cache: sem decodificar o token nem consultar users
+    cached_user = principal_cache.obter_usuario(token)
+    if cached_user is not None:
+        return cached_user
+
     payload = decode_token(token)
     
     user_id = payload.get("sub")
@@ -246,7 +253,8 @@ def get_current_user(
             detail="Usuario inativo",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
+    principal_cache.guardar_usuario(token, user, payload.get("exp"))
     return user
 
 
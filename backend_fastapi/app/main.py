@@ -121,6 +121,9 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     print("Shutdown: API stopping...")
+    from app.services import audit_log, ocr_pool
+    ocr_pool.encerrar()
+    audit_log.encerrar()
 
 
 app.include_router(api_router, prefix="/api/v1")
@@ -700,39 +703,32 @@ async def get_checklist_compat(checklist_id: int, db: Session = Depends(get_db))
         if not checklist:
             raise HTTPException(status_code=404, detail="Checklist not found")
 
-        # Get checklist items from the model
-        items = db.query(models.ChecklistItem).filter(models.ChecklistItem.modelo_id == checklist.modelo_id).order_by(models.ChecklistItem.ordem).all()
+        from app.services.checklist_scoring import indexar_respostas, pontuar
+        from app.services.checklist_templates import obter_template
+
+        # Get checklist items from the model (cached template)
+        template = obter_template(db, checklist.modelo_id)
+        items = template.itens if template else ()
 
         # Get existing responses for this checklist
         responses = db.query(models.ChecklistResposta).filter(models.ChecklistResposta.checklist_id == checklist_id).all()
-        response_dict = {resp.item_id: resp for resp in responses}
+        response_dict = indexar_respostas(responses)
 
         # Build items with responses
         items_data = []
         respostas_data = []
         for item in items:
-            item_data = {
-                "id": item.id,
-                "ordem": item.ordem,
-                "descricao": item.descricao,
-                "categoria": item.categoria,
-                "tipo_resposta": item.tipo_resposta,
-                "severidade": item.severidade,
-                "exige_foto": item.exige_foto,
-                "bloqueia_viagem": item.bloqueia_viagem,
-                "resposta": None,
-                "observacao": None
-            }
+            item_data = dict(item, resposta=None, observacao=None)
 
             # Add existing response if any
-            if item.id in response_dict:
-                resp = response_dict[item.id]
+            if item["id"] in response_dict:
+                resp = response_dict[item["id"]]
                 item_data["resposta"] = resp.valor
                 item_data["observacao"] = resp.observacao
 
                 # Add to separate responses list for template compatibility
                 respostas_data.append({
-                    "item_id": item.id,
+                    "item_id": item["id"],
                     "valor": resp.valor,
                     "observacao": resp.observacao
                 })
@@ -740,10 +736,7 @@ async def get_checklist_compat(checklist_id: int, db: Session = Depends(get_db))
             items_data.append(item_data)
 
         # Calculate statistics
-        itens_ok = sum(1 for resp in respostas_data if resp["valor"] == "ok")
-        itens_nok = sum(1 for resp in respostas_data if resp["valor"] == "nao_ok")
-        itens_na = sum(1 for resp in respostas_data if resp["valor"] == "na")
-        itens_pendentes = len(items_data) - len(respostas_data)
+        pontuacao = pontuar(items, response_dict)
 
         return {
             "id": checklist.id,
@@ -768,10 +761,10 @@ async def get_checklist_compat(checklist_id: int, db: Session = Depends(get_db))
             } if checklist.modelo else None,
             "itens": items_data,
             "respostas": respostas_data,
-            "itens_ok": itens_ok,
-            "itens_nok": itens_nok,
-            "itens_na": itens_na,
-            "itens_pendentes": itens_pendentes
+            "itens_ok": pontuacao.itens_ok,
+            "itens_nok": pontuacao.itens_nok,
+            "itens_na": pontuacao.itens_na,
+            "itens_pendentes": len(items_data) - len(respostas_data)
         }
     except Exception as e:
         print(f"Error getting checklist {checklist_id}: {e}")
@@ -807,6 +800,11 @@ async def save_checklist_answer_compat(answer_data: dict, db: Session = Depends(
             )
             db.add(response)
 
+        checklist = db.get(models.Checklist, checklist_id)
+        if checklist:
+            from app.services.checklist_scoring import atualizar_metricas
+            atualizar_metricas(db, checklist)
+
         db.commit()
 
         return {
@@ -838,6 +836,11 @@ async def finish_checklist_compat(finish_data: dict, db: Session = Depends(get_d
         if finish_data.get('odometro_fim'):
             checklist.odometro_fim = finish_data['odometro_fim']
 
+        from app.services.checklist_scoring import atualizar_metricas
+        from app.services.odometro import registrar_checklist
+        atualizar_metricas(db, checklist)
+        registrar_checklist(db, checklist)
+
         db.commit()
 
         return {
@@ -904,6 +907,11 @@ async def save_checklist_answer(answer_data: dict, db: Session = Depends(get_db)
             )
             db.add(response)
 
+        checklist = db.get(models.Checklist, checklist_id)
+        if checklist:
+            from app.services.checklist_scoring import atualizar_metricas
+            atualizar_metricas(db, checklist)
+
         db.commit()
 
         return {
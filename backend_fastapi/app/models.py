@@ -2,7 +2,7 @@
 """
 Modelos SQLAlchemy - Versão simplificada funcional
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, BigInteger, Text, Time, Date, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, BigInteger, Text, Time, Date, JSON, Numeric, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime, time, date
@@ -215,6 +215,15 @@ class Checklist(Base):
     dt_inicio = Column(DateTime, default=lambda: datetime.utcnow(), nullable=False)
     dt_fim = Column(DateTime)
     status = Column(String(20), default="pendente", nullable=False)
+    # Métricas derivadas das respostas (app.services.checklist_scoring)
+    score_aprovacao = Column(Numeric(5, 2, asdecimal=False))
+    total_itens = Column(Integer)
+    itens_ok = Column(Integer)
+    itens_nok = Column(Integer)
+    itens_na = Column(Integer)
+    tem_bloqueios = Column(Boolean, default=False)
+    # Mantido também pelo trigger do banco; dias alterados após o ETL são reagregados
+    atualizado_em = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
     
     # Relacionamentos
     veiculo = relationship("Veiculo", back_populates="checklists")
@@ -225,6 +234,9 @@ class Checklist(Base):
 class ChecklistResposta(Base):
     """Modelo para respostas dos itens"""
     __tablename__ = "checklist_respostas"
+    __table_args__ = (
+        UniqueConstraint("checklist_id", "item_id", name="uk_checklist_resposta"),
+    )
     
     id = Column(Integer, primary_key=True)
     checklist_id = Column(Integer, ForeignKey("checklists.id"), nullable=False)
@@ -247,9 +259,9 @@ class Abastecimento(Base):
     fornecedor_id = Column(Integer, ForeignKey("fornecedores_frotas.id"), nullable=True)
     data_abastecimento = Column(DateTime, default=func.now(), nullable=False)
     odometro = Column(BigInteger, nullable=False)
-    litros = Column(String(20), nullable=False)  # Decimal como string
-    valor_litro = Column(String(20), nullable=False)  # Decimal como string
-    valor_total = Column(String(20), nullable=False)  # Decimal como string
+    litros = Column(Numeric(10, 3, asdecimal=False), nullable=False)
+    valor_litro = Column(Numeric(10, 3, asdecimal=False), nullable=False)
+    valor_total = Column(Numeric(12, 2, asdecimal=False), nullable=False)
     posto = Column(String(200))
     tipo_combustivel = Column(String(50), default="Diesel")
     numero_cupom = Column(String(100))
@@ -310,7 +322,7 @@ class OrdemServico(Base):
     odometro = Column(BigInteger)
     descricao_problema = Column(Text)
     descricao_servico = Column(Text)
-    valor_total = Column(String(20))  # Decimal como string
+    valor_total = Column(Numeric(12, 2, asdecimal=False))
     observacoes = Column(Text)
     criado_em = Column(DateTime, default=func.now(), nullable=False)
 
@@ -334,9 +346,9 @@ class OrdemServicoItem(Base):
     ordem_servico_id = Column(Integer, ForeignKey("ordens_servico.id"), nullable=False)
     tipo_item = Column(String(20), nullable=False)  # 'peca' ou 'servico'
     descricao = Column(String(300), nullable=False)
-    quantidade = Column(String(20), default="1")  # Decimal como string
-    valor_unitario = Column(String(20))  # Decimal como string
-    valor_total = Column(String(20))  # Decimal como string
+    quantidade = Column(Numeric(10, 3, asdecimal=False), default=1)
+    valor_unitario = Column(Numeric(12, 2, asdecimal=False))
+    valor_total = Column(Numeric(12, 2, asdecimal=False))
     observacoes = Column(Text)
 
     # Relacionamentos
@@ -411,3 +423,213 @@ class UsuarioPerfil(Base):
     perfil_id = Column(Integer, ForeignKey("perfis_acesso.id"), primary_key=True)
     atribuido_em = Column(DateTime, default=func.now(), nullable=False)
 
+
+class ChecklistRollupDiario(Base):
+    """Agregado diário de checklists por veículo, motorista e status (mantido pelo ETL)"""
+    __tablename__ = "checklist_rollup_diario"
+
+    dia = Column(Date, primary_key=True)
+    veiculo_id = Column(Integer, primary_key=True)
+    motorista_id = Column(Integer, primary_key=True)
+    status = Column(String(20), primary_key=True)
+    total = Column(Integer, default=0, nullable=False)
+    finalizados = Column(Integer, default=0, nullable=False)
+    rapidos = Column(Integer, default=0, nullable=False)
+    duracao_total_segundos = Column(Numeric(14, 2), default=0, nullable=False)
+    atualizado_em = Column(DateTime, default=func.now(), nullable=False)
+
+class ChecklistRollupDiaPendente(Base):
+    """Dia a reagregar após exclusão ou mudança de data de checklist (gravado por trigger)"""
+    __tablename__ = "checklist_rollup_dias_pendentes"
+
+    dia = Column(Date, primary_key=True)
+
+class EtlWatermark(Base):
+    """Marca d'água dos jobs incrementais de ETL"""
+    __tablename__ = "etl_watermarks"
+
+    job = Column(String(100), primary_key=True)
+    watermark = Column(DateTime, nullable=False)
+    atualizado_em = Column(DateTime, default=func.now(), nullable=False)
+
+
+class PlanoManutencao(Base):
+    """Plano de manutenção preventiva (sql/maintenance_system.sql)"""
+    __tablename__ = "planos_manutencao"
+
+    id = Column(Integer, primary_key=True)
+    codigo = Column(String(50), unique=True, nullable=False)
+    descricao = Column(String(300), nullable=False)
+    ativo = Column(Boolean, default=True, nullable=False)
+    criado_em = Column(DateTime, default=func.now(), nullable=False)
+
+    itens = relationship("PlanoManutencaoItem", back_populates="plano")
+
+class PlanoManutencaoItem(Base):
+    """Item de plano: periodicidade por km, horas ou dias"""
+    __tablename__ = "planos_manutencao_itens"
+
+    id = Column(Integer, primary_key=True)
+    plano_id = Column(Integer, ForeignKey("planos_manutencao.id", ondelete="CASCADE"), nullable=False)
+    descricao = Column(String(500), nullable=False)
+    tipo = Column(String(50), default="Troca", nullable=False)
+    categoria = Column(String(50))
+    controle_por = Column(String(10), nullable=False)  # km, horas, dias
+    intervalo_valor = Column(Integer, nullable=False)
+    km_inicial = Column(Integer, default=0)
+    alerta_antecipacao = Column(Integer, default=0)
+    alerta_tolerancia = Column(Integer, default=0)
+    ordem = Column(Integer, default=1, nullable=False)
+    ativo = Column(Boolean, default=True, nullable=False)
+    obrigatoria = Column(Boolean, default=True, nullable=False)
+
+    plano = relationship("PlanoManutencao", back_populates="itens")
+
+class VeiculoPlanoManutencao(Base):
+    """Vínculo de um veículo a um plano de manutenção"""
+    __tablename__ = "veiculos_planos_manutencao"
+
+    id = Column(Integer, primary_key=True)
+    veiculo_id = Column(Integer, ForeignKey("veiculos.id", ondelete="CASCADE"), nullable=False)
+    plano_id = Column(Integer, ForeignKey("planos_manutencao.id", ondelete="CASCADE"), nullable=False)
+    data_inicio = Column(Date, default=date.today, nullable=False)
+    km_inicio = Column(Integer, default=0)
+    ativo = Column(Boolean, default=True, nullable=False)
+
+    __table_args__ = (UniqueConstraint("veiculo_id", "plano_id", name="uk_veiculo_plano"),)
+
+class ManutencaoControle(Base):
+    """Estado atual de cada item de plano por veículo (mantido por services/manutencao_estado)"""
+    __tablename__ = "manutencoes_controle"
+
+    id = Column(Integer, primary_key=True)
+    veiculo_id = Column(Integer, ForeignKey("veiculos.id", ondelete="CASCADE"), nullable=False)
+    plano_item_id = Column(Integer, ForeignKey("planos_manutencao_itens.id", ondelete="CASCADE"), nullable=False)
+    km_ultima_manutencao = Column(BigInteger, default=0)
+    data_ultima_manutencao = Column(Date)
+    horas_ultima_manutencao = Column(Integer, default=0)
+    km_proxima_manutencao = Column(BigInteger)
+    data_proxima_manutencao = Column(Date)
+    horas_proxima_manutencao = Column(Integer)
+    status = Column(String(20), default="em_dia", nullable=False)  # em_dia, vencendo, vencida, realizada
+    alerta_enviado = Column(Boolean, default=False)
+    data_alerta = Column(DateTime)
+    atualizado_em = Column(DateTime, default=func.now(), nullable=False)
+
+    __table_args__ = (UniqueConstraint("veiculo_id", "plano_item_id", name="uk_veiculo_plano_item"),)
+
+class ManutencaoHistorico(Base):
+    """Manutenção realizada (preventiva ligada a item de plano e/ou ordem de serviço)"""
+    __tablename__ = "manutencoes_historico"
+
+    id = Column(Integer, primary_key=True)
+    veiculo_id = Column(Integer, ForeignKey("veiculos.id"), nullable=False)
+    plano_item_id = Column(Integer, ForeignKey("planos_manutencao_itens.id"))
+    ordem_servico_id = Column(Integer, ForeignKey("ordens_servico.id"))
+    descricao = Column(String(500), nullable=False)
+    tipo_manutencao = Column(String(20), nullable=False)  # preventiva, corretiva, preditiva
+    data_realizacao = Column(Date, nullable=False)
+    km_realizacao = Column(BigInteger)
+    custo_total = Column(Numeric(10, 2, asdecimal=False), default=0)
+    proxima_km = Column(BigInteger)
+    proxima_data = Column(Date)
+    status = Column(String(20), default="concluida", nullable=False)
+    criado_em = Column(DateTime, default=func.now(), nullable=False)
+
+class HistoricoOdometro(Base):
+    """Leitura de odômetro (só cresce; gravada por services/odometro)"""
+    __tablename__ = "historico_odometro"
+
+    id = Column(Integer, primary_key=True)
+    veiculo_id = Column(Integer, ForeignKey("veiculos.id", ondelete="CASCADE"), nullable=False)
+    km_atual = Column(BigInteger, nullable=False)
+    km_anterior = Column(BigInteger)
+    diferenca_km = Column(Integer)
+    fonte = Column(String(20), nullable=False)  # checklist, abastecimento, manutencao, manual
+    referencia_id = Column(Integer)
+    data_leitura = Column(DateTime, default=func.now(), nullable=False)
+    observacoes = Column(Text)
+    registrado_por = Column(Integer, ForeignKey("users.id"))
+    criado_em = Column(DateTime, default=func.now(), nullable=False)
+
+class OdometroAtual(Base):
+    """Última leitura aceita por veículo (cache de historico_odometro)"""
+    __tablename__ = "odometro_atual"
+
+    veiculo_id = Column(Integer, ForeignKey("veiculos.id", ondelete="CASCADE"), primary_key=True)
+    km = Column(BigInteger, nullable=False)
+    data_leitura = Column(DateTime, nullable=False)
+    fonte = Column(String(20), nullable=False)
+    referencia_id = Column(Integer)
+    historico_id = Column(Integer, ForeignKey("historico_odometro.id", ondelete="SET NULL"))
+    atualizado_em = Column(DateTime, default=func.now(), nullable=False)
+    # Média móvel exponencial de km/dia (recalculada pelo ETL diário)
+    km_por_dia = Column(Numeric(8, 1, asdecimal=False))
+    km_por_dia_calculado_em = Column(DateTime)
+
+
+class Documento(Base):
+    """Documento com vencimento (CRLV, CNH, seguro, licenças) de veículo, motorista ou empresa"""
+    __tablename__ = "documentos"
+
+    id = Column(Integer, primary_key=True)
+    codigo = Column(String(50), unique=True, nullable=False)
+    entidade_tipo = Column(String(20), nullable=False)  # veiculo, motorista, empresa
+    entidade_id = Column(Integer, nullable=False)
+    tipo_documento = Column(String(50), nullable=False)  # crlv, cnh, seguro, licenca_operacao
+    numero_documento = Column(String(100))
+    orgao_emissor = Column(String(100))
+    data_emissao = Column(Date)
+    data_vencimento = Column(Date)
+    data_renovacao = Column(Date)
+    status = Column(String(20), default="vigente")  # vigente, vencido, vencendo, renovado, cancelado
+    valor = Column(Numeric(10, 2, asdecimal=False))
+    observacoes = Column(Text)
+    arquivo_url = Column(Text)
+    alerta_vencimento = Column(Boolean, default=True)
+    dias_alerta = Column(Integer, default=30)
+    criado_em = Column(DateTime, default=func.now(), nullable=False)
+    atualizado_em = Column(DateTime, default=func.now(), nullable=False)
+
+
+# Índices compostos e parciais no formato das consultas de listagem
+# (filtro + ORDER BY data DESC). Mesmo conjunto em sql/migration_indices_consultas.sql
+Index("ix_checklists_veiculo_dt_inicio", Checklist.veiculo_id, Checklist.dt_inicio.desc(), Checklist.id.desc())
+Index("ix_checklists_status_dt_inicio", Checklist.status, Checklist.dt_inicio.desc(), Checklist.id.desc())
+Index(
+    "ix_checklists_aguardando_aprovacao",
+    Checklist.dt_inicio.desc(),
+    postgresql_where=Checklist.status == "aguardando_aprovacao",
+    sqlite_where=Checklist.status == "aguardando_aprovacao",
+)
+Index(
+    "ix_abastecimentos_veiculo_data",
+    Abastecimento.veiculo_id, Abastecimento.data_abastecimento.desc(), Abastecimento.id.desc(),
+)
+Index("ix_ordens_servico_veiculo_abertura", OrdemServico.veiculo_id, OrdemServico.data_abertura.desc())
+
+# Alertas/previsão de manutenção lidos por status (sql/maintenance_system.sql)
+Index("idx_manutencoes_controle_status", ManutencaoControle.status)
+
+# Leituras por veículo em ordem cronológica (km rodados, média km/dia)
+Index("idx_historico_odometro_veiculo_data", HistoricoOdometro.veiculo_id, HistoricoOdometro.data_leitura)
+
+# Vencimentos: só documentos ativos com alerta e CNHs de motoristas ativos
+# (sql/migration_documentos_vencimento.sql)
+_documento_ativo = (
+    Documento.alerta_vencimento.is_(True)
+    & Documento.status.notin_(("renovado", "cancelado"))
+    & Documento.data_vencimento.isnot(None)
+)
+Index(
+    "idx_documentos_vencimento_ativos",
+    Documento.data_vencimento,
+    postgresql_where=_documento_ativo,
+    sqlite_where=_documento_ativo,
+)
+Index(
+    "idx_motoristas_validade_cnh_ativos",
+    Motorista.validade_cnh,
+    postgresql_where=Motorista.ativo.is_(True) & Motorista.validade_cnh.isnot(None),
+    sqlite_where=Motorista.ativo.is_(True) & Motorista.validade_cnh.isnot(None),
+)
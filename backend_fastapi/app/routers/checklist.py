@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import hashlib
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from datetime import datetime
 from app.core.database import get_db
 from app import models, schemas
 from app.core.security import get_current_user, require_role
+from app.services.checklist_scoring import atualizar_metricas, indexar_respostas, pontuar
+from app.services.checklist_templates import etag_modelo, nova_versao, obter_template, versao_atual
+from app.services.odometro import registrar_checklist
 
 router = APIRouter()
 
@@ -12,6 +17,55 @@ ALLOWED_RESPOSTA = {"ok", "nao_ok", "na"}
 ALLOWED_SEVERIDADE = {"baixa", "media", "alta"}
 
 
+def _upsert_respostas(db: Session, checklist_id: int, respostas: list[dict]) -> None:
+    """
+    Grava as respostas do checklist em um único INSERT ... ON CONFLICT
+    DO UPDATE sobre a restrição uk_checklist_resposta (checklist_id, item_id)
+    """
+    if not respostas:
+        return
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        conflito = {"index_elements": ["checklist_id", "item_id"]}
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+        conflito = {"constraint": "uk_checklist_resposta"}
+
+    agora = datetime.utcnow()
+    stmt = insert(models.ChecklistResposta.__table__).values([
+        {
+            "checklist_id": checklist_id,
+            "item_id": r["item_id"],
+            "valor": r["valor"],
+            "observacao": r.get("observacao"),
+            "dt": agora,
+        }
+        for r in respostas
+    ])
+    stmt = stmt.on_conflict_do_update(
+        **conflito,
+        set_={
+            "valor": stmt.excluded.valor,
+            "observacao": stmt.excluded.observacao,
+            "dt": stmt.excluded.dt,
+        },
+    )
+    db.execute(stmt)
+
+
+def _cabecalhos_cache(etag: str) -> dict:
+    # no-cache: o navegador/PWA guarda a resposta, mas revalida com If-None-Match
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def _nao_modificado(request: Request, etag: str) -> bool:
+    """True se o cliente já tem a representação com este ETag (If-None-Match)"""
+    cabecalho = request.headers.get("if-none-match")
+    if not cabecalho:
+        return False
+    return cabecalho.strip() == "*" or etag in [t.strip() for t in cabecalho.split(",")]
+
+
 # Listagem com filtros e paginação
 @router.get("/", response_model=dict)
 def list_checklists(
@@ -130,6 +184,12 @@ def list_checklists(
             "dt_fim": c.dt_fim.isoformat() if c.dt_fim else None,
             "odometro_ini": c.odometro_ini,
             "odometro_fim": c.odometro_fim,
+            # Métricas persistidas (atualizar_metricas / backfill_checklist_scores.py)
+            "score_aprovacao": c.score_aprovacao,
+            "itens_ok": c.itens_ok,
+            "itens_nok": c.itens_nok,
+            "itens_na": c.itens_na,
+            "tem_bloqueios": c.tem_bloqueios,
         }
 
     return {
@@ -196,6 +256,9 @@ def get_pending_checklists(
             "dt_fim": c.dt_fim.isoformat() if c.dt_fim else None,
             "odometro_ini": c.odometro_ini,
             "odometro_fim": c.odometro_fim,
+            "score_aprovacao": c.score_aprovacao,
+            "itens_nok": c.itens_nok,
+            "tem_bloqueios": c.tem_bloqueios,
         })
 
     return result
@@ -203,6 +266,8 @@ def get_pending_checklists(
 
 @router.get("/modelos", response_model=list[schemas.ChecklistModeloResponse])
 def list_checklist_models(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: models.Usuario = Depends(get_current_user),
 ):
@@ -210,7 +275,16 @@ def list_checklist_models(
     if db is None:
         return []
 
-    return db.query(models.ChecklistModelo).filter(models.ChecklistModelo.ativo == True).all()
+    modelos = db.query(models.ChecklistModelo).filter(models.ChecklistModelo.ativo == True).all()
+    # ETag: id e versão de cada modelo ativo (a versão muda a cada alteração)
+    assinatura = json.dumps(
+        [[m.id, m.versao, m.nome, m.tipo, str(m.criado_em)] for m in modelos]
+    )
+    etag = f'W/"modelos-{hashlib.sha256(assinatura.encode()).hexdigest()[:32]}"'
+    if _nao_modificado(request, etag):
+        return Response(status_code=304, headers=_cabecalhos_cache(etag))
+    response.headers.update(_cabecalhos_cache(etag))
+    return modelos
 
 
 @router.post("/modelos", response_model=schemas.ChecklistModeloResponse, status_code=201)
@@ -266,6 +340,7 @@ def update_checklist_model(
             raise HTTPException(409, "Já existe um modelo ativo com este nome e tipo")
     for k, v in data.items():
         setattr(model, k, v)
+    nova_versao(db, model.id)
     db.commit()
     db.refresh(model)
     return model
@@ -281,6 +356,7 @@ def delete_checklist_model(
     if not model:
         raise HTTPException(404, "Modelo não encontrado")
     model.ativo = False
+    nova_versao(db, model.id)
     db.commit()
     return {"ok": True}
 
@@ -288,26 +364,31 @@ def delete_checklist_model(
 @router.get("/modelos/{modelo_id}/itens")
 def list_model_items(
     modelo_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: models.Usuario = Depends(get_current_user),
 ):
-    itens = (
-        db.query(models.ChecklistItem)
-        .filter(models.ChecklistItem.modelo_id == modelo_id)
-        .order_by(models.ChecklistItem.ordem)
-        .all()
-    )
+    versao = versao_atual(db, modelo_id)
+    if versao is None:
+        return []
+    etag = etag_modelo(modelo_id, versao)
+    if _nao_modificado(request, etag):
+        return Response(status_code=304, headers=_cabecalhos_cache(etag))
+
+    template = obter_template(db, modelo_id, versao)
+    response.headers.update(_cabecalhos_cache(etag))
     return [
         {
-            "id": item.id,
-            "ordem": item.ordem,
-            "descricao": item.descricao,
-            "severidade": item.severidade,
-            "exige_foto": item.exige_foto,
-            "bloqueia_viagem": item.bloqueia_viagem,
+            "id": item["id"],
+            "ordem": item["ordem"],
+            "descricao": item["descricao"],
+            "severidade": item["severidade"],
+            "exige_foto": item["exige_foto"],
+            "bloqueia_viagem": item["bloqueia_viagem"],
             "opcoes": [],
         }
-        for item in itens
+        for item in template.itens
     ]
 
 
@@ -341,6 +422,7 @@ def create_model_item(
         raise HTTPException(409, "Já existe um item com esta ordem neste modelo")
     item = models.ChecklistItem(**body.model_dump())
     db.add(item)
+    nova_versao(db, modelo_id)
     db.commit()
     db.refresh(item)
     return item
@@ -377,6 +459,7 @@ def update_model_item(
             raise HTTPException(409, "Já existe um item com esta ordem neste modelo")
     for k, v in data.items():
         setattr(item, k, v)
+    nova_versao(db, item.modelo_id)
     db.commit()
     db.refresh(item)
     return item
@@ -391,7 +474,9 @@ def delete_model_item(
     item = db.get(models.ChecklistItem, item_id)
     if not item:
         raise HTTPException(404, "Item não encontrado")
+    modelo_id = item.modelo_id
     db.delete(item)
+    nova_versao(db, modelo_id)
     db.commit()
     return {"ok": True}
 
@@ -449,24 +534,11 @@ def get_checklist(
         .filter(models.ChecklistResposta.checklist_id == checklist_id)
         .all()
     )
-    itens = (
-        db.query(models.ChecklistItem)
-        .filter(models.ChecklistItem.modelo_id == checklist.modelo_id)
-        .order_by(models.ChecklistItem.ordem)
-        .all()
-    )
-
-    # Calculate score and counts
-    total_respostas = len(respostas)
-    total_itens = len(itens)
-    itens_ok = len([r for r in respostas if r.valor == 'ok'])
-    itens_nok = len([r for r in respostas if r.valor == 'nao_ok'])
-    itens_na = len([r for r in respostas if r.valor == 'na'])
+    template = obter_template(db, checklist.modelo_id, modelo.versao if modelo else None)
+    itens = template.itens if template else ()
 
-    # Calculate approval score (OK items / Total items * 100)
-    score_aprovacao = None
-    if total_itens > 0:
-        score_aprovacao = (itens_ok / total_itens) * 100
+    # Score (OK / total de itens * 100), contagens e bloqueios em uma passada
+    pontuacao = pontuar(itens, respostas)
 
     return {
         "id": checklist.id,
@@ -485,11 +557,12 @@ def get_checklist(
         "dt_fim": checklist.dt_fim.isoformat() if checklist.dt_fim else None,
         "odometro_ini": checklist.odometro_ini,
         "odometro_fim": checklist.odometro_fim,
-        "score_aprovacao": score_aprovacao,
-        "itens_ok": itens_ok,
-        "itens_nok": itens_nok,
-        "itens_na": itens_na,
-        "tem_bloqueios": any(item.bloqueia_viagem and any(r.item_id == item.id and r.valor == 'nao_ok' for r in respostas) for item in itens),
+        "score_aprovacao": pontuacao.score_aprovacao,
+        "itens_ok": pontuacao.itens_ok,
+        "itens_nok": pontuacao.itens_nok,
+        "itens_na": pontuacao.itens_na,
+        "tem_bloqueios": pontuacao.tem_bloqueios,
+        "por_categoria": pontuacao.por_categoria,
         "respostas": [
             {
                 "item_id": r.item_id,
@@ -501,12 +574,12 @@ def get_checklist(
         ],
         "itens": [
             {
-                "id": item.id,
-                "ordem": item.ordem,
-                "descricao": item.descricao,
-                "severidade": item.severidade,
-                "exige_foto": item.exige_foto,
-                "bloqueia_viagem": item.bloqueia_viagem,
+                "id": item["id"],
+                "ordem": item["ordem"],
+                "descricao": item["descricao"],
+                "severidade": item["severidade"],
+                "exige_foto": item["exige_foto"],
+                "bloqueia_viagem": item["bloqueia_viagem"],
             }
             for item in itens
         ],
@@ -523,27 +596,26 @@ def answer_checklist(
     if not checklist:
         raise HTTPException(404, "Checklist não encontrado")
     # Validar itens e valores
-    valid_item_ids = {
-        i.id
-        for i in db.query(models.ChecklistItem)
-        .filter(models.ChecklistItem.modelo_id == checklist.modelo_id)
-        .all()
-    }
+    template = obter_template(db, checklist.modelo_id)
+    valid_item_ids = template.ids if template else frozenset()
+    erros = []
     for resposta in body.respostas:
         if resposta.item_id not in valid_item_ids:
-            raise HTTPException(400, f"Item {resposta.item_id} não pertence ao modelo do checklist")
-        if resposta.valor not in ALLOWED_RESPOSTA:
-            raise HTTPException(400, "Valor de resposta inválido")
-        db.add(
-            models.ChecklistResposta(
-                checklist_id=body.checklist_id,
-                item_id=resposta.item_id,
-                valor=resposta.valor,
-                observacao=resposta.observacao,
-            )
-        )
+            erros.append(f"Item {resposta.item_id} não pertence ao modelo do checklist")
+        elif resposta.valor not in ALLOWED_RESPOSTA:
+            erros.append(f"Item {resposta.item_id}: valor de resposta inválido")
+    if erros:
+        raise HTTPException(400, "; ".join(erros))
+
+    # Última resposta de cada item prevalece
+    respostas = {
+        r.item_id: {"item_id": r.item_id, "valor": r.valor, "observacao": r.observacao}
+        for r in body.respostas
+    }
+    _upsert_respostas(db, body.checklist_id, list(respostas.values()))
+    atualizar_metricas(db, checklist)
     db.commit()
-    return {"ok": True}
+    return {"ok": True, "salvos": len(respostas)}
 
 
 @router.post("/finish", response_model=schemas.ChecklistResponse)
@@ -561,9 +633,12 @@ def finish_checklist(
         if body.odometro_fim < 0:
             raise HTTPException(400, "Odômetro final inválido")
         checklist.odometro_fim = body.odometro_fim
-    checklist.status = "aprovado"
+    # Item que bloqueia viagem marcado como não conforme reprova o checklist
+    pontuacao = atualizar_metricas(db, checklist)
+    checklist.status = "reprovado" if pontuacao.tem_bloqueios else "aprovado"
     from datetime import datetime
     checklist.dt_fim = datetime.utcnow()
+    registrar_checklist(db, checklist)
     db.commit()
     db.refresh(checklist)
     return checklist
@@ -626,6 +701,7 @@ def add_item_to_checklist(
     )
 
     db.add(new_item)
+    nova_versao(db, checklist.modelo_id)
     db.commit()
     db.refresh(new_item)
 
@@ -658,62 +734,40 @@ def get_approval_report(
     modelo = db.get(models.ChecklistModelo, checklist.modelo_id)
 
     # Get all items for this checklist model
-    itens = (
-        db.query(models.ChecklistItem)
-        .filter(models.ChecklistItem.modelo_id == checklist.modelo_id)
-        .order_by(models.ChecklistItem.ordem)
-        .all()
-    )
+    template = obter_template(db, checklist.modelo_id, modelo.versao if modelo else None)
+    itens = template.itens if template else ()
 
-    # Get all responses
-    respostas = {}
-    responses_query = (
+    # Get all responses (indexed by item) and score in one pass
+    respostas = indexar_respostas(
         db.query(models.ChecklistResposta)
         .filter(models.ChecklistResposta.checklist_id == checklist_id)
         .all()
     )
-
-    for resp in responses_query:
-        respostas[resp.item_id] = {
-            "valor": resp.valor,
-            "observacao": resp.observacao,
-            "dt": resp.dt.isoformat() if resp.dt else None
-        }
+    pontuacao = pontuar(itens, respostas)
 
     # Categorize items
-    conformes = []
-    nao_conformes = []
-    nao_aplicaveis = []
-    nao_respondidos = []
+    grupos = {"ok": [], "nao_ok": [], "na": [], None: []}
 
     for item in itens:
         item_data = {
-            "id": item.id,
-            "ordem": item.ordem,
-            "categoria": item.categoria,
-            "descricao": item.descricao,
-            "severidade": item.severidade,
-            "exige_foto": item.exige_foto,
-            "bloqueia_viagem": item.bloqueia_viagem
+            "id": item["id"],
+            "ordem": item["ordem"],
+            "categoria": item["categoria"],
+            "descricao": item["descricao"],
+            "severidade": item["severidade"],
+            "exige_foto": item["exige_foto"],
+            "bloqueia_viagem": item["bloqueia_viagem"]
         }
 
-        if item.id in respostas:
-            resp = respostas[item.id]
+        resp = respostas.get(item["id"])
+        if resp is not None:
             item_data.update({
-                "valor": resp["valor"],
-                "observacao": resp["observacao"],
-                "respondido_em": resp["dt"]
+                "valor": resp.valor,
+                "observacao": resp.observacao,
+                "respondido_em": resp.dt.isoformat() if resp.dt else None
             })
 
-            # Categorize based on response
-            if resp["valor"] == "ok":
-                conformes.append(item_data)
-            elif resp["valor"] == "nao_ok":
-                nao_conformes.append(item_data)
-            elif resp["valor"] == "na":
-                nao_aplicaveis.append(item_data)
-        else:
-            nao_respondidos.append(item_data)
+        grupos[pontuacao.situacao.get(item["id"])].append(item_data)
 
     return {
         "checklist": {
@@ -740,18 +794,20 @@ def get_approval_report(
             "tipo": modelo.tipo if modelo else "N/A"
         },
         "resumo": {
-            "total_itens": len(itens),
-            "conformes": len(conformes),
-            "nao_conformes": len(nao_conformes),
-            "nao_aplicaveis": len(nao_aplicaveis),
-            "nao_respondidos": len(nao_respondidos),
-            "percentual_conformidade": round((len(conformes) / len(itens) * 100), 2) if len(itens) > 0 else 0
+            "total_itens": pontuacao.total_itens,
+            "conformes": pontuacao.itens_ok,
+            "nao_conformes": pontuacao.itens_nok,
+            "nao_aplicaveis": pontuacao.itens_na,
+            "nao_respondidos": pontuacao.pendentes,
+            "percentual_conformidade": pontuacao.percentual_conformidade,
+            "tem_bloqueios": pontuacao.tem_bloqueios,
+            "por_categoria": pontuacao.por_categoria
         },
         "itens": {
-            "conformes": conformes,
-            "nao_conformes": nao_conformes,
-            "nao_aplicaveis": nao_aplicaveis,
-            "nao_respondidos": nao_respondidos
+            "conformes": grupos["ok"],
+            "nao_conformes": grupos["nao_ok"],
+            "nao_aplicaveis": grupos["na"],
+            "nao_respondidos": grupos[None]
         }
     }
 
@@ -889,79 +945,53 @@ def update_multiple_items(
     if not items:
         raise HTTPException(400, "Nenhum item fornecido")
 
-    saved_items = []
-    errors = []
+    resultados = []
+    candidatos = {}
+    for item_data in items:
+        item_id = item_data.get("item_id") if isinstance(item_data, dict) else None
+        valor = item_data.get("valor") if isinstance(item_data, dict) else None
+        if not item_id or not valor:
+            resultados.append({"item_id": item_id, "status": "erro", "erro": "dados incompletos"})
+        elif valor not in ALLOWED_RESPOSTA:
+            resultados.append({"item_id": item_id, "status": "erro", "erro": "valor inválido"})
+        else:
+            resultados.append({"item_id": item_id, "status": "salvo"})
+            # Se o mesmo item vier repetido, a última resposta prevalece
+            candidatos[item_id] = {
+                "item_id": item_id,
+                "valor": valor,
+                "observacao": item_data.get("observacao"),
+            }
+
+    # Validar todos os itens contra o template (em cache) do modelo
+    template = obter_template(db, checklist.modelo_id)
+    validos = template.ids if template else frozenset()
+    for resultado in resultados:
+        if resultado["status"] == "salvo" and resultado["item_id"] not in validos:
+            resultado.update(status="erro", erro="não encontrado")
+    for item_id in set(candidatos) - validos:
+        del candidatos[item_id]
 
     try:
-        for item_data in items:
-            try:
-                item_id = item_data.get("item_id")
-                valor = item_data.get("valor")
-                observacao = item_data.get("observacao")
-
-                if not item_id or not valor:
-                    errors.append(f"Item {item_id}: dados incompletos")
-                    continue
-
-                if valor not in ALLOWED_RESPOSTA:
-                    errors.append(f"Item {item_id}: valor inválido")
-                    continue
-
-                # Verificar se o item existe
-                item = db.query(models.ChecklistItem).filter(
-                    models.ChecklistItem.id == item_id,
-                    models.ChecklistItem.modelo_id == checklist.modelo_id
-                ).first()
-
-                if not item:
-                    errors.append(f"Item {item_id}: não encontrado")
-                    continue
-
-                # Buscar resposta existente
-                resposta = db.query(models.ChecklistResposta).filter(
-                    models.ChecklistResposta.checklist_id == checklist_id,
-                    models.ChecklistResposta.item_id == item_id
-                ).first()
-
-                if resposta:
-                    # Atualizar resposta existente
-                    resposta.valor = valor
-                    resposta.observacao = observacao
-                    resposta.dt = datetime.utcnow()
-                else:
-                    # Criar nova resposta
-                    resposta = models.ChecklistResposta(
-                        checklist_id=checklist_id,
-                        item_id=item_id,
-                        valor=valor,
-                        observacao=observacao,
-                        dt=datetime.utcnow()
-                    )
-                    db.add(resposta)
-
-                saved_items.append({
-                    "item_id": item_id,
-                    "valor": valor,
-                    "observacao": observacao
-                })
-
-            except Exception as e:
-                errors.append(f"Item {item_id}: {str(e)}")
-
+        _upsert_respostas(db, checklist_id, list(candidatos.values()))
+        if candidatos:
+            atualizar_metricas(db, checklist)
         db.commit()
-
-        return {
-            "message": f"Salvamento em lote concluído",
-            "saved_count": len(saved_items),
-            "error_count": len(errors),
-            "saved_items": saved_items,
-            "errors": errors if errors else None
-        }
-
     except Exception as e:
         db.rollback()
         raise HTTPException(500, f"Erro no salvamento em lote: {str(e)}")
 
+    saved_items = list(candidatos.values())
+    errors = [f"Item {r['item_id']}: {r['erro']}" for r in resultados if r["status"] == "erro"]
+    return {
+        "message": f"Salvamento em lote concluído",
+        "saved_count": len(saved_items),
+        "error_count": len(errors),
+        "saved_items": saved_items,
+        "errors": errors if errors else None,
+        "resultados": resultados,
+    }
+
 
 @router.patch("/{checklist_id}")
 def update_checklist(
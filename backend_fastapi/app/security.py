@@ -159,35 +159,86 @@ def pode_acessar_sistema(usuario, ip_cliente: str) -> tuple[bool, str]:
 
     return True, ""
 
+# Matriz de permissões compilada: um bitmap de ações por módulo
+ACOES = ("visualizar", "criar", "editar", "excluir")
+BITS_ACAO = {acao: 1 << i for i, acao in enumerate(ACOES)}
+
+
+def _conceder(matriz: Dict, modulo: str, acao: str, permitido: bool = True) -> None:
+    bit = BITS_ACAO.get(acao)
+    if bit is None:
+        # Ações fora do vocabulário padrão ficam listadas à parte
+        chave = f"{modulo}:{acao}"
+        extras = matriz["extras"]
+        if permitido and chave not in extras:
+            extras.append(chave)
+        elif not permitido and chave in extras:
+            extras.remove(chave)
+        return
+    atual = matriz["modulos"].get(modulo, 0)
+    matriz["modulos"][modulo] = (atual | bit) if permitido else (atual & ~bit)
+
+
+def compilar_permissoes(usuario, db: Session) -> Dict:
+    """
+    Compila todas as permissões do usuário em uma matriz módulo x ação.
+
+    Ordem de precedência (a mesma da verificação individual): permissões
+    específicas do usuário prevalecem; senão valem os perfis atribuídos ou,
+    na falta deles, o papel tradicional.
+    """
+    from app.models import UsuarioPermissao, UsuarioPerfil, PerfilAcesso
+
+    matriz = {"acoes": list(ACOES), "modulos": {}, "extras": []}
+
+    # Papel tradicional (compatibilidade) e perfis atribuídos
+    concessoes = dict(PERFIS_PADRAO.get(usuario.papel, {}).get("permissoes", {}))
+    perfis = db.query(PerfilAcesso.permissoes).join(
+        UsuarioPerfil, UsuarioPerfil.perfil_id == PerfilAcesso.id
+    ).filter(UsuarioPerfil.usuario_id == usuario.id, PerfilAcesso.ativo.is_(True)).all()
+
+    for modulo, acoes in concessoes.items():
+        for acao in acoes:
+            _conceder(matriz, modulo, acao)
+    for (permissoes,) in perfis:
+        for modulo, acoes in (permissoes or {}).items():
+            for acao in acoes or []:
+                _conceder(matriz, modulo, acao)
+
+    # Permissões específicas (concedem ou negam)
+    especificas = db.query(UsuarioPermissao.modulo, UsuarioPermissao.acao, UsuarioPermissao.permitido).filter(
+        UsuarioPermissao.usuario_id == usuario.id
+    ).all()
+    for modulo, acao, permitido in especificas:
+        _conceder(matriz, modulo, acao, bool(permitido))
+
+    return matriz
+
+
+def permissao_na_matriz(matriz: Dict, modulo: str, acao: str) -> bool:
+    """Consulta uma permissão na matriz compilada"""
+    bit = BITS_ACAO.get(acao)
+    if bit is None:
+        return f"{modulo}:{acao}" in matriz.get("extras", [])
+    return bool(matriz.get("modulos", {}).get(modulo, 0) & bit)
+
+
+def obter_matriz_permissoes(usuario, db: Session) -> Dict:
+    """Matriz do usuário, compilada uma vez e mantida no cache de principal"""
+    from app.core import principal_cache
+
+    matriz = principal_cache.obter_matriz(usuario.id)
+    if matriz is None:
+        matriz = compilar_permissoes(usuario, db)
+        principal_cache.guardar_matriz(usuario.id, matriz)
+    return matriz
+
+
 def verificar_permissao_modulo(usuario, modulo: str, acao: str, db: Session) -> bool:
     """
     Verifica se o usuário tem permissão para uma ação específica em um módulo
     """
-    from app.models import UsuarioPermissao
-
-    # Verificar permissões específicas do usuário
-    permissao = db.query(UsuarioPermissao).filter(
-        UsuarioPermissao.usuario_id == usuario.id,
-        UsuarioPermissao.modulo == modulo,
-        UsuarioPermissao.acao == acao
-    ).first()
-
-    if permissao:
-        return permissao.permitido
-
-    # Verificar permissões dos perfis do usuário
-    for perfil in usuario.perfis:
-        if perfil.ativo and perfil.permissoes:
-            modulo_perms = perfil.permissoes.get(modulo, [])
-            if acao in modulo_perms:
-                return True
-
-    # Verificar papel tradicional (compatibilidade)
-    if usuario.papel in PERFIS_PADRAO:
-        modulo_perms = PERFIS_PADRAO[usuario.papel]["permissoes"].get(modulo, [])
-        return acao in modulo_perms
-
-    return False
+    return permissao_na_matriz(obter_matriz_permissoes(usuario, db), modulo, acao)
 
 def registrar_tentativa_login(usuario, sucesso: bool, ip_cliente: str, motivo: str = "", db: Session = None):
     """Registra tentativa de login para auditoria"""
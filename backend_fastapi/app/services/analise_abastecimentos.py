@@ -0,0 +1,147 @@
+# backend_fastapi/app/services/analise_abastecimentos.py
+"""
+Análise de consumo de combustível (km/L, custo/km e abastecimentos atípicos)
+
+Os trechos entre abastecimentos consecutivos e a regra de consumo vêm de
+``resumos`` (mesmo km/L de /abastecimentos/resumo); consumo por veículo,
+por mês e a detecção de anomalias são agregações SQL sobre esses trechos. O
+custo/km usa o valor do abastecimento anterior de cada trecho válido.
+"""
+from typing import Any, Callable, Dict
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Query, Session
+
+from app import models
+from app.services.resumos import (
+    CONSUMO_MAX_KM_L,
+    CONSUMO_MIN_KM_L,
+    consumo_trecho,
+    km_por_litro,
+    mes,
+    soma_km_litros,
+    trecho_valido,
+    trechos_abastecimento,
+)
+
+# Trecho atípico: consumo a mais de 35% da média do próprio veículo
+DESVIO_MAX = 0.35
+
+
+def _agregados(trechos):
+    """Colunas agregadas comuns a veículo e mês"""
+    return (
+        func.count(trechos.c.id),
+        func.coalesce(func.sum(trechos.c.litros), 0),
+        func.coalesce(func.sum(trechos.c.valor_total), 0),
+        *soma_km_litros(trechos),
+        func.coalesce(func.sum(case((trecho_valido(trechos), trechos.c.valor_anterior), else_=0)), 0),
+    )
+
+
+def _indicadores(quantidade, litros, valor, km, litros_trechos, valor_trechos) -> Dict[str, Any]:
+    consumo = km_por_litro(km, litros_trechos)
+    km, valor_trechos = float(km), float(valor_trechos)
+    return {
+        "total_abastecimentos": quantidade,
+        "total_litros": float(litros),
+        "total_valor": float(valor),
+        "km_rodados": km,
+        "km_por_litro": round(consumo, 2) if consumo is not None else None,
+        "custo_por_km": round(valor_trechos / km, 4) if km > 0 else None,
+    }
+
+
+def analisar_abastecimentos(
+    db: Session,
+    filtrar: Callable[[Query], Query],
+    limite_anomalias: int = 200,
+) -> Dict[str, Any]:
+    """
+    Consumo e custo/km por veículo e por mês e abastecimentos atípicos
+    (mesmos filtros da listagem, aplicados via ``filtrar``)
+
+    Anomalias: odômetro que não avançou desde o abastecimento anterior,
+    consumo fora da faixa aceita ou a mais de DESVIO_MAX da média do veículo.
+    """
+    trechos = trechos_abastecimento(db, filtrar, mes(db, models.Abastecimento.data_abastecimento).label("mes"))
+    v = models.Veiculo
+
+    linhas_veiculo = (
+        db.query(trechos.c.veiculo_id, v.placa, v.modelo, *_agregados(trechos))
+        .outerjoin(v, v.id == trechos.c.veiculo_id)
+        .group_by(trechos.c.veiculo_id, v.placa, v.modelo)
+        .order_by(v.placa)
+        .all()
+    )
+    por_veiculo = [
+        {"veiculo": {"id": veiculo_id, "placa": placa, "modelo": modelo}, **_indicadores(*valores)}
+        for veiculo_id, placa, modelo, *valores in linhas_veiculo
+    ]
+
+    por_mes = [
+        {"mes": chave, **_indicadores(*valores)}
+        for chave, *valores in db.query(trechos.c.mes, *_agregados(trechos))
+        .group_by(trechos.c.mes)
+        .order_by(trechos.c.mes)
+        .all()
+        if chave is not None
+    ]
+
+    # Média do próprio veículo (razão de somas dos trechos válidos) ao lado de cada trecho
+    valido = trecho_valido(trechos)
+    media_veiculo = (
+        func.sum(case((valido, trechos.c.km), else_=0)).over(partition_by=trechos.c.veiculo_id)
+        * 1.0
+        / func.nullif(
+            func.sum(case((valido, trechos.c.litros_anterior), else_=0)).over(partition_by=trechos.c.veiculo_id),
+            0,
+        )
+    )
+    comparados = db.query(
+        trechos,
+        case((trechos.c.litros_anterior > 0, consumo_trecho(trechos)), else_=None).label("consumo"),
+        media_veiculo.label("media_veiculo"),
+    ).subquery()
+
+    consumo = comparados.c.consumo
+    media = comparados.c.media_veiculo
+    motivo = case(
+        (comparados.c.km <= 0, "odometro_nao_avancou"),
+        (consumo < CONSUMO_MIN_KM_L, "consumo_fora_da_faixa"),
+        (consumo > CONSUMO_MAX_KM_L, "consumo_fora_da_faixa"),
+        (consumo < media * (1 - DESVIO_MAX), "consumo_abaixo_da_media"),
+        (consumo > media * (1 + DESVIO_MAX), "consumo_acima_da_media"),
+        else_=None,
+    )
+    atipicos = (
+        db.query(comparados, v.placa, motivo.label("motivo"))
+        .outerjoin(v, v.id == comparados.c.veiculo_id)
+        .filter(comparados.c.km.isnot(None), motivo.isnot(None))
+        .order_by(comparados.c.data_abastecimento.desc(), comparados.c.id.desc())
+    )
+    total_anomalias = atipicos.count()
+    anomalias = [
+        {
+            "id": linha.id,
+            "veiculo_id": linha.veiculo_id,
+            "placa": linha.placa,
+            "data_abastecimento": linha.data_abastecimento.isoformat() if linha.data_abastecimento else None,
+            "odometro": linha.odometro,
+            "litros": linha.litros,
+            "km": linha.km,
+            "km_por_litro": round(float(linha.consumo), 2) if linha.consumo is not None else None,
+            "media_veiculo": round(float(linha.media_veiculo), 2) if linha.media_veiculo is not None else None,
+            "motivo": linha.motivo,
+        }
+        for linha in atipicos.limit(limite_anomalias).all()
+    ]
+
+    geral = _indicadores(*db.query(*_agregados(trechos)).one())
+    return {
+        **geral,
+        "por_veiculo": por_veiculo,
+        "por_mes": por_mes,
+        "total_anomalias": total_anomalias,
+        "anomalias": anomalias,
+    }
@@ -0,0 +1,157 @@
+# backend_fastapi/app/services/audit_log.py
+"""
+Pipeline de auditoria (logs_acesso) com gravação em lote
+
+As requisições apenas enfileiram o evento; uma thread em segundo plano grava
+os eventos com um único INSERT de várias linhas a cada AUDIT_BATCH_SIZE
+eventos ou AUDIT_FLUSH_MS milissegundos. A fila é limitada: quando cheia, o
+evento é descartado e contado (``estatisticas()``) em vez de atrasar a
+requisição.
+"""
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+AUDIT_FLUSH_MS = int(os.getenv("AUDIT_FLUSH_MS", "500"))
+
+_fila: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=AUDIT_QUEUE_SIZE)
+_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+_parar = threading.Event()
+_contadores = {"enfileirados": 0, "gravados": 0, "descartados": 0, "falhas": 0, "lotes": 0}
+
+# Limites das colunas de logs_acesso
+_TAMANHOS = {"ip_acesso": 45, "url_acessada": 500, "metodo_http": 10, "motivo_falha": 200}
+
+
+def _linha(usuario_id: Optional[int], dados: Dict[str, Any]) -> Dict[str, Any]:
+    """Monta a linha de logs_acesso; horário e sucesso são definidos pelo servidor, nunca pelo cliente"""
+    linha = {
+        "usuario_id": usuario_id,
+        "ip_acesso": dados.get("ip") or "",
+        "user_agent": dados.get("user_agent") or "",
+        "url_acessada": dados.get("url") or "",
+        "metodo_http": dados.get("method") or "",
+        "status_resposta": dados.get("status"),
+        "timestamp": datetime.now(),
+        "sucesso": True,
+        "motivo_falha": None,
+    }
+    for campo, tamanho in _TAMANHOS.items():
+        if isinstance(linha[campo], str):
+            linha[campo] = linha[campo][:tamanho]
+    return linha
+
+
+def registrar(usuario_id: Optional[int], dados: Dict[str, Any]) -> bool:
+    """Enfileira um evento sem bloquear; retorna False se ele foi descartado"""
+    _iniciar()
+    try:
+        _fila.put_nowait(_linha(usuario_id, dados))
+    except queue.Full:
+        with _lock:
+            _contadores["descartados"] += 1
+        return False
+    with _lock:
+        _contadores["enfileirados"] += 1
+    return True
+
+
+def _gravar(linhas: List[Dict[str, Any]]) -> None:
+    from sqlalchemy import insert
+    from app.core.database import SessionLocal, is_database_available
+    from app.models import LogAcesso
+
+    if not is_database_available() or SessionLocal is None:
+        with _lock:
+            _contadores["falhas"] += len(linhas)
+        return
+
+    db = SessionLocal()
+    try:
+        db.execute(insert(LogAcesso.__table__).values(linhas))
+        db.commit()
+        with _lock:
+            _contadores["gravados"] += len(linhas)
+            _contadores["lotes"] += 1
+    except Exception as e:
+        db.rollback()
+        with _lock:
+            _contadores["falhas"] += len(linhas)
+        print(f"[AUDITORIA] Erro ao gravar lote de {len(linhas)} eventos: {e}")
+    finally:
+        db.close()
+
+
+def _coletar_lote(espera: float) -> List[Dict[str, Any]]:
+    """Aguarda o primeiro evento e junta os seguintes até o tamanho do lote ou o prazo"""
+    try:
+        linhas = [_fila.get(timeout=espera)]
+    except queue.Empty:
+        return []
+    prazo = time.monotonic() + AUDIT_FLUSH_MS / 1000
+    while len(linhas) < AUDIT_BATCH_SIZE:
+        restante = prazo - time.monotonic()
+        if restante <= 0:
+            break
+        try:
+            linhas.append(_fila.get(timeout=restante))
+        except queue.Empty:
+            break
+    return linhas
+
+
+def _loop() -> None:
+    while not _parar.is_set():
+        linhas = _coletar_lote(espera=0.5)
+        if linhas:
+            _gravar(linhas)
+
+
+def _iniciar() -> None:
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            _parar.clear()
+            _thread = threading.Thread(target=_loop, name="auditoria", daemon=True)
+            _thread.start()
+
+
+def descarregar() -> None:
+    """Grava imediatamente tudo o que estiver na fila"""
+    while True:
+        linhas = []
+        while len(linhas) < AUDIT_BATCH_SIZE:
+            try:
+                linhas.append(_fila.get_nowait())
+            except queue.Empty:
+                break
+        if not linhas:
+            return
+        _gravar(linhas)
+
+
+def encerrar() -> None:
+    """Para a thread de gravação e descarrega os eventos pendentes"""
+    global _thread
+    _parar.set()
+    if _thread is not None:
+        _thread.join(timeout=5)
+        _thread = None
+    descarregar()
+
+
+def estatisticas() -> Dict[str, int]:
+    """Contadores do pipeline (inclui os eventos descartados por fila cheia)"""
+    with _lock:
+        dados = dict(_contadores)
+    dados["pendentes"] = _fila.qsize()
+    dados["capacidade"] = AUDIT_QUEUE_SIZE
+    return dados
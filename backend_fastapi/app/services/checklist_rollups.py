@@ -0,0 +1,283 @@
+# backend_fastapi/app/services/checklist_rollups.py
+"""
+Leitura dos agregados diários de checklist (checklist_rollup_diario)
+
+Os KPIs da página inicial (``calcular_kpis``) saem de uma única consulta
+agregada sobre checklists (COUNT FILTER + AVG); as séries e estatísticas
+por período usam o agregado diário.
+
+Dias anteriores à marca d'água do ETL vêm do agregado; o intervalo ainda não
+processado é agregado ao vivo com a mesma granularidade
+(dia, veiculo_id, motorista_id, status). Dias anteriores com checklists
+alterados depois da marca d'água (``atualizado_em``) ou marcados pelo
+trigger em checklist_rollup_dias_pendentes também são agregados ao vivo até
+a próxima execução. Sem agregado disponível, tudo é calculado ao vivo.
+
+Os dias são de calendário UTC, como ``dt_inicio`` e o ``DATE(dt_inicio)``
+do ETL.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from app import models
+
+ROLLUP_JOB = "checklist_rollup_diario"
+CHECKLIST_RAPIDO_SEGUNDOS = 90
+STATUS_PENDENTES = ("pendente", "em_andamento", "aguardando_aprovacao")
+# Mesma margem do ETL para transações que commitaram depois da marca d'água
+ROLLUP_LAG = timedelta(minutes=5)
+
+
+@dataclass
+class LinhaRollup:
+    dia: Optional[date]
+    veiculo_id: int
+    motorista_id: int
+    status: str
+    total: int
+    finalizados: int
+    rapidos: int
+    duracao_total_segundos: float
+
+
+def _duracao_segundos(db: Session):
+    c = models.Checklist
+    if db.get_bind().dialect.name == "sqlite":
+        return (func.julianday(c.dt_fim) - func.julianday(c.dt_inicio)) * 86400
+    return func.extract("epoch", c.dt_fim - c.dt_inicio)
+
+
+def _hoje() -> date:
+    """Dia corrente em UTC (dt_inicio é gravado em UTC)"""
+    return datetime.utcnow().date()
+
+
+def _inicio(dias: Optional[int]) -> datetime:
+    """Início da janela dos últimos ``dias`` (meia-noite UTC), ou todo o histórico"""
+    if not dias:
+        return datetime(1970, 1, 1)
+    return datetime.combine(_hoje() - timedelta(days=dias), datetime.min.time())
+
+
+def calcular_kpis(db: Session, dias: int, veiculo_id: Optional[int] = None) -> Dict:
+    """KPIs dos últimos ``dias`` em uma única consulta agregada sobre checklists"""
+    c = models.Checklist
+    duracao = _duracao_segundos(db)
+    finalizado = c.dt_fim.isnot(None)
+
+    query = db.query(
+        func.count(c.id).label("total"),
+        func.count(c.id).filter(c.status == "aprovado").label("aprovados"),
+        func.count(c.id).filter(c.status == "reprovado").label("reprovados"),
+        func.count(c.id).filter(c.status.in_(STATUS_PENDENTES)).label("pendentes"),
+        func.count(c.id).filter(finalizado, duracao < CHECKLIST_RAPIDO_SEGUNDOS).label("rapidos"),
+        func.count(c.motorista_id.distinct()).label("colaboradores"),
+        func.count(c.veiculo_id.distinct()).label("veiculos"),
+        func.avg(duracao).filter(finalizado).label("duracao_media"),
+    ).filter(c.dt_inicio >= _inicio(dias))
+    if veiculo_id:
+        query = query.filter(c.veiculo_id == veiculo_id)
+    row = query.one()
+
+    total = row.total or 0
+    aprovados = row.aprovados or 0
+    return {
+        "total_checklists": total,
+        "aprovados": aprovados,
+        "reprovados": row.reprovados or 0,
+        "pendentes": row.pendentes or 0,
+        "taxa_aprovacao": round(aprovados / total * 100, 2) if total > 0 else 0.0,
+        "checklists_rapidos": row.rapidos or 0,
+        "colaboradores_ativos": row.colaboradores or 0,
+        "veiculos_inspecionados": row.veiculos or 0,
+        "duracao_media_segundos": round(float(row.duracao_media), 1) if row.duracao_media is not None else None,
+        "media_checklists_dia": round(total / dias, 2),
+    }
+
+
+def ler_watermark(db: Session) -> Optional[datetime]:
+    """Marca d'água do job de agregação (None se o agregado não existe)"""
+    try:
+        registro = db.query(models.EtlWatermark).filter(models.EtlWatermark.job == ROLLUP_JOB).first()
+    except Exception:
+        db.rollback()
+        return None
+    return registro.watermark if registro else None
+
+
+def _dias_alterados(db: Session, inicio: date, corte: date, watermark: datetime) -> List[date]:
+    """Dias já agregados cujos checklists mudaram depois da marca d'água"""
+    c = models.Checklist
+    alterados = (
+        db.query(func.date(c.dt_inicio))
+        .distinct()
+        .filter(
+            c.atualizado_em > watermark - ROLLUP_LAG,
+            c.dt_inicio >= datetime.combine(inicio, datetime.min.time()),
+            c.dt_inicio < datetime.combine(corte, datetime.min.time()),
+        )
+    )
+    dias = {dia if not isinstance(dia, str) else date.fromisoformat(dia) for (dia,) in alterados}
+
+    p = models.ChecklistRollupDiaPendente
+    dias.update(dia for (dia,) in db.query(p.dia).filter(p.dia >= inicio, p.dia < corte))
+    return sorted(dias)
+
+
+def _linhas_ao_vivo(
+    db: Session,
+    inicio: datetime,
+    veiculo_id: Optional[int],
+    por_dia: bool,
+    dias: Optional[List[date]] = None
+) -> List[LinhaRollup]:
+    """Agrega checklists a partir de ``inicio`` (ou só dos ``dias`` informados)"""
+    c = models.Checklist
+    duracao = _duracao_segundos(db)
+    finalizado = c.dt_fim.isnot(None)
+    chaves = [c.veiculo_id, c.motorista_id, c.status]
+    if por_dia:
+        chaves.insert(0, func.date(c.dt_inicio))
+
+    query = db.query(
+        *chaves,
+        func.count(c.id),
+        func.count(c.id).filter(finalizado),
+        func.count(c.id).filter(finalizado, duracao < CHECKLIST_RAPIDO_SEGUNDOS),
+        func.coalesce(func.sum(duracao).filter(finalizado), 0),
+    )
+    if dias is None:
+        query = query.filter(c.dt_inicio >= inicio)
+    else:
+        query = query.filter(or_(*(
+            and_(
+                c.dt_inicio >= datetime.combine(dia, datetime.min.time()),
+                c.dt_inicio < datetime.combine(dia + timedelta(days=1), datetime.min.time()),
+            )
+            for dia in dias
+        )))
+    if veiculo_id:
+        query = query.filter(c.veiculo_id == veiculo_id)
+    query = query.group_by(*chaves)
+
+    linhas = []
+    for row in query.all():
+        if por_dia:
+            dia = row[0] if not isinstance(row[0], str) else date.fromisoformat(row[0])
+            row = row[1:]
+        else:
+            dia = None
+        linhas.append(LinhaRollup(dia, row[0], row[1], row[2], row[3], row[4], row[5], float(row[6] or 0)))
+    return linhas
+
+
+def _linhas_rollup(
+    db: Session,
+    inicio: date,
+    fim: date,
+    veiculo_id: Optional[int],
+    por_dia: bool,
+    excluir: Optional[List[date]] = None
+) -> List[LinhaRollup]:
+    r = models.ChecklistRollupDiario
+    chaves = [r.veiculo_id, r.motorista_id, r.status]
+    if por_dia:
+        chaves.insert(0, r.dia)
+
+    query = db.query(
+        *chaves,
+        func.sum(r.total),
+        func.sum(r.finalizados),
+        func.sum(r.rapidos),
+        func.sum(r.duracao_total_segundos),
+    ).filter(r.dia >= inicio, r.dia < fim)
+    if excluir:
+        query = query.filter(r.dia.notin_(excluir))
+    if veiculo_id:
+        query = query.filter(r.veiculo_id == veiculo_id)
+    query = query.group_by(*chaves)
+
+    linhas = []
+    for row in query.all():
+        dia, row = (row[0], row[1:]) if por_dia else (None, row)
+        linhas.append(LinhaRollup(dia, row[0], row[1], row[2], int(row[3] or 0), int(row[4] or 0),
+                                  int(row[5] or 0), float(row[6] or 0)))
+    return linhas
+
+
+def carregar_linhas(
+    db: Session,
+    dias: Optional[int] = None,
+    veiculo_id: Optional[int] = None,
+    por_dia: bool = False
+) -> List[LinhaRollup]:
+    """
+    Linhas agregadas dos últimos ``dias`` (todo o histórico, se None).
+
+    Sem ``por_dia`` as linhas são somadas por (veiculo_id, motorista_id, status),
+    então o volume retornado não cresce com o histórico.
+    """
+    inicio = _inicio(dias)
+    watermark = ler_watermark(db)
+    if watermark is None:
+        return _linhas_ao_vivo(db, inicio, veiculo_id, por_dia)
+
+    # Dias fechados pelo ETL saem do agregado; o restante é calculado ao vivo
+    corte = watermark.date()
+    linhas = []
+    if inicio.date() < corte:
+        alterados = _dias_alterados(db, inicio.date(), corte, watermark)
+        linhas.extend(_linhas_rollup(db, inicio.date(), corte, veiculo_id, por_dia, excluir=alterados))
+        if alterados:
+            linhas.extend(_linhas_ao_vivo(db, inicio, veiculo_id, por_dia, dias=alterados))
+    linhas.extend(_linhas_ao_vivo(db, max(inicio, datetime.combine(corte, datetime.min.time())), veiculo_id, por_dia))
+    return linhas
+
+
+def resumir(linhas: List[LinhaRollup], dias: Optional[int] = None) -> Dict:
+    """KPIs a partir das linhas agregadas"""
+    total = sum(l.total for l in linhas)
+    aprovados = sum(l.total for l in linhas if l.status == "aprovado")
+    reprovados = sum(l.total for l in linhas if l.status == "reprovado")
+    pendentes = sum(l.total for l in linhas if l.status in STATUS_PENDENTES)
+    finalizados = sum(l.finalizados for l in linhas)
+    duracao_total = sum(l.duracao_total_segundos for l in linhas)
+
+    resumo = {
+        "total_checklists": total,
+        "aprovados": aprovados,
+        "reprovados": reprovados,
+        "pendentes": pendentes,
+        "taxa_aprovacao": round(aprovados / total * 100, 2) if total > 0 else 0.0,
+        "checklists_rapidos": sum(l.rapidos for l in linhas),
+        "colaboradores_ativos": len({l.motorista_id for l in linhas if l.motorista_id}),
+        "veiculos_inspecionados": len({l.veiculo_id for l in linhas if l.veiculo_id}),
+        "duracao_media_segundos": round(duracao_total / finalizados, 1) if finalizados else None,
+    }
+    if dias:
+        resumo["media_checklists_dia"] = round(total / dias, 2)
+    return resumo
+
+
+def evolucao_diaria(linhas: List[LinhaRollup], dias: int) -> List[Dict]:
+    """Série diária (total, aprovados, reprovados); requer linhas carregadas com por_dia"""
+    por_dia = {}
+    for l in linhas:
+        item = por_dia.setdefault(l.dia, {"total": 0, "aprovados": 0, "reprovados": 0})
+        item["total"] += l.total
+        if l.status == "aprovado":
+            item["aprovados"] += l.total
+        elif l.status == "reprovado":
+            item["reprovados"] += l.total
+
+    hoje = _hoje()
+    serie = []
+    for i in range(dias - 1, -1, -1):
+        dia = hoje - timedelta(days=i)
+        valores = por_dia.get(dia, {"total": 0, "aprovados": 0, "reprovados": 0})
+        serie.append({"data": dia.isoformat(), **valores})
+    return serie
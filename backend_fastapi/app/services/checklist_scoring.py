@@ -0,0 +1,126 @@
+# backend_fastapi/app/services/checklist_scoring.py
+"""
+Pontuação de checklists
+
+As respostas são indexadas por item uma única vez e os itens do modelo
+(template em cache, ver checklist_templates) são percorridos em uma só
+passada, calculando contagens, score, bloqueios e a quebra por categoria.
+Usado pelo detalhe, relatório de aprovação e finalização; o resultado é
+gravado na própria linha de ``checklists`` (``atualizar_metricas``) para que
+listagens e exportações não precisem ler ``checklist_respostas``.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+VALORES = ("ok", "nao_ok", "na")
+
+
+@dataclass
+class PontuacaoChecklist:
+    total_itens: int = 0
+    respondidos: int = 0
+    itens_ok: int = 0
+    itens_nok: int = 0
+    itens_na: int = 0
+    pendentes: int = 0
+    score_aprovacao: Optional[float] = None
+    tem_bloqueios: bool = False
+    itens_bloqueantes_nok: List[int] = field(default_factory=list)
+    por_categoria: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    # item_id -> "ok" | "nao_ok" | "na" (ausente = não respondido)
+    situacao: Dict[int, str] = field(default_factory=dict)
+
+    @property
+    def percentual_conformidade(self) -> float:
+        return round(self.score_aprovacao, 2) if self.score_aprovacao is not None else 0
+
+
+def indexar_respostas(respostas: Iterable) -> Dict[int, object]:
+    """
+    Respostas por item_id (objetos com ``item_id``/``valor``); havendo mais de
+    uma para o mesmo item, prevalece a última
+    """
+    return {r.item_id: r for r in respostas}
+
+
+def pontuar(itens: Sequence[dict], respostas) -> PontuacaoChecklist:
+    """
+    Pontua um checklist em uma passada pelos itens do modelo
+
+    ``itens``: itens do template (dicts com id, categoria, bloqueia_viagem).
+    ``respostas``: lista de respostas ou o índice de ``indexar_respostas``.
+    Só respostas de itens do modelo entram nas contagens.
+    """
+    indice = respostas if isinstance(respostas, dict) else indexar_respostas(respostas)
+    resultado = PontuacaoChecklist(total_itens=len(itens))
+
+    for item in itens:
+        categoria = resultado.por_categoria.setdefault(
+            item.get("categoria") or "outros",
+            {"total": 0, "ok": 0, "nao_ok": 0, "na": 0, "pendentes": 0},
+        )
+        categoria["total"] += 1
+
+        resposta = indice.get(item["id"])
+        valor = getattr(resposta, "valor", None)
+        if valor not in VALORES:
+            categoria["pendentes"] += 1
+            resultado.pendentes += 1
+            continue
+
+        resultado.respondidos += 1
+        resultado.situacao[item["id"]] = valor
+        categoria[valor] += 1
+        if valor == "ok":
+            resultado.itens_ok += 1
+        elif valor == "nao_ok":
+            resultado.itens_nok += 1
+            if item.get("bloqueia_viagem"):
+                resultado.itens_bloqueantes_nok.append(item["id"])
+        else:
+            resultado.itens_na += 1
+
+    resultado.tem_bloqueios = bool(resultado.itens_bloqueantes_nok)
+    if resultado.total_itens > 0:
+        resultado.score_aprovacao = resultado.itens_ok / resultado.total_itens * 100
+    return resultado
+
+
+def valores_metricas(pontuacao: PontuacaoChecklist) -> Dict[str, object]:
+    """Colunas persistidas em ``checklists`` a partir da pontuação"""
+    return {
+        "total_itens": pontuacao.total_itens,
+        "itens_ok": pontuacao.itens_ok,
+        "itens_nok": pontuacao.itens_nok,
+        "itens_na": pontuacao.itens_na,
+        "score_aprovacao": (
+            round(pontuacao.score_aprovacao, 2) if pontuacao.score_aprovacao is not None else None
+        ),
+        "tem_bloqueios": pontuacao.tem_bloqueios,
+    }
+
+
+def atualizar_metricas(db: Session, checklist, respostas=None) -> PontuacaoChecklist:
+    """
+    Recalcula e grava no checklist (sem commit) score, contadores e bloqueios
+
+    Chamado ao finalizar o checklist e sempre que suas respostas mudam.
+    """
+    from app import models
+    from app.services.checklist_templates import obter_template
+
+    if respostas is None:
+        # Colunas (não entidades): enxerga também o upsert feito via Core
+        db.flush()
+        respostas = (
+            db.query(models.ChecklistResposta.item_id, models.ChecklistResposta.valor)
+            .filter(models.ChecklistResposta.checklist_id == checklist.id)
+            .all()
+        )
+    template = obter_template(db, checklist.modelo_id)
+    pontuacao = pontuar(template.itens if template else (), respostas)
+    for coluna, valor in valores_metricas(pontuacao).items():
+        setattr(checklist, coluna, valor)
+    return pontuacao
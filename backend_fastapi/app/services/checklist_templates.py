@@ -0,0 +1,122 @@
+# backend_fastapi/app/services/checklist_templates.py
+"""
+Cache dos modelos (templates) de checklist
+
+Os itens de um modelo mudam raramente, mas eram recarregados a cada leitura
+de checklist. O cache é indexado por (modelo_id, versao): toda alteração em
+modelo ou item incrementa ``checklist_modelos.versao`` (``nova_versao``), então
+os demais processos passam a usar a nova chave sem precisar de aviso. A versão
+também serve de ETag para os endpoints de modelos.
+"""
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import models
+
+TEMPLATE_CACHE_SIZE = int(os.getenv("TEMPLATE_CACHE_SIZE", "256"))
+
+_CAMPOS_ITEM = (
+    "id", "ordem", "categoria", "descricao", "tipo_resposta",
+    "severidade", "exige_foto", "bloqueia_viagem",
+)
+
+_cache: "OrderedDict[Tuple[int, int], ModeloTemplate]" = OrderedDict()
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class ModeloTemplate:
+    modelo_id: int
+    versao: int
+    itens: Tuple[Dict, ...]
+    ids: FrozenSet[int]
+    bloqueantes: FrozenSet[int]
+
+
+def etag_modelo(modelo_id: int, versao: int) -> str:
+    """ETag dos itens do modelo (muda a cada nova versão)"""
+    return f'W/"modelo-{modelo_id}-v{versao}"'
+
+
+def _carregar(db: Session, modelo_id: int, versao: int) -> ModeloTemplate:
+    itens = (
+        db.query(models.ChecklistItem)
+        .filter(models.ChecklistItem.modelo_id == modelo_id)
+        .order_by(models.ChecklistItem.ordem)
+        .all()
+    )
+    dados = tuple({campo: getattr(item, campo) for campo in _CAMPOS_ITEM} for item in itens)
+    return ModeloTemplate(
+        modelo_id=modelo_id,
+        versao=versao,
+        itens=dados,
+        ids=frozenset(item["id"] for item in dados),
+        bloqueantes=frozenset(item["id"] for item in dados if item["bloqueia_viagem"]),
+    )
+
+
+def versao_atual(db: Session, modelo_id: int) -> Optional[int]:
+    """Versão do modelo no banco (None se o modelo não existe)"""
+    linha = (
+        db.query(models.ChecklistModelo.versao)
+        .filter(models.ChecklistModelo.id == modelo_id)
+        .first()
+    )
+    if linha is None:
+        return None
+    return linha[0] or 1
+
+
+def obter_template(db: Session, modelo_id: int, versao: Optional[int] = None) -> Optional[ModeloTemplate]:
+    """
+    Template do modelo (itens ordenados, ids válidos e itens que bloqueiam viagem)
+
+    ``versao`` pode ser passada quando o modelo já foi carregado pelo chamador;
+    caso contrário é lida do banco (consulta pela chave primária).
+    """
+    if versao is None:
+        versao = versao_atual(db, modelo_id)
+        if versao is None:
+            return None
+    chave = (modelo_id, versao)
+    with _lock:
+        template = _cache.get(chave)
+        if template is not None:
+            _cache.move_to_end(chave)
+            return template
+
+    template = _carregar(db, modelo_id, versao)
+    with _lock:
+        # Versões antigas do mesmo modelo não serão mais usadas
+        for antiga in [c for c in _cache if c[0] == modelo_id and c[1] < versao]:
+            del _cache[antiga]
+        _cache[chave] = template
+        while len(_cache) > TEMPLATE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return template
+
+
+def nova_versao(db: Session, modelo_id: int) -> None:
+    """
+    Incrementa a versão do modelo após alterar o modelo ou seus itens
+    (efetivado no commit do chamador) e descarta o template local
+    """
+    modelo = db.get(models.ChecklistModelo, modelo_id)
+    if modelo is not None:
+        modelo.versao = (modelo.versao or 1) + 1
+    invalidar(modelo_id)
+
+
+def invalidar(modelo_id: Optional[int] = None) -> None:
+    """Descarta os templates em cache (todos, se modelo_id for None)"""
+    with _lock:
+        if modelo_id is None:
+            _cache.clear()
+            return
+        for chave in [c for c in _cache if c[0] == modelo_id]:
+            del _cache[chave]
@@ -0,0 +1,72 @@
+# backend_fastapi/app/services/csv_export.py
+"""
+Exportação CSV em streaming
+
+As linhas são lidas com cursor no servidor (``yield_per``) e enviadas em
+blocos, então o consumo de memória não depende do tamanho da exportação.
+A sessão é aberta pelo próprio gerador porque ele roda depois que o
+endpoint já retornou.
+"""
+import csv
+from datetime import datetime
+from io import StringIO
+from typing import Callable, Iterable, Iterator, List, Sequence
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Query, Session
+
+CSV_LOTE = 1000
+
+
+def _formatar(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, datetime):
+        return valor.strftime("%d/%m/%Y %H:%M")
+    if isinstance(valor, bool):
+        return "Sim" if valor else "Não"
+    return valor
+
+
+def gerar_csv(cabecalho: Sequence[str], linhas: Iterable[Sequence], lote: int = CSV_LOTE) -> Iterator[str]:
+    """Serializa as linhas em blocos de ``lote`` registros"""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(cabecalho)
+    pendentes = 0
+    for linha in linhas:
+        writer.writerow([_formatar(v) for v in linha])
+        pendentes += 1
+        if pendentes >= lote:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pendentes = 0
+    yield buffer.getvalue()
+
+
+def streaming_csv(
+    session_factory: Callable[[], Session],
+    montar_query: Callable[[Session], Query],
+    cabecalho: List[str],
+    nome_arquivo: str,
+) -> StreamingResponse:
+    """
+    StreamingResponse de um CSV a partir de uma query montada sob demanda
+
+    ``montar_query`` recebe a sessão do gerador e devolve uma query de colunas
+    na mesma ordem do ``cabecalho``.
+    """
+    def conteudo() -> Iterator[str]:
+        db = session_factory()
+        try:
+            query = montar_query(db).yield_per(CSV_LOTE)
+            yield from gerar_csv(cabecalho, query)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        conteudo(),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo}"'},
+    )
@@ -0,0 +1,163 @@
+# backend_fastapi/app/services/documentos_vencimento.py
+"""
+Documentos e CNHs vencendo
+
+Seleciona, pelos índices parciais de vencimento (sql/migration_documentos_vencimento.sql),
+os documentos ativos dentro da janela de alerta de cada um (``dias_alerta``)
+e as CNHs de motoristas ativos (``Motorista.validade_cnh``) que não têm
+documento 'cnh' próprio cadastrado. A janela é limitada por DIAS_ALERTA_MAX
+para a consulta ser sempre uma faixa do índice, nunca uma varredura da tabela.
+Mesma regra do job de alertas do ETL (etl_jobs/etl_jobs_system.py).
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import Date, String, and_, cast, func, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app import models
+
+DIAS_ALERTA_PADRAO = 30
+DIAS_ALERTA_MAX = 180
+CNH_DIAS_ALERTA = 60
+STATUS_INATIVOS = ("renovado", "cancelado")
+
+
+def _sqlite(db: Session) -> bool:
+    return db.get_bind().dialect.name == "sqlite"
+
+
+def _inicio_alerta(db: Session, vencimento, dias):
+    """Data em que o documento entra na janela de alerta (vencimento - dias)"""
+    if _sqlite(db):
+        return func.date(vencimento, "-" + cast(dias, String) + " days")
+    return vencimento - dias
+
+
+def _data(db: Session, coluna):
+    """Parte data de um DateTime (validade_cnh)"""
+    return func.date(coluna) if _sqlite(db) else cast(coluna, Date)
+
+
+def consulta_vencendo(
+    db: Session,
+    hoje: Optional[date] = None,
+    dias: Optional[int] = None,
+    entidade_tipo: Optional[str] = None,
+    incluir_vencidos: bool = True,
+):
+    """
+    Subquery com documentos e CNHs vencendo (e vencidos, se pedido)
+
+    ``dias`` fixa a janela para todos; sem ele vale o ``dias_alerta`` de cada
+    documento (CNH_DIAS_ALERTA para CNHs sem documento), até DIAS_ALERTA_MAX.
+    """
+    hoje = hoje or date.today()
+    janela = min(dias if dias is not None else DIAS_ALERTA_MAX, DIAS_ALERTA_MAX)
+    limite = hoje + timedelta(days=janela)
+
+    d = models.Documento
+    v = models.Veiculo
+    m = models.Motorista
+
+    filtros = [
+        d.alerta_vencimento.is_(True),
+        d.status.notin_(STATUS_INATIVOS),
+        d.data_vencimento.isnot(None),
+        d.data_vencimento <= limite,
+    ]
+    if dias is None:
+        dias_documento = func.coalesce(d.dias_alerta, DIAS_ALERTA_PADRAO)
+        filtros.append(_inicio_alerta(db, d.data_vencimento, dias_documento) <= hoje)
+    if not incluir_vencidos:
+        filtros.append(d.data_vencimento >= hoje)
+    if entidade_tipo:
+        filtros.append(d.entidade_tipo == entidade_tipo)
+
+    documentos = (
+        select(
+            literal("documento").label("origem"),
+            d.id.label("documento_id"),
+            d.entidade_tipo.label("entidade_tipo"),
+            d.entidade_id.label("entidade_id"),
+            func.coalesce(v.placa, m.nome).label("entidade_nome"),
+            d.tipo_documento.label("tipo_documento"),
+            d.numero_documento.label("numero_documento"),
+            d.data_vencimento.label("data_vencimento"),
+        )
+        .outerjoin(v, and_(d.entidade_tipo == "veiculo", v.id == d.entidade_id))
+        .outerjoin(m, and_(d.entidade_tipo == "motorista", m.id == d.entidade_id))
+        .where(*filtros)
+    )
+    partes = [documentos]
+
+    if entidade_tipo in (None, "motorista"):
+        janela_cnh = min(dias if dias is not None else CNH_DIAS_ALERTA, DIAS_ALERTA_MAX)
+        filtros_cnh = [
+            m.ativo.is_(True),
+            m.validade_cnh.isnot(None),
+            m.validade_cnh < hoje + timedelta(days=janela_cnh + 1),
+            ~select(d.id).where(
+                d.entidade_tipo == "motorista",
+                d.entidade_id == m.id,
+                d.tipo_documento == "cnh",
+                d.status.notin_(STATUS_INATIVOS),
+            ).exists(),
+        ]
+        if not incluir_vencidos:
+            filtros_cnh.append(m.validade_cnh >= hoje)
+        partes.append(
+            select(
+                literal("cnh_motorista").label("origem"),
+                literal(None).label("documento_id"),
+                literal("motorista").label("entidade_tipo"),
+                m.id.label("entidade_id"),
+                m.nome.label("entidade_nome"),
+                literal("cnh").label("tipo_documento"),
+                m.cnh.label("numero_documento"),
+                _data(db, m.validade_cnh).label("data_vencimento"),
+            ).where(*filtros_cnh)
+        )
+
+    return union_all(*partes).subquery()
+
+
+def listar_vencendo(
+    db: Session,
+    page: int = 1,
+    per_page: int = 50,
+    hoje: Optional[date] = None,
+    **filtros,
+) -> Tuple[int, list]:
+    """Página de vencimentos por data (mais próximos primeiro) e total"""
+    hoje = hoje or date.today()
+    vencendo = consulta_vencendo(db, hoje=hoje, **filtros)
+
+    total = db.query(func.count()).select_from(vencendo).scalar()
+    linhas = (
+        db.query(vencendo)
+        .order_by(vencendo.c.data_vencimento, vencendo.c.origem, vencendo.c.documento_id, vencendo.c.entidade_id)
+        .offset((page - 1) * per_page)
+        .limit(per_page)
+        .all()
+    )
+    return total, [_item(linha, hoje) for linha in linhas]
+
+
+def _item(linha, hoje: date) -> Dict[str, Any]:
+    vencimento = linha.data_vencimento
+    if isinstance(vencimento, str):
+        vencimento = date.fromisoformat(vencimento[:10])
+    dias_restantes = (vencimento - hoje).days
+    return {
+        "origem": linha.origem,
+        "documento_id": linha.documento_id,
+        "entidade_tipo": linha.entidade_tipo,
+        "entidade_id": linha.entidade_id,
+        "entidade_nome": linha.entidade_nome,
+        "tipo_documento": linha.tipo_documento,
+        "numero_documento": linha.numero_documento,
+        "data_vencimento": vencimento.isoformat(),
+        "dias_restantes": dias_restantes,
+        "situacao": "vencido" if dias_restantes < 0 else "vencendo",
+    }
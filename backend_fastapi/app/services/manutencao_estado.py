@@ -0,0 +1,297 @@
+# backend_fastapi/app/services/manutencao_estado.py
+"""
+Estado da manutenção preventiva (manutencoes_controle)
+
+Em vez de recalcular km/data restantes de todos os itens a cada página, o
+estado de cada par veículo x item de plano é gravado quando algo muda:
+odômetro avançado (services/odometro), ordem de serviço concluída ou
+alteração de plano. Alertas e previsão passam a ser uma leitura indexada
+da tabela.
+
+Itens por km vencem em ``km_ultima_manutencao + intervalo``. Sem estado
+gravado, a última execução vem de manutencoes_historico; sem histórico, é
+o múltiplo do intervalo (a partir de ``km_inicial``)
+imediatamente abaixo do odômetro atual. Itens por dias vencem em
+``data_ultima_manutencao + intervalo`` (sem histórico, a partir da data de
+vínculo ao plano). Como esses itens vencem com o passar do tempo, o
+recálculo geral (``recalcular_todos`` / recalcular_manutencoes.py) deve
+rodar diariamente. Itens por horas não são controlados (não há horímetro).
+
+As funções de evento não fazem commit e rodam em savepoint: uma falha no
+motor (ex.: tabelas de manutenção ausentes) é registrada e não desfaz a
+operação principal do chamador.
+"""
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services import odometro
+
+logger = logging.getLogger(__name__)
+
+ANTECIPACAO_KM_PADRAO = int(os.getenv("MANUTENCAO_ANTECIPACAO_KM", "5000"))
+ANTECIPACAO_DIAS_PADRAO = int(os.getenv("MANUTENCAO_ANTECIPACAO_DIAS", "15"))
+
+STATUS_PENDENTES = ("vencida", "vencendo")
+
+
+def calcular_estado(
+    controle_por: str,
+    intervalo: int,
+    km_inicial: int,
+    antecipacao: int,
+    km_atual: int,
+    hoje: date,
+    km_ultima: Optional[int] = None,
+    data_ultima: Optional[date] = None,
+    data_inicio: Optional[date] = None,
+) -> Optional[Dict]:
+    """
+    Próximo vencimento e status de um item (None para itens não controlados)
+
+    Status: ``vencida`` (restante <= 0), ``vencendo`` (restante dentro da
+    antecipação do item) ou ``em_dia``.
+    """
+    if not intervalo or intervalo <= 0:
+        return None
+
+    estado = {
+        "km_ultima_manutencao": km_ultima,
+        "data_ultima_manutencao": data_ultima,
+        "km_proxima_manutencao": None,
+        "data_proxima_manutencao": None,
+    }
+    if controle_por == "km":
+        base = km_inicial or 0
+        km_atual = km_atual or 0
+        if km_ultima is None and km_atual >= base:
+            km_ultima = base + ((km_atual - base) // intervalo) * intervalo
+            estado["km_ultima_manutencao"] = km_ultima
+        proxima = base if km_ultima is None else km_ultima + intervalo
+        estado["km_proxima_manutencao"] = proxima
+        restante = proxima - km_atual
+        limite = antecipacao or ANTECIPACAO_KM_PADRAO
+    elif controle_por == "dias":
+        ultima = data_ultima or data_inicio or hoje
+        proxima = ultima + timedelta(days=intervalo)
+        estado["data_proxima_manutencao"] = proxima
+        restante = (proxima - hoje).days
+        limite = antecipacao or ANTECIPACAO_DIAS_PADRAO
+    else:
+        return None
+
+    if restante <= 0:
+        estado["status"] = "vencida"
+    elif restante <= limite:
+        estado["status"] = "vencendo"
+    else:
+        estado["status"] = "em_dia"
+    return estado
+
+
+def _gravar(db: Session, linhas: list) -> None:
+    """INSERT ... ON CONFLICT (veiculo_id, plano_item_id) DO UPDATE do estado"""
+    if not linhas:
+        return
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+
+    stmt = insert(models.ManutencaoControle.__table__).values(linhas)
+    colunas = [c for c in linhas[0] if c not in ("veiculo_id", "plano_item_id")]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["veiculo_id", "plano_item_id"],
+        set_={coluna: stmt.excluded[coluna] for coluna in colunas},
+    )
+    db.execute(stmt)
+
+
+def _ultimas_execucoes(db: Session, veiculo_id: int, item_ids: list) -> Dict[int, Tuple[Optional[int], date]]:
+    """{plano_item_id: (km, data)} da execução mais recente registrada em manutencoes_historico"""
+    if not item_ids:
+        return {}
+    h = models.ManutencaoHistorico
+    linhas = (
+        db.query(h.plano_item_id, h.km_realizacao, h.data_realizacao)
+        .filter(h.veiculo_id == veiculo_id, h.plano_item_id.in_(item_ids), h.status == "concluida")
+        .order_by(h.data_realizacao, h.id)
+    )
+    return {item_id: (km, data) for item_id, km, data in linhas}
+
+
+def recalcular_veiculo(
+    db: Session,
+    veiculo_id: int,
+    hoje: Optional[date] = None,
+    realizadas: Optional[Dict[int, Tuple[Optional[int], date]]] = None,
+) -> int:
+    """
+    Recalcula o estado de todos os itens de plano vinculados ao veículo
+
+    ``realizadas``: {plano_item_id: (km, data)} de manutenções recém-feitas,
+    que passam a ser a última execução do item. Remove o estado de itens que
+    deixaram de estar vinculados. Retorna o número de itens gravados.
+    """
+    hoje = hoje or date.today()
+    realizadas = realizadas or {}
+    db.flush()
+
+    km_atual = (
+        db.query(models.Veiculo.km_atual).filter(models.Veiculo.id == veiculo_id).scalar()
+    ) or 0
+
+    i = models.PlanoManutencaoItem
+    vpm = models.VeiculoPlanoManutencao
+    mc = models.ManutencaoControle
+    itens = (
+        db.query(
+            i.id, i.controle_por, i.intervalo_valor, i.km_inicial, i.alerta_antecipacao,
+            vpm.data_inicio, mc.km_ultima_manutencao, mc.data_ultima_manutencao, mc.id,
+        )
+        .join(models.PlanoManutencao, models.PlanoManutencao.id == i.plano_id)
+        .join(vpm, vpm.plano_id == i.plano_id)
+        .outerjoin(mc, (mc.veiculo_id == vpm.veiculo_id) & (mc.plano_item_id == i.id))
+        .filter(
+            vpm.veiculo_id == veiculo_id,
+            vpm.ativo.is_(True),
+            models.PlanoManutencao.ativo.is_(True),
+            i.ativo.is_(True),
+        )
+        .all()
+    )
+    historico = _ultimas_execucoes(
+        db, veiculo_id, [item[0] for item in itens if item[-1] is None and item[0] not in realizadas]
+    )
+
+    agora = datetime.utcnow()
+    linhas = []
+    for (item_id, controle_por, intervalo, km_inicial, antecipacao,
+         data_inicio, km_ultima, data_ultima, controle_id) in itens:
+        if item_id in realizadas:
+            km_ultima, data_ultima = realizadas[item_id]
+        elif controle_id is None:
+            # Sem estado gravado: histórico do item ou, sem ele, inferência pelo intervalo
+            km_ultima, data_ultima = historico.get(item_id, (None, None))
+        estado = calcular_estado(
+            controle_por, intervalo, km_inicial, antecipacao, km_atual, hoje,
+            km_ultima=km_ultima, data_ultima=data_ultima, data_inicio=data_inicio,
+        )
+        if estado is None:
+            continue
+        linhas.append({"veiculo_id": veiculo_id, "plano_item_id": item_id, **estado, "atualizado_em": agora})
+
+    _gravar(db, linhas)
+
+    vinculados = [linha["plano_item_id"] for linha in linhas]
+    obsoletos = db.query(mc).filter(mc.veiculo_id == veiculo_id)
+    if vinculados:
+        obsoletos = obsoletos.filter(mc.plano_item_id.notin_(vinculados))
+    obsoletos.delete(synchronize_session=False)
+    return len(linhas)
+
+
+def _executar(db: Session, descricao: str, funcao, *args, **kwargs):
+    """Roda o motor em savepoint; falhas são registradas sem afetar o chamador"""
+    try:
+        with db.begin_nested():
+            return funcao(*args, **kwargs)
+    except Exception:
+        logger.exception("Erro ao %s", descricao)
+        return None
+
+
+def registrar_odometro(db: Session, veiculo_id: int) -> None:
+    """Evento de odômetro avançado (services/odometro): recalcula o veículo"""
+    _executar(db, f"recalcular o veículo {veiculo_id}", recalcular_veiculo, db, veiculo_id)
+
+
+def _manutencao(db: Session, ordem, plano_item_ids: Optional[Iterable[int]]) -> None:
+    veiculo_id = ordem.veiculo_id
+    km = ordem.odometro or db.query(models.Veiculo.km_atual).filter(models.Veiculo.id == veiculo_id).scalar()
+    realizada_em = ordem.data_conclusao or datetime.now()
+    realizada_em = realizada_em.date() if isinstance(realizada_em, datetime) else realizada_em
+
+    mc = models.ManutencaoControle
+    if plano_item_ids:
+        itens = [int(item_id) for item_id in plano_item_ids]
+    elif (ordem.tipo_servico or "").strip().lower().startswith("preventiva"):
+        # Preventiva sem itens informados: baixa os itens vencidos/vencendo do veículo
+        itens = [
+            item_id for (item_id,) in db.query(mc.plano_item_id)
+            .filter(mc.veiculo_id == veiculo_id, mc.status.in_(STATUS_PENDENTES))
+        ]
+    else:
+        itens = []
+
+    ja_registrados = {
+        item_id for (item_id,) in db.query(models.ManutencaoHistorico.plano_item_id)
+        .filter(models.ManutencaoHistorico.ordem_servico_id == ordem.id)
+    }
+    descricoes = dict(
+        db.query(models.PlanoManutencaoItem.id, models.PlanoManutencaoItem.descricao)
+        .filter(models.PlanoManutencaoItem.id.in_(itens))
+    ) if itens else {}
+
+    realizadas = {}
+    for item_id in itens:
+        if item_id not in descricoes:
+            continue
+        realizadas[item_id] = (km, realizada_em)
+        if item_id not in ja_registrados:
+            db.add(models.ManutencaoHistorico(
+                veiculo_id=veiculo_id,
+                plano_item_id=item_id,
+                ordem_servico_id=ordem.id,
+                descricao=descricoes[item_id],
+                tipo_manutencao="preventiva",
+                data_realizacao=realizada_em,
+                km_realizacao=km,
+                custo_total=ordem.valor_total or 0,
+            ))
+
+    try:
+        odometro.ingerir(
+            db, veiculo_id, ordem.odometro, "manutencao", ordem.id,
+            data_leitura=ordem.data_conclusao,
+        )
+    except odometro.LeituraRegressiva as e:
+        # OS fechada depois de leituras mais recentes: vale o odômetro atual
+        logger.warning("Leitura de odômetro da OS %s ignorada: %s", ordem.id, e)
+    recalcular_veiculo(db, veiculo_id, realizadas=realizadas)
+
+
+def registrar_manutencao(db: Session, ordem, plano_item_ids: Optional[Iterable[int]] = None) -> None:
+    """
+    Evento de ordem de serviço concluída
+
+    Os itens informados (ou, em OS preventiva sem itens, os itens vencidos e
+    vencendo do veículo) passam a ter a última execução no odômetro/data da
+    OS, com registro em manutencoes_historico.
+    """
+    _executar(db, f"registrar manutenção da OS {ordem.id}", _manutencao, db, ordem, plano_item_ids)
+
+
+def recalcular_plano(db: Session, plano_id: int) -> int:
+    """Recalcula os veículos vinculados a um plano (após alterar itens ou vínculos)"""
+    veiculo_ids = [
+        veiculo_id for (veiculo_id,) in db.query(models.VeiculoPlanoManutencao.veiculo_id)
+        .filter(models.VeiculoPlanoManutencao.plano_id == plano_id)
+    ]
+    for veiculo_id in veiculo_ids:
+        recalcular_veiculo(db, veiculo_id)
+    return len(veiculo_ids)
+
+
+def recalcular_todos(db: Session) -> int:
+    """Recalcula todos os veículos com plano vinculado (rotina diária)"""
+    veiculo_ids = [
+        veiculo_id for (veiculo_id,) in db.query(models.VeiculoPlanoManutencao.veiculo_id).distinct()
+    ]
+    for veiculo_id in veiculo_ids:
+        recalcular_veiculo(db, veiculo_id)
+    return len(veiculo_ids)
@@ -0,0 +1,134 @@
+# backend_fastapi/app/services/ocr_cache.py
+"""
+Cache de resultados do OCR de cupons, indexado pelo SHA-256 do arquivo
+
+Reenvios da mesma foto/PDF não passam de novo pelo Tesseract. O cache em
+memória é um LRU limitado (OCR_CACHE_SIZE); com OCR_CACHE_PERSIST=1 os
+resultados também são gravados em SQLite dentro de STORAGE_DIR e sobrevivem
+a reinícios. O número do cupom é indexado para sinalizar envios duplicados.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", "256"))
+OCR_CACHE_PERSIST = os.getenv("OCR_CACHE_PERSIST", "0").lower() in ("1", "true", "yes")
+OCR_CACHE_FILE = os.path.join(os.getenv("STORAGE_DIR", "./uploads"), "ocr_cache.sqlite3")
+
+_memoria: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_lock = threading.Lock()
+_schema_ok = False
+
+
+def chave(file_bytes: bytes) -> str:
+    """SHA-256 do conteúdo do arquivo"""
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def _conectar() -> Optional[sqlite3.Connection]:
+    global _schema_ok
+    if not OCR_CACHE_PERSIST:
+        return None
+    try:
+        os.makedirs(os.path.dirname(OCR_CACHE_FILE) or ".", exist_ok=True)
+        conn = sqlite3.connect(OCR_CACHE_FILE, timeout=5)
+        if not _schema_ok:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_resultados ("
+                " sha256 TEXT PRIMARY KEY, dados TEXT NOT NULL,"
+                " numero_cupom TEXT, criado_em TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_ocr_resultados_numero ON ocr_resultados (numero_cupom)")
+            conn.commit()
+            _schema_ok = True
+        return conn
+    except sqlite3.Error as e:
+        logger.warning(f"Cache OCR em disco indisponível: {e}")
+        return None
+
+
+def _lembrar(sha: str, dados: Dict[str, Any]) -> None:
+    with _lock:
+        _memoria[sha] = dados
+        _memoria.move_to_end(sha)
+        while len(_memoria) > OCR_CACHE_SIZE:
+            _memoria.popitem(last=False)
+
+
+def obter(sha: str) -> Optional[Dict[str, Any]]:
+    """Resultado já extraído para este arquivo (cópia), ou None"""
+    with _lock:
+        dados = _memoria.get(sha)
+        if dados is not None:
+            _memoria.move_to_end(sha)
+            return dict(dados)
+
+    conn = _conectar()
+    if conn is None:
+        return None
+    try:
+        row = conn.execute("SELECT dados FROM ocr_resultados WHERE sha256 = ?", (sha,)).fetchone()
+    except sqlite3.Error as e:
+        logger.warning(f"Erro ao ler cache OCR: {e}")
+        return None
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    dados = json.loads(row[0])
+    _lembrar(sha, dados)
+    return dict(dados)
+
+
+def guardar(sha: str, dados: Dict[str, Any]) -> None:
+    """Registra o resultado do OCR deste arquivo"""
+    _lembrar(sha, dict(dados))
+
+    conn = _conectar()
+    if conn is None:
+        return
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO ocr_resultados (sha256, dados, numero_cupom, criado_em) VALUES (?, ?, ?, ?)",
+            (sha, json.dumps(dados, default=str), dados.get("numero_cupom"), datetime.now().isoformat()),
+        )
+        conn.commit()
+    except sqlite3.Error as e:
+        logger.warning(f"Erro ao gravar cache OCR: {e}")
+    finally:
+        conn.close()
+
+
+def arquivos_com_numero(numero_cupom: Optional[str], exceto: Optional[str] = None) -> List[str]:
+    """Hashes de outros arquivos já lidos com o mesmo número de cupom"""
+    if not numero_cupom:
+        return []
+    with _lock:
+        encontrados = {sha for sha, dados in _memoria.items() if dados.get("numero_cupom") == numero_cupom}
+
+    conn = _conectar()
+    if conn is not None:
+        try:
+            rows = conn.execute("SELECT sha256 FROM ocr_resultados WHERE numero_cupom = ?", (numero_cupom,)).fetchall()
+            encontrados.update(r[0] for r in rows)
+        except sqlite3.Error as e:
+            logger.warning(f"Erro ao consultar cache OCR: {e}")
+        finally:
+            conn.close()
+
+    encontrados.discard(exceto)
+    return sorted(encontrados)
+
+
+def limpar() -> None:
+    """Esvazia o cache em memória"""
+    with _lock:
+        _memoria.clear()
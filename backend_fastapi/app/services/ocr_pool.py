@@ -0,0 +1,191 @@
+# backend_fastapi/app/services/ocr_pool.py
+"""
+Pool de processos para o OCR de cupons fiscais
+
+PIL + Tesseract são CPU-bound e bloqueariam o event loop; os cupons são
+processados em processos separados, com limite de fila e timeout por job.
+Os jobs ficam registrados por OCR_JOB_TTL segundos para consulta (submit/poll).
+
+Job que passa de OCR_TIMEOUT expira: deixa de contar na fila e é cancelado.
+Um processo do pool não pode ser interrompido isoladamente, então se o job
+já estava em execução (Tesseract travado) o pool é reciclado, o que também
+vale para um pool quebrado (worker que morreu).
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "2"))
+OCR_MAX_PENDING = int(os.getenv("OCR_MAX_PENDING", "8"))
+OCR_TIMEOUT = float(os.getenv("OCR_TIMEOUT", "60"))
+OCR_JOB_TTL = int(os.getenv("OCR_JOB_TTL", "600"))
+
+_executor: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+_jobs: Dict[str, Dict[str, Any]] = {}
+
+
+class FilaOcrCheia(Exception):
+    """Limite de jobs de OCR pendentes atingido"""
+
+
+def _extrair(file_bytes: bytes) -> Dict[str, Any]:
+    # Executado no processo filho
+    from app.services.cupom_extractor import extract_cupom_data
+    return extract_cupom_data(file_bytes)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=OCR_WORKERS)
+    return _executor
+
+
+def _reciclar_executor() -> None:
+    """Descarta o pool atual (travado ou quebrado); o próximo submit cria outro"""
+    global _executor
+    antigo, _executor = _executor, None
+    if antigo is None:
+        return
+    processos = list((getattr(antigo, "_processes", None) or {}).values())
+    antigo.shutdown(wait=False, cancel_futures=True)
+    for processo in processos:
+        if processo.is_alive():
+            processo.terminate()
+    logger.warning("Pool de OCR reciclado (%d processo(s) encerrado(s))", len(processos))
+
+
+def _ativo(job: Dict[str, Any]) -> bool:
+    return not job["future"].done() and not job["expirado"]
+
+
+def _expirar(agora: float) -> None:
+    """Expira jobs acima de OCR_TIMEOUT; recicla o pool se algum estiver em execução"""
+    travado = False
+    for job in _jobs.values():
+        if not _ativo(job) or agora - job["criado_em"] <= OCR_TIMEOUT:
+            continue
+        job["expirado"] = True
+        if not job["future"].cancel():
+            travado = True
+    if travado:
+        _reciclar_executor()
+
+
+def _limpar_expirados(agora: float) -> None:
+    _expirar(agora)
+    for job_id in [j for j, job in _jobs.items()
+                   if not _ativo(job) and agora - job["criado_em"] > OCR_JOB_TTL]:
+        del _jobs[job_id]
+
+
+def pendentes() -> int:
+    """Jobs ainda não concluídos (em execução ou na fila)"""
+    with _lock:
+        _expirar(time.time())
+        return sum(1 for job in _jobs.values() if _ativo(job))
+
+
+def _submeter(funcao: Callable, *args, chave: Optional[str] = None) -> str:
+    with _lock:
+        agora = time.time()
+        _limpar_expirados(agora)
+        if sum(1 for job in _jobs.values() if _ativo(job)) >= OCR_MAX_PENDING:
+            raise FilaOcrCheia(f"{OCR_MAX_PENDING} cupons já aguardam processamento")
+        job_id = uuid.uuid4().hex
+        try:
+            future = _get_executor().submit(funcao, *args)
+        except BrokenProcessPool:
+            # Worker morreu (ex.: falta de memória): recria o pool uma vez
+            _reciclar_executor()
+            future = _get_executor().submit(funcao, *args)
+        _jobs[job_id] = {"future": future, "criado_em": agora, "chave": chave, "expirado": False}
+    return job_id
+
+
+def submeter(file_bytes: bytes, chave: Optional[str] = None) -> str:
+    """Enfileira o OCR de um cupom e retorna o id do job (``chave``: hash do arquivo)"""
+    return _submeter(_extrair, file_bytes, chave=chave)
+
+
+def adicionar_callback(job_id: str, callback) -> None:
+    """Chama ``callback(dados)`` quando o job terminar com sucesso"""
+    future = _future(job_id)
+    if future is None:
+        return
+
+    def _concluido(f: Future) -> None:
+        if not f.cancelled() and f.exception() is None:
+            callback(f.result())
+
+    future.add_done_callback(_concluido)
+
+
+def _future(job_id: str) -> Optional[Future]:
+    with _lock:
+        job = _jobs.get(job_id)
+    return job["future"] if job else None
+
+
+async def aguardar(job_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Aguarda o resultado sem bloquear o event loop.
+
+    Levanta asyncio.TimeoutError após ``timeout`` (OCR_TIMEOUT por padrão).
+    Um timeout menor que OCR_TIMEOUT mantém o job para consulta posterior;
+    passado OCR_TIMEOUT o job expira (ver ``_expirar``).
+    """
+    future = _future(job_id)
+    if future is None:
+        raise KeyError(job_id)
+    try:
+        # shield: o timeout da requisição, por si só, não cancela o job no pool
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)),
+                                      timeout=timeout or OCR_TIMEOUT)
+    except asyncio.TimeoutError:
+        with _lock:
+            _expirar(time.time())
+        raise
+
+
+def consultar(job_id: str) -> Optional[Dict[str, Any]]:
+    """Situação do job: None se desconhecido/expirado"""
+    with _lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        return None
+
+    with _lock:
+        _expirar(time.time())
+
+    future = job["future"]
+    decorrido = time.time() - job["criado_em"]
+    if job["expirado"]:
+        return {"job_id": job_id, "status": "expirado", "decorrido_segundos": round(decorrido, 1)}
+    if not future.done():
+        status = "processando" if future.running() else "na_fila"
+        return {"job_id": job_id, "status": status, "decorrido_segundos": round(decorrido, 1)}
+
+    erro = future.exception()
+    if erro is not None:
+        return {"job_id": job_id, "status": "erro", "erro": str(erro)}
+    return {"job_id": job_id, "status": "concluido", "data": future.result(), "chave": job["chave"]}
+
+
+def encerrar() -> None:
+    """Finaliza o pool (shutdown da aplicação)"""
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+        _jobs.clear()
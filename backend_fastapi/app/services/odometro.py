@@ -0,0 +1,229 @@
+# backend_fastapi/app/services/odometro.py
+"""
+Ingestão de leituras de odômetro
+
+Toda leitura (checklist, abastecimento, ordem de serviço ou lançamento
+manual) passa por ``ingerir``: é anexada a historico_odometro com km
+anterior e diferença, leituras menores que a última são rejeitadas e
+``veiculos.km_atual`` avança junto com o cache da última leitura por
+veículo (odometro_atual: km, data, fonte e referência).
+
+Leitores usam esse estado em vez de varrer checklists: km atual em
+``veiculos.km_atual``/odometro_atual, km rodados em historico_odometro.
+"""
+import logging
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app import models
+
+logger = logging.getLogger(__name__)
+
+FONTES = ("checklist", "abastecimento", "manutencao", "manual")
+
+# Leitura semente da carga inicial (km do cadastro); não é um trecho rodado
+OBSERVACAO_CADASTRO = "Odômetro do cadastro"
+
+
+class LeituraRegressiva(Exception):
+    """Leitura menor que a última registrada para o veículo"""
+
+    def __init__(self, veiculo_id: int, km: int, km_anterior: int):
+        self.veiculo_id = veiculo_id
+        self.km = km
+        self.km_anterior = km_anterior
+        super().__init__(
+            f"Odômetro {km} menor que a última leitura ({km_anterior}) do veículo {veiculo_id}"
+        )
+
+
+def _atualizar_cache(db: Session, leitura: models.HistoricoOdometro) -> None:
+    """INSERT ... ON CONFLICT (veiculo_id) DO UPDATE da última leitura"""
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+
+    valores = {
+        "km": leitura.km_atual,
+        "data_leitura": leitura.data_leitura,
+        "fonte": leitura.fonte,
+        "referencia_id": leitura.referencia_id,
+        "historico_id": leitura.id,
+        "atualizado_em": datetime.utcnow(),
+    }
+    stmt = insert(models.OdometroAtual.__table__).values(veiculo_id=leitura.veiculo_id, **valores)
+    db.execute(stmt.on_conflict_do_update(index_elements=["veiculo_id"], set_=valores))
+
+
+def _avancar(db: Session, leitura: models.HistoricoOdometro) -> None:
+    """Leva veiculos.km_atual e o cache até a leitura (já adicionada à sessão)"""
+    db.flush()
+    db.execute(
+        update(models.Veiculo)
+        .where(models.Veiculo.id == leitura.veiculo_id)
+        .values(km_atual=leitura.km_atual)
+    )
+    _atualizar_cache(db, leitura)
+
+
+def ingerir(
+    db: Session,
+    veiculo_id: int,
+    km: Optional[int],
+    fonte: str,
+    referencia_id: Optional[int] = None,
+    data_leitura: Optional[datetime] = None,
+    observacoes: Optional[str] = None,
+    usuario_id: Optional[int] = None,
+) -> Optional[models.HistoricoOdometro]:
+    """
+    Registra uma leitura e avança o odômetro do veículo (sem commit)
+
+    Retorna a leitura gravada, ou None quando não há o que gravar (km vazio,
+    veículo inexistente ou km igual ao atual). Levanta LeituraRegressiva
+    para km menor que o atual.
+    """
+    if fonte not in FONTES:
+        raise ValueError(f"Fonte de odômetro inválida: {fonte}")
+    if km is None or km <= 0:
+        return None
+
+    consulta = db.query(models.Veiculo.km_atual).filter(models.Veiculo.id == veiculo_id)
+    if db.get_bind().dialect.name != "sqlite":
+        # Leituras simultâneas do mesmo veículo são serializadas
+        consulta = consulta.with_for_update()
+    atual = consulta.first()
+    if atual is None:
+        return None
+
+    km_anterior = atual[0] or 0
+    if km < km_anterior:
+        raise LeituraRegressiva(veiculo_id, km, km_anterior)
+    if km == km_anterior:
+        return None
+
+    leitura = models.HistoricoOdometro(
+        veiculo_id=veiculo_id,
+        km_atual=km,
+        km_anterior=km_anterior or None,
+        diferenca_km=(km - km_anterior) if km_anterior else None,
+        fonte=fonte,
+        referencia_id=referencia_id,
+        data_leitura=data_leitura or datetime.now(),
+        observacoes=observacoes,
+        registrado_por=usuario_id,
+    )
+    db.add(leitura)
+    _avancar(db, leitura)
+    return leitura
+
+
+def registrar_leitura(
+    db: Session,
+    veiculo_id: Optional[int],
+    km: Optional[int],
+    fonte: str,
+    referencia_id: Optional[int] = None,
+    estrito: bool = False,
+    **dados,
+) -> Optional[models.HistoricoOdometro]:
+    """
+    Evento de leitura de odômetro: ingere em savepoint e recalcula a manutenção
+
+    Sem ``estrito`` (leituras automáticas), regressões e falhas são
+    registradas no log e não afetam a operação do chamador; com ``estrito``
+    (lançamento manual) toda falha é propagada.
+    """
+    if not veiculo_id:
+        return None
+
+    leitura = None
+    try:
+        with db.begin_nested():
+            leitura = ingerir(db, veiculo_id, km, fonte, referencia_id, **dados)
+    except LeituraRegressiva as e:
+        if estrito:
+            raise
+        logger.warning("Leitura de odômetro ignorada (%s): %s", fonte, e)
+    except Exception:
+        if estrito:
+            raise
+        logger.exception("Erro ao registrar leitura de odômetro do veículo %s", veiculo_id)
+
+    if leitura is not None:
+        from app.services.manutencao_estado import registrar_odometro
+        registrar_odometro(db, veiculo_id)
+    return leitura
+
+
+def registrar_checklist(db: Session, checklist) -> None:
+    """Leituras de início e fim de um checklist finalizado"""
+    registrar_leitura(
+        db, checklist.veiculo_id, checklist.odometro_ini, "checklist", checklist.id,
+        data_leitura=checklist.dt_inicio,
+    )
+    registrar_leitura(
+        db, checklist.veiculo_id, checklist.odometro_fim, "checklist", checklist.id,
+        data_leitura=checklist.dt_fim,
+    )
+
+
+def carga_inicial(
+    db: Session,
+    veiculo_id: int,
+    leituras: Iterable[Tuple[int, datetime, str, Optional[int]]],
+) -> int:
+    """
+    Monta o histórico de um veículo que ainda não tem leituras
+
+    ``leituras``: (km, data, fonte, referencia_id) já registradas em
+    checklists, abastecimentos e OS. Em ordem cronológica, só entram as
+    leituras que avançam o odômetro; se o km do cadastro for maior que a
+    última, ele entra como leitura manual (OBSERVACAO_CADASTRO) para o
+    histórico fechar com ``veiculos.km_atual``. Essa leitura fica na data da
+    última leitura conhecida (ou do cadastro do veículo) e sem diferença de
+    km: a distância acumulada fora do histórico não é atribuída a nenhum
+    mês nem entra na média de km/dia. Retorna o número de leituras gravadas.
+    """
+    if db.query(models.HistoricoOdometro.id).filter(models.HistoricoOdometro.veiculo_id == veiculo_id).first():
+        return 0
+    km_cadastro, cadastrado_em = (
+        db.query(models.Veiculo.km_atual, models.Veiculo.criado_em)
+        .filter(models.Veiculo.id == veiculo_id)
+        .one()
+    )
+    km_cadastro = km_cadastro or 0
+
+    gravadas = 0
+    ultima = None
+    km_anterior = 0
+    for km, data_leitura, fonte, referencia_id in sorted(
+        (l for l in leituras if l[0] and l[1]), key=lambda l: (l[1], l[0])
+    ):
+        if km <= km_anterior:
+            continue
+        ultima = models.HistoricoOdometro(
+            veiculo_id=veiculo_id, km_atual=km, km_anterior=km_anterior or None,
+            diferenca_km=(km - km_anterior) if km_anterior else None,
+            fonte=fonte, referencia_id=referencia_id, data_leitura=data_leitura,
+        )
+        db.add(ultima)
+        km_anterior = km
+        gravadas += 1
+
+    if km_cadastro > km_anterior:
+        ultima = models.HistoricoOdometro(
+            veiculo_id=veiculo_id, km_atual=km_cadastro, km_anterior=km_anterior or None,
+            fonte="manual", observacoes=OBSERVACAO_CADASTRO,
+            data_leitura=ultima.data_leitura if ultima is not None else (cadastrado_em or datetime.now()),
+        )
+        db.add(ultima)
+        gravadas += 1
+
+    if ultima is not None:
+        _avancar(db, ultima)
+    return gravadas
@@ -0,0 +1,194 @@
+# backend_fastapi/app/services/resumos.py
+"""
+Resumos de abastecimentos e ordens de serviço calculados no banco
+
+Totais, médias, consumo por veículo e séries mensais saem de agregações SQL
+sobre as colunas NUMERIC, em vez de trazer todas as linhas para somar no
+cliente.
+
+Regra de consumo (única, usada também por ``analise_abastecimentos``): cada
+abastecimento fecha um trecho desde o anterior do mesmo veículo, em ordem
+cronológica ``(data_abastecimento, id)``; o consumo do trecho é km rodados /
+litros do abastecimento anterior e trechos fora de 0,5–50 km/L são
+descartados. O km/L de um conjunto de trechos é a razão de somas
+(Σ km / Σ litros), que pondera cada trecho pela distância.
+"""
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import Query, Session
+
+from app import models
+
+CONSUMO_MIN_KM_L = 0.5
+CONSUMO_MAX_KM_L = 50
+
+
+def mes(db: Session, coluna):
+    """Expressão 'AAAA-MM' da data conforme o dialeto"""
+    if db.get_bind().dialect.name == "sqlite":
+        return func.strftime("%Y-%m", coluna)
+    return func.to_char(coluna, "YYYY-MM")
+
+
+def trechos_abastecimento(db: Session, filtrar: Callable[[Query], Query], *colunas):
+    """
+    Subquery com um trecho por abastecimento: ``km`` desde o abastecimento
+    anterior do veículo e ``litros_anterior``/``valor_anterior`` dele
+    (``colunas`` extras entram no SELECT)
+    """
+    a = models.Abastecimento
+    janela = {"partition_by": a.veiculo_id, "order_by": (a.data_abastecimento, a.id)}
+    return filtrar(
+        db.query(
+            a.id.label("id"),
+            a.veiculo_id.label("veiculo_id"),
+            a.data_abastecimento.label("data_abastecimento"),
+            a.odometro.label("odometro"),
+            a.litros.label("litros"),
+            a.valor_total.label("valor_total"),
+            (a.odometro - func.lag(a.odometro).over(**janela)).label("km"),
+            func.lag(a.litros).over(**janela).label("litros_anterior"),
+            func.lag(a.valor_total).over(**janela).label("valor_anterior"),
+            *colunas,
+        )
+    ).subquery()
+
+
+def consumo_trecho(trechos):
+    """km/L de cada trecho"""
+    return trechos.c.km * 1.0 / trechos.c.litros_anterior
+
+
+def trecho_valido(trechos):
+    """Trechos que entram nas médias de consumo"""
+    return and_(
+        trechos.c.km > 0,
+        trechos.c.litros_anterior > 0,
+        consumo_trecho(trechos).between(CONSUMO_MIN_KM_L, CONSUMO_MAX_KM_L),
+    )
+
+
+def soma_km_litros(trechos):
+    """(Σ km, Σ litros) dos trechos válidos, para ``km_por_litro``"""
+    valido = trecho_valido(trechos)
+    return (
+        func.coalesce(func.sum(case((valido, trechos.c.km), else_=0)), 0),
+        func.coalesce(func.sum(case((valido, trechos.c.litros_anterior), else_=0)), 0),
+    )
+
+
+def km_por_litro(km, litros) -> Optional[float]:
+    """Razão de somas dos trechos válidos (None sem trechos)"""
+    km, litros = float(km or 0), float(litros or 0)
+    return km / litros if litros > 0 else None
+
+
+def resumo_abastecimentos(db: Session, filtrar: Callable[[Query], Query]) -> Dict[str, Any]:
+    """
+    Agrega os abastecimentos selecionados por ``filtrar`` (mesmos filtros da
+    listagem) em totais gerais, por veículo e por mês
+    """
+    a = models.Abastecimento
+
+    total, litros, valor = filtrar(
+        db.query(func.count(a.id), func.coalesce(func.sum(a.litros), 0), func.coalesce(func.sum(a.valor_total), 0))
+    ).one()
+    litros, valor = float(litros), float(valor)
+
+    # Consumo pelos trechos entre abastecimentos consecutivos de cada veículo
+    trechos = trechos_abastecimento(db, filtrar)
+    consumo_por_veiculo = {
+        veiculo_id: km_por_litro(km, litros)
+        for veiculo_id, km, litros in db.query(trechos.c.veiculo_id, *soma_km_litros(trechos))
+        .group_by(trechos.c.veiculo_id)
+        .all()
+    }
+    consumo_geral = km_por_litro(*db.query(*soma_km_litros(trechos)).one())
+
+    linhas_veiculo = (
+        filtrar(
+            db.query(
+                a.veiculo_id,
+                models.Veiculo.placa,
+                models.Veiculo.marca,
+                models.Veiculo.modelo,
+                func.count(a.id),
+                func.coalesce(func.sum(a.litros), 0),
+                func.coalesce(func.sum(a.valor_total), 0),
+            ).outerjoin(models.Veiculo, models.Veiculo.id == a.veiculo_id)
+        )
+        .group_by(a.veiculo_id, models.Veiculo.placa, models.Veiculo.marca, models.Veiculo.modelo)
+        .order_by(models.Veiculo.placa)
+        .all()
+    )
+    por_veiculo = [
+        {
+            "veiculo": {"id": veiculo_id, "placa": placa, "marca": marca, "modelo": modelo},
+            "total_abastecimentos": quantidade,
+            "total_litros": float(soma_litros),
+            "total_valor": float(soma_valor),
+            "consumo_medio": consumo_por_veiculo.get(veiculo_id) or 0,
+        }
+        for veiculo_id, placa, marca, modelo, quantidade, soma_litros, soma_valor in linhas_veiculo
+    ]
+
+    chave_mes = mes(db, a.data_abastecimento)
+    por_mes = [
+        {
+            "mes": chave,
+            "total_abastecimentos": quantidade,
+            "total_litros": float(soma_litros),
+            "total_valor": float(soma_valor),
+        }
+        for chave, quantidade, soma_litros, soma_valor in filtrar(
+            db.query(chave_mes, func.count(a.id), func.coalesce(func.sum(a.litros), 0), func.coalesce(func.sum(a.valor_total), 0))
+        )
+        .group_by(chave_mes)
+        .order_by(chave_mes)
+        .all()
+    ]
+
+    return {
+        "total_abastecimentos": total,
+        "total_litros": litros,
+        "total_valor": valor,
+        "media_preco_litro": valor / litros if litros > 0 else 0,
+        "consumo_medio_geral": consumo_geral or 0,
+        "por_veiculo": por_veiculo,
+        "por_mes": por_mes,
+    }
+
+
+def resumo_ordens_servico(db: Session) -> Dict[str, Any]:
+    """Contagem por status, valor total e série mensal das ordens de serviço"""
+    o = models.OrdemServico
+
+    por_status = dict(db.query(o.status, func.count(o.id)).group_by(o.status).all())
+    valor_total = db.query(func.coalesce(func.sum(o.valor_total), 0)).scalar()
+
+    chave_mes = mes(db, o.data_abertura)
+    concluida = func.sum(case((o.status == "Concluída", 1), else_=0))
+    mensal = (
+        db.query(chave_mes, func.count(o.id), concluida, func.coalesce(func.sum(o.valor_total), 0))
+        .group_by(chave_mes)
+        .order_by(chave_mes)
+        .all()
+    )
+
+    total = sum(por_status.values())
+    concluidas = por_status.get("Concluída", 0)
+    return {
+        "total_ordens": total,
+        "ordens_abertas": por_status.get("Aberta", 0),
+        "ordens_em_andamento": por_status.get("Em Andamento", 0),
+        "ordens_concluidas": concluidas,
+        "valor_total": float(valor_total),
+        "taxa_conclusao": (concluidas / total * 100) if total > 0 else 0,
+        "por_status": por_status,
+        "por_mes": [
+            {"mes": chave, "abertas": abertas, "concluidas": int(fechadas or 0), "valor": float(valor)}
+            for chave, abertas, fechadas, valor in mensal
+            if chave is not None
+        ],
+    }
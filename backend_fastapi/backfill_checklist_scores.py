@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Backfill do score e contadores persistidos em checklists
+
+Calcula score_aprovacao, itens_ok/nok/na, total_itens e tem_bloqueios para o
+histórico (checklists com total_itens nulo, ou todos com --todos), em lotes
+por id. Usa a mesma pontuação da API (app.services.checklist_scoring).
+
+Uso: python backfill_checklist_scores.py [--lote 500] [--todos]
+"""
+import argparse
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import update
+
+from app import models
+from app.core.database import SessionLocal
+from app.services.checklist_scoring import pontuar, valores_metricas
+from app.services.checklist_templates import obter_template
+
+
+def backfill(lote: int = 500, todos: bool = False) -> int:
+    """Recalcula as métricas em lotes e retorna quantos checklists foram atualizados"""
+    db = SessionLocal()
+    c = models.Checklist
+    r = models.ChecklistResposta
+    ultimo_id = 0
+    atualizados = 0
+    try:
+        while True:
+            query = db.query(c.id, c.modelo_id).filter(c.id > ultimo_id)
+            if not todos:
+                query = query.filter(c.total_itens.is_(None))
+            checklists = query.order_by(c.id).limit(lote).all()
+            if not checklists:
+                break
+            ultimo_id = checklists[-1].id
+
+            # Respostas do lote inteiro em uma consulta
+            respostas = {}
+            for linha in (
+                db.query(r.checklist_id, r.item_id, r.valor)
+                .filter(r.checklist_id.in_([ck.id for ck in checklists]))
+                .all()
+            ):
+                respostas.setdefault(linha.checklist_id, {})[linha.item_id] = linha
+
+            valores = []
+            for ck in checklists:
+                template = obter_template(db, ck.modelo_id)
+                pontuacao = pontuar(template.itens if template else (), respostas.get(ck.id, {}))
+                valores.append({"id": ck.id, **valores_metricas(pontuacao)})
+
+            db.execute(update(c), valores)
+            db.commit()
+            atualizados += len(valores)
+            print(f"Checklists atualizados: {atualizados} (último id {ultimo_id})")
+    except Exception as e:
+        db.rollback()
+        print(f"Erro no backfill das métricas de checklist: {e}")
+        raise
+    finally:
+        db.close()
+    return atualizados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill do score e contadores dos checklists")
+    parser.add_argument("--lote", type=int, default=500, help="Checklists por lote (padrão 500)")
+    parser.add_argument("--todos", action="store_true", help="Recalcular também os já calculados")
+    args = parser.parse_args()
+    total = backfill(args.lote, args.todos)
+    print(f"Backfill concluído: {total} checklists")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Recálculo do estado de manutenção preventiva (manutencoes_controle)
+
+Carga inicial e rotina diária: itens controlados por dias vencem com o
+passar do tempo, sem evento que dispare o recálculo. Com --odometro, antes
+de recalcular monta o histórico de odômetro (historico_odometro) dos
+veículos que ainda não o têm, a partir das leituras já registradas em
+checklists, abastecimentos e ordens de serviço (necessário na primeira
+carga).
+
+Uso: python recalcular_manutencoes.py [--odometro] [--veiculo ID]
+"""
+import argparse
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func
+
+from app import models
+from app.core.database import SessionLocal
+from app.services.manutencao_estado import recalcular_veiculo
+from app.services.odometro import carga_inicial
+
+
+def _leituras(db, veiculo_id):
+    """Leituras já registradas do veículo: (km, data, fonte, referencia_id)"""
+    c = models.Checklist
+    a = models.Abastecimento
+    os_ = models.OrdemServico
+    leituras = []
+    for checklist_id, km_ini, dt_inicio, km_fim, dt_fim in db.query(
+        c.id, c.odometro_ini, c.dt_inicio, c.odometro_fim, c.dt_fim
+    ).filter(c.veiculo_id == veiculo_id):
+        leituras.append((km_ini, dt_inicio, "checklist", checklist_id))
+        leituras.append((km_fim, dt_fim, "checklist", checklist_id))
+    leituras.extend(
+        (km, data, "abastecimento", abastecimento_id)
+        for abastecimento_id, km, data in db.query(a.id, a.odometro, a.data_abastecimento)
+        .filter(a.veiculo_id == veiculo_id)
+    )
+    leituras.extend(
+        (km, data, "manutencao", ordem_id)
+        for ordem_id, km, data in db.query(
+            os_.id, os_.odometro, func.coalesce(os_.data_conclusao, os_.data_abertura)
+        ).filter(os_.veiculo_id == veiculo_id)
+    )
+    return leituras
+
+
+def recalcular(odometro: bool = False, veiculo_id: int = None) -> int:
+    """Recalcula os veículos com plano vinculado (commit por veículo)"""
+    db = SessionLocal()
+    try:
+        if odometro:
+            lidas = 0
+            for (vid,) in db.query(models.Veiculo.id).all():
+                lidas += carga_inicial(db, vid, _leituras(db, vid))
+                db.commit()
+            print(f"Histórico de odômetro: {lidas} leituras carregadas")
+
+        if veiculo_id:
+            veiculo_ids = [veiculo_id]
+        else:
+            veiculo_ids = [
+                vid for (vid,) in db.query(models.VeiculoPlanoManutencao.veiculo_id).distinct().all()
+            ]
+
+        itens = 0
+        for vid in veiculo_ids:
+            itens += recalcular_veiculo(db, vid)
+            db.commit()
+        print(f"Estado de manutenção recalculado: {len(veiculo_ids)} veículos, {itens} itens")
+        return len(veiculo_ids)
+    except Exception as e:
+        db.rollback()
+        print(f"Erro ao recalcular estado de manutenção: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recálculo do estado de manutenção preventiva")
+    parser.add_argument("--odometro", action="store_true", help="Carregar o histórico de odômetro pelas leituras registradas")
+    parser.add_argument("--veiculo", type=int, help="Recalcular apenas um veículo")
+    args = parser.parse_args()
+    recalcular(args.odometro, args.veiculo)
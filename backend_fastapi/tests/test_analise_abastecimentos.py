@@ -0,0 +1,50 @@
+# backend_fastapi/tests/test_analise_abastecimentos.py
+"""
+Testes da análise de consumo de combustível (trechos via LAG)
+"""
+from datetime import datetime
+
+import pytest
+
+from app import models
+from app.services.analise_abastecimentos import analisar_abastecimentos
+
+
+def test_analise_consumo_custo_e_anomalias(db_session, veiculo_test):
+    motorista = models.Motorista(nome="Motorista Análise", ativo=True)
+    db_session.add(motorista)
+    db_session.flush()
+    for data, odometro in [
+        (datetime(2026, 8, 1), 10000),
+        (datetime(2026, 8, 10), 10400),
+        (datetime(2026, 8, 20), 10800),
+        (datetime(2026, 9, 1), 11200),
+        (datetime(2026, 9, 10), 11400),  # 2 km/L: abaixo da média do veículo
+        (datetime(2026, 9, 20), 11400),  # odômetro repetido
+    ]:
+        db_session.add(models.Abastecimento(
+            veiculo_id=veiculo_test.id, motorista_id=motorista.id, data_abastecimento=data, odometro=odometro,
+            litros=100.0, valor_litro=6.0, valor_total=600.0,
+        ))
+    db_session.commit()
+
+    dados = analisar_abastecimentos(
+        db_session, lambda q: q.filter(models.Abastecimento.veiculo_id == veiculo_test.id)
+    )
+
+    # Trechos válidos: 400 + 400 + 400 + 200 km sobre 4 x 100 L
+    assert dados["total_abastecimentos"] == 6
+    assert dados["km_rodados"] == pytest.approx(1400)
+    assert dados["km_por_litro"] == pytest.approx(3.5)
+    assert dados["custo_por_km"] == pytest.approx(2400 / 1400, abs=1e-4)
+    veiculo = dados["por_veiculo"][0]
+    assert veiculo["veiculo"]["placa"] == veiculo_test.placa
+    assert veiculo["km_por_litro"] == pytest.approx(3.5)
+    assert [(m["mes"], m["km_por_litro"]) for m in dados["por_mes"]] == [("2026-08", 4.0), ("2026-09", 3.0)]
+
+    assert dados["total_anomalias"] == 2
+    assert [(a["odometro"], a["motivo"]) for a in dados["anomalias"]] == [
+        (11400, "odometro_nao_avancou"),
+        (11400, "consumo_abaixo_da_media"),
+    ]
+    assert dados["anomalias"][1]["media_veiculo"] == pytest.approx(3.5)
@@ -0,0 +1,53 @@
+# backend_fastapi/tests/test_audit_log.py
+"""
+Testes do pipeline de auditoria (fila limitada e gravação em lote)
+"""
+import queue
+from datetime import datetime
+
+from app.services import audit_log
+
+
+def test_fila_cheia_descarta_e_conta(monkeypatch):
+    """Com a fila cheia o evento é descartado sem bloquear, e o descarte é contado"""
+    monkeypatch.setattr(audit_log, "_fila", queue.Queue(maxsize=2))
+    monkeypatch.setattr(audit_log, "_iniciar", lambda: None)
+    antes = audit_log.estatisticas()["descartados"]
+
+    resultados = [audit_log.registrar(1, {"url": f"/pagina/{i}"}) for i in range(3)]
+
+    assert resultados == [True, True, False]
+    assert audit_log.estatisticas()["descartados"] == antes + 1
+
+
+def test_lote_unico_insert(monkeypatch):
+    """Eventos pendentes são gravados juntos, com colunas truncadas aos limites da tabela"""
+    lotes = []
+    monkeypatch.setattr(audit_log, "_fila", queue.Queue())
+    monkeypatch.setattr(audit_log, "_iniciar", lambda: None)
+    monkeypatch.setattr(audit_log, "_gravar", lotes.append)
+
+    for i in range(5):
+        audit_log.registrar(1, {"url": "/x" * 400, "method": "GET", "ip": f"10.0.0.{i}"})
+    audit_log.descarregar()
+
+    assert len(lotes) == 1 and len(lotes[0]) == 5
+    assert len(lotes[0][0]["url_acessada"]) == 500
+
+
+def test_horario_e_sucesso_definidos_pelo_servidor(monkeypatch):
+    """O cliente não consegue retroagir o evento nem marcá-lo como falha"""
+    lotes = []
+    monkeypatch.setattr(audit_log, "_fila", queue.Queue())
+    monkeypatch.setattr(audit_log, "_iniciar", lambda: None)
+    monkeypatch.setattr(audit_log, "_gravar", lotes.append)
+
+    antes = datetime.now()
+    audit_log.registrar(1, {
+        "url": "/x", "timestamp": "2000-01-01T00:00:00", "sucesso": False, "motivo_falha": "forjado",
+    })
+    audit_log.descarregar()
+
+    linha = lotes[0][0]
+    assert linha["timestamp"] >= antes
+    assert linha["sucesso"] is True and linha["motivo_falha"] is None
@@ -0,0 +1,49 @@
+# backend_fastapi/tests/test_checklist_respostas_lote.py
+"""
+Testes do salvamento em lote das respostas (validação única + upsert)
+"""
+from app import models
+from app.routers.checklist import update_multiple_items
+
+
+def test_salvamento_em_lote_upsert(db_session, veiculo_test, checklist_modelo):
+    """Respostas existentes são atualizadas, novas inseridas e itens inválidos reportados"""
+    motorista = models.Motorista(nome="Motorista Lote", ativo=True)
+    db_session.add(motorista)
+    db_session.flush()
+    checklist = models.Checklist(
+        veiculo_id=veiculo_test.id,
+        motorista_id=motorista.id,
+        modelo_id=checklist_modelo.id,
+        tipo="pre",
+        status="em_andamento",
+    )
+    db_session.add(checklist)
+    db_session.commit()
+    freios, pneus = sorted(i.id for i in checklist_modelo.itens)
+
+    update_multiple_items(checklist.id, {"items": [{"item_id": freios, "valor": "nao_ok"}]}, db_session, None)
+    resultado = update_multiple_items(
+        checklist.id,
+        {"items": [
+            {"item_id": freios, "valor": "ok", "observacao": "corrigido"},
+            {"item_id": pneus, "valor": "ok"},
+            {"item_id": 999999, "valor": "ok"},
+            {"item_id": pneus, "valor": "talvez"},
+        ]},
+        db_session,
+        None,
+    )
+
+    assert resultado["saved_count"] == 2
+    assert [r["status"] for r in resultado["resultados"]] == ["salvo", "salvo", "erro", "erro"]
+    respostas = {
+        r.item_id: r
+        for r in db_session.query(models.ChecklistResposta).filter_by(checklist_id=checklist.id)
+    }
+    assert len(respostas) == 2
+    assert respostas[freios].valor == "ok" and respostas[freios].observacao == "corrigido"
+    # Métricas persistidas na linha do checklist (usadas por listagens e exportações)
+    db_session.refresh(checklist)
+    assert (checklist.itens_ok, checklist.itens_nok, checklist.total_itens) == (2, 0, 2)
+    assert checklist.score_aprovacao == 100 and checklist.tem_bloqueios is False
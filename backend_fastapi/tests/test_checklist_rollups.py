@@ -0,0 +1,107 @@
+# backend_fastapi/tests/test_checklist_rollups.py
+"""
+Testes dos agregados diários de checklist
+"""
+from datetime import date, datetime, timedelta
+
+from app import models
+from app.services.checklist_rollups import LinhaRollup, calcular_kpis, carregar_linhas, resumir, evolucao_diaria
+
+
+def test_resumir_combina_linhas():
+    """KPIs somam linhas do agregado e do intervalo ao vivo"""
+    linhas = [
+        LinhaRollup(None, 1, 10, "aprovado", 8, 8, 3, 1600.0),
+        LinhaRollup(None, 1, 11, "reprovado", 2, 2, 0, 400.0),
+        LinhaRollup(None, 2, 10, "pendente", 1, 0, 0, 0.0),
+    ]
+    resumo = resumir(linhas, dias=10)
+    assert resumo["total_checklists"] == 11
+    assert resumo["aprovados"] == 8
+    assert resumo["pendentes"] == 1
+    assert resumo["checklists_rapidos"] == 3
+    assert resumo["colaboradores_ativos"] == 2
+    assert resumo["duracao_media_segundos"] == 200.0
+    assert resumo["media_checklists_dia"] == 1.1
+
+
+def test_evolucao_preenche_dias_sem_checklist():
+    """Série diária tem um ponto por dia, inclusive dias vazios"""
+    hoje = date.today()
+    linhas = [LinhaRollup(hoje - timedelta(days=1), 1, 10, "aprovado", 3, 3, 0, 0.0)]
+    serie = evolucao_diaria(linhas, 7)
+    assert len(serie) == 7
+    assert serie[-2] == {"data": (hoje - timedelta(days=1)).isoformat(), "total": 3, "aprovados": 3, "reprovados": 0}
+    assert serie[-1]["total"] == 0
+
+
+def test_kpis_em_uma_consulta(db_session, veiculo_test, checklist_modelo):
+    """KPIs da página inicial calculados no banco sobre checklists semeados"""
+    motoristas = [models.Motorista(nome=f"Motorista KPI {n}", ativo=True) for n in (1, 2)]
+    db_session.add_all(motoristas)
+    db_session.flush()
+    agora = datetime.utcnow()
+
+    def checklist(motorista, status, duracao=None, dias_atras=1):
+        inicio = agora - timedelta(days=dias_atras)
+        db_session.add(models.Checklist(
+            veiculo_id=veiculo_test.id, motorista_id=motorista.id, modelo_id=checklist_modelo.id,
+            tipo="pre", status=status, dt_inicio=inicio,
+            dt_fim=inicio + timedelta(seconds=duracao) if duracao is not None else None,
+        ))
+
+    checklist(motoristas[0], "aprovado", 60)
+    checklist(motoristas[0], "aprovado", 240)
+    checklist(motoristas[1], "reprovado", 120)
+    checklist(motoristas[1], "pendente")
+    checklist(motoristas[1], "aprovado", 30, dias_atras=40)  # fora da janela
+    db_session.commit()
+
+    kpis = calcular_kpis(db_session, 30)
+    assert (kpis["total_checklists"], kpis["aprovados"], kpis["reprovados"], kpis["pendentes"]) == (4, 2, 1, 1)
+    assert kpis["taxa_aprovacao"] == 50.0
+    assert kpis["checklists_rapidos"] == 1
+    assert (kpis["colaboradores_ativos"], kpis["veiculos_inspecionados"]) == (2, 1)
+    assert kpis["duracao_media_segundos"] == 140.0
+    assert kpis["media_checklists_dia"] == round(4 / 30, 2)
+
+    assert calcular_kpis(db_session, 30, veiculo_id=veiculo_test.id + 1)["total_checklists"] == 0
+
+
+def test_dia_alterado_apos_etl_sai_ao_vivo(db_session, veiculo_test, checklist_modelo):
+    """Checklist de dia já agregado, editado depois do ETL, não fica defasado até a próxima execução"""
+    motorista = models.Motorista(nome="Motorista Rollup", ativo=True)
+    db_session.add(motorista)
+    db_session.flush()
+    agora = datetime.utcnow()
+    dia = (agora - timedelta(days=3)).date()
+    checklist = models.Checklist(
+        veiculo_id=veiculo_test.id, motorista_id=motorista.id, modelo_id=checklist_modelo.id,
+        tipo="pre", status="aguardando_aprovacao",
+        dt_inicio=datetime.combine(dia, datetime.min.time()) + timedelta(hours=10),
+        atualizado_em=agora - timedelta(days=3),
+    )
+    db_session.add_all([
+        checklist,
+        models.ChecklistRollupDiario(
+            dia=dia, veiculo_id=veiculo_test.id, motorista_id=motorista.id,
+            status="aguardando_aprovacao", total=1, finalizados=0, rapidos=0, duracao_total_segundos=0,
+        ),
+        models.EtlWatermark(job="checklist_rollup_diario", watermark=agora - timedelta(days=1)),
+    ])
+    db_session.commit()
+
+    def status_do_dia():
+        return [(l.status, l.total) for l in carregar_linhas(db_session, dias=7, por_dia=True) if l.dia == dia]
+
+    assert status_do_dia() == [("aguardando_aprovacao", 1)]
+
+    checklist.status = "aprovado"
+    db_session.commit()
+    assert status_do_dia() == [("aprovado", 1)]
+
+    # Exclusão marcada pelo trigger: o dia também deixa de vir do agregado
+    db_session.delete(checklist)
+    db_session.add(models.ChecklistRollupDiaPendente(dia=dia))
+    db_session.commit()
+    assert status_do_dia() == []
@@ -0,0 +1,38 @@
+# backend_fastapi/tests/test_checklist_scoring.py
+"""
+Testes da pontuação de checklists (uma passada pelos itens do modelo)
+"""
+from types import SimpleNamespace
+
+from app.services.checklist_scoring import pontuar
+
+
+def _item(item_id, categoria, bloqueia=False):
+    return {"id": item_id, "categoria": categoria, "bloqueia_viagem": bloqueia}
+
+
+def _resposta(item_id, valor):
+    return SimpleNamespace(item_id=item_id, valor=valor)
+
+
+def test_pontuacao_em_uma_passada():
+    itens = [_item(1, "freios", True), _item(2, "freios"), _item(3, "pneus", True), _item(4, "pneus")]
+    respostas = [
+        _resposta(1, "ok"),
+        _resposta(2, "nao_ok"),
+        _resposta(3, "nao_ok"),
+        _resposta(99, "ok"),  # item fora do modelo não conta
+    ]
+
+    p = pontuar(itens, respostas)
+
+    assert (p.itens_ok, p.itens_nok, p.itens_na, p.pendentes) == (1, 2, 0, 1)
+    assert p.score_aprovacao == 25.0
+    assert p.tem_bloqueios and p.itens_bloqueantes_nok == [3]
+    assert p.por_categoria["pneus"] == {"total": 2, "ok": 0, "nao_ok": 1, "na": 0, "pendentes": 1}
+    assert p.situacao == {1: "ok", 2: "nao_ok", 3: "nao_ok"}
+
+
+def test_modelo_sem_itens():
+    p = pontuar([], [])
+    assert p.score_aprovacao is None and p.percentual_conformidade == 0 and not p.tem_bloqueios
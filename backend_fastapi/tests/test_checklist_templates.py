@@ -0,0 +1,30 @@
+# backend_fastapi/tests/test_checklist_templates.py
+"""
+Testes do cache de templates de checklist (chave modelo/versão)
+"""
+from app import models
+from app.services import checklist_templates
+
+
+def test_template_em_cache_ate_nova_versao(db_session, checklist_modelo):
+    """O template é reaproveitado até uma alteração incrementar a versão do modelo"""
+    checklist_templates.invalidar()
+    modelo_id = checklist_modelo.id
+
+    template = checklist_templates.obter_template(db_session, modelo_id)
+    assert [i["ordem"] for i in template.itens] == [1, 2]
+    assert template.bloqueantes == template.ids
+    assert checklist_templates.obter_template(db_session, modelo_id) is template
+
+    db_session.add(models.ChecklistItem(
+        modelo_id=modelo_id, ordem=3, descricao="Buzina",
+        tipo_resposta="ok", severidade="baixa", bloqueia_viagem=False,
+    ))
+    checklist_templates.nova_versao(db_session, modelo_id)
+    db_session.commit()
+
+    atualizado = checklist_templates.obter_template(db_session, modelo_id)
+    assert atualizado.versao == template.versao + 1
+    assert len(atualizado.ids) == 3 and len(atualizado.bloqueantes) == 2
+    assert checklist_templates.etag_modelo(modelo_id, atualizado.versao) != \
+        checklist_templates.etag_modelo(modelo_id, template.versao)
@@ -0,0 +1,18 @@
+# backend_fastapi/tests/test_csv_export.py
+"""
+Testes da serialização CSV em blocos
+"""
+from datetime import datetime
+
+from app.services.csv_export import gerar_csv
+
+
+def test_gerar_csv_em_blocos():
+    """Cabeçalho no primeiro bloco, um bloco a cada ``lote`` linhas e valores formatados"""
+    linhas = [(i, datetime(2025, 1, 2, 8, 30), i % 2 == 0, None) for i in range(5)]
+    blocos = list(gerar_csv(["id", "data", "par", "obs"], linhas, lote=2))
+
+    assert len(blocos) == 3
+    assert blocos[0].splitlines()[0] == "id,data,par,obs"
+    assert blocos[0].splitlines()[1] == "0,02/01/2025 08:30,Sim,"
+    assert "".join(blocos).count("\n") == 6
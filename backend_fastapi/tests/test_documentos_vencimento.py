@@ -0,0 +1,55 @@
+# backend_fastapi/tests/test_documentos_vencimento.py
+"""
+Testes da consulta de documentos e CNHs vencendo
+"""
+from datetime import date, datetime, timedelta
+
+from app import models
+from app.services.documentos_vencimento import listar_vencendo
+
+HOJE = date(2026, 10, 17)
+
+
+def _documento(db_session, codigo, entidade_tipo, entidade_id, dias, **dados):
+    documento = models.Documento(
+        codigo=codigo, entidade_tipo=entidade_tipo, entidade_id=entidade_id,
+        tipo_documento=dados.pop("tipo_documento", "crlv"),
+        data_vencimento=HOJE + timedelta(days=dias), **dados,
+    )
+    db_session.add(documento)
+    return documento
+
+
+def test_vencimentos_na_janela_de_cada_documento(db_session, veiculo_test):
+    motorista = models.Motorista(nome="Motorista CNH", ativo=True, validade_cnh=datetime(2026, 11, 1))
+    sem_documento = models.Motorista(nome="Motorista Sem Doc", ativo=True, validade_cnh=datetime(2026, 10, 10))
+    inativo = models.Motorista(nome="Motorista Inativo", ativo=False, validade_cnh=datetime(2026, 10, 20))
+    db_session.add_all([motorista, sem_documento, inativo])
+    db_session.flush()
+
+    crlv = _documento(db_session, "DOC-1", "veiculo", veiculo_test.id, 10)
+    _documento(db_session, "DOC-2", "veiculo", veiculo_test.id, 40)  # fora dos 30 dias
+    seguro = _documento(db_session, "DOC-3", "veiculo", veiculo_test.id, 80, tipo_documento="seguro", dias_alerta=90)
+    _documento(db_session, "DOC-4", "veiculo", veiculo_test.id, 5, status="renovado")
+    _documento(db_session, "DOC-5", "veiculo", veiculo_test.id, 5, alerta_vencimento=False)
+    cnh = _documento(db_session, "DOC-6", "motorista", motorista.id, 15, tipo_documento="cnh")
+    db_session.commit()
+
+    total, itens = listar_vencendo(db_session, hoje=HOJE)
+    assert total == 4
+    # CNH do cadastro só entra para quem não tem documento 'cnh'
+    assert [(i["origem"], i["documento_id"] or i["entidade_id"]) for i in itens] == [
+        ("cnh_motorista", sem_documento.id),
+        ("documento", crlv.id),
+        ("documento", cnh.id),
+        ("documento", seguro.id),
+    ]
+    assert itens[0]["situacao"] == "vencido" and itens[0]["dias_restantes"] == -7
+    assert itens[1]["entidade_nome"] == veiculo_test.placa
+    assert itens[2]["entidade_nome"] == "Motorista CNH"
+
+    total, itens = listar_vencendo(db_session, hoje=HOJE, incluir_vencidos=False, entidade_tipo="veiculo")
+    assert total == 2 and [i["documento_id"] for i in itens] == [crlv.id, seguro.id]
+
+    total, itens = listar_vencendo(db_session, page=2, per_page=3, hoje=HOJE)
+    assert total == 4 and [i["documento_id"] for i in itens] == [seguro.id]
@@ -0,0 +1,164 @@
+# backend_fastapi/tests/test_indices_consultas.py
+"""
+Testes dos índices compostos das listagens (plano de execução)
+
+As funções dos endpoints rodam sobre dados semeados (com ANALYZE); cada
+SELECT que elas executam é capturado e passa por EXPLAIN QUERY PLAN, que
+deve usar o índice correspondente em vez de varrer a tabela e ordenar em
+memória.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert
+
+from app import api_v1, models
+from app.routers import checklist as checklist_router
+
+VEICULOS = 20
+CHECKLISTS_POR_VEICULO = 50
+STATUS = ("aprovado", "reprovado", "em_andamento", "aguardando_aprovacao", "pendente")
+
+
+@pytest.fixture
+def dados(db_session, checklist_modelo, monkeypatch):
+    monkeypatch.setattr(api_v1, "is_database_available", lambda: True)
+    motorista = models.Motorista(nome="Motorista Índices", ativo=True)
+    veiculos = [models.Veiculo(placa=f"IDX{n:04d}", km_atual=0, ativo=True) for n in range(VEICULOS)]
+    db_session.add(motorista)
+    db_session.add_all(veiculos)
+    db_session.flush()
+
+    base = datetime(2026, 1, 1)
+    checklists, abastecimentos, ordens = [], [], []
+    for v, veiculo in enumerate(veiculos):
+        for n in range(CHECKLISTS_POR_VEICULO):
+            momento = base + timedelta(hours=v * CHECKLISTS_POR_VEICULO + n)
+            checklists.append({
+                "veiculo_id": veiculo.id, "motorista_id": motorista.id, "modelo_id": checklist_modelo.id,
+                "tipo": "pre", "status": STATUS[n % len(STATUS)], "dt_inicio": momento,
+                "atualizado_em": momento,
+            })
+            abastecimentos.append({
+                "veiculo_id": veiculo.id, "motorista_id": motorista.id, "data_abastecimento": momento,
+                "odometro": 1000 * n, "litros": 100, "valor_litro": 6, "valor_total": 600,
+            })
+            ordens.append({
+                "veiculo_id": veiculo.id, "tipo_servico": "Preventiva", "status": "Aberta",
+                "data_abertura": momento,
+            })
+    db_session.execute(insert(models.Checklist), checklists)
+    db_session.execute(insert(models.Abastecimento), abastecimentos)
+    db_session.execute(insert(models.OrdemServico), ordens)
+
+    checklist_ids = [id_ for (id_,) in db_session.query(models.Checklist.id)]
+    db_session.execute(insert(models.ChecklistResposta), [
+        {"checklist_id": checklist_id, "item_id": item.id, "valor": "ok"}
+        for checklist_id in checklist_ids
+        for item in checklist_modelo.itens
+    ])
+    db_session.commit()
+    db_session.connection().exec_driver_sql("ANALYZE")
+    return {"veiculo_id": veiculos[7].id, "checklist_id": checklist_ids[123]}
+
+
+def _planos(db_session, tabela, chamar):
+    """Executa ``chamar`` e devolve o plano de cada SELECT em ``tabela`` que ela rodou"""
+    conexao = db_session.connection()
+    consultas = []
+
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and f"FROM {tabela}" in statement:
+            consultas.append((statement, parameters))
+
+    event.listen(conexao, "before_cursor_execute", capturar)
+    try:
+        chamar()
+    finally:
+        event.remove(conexao, "before_cursor_execute", capturar)
+
+    planos = []
+    for statement, parameters in consultas:
+        linhas = conexao.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+        planos.append(" | ".join(str(linha[-1]) for linha in linhas))
+    assert planos, f"nenhuma consulta em {tabela}"
+    return planos
+
+
+def _listar_checklists(db, **filtros):
+    argumentos = dict(
+        page=1, per_page=12, veiculo_id=None, motorista_id=None, status=None, tipo=None,
+        data_inicio=None, data_fim=None, limit=None, offset=None, cursor=None, total_mode="none",
+    )
+    argumentos.update(filtros)
+    return api_v1.list_checklists(db=db, **argumentos)
+
+
+def test_listagem_de_checklists_por_veiculo(db_session, dados):
+    veiculo_id = dados["veiculo_id"]
+    resposta = _listar_checklists(db_session, veiculo_id=veiculo_id, cursor="")
+    assert len(resposta["checklists"]) == 12
+
+    proxima = resposta["pagination"]["next_cursor"]
+    planos = _planos(db_session, "checklists", lambda: _listar_checklists(
+        db_session, veiculo_id=veiculo_id, cursor=proxima,
+    ))
+    for plano in planos:
+        assert "ix_checklists_veiculo_dt_inicio" in plano, plano
+        assert "TEMP B-TREE" not in plano, plano
+
+
+def test_listagem_de_checklists_por_status(db_session, dados):
+    planos = _planos(db_session, "checklists", lambda: _listar_checklists(
+        db_session, status="reprovado", total_mode="exact",
+    ))
+    assert all("ix_checklists_status_dt_inicio" in plano for plano in planos), planos
+    assert all("TEMP B-TREE" not in plano for plano in planos), planos
+
+
+def test_fila_de_aprovacao(db_session, dados):
+    pendentes = []
+    planos = _planos(db_session, "checklists", lambda: pendentes.extend(
+        checklist_router.get_pending_checklists(db=db_session, current_user=None)
+    ))
+    assert len(pendentes) == VEICULOS * CHECKLISTS_POR_VEICULO // len(STATUS)
+    # Parcial ou composto por status: os dois evitam varrer e ordenar a tabela
+    assert any(
+        nome in planos[0] for nome in ("ix_checklists_aguardando_aprovacao", "ix_checklists_status_dt_inicio")
+    ), planos[0]
+    assert "TEMP B-TREE" not in planos[0], planos[0]
+
+
+def test_respostas_do_checklist(db_session, dados):
+    """Respostas de um checklist pela restrição única (checklist_id, item_id)"""
+    detalhe = {}
+    planos = _planos(db_session, "checklist_respostas", lambda: detalhe.update(
+        checklist_router.get_checklist(dados["checklist_id"], db=db_session, current_user=None)
+    ))
+    assert detalhe["id"] == dados["checklist_id"]
+    for plano in planos:
+        assert "SCAN checklist_respostas" not in plano, plano
+        assert "INDEX" in plano, plano
+
+
+def test_listagem_de_abastecimentos_por_veiculo(db_session, dados):
+    abastecimentos = []
+    planos = _planos(db_session, "abastecimentos", lambda: abastecimentos.extend(api_v1.list_abastecimentos(
+        skip=0, limit=100, veiculo_id=dados["veiculo_id"], motorista_id=None,
+        data_inicio=None, data_fim=None, db=db_session,
+    )))
+    assert len(abastecimentos) == CHECKLISTS_POR_VEICULO
+    assert "ix_abastecimentos_veiculo_data" in planos[0], planos[0]
+    assert "TEMP B-TREE" not in planos[0], planos[0]
+
+
+def test_listagem_de_ordens_de_servico_por_veiculo(db_session, dados):
+    ordens = []
+    planos = _planos(db_session, "ordens_servico", lambda: ordens.extend(api_v1.list_ordens_servico(
+        skip=0, limit=100, veiculo_id=dados["veiculo_id"], status=None, tipo_servico=None,
+        data_inicio=None, data_fim=None, db=db_session,
+    )))
+    assert len(ordens) == CHECKLISTS_POR_VEICULO
+    listagem = [plano for plano in planos if "ix_ordens_servico_veiculo_abertura" in plano]
+    assert listagem, planos
+    assert all("TEMP B-TREE" not in plano for plano in listagem), listagem
@@ -31,4 +31,35 @@ def test_openapi_endpoint(client):
     assert response.status_code == 200
     data = response.json()
     assert "info" in data
-    assert "paths" in data
\ No newline at end of file
+    assert "paths" in data
+
+
+def test_dashboard_kpis_endpoint(client, db_session, veiculo_test, checklist_modelo, monkeypatch):
+    """KPIs do dashboard calculados sobre checklists gravados"""
+    from datetime import datetime, timedelta
+    from app import api_v1
+    from app.models import Checklist, Motorista
+
+    monkeypatch.setattr(api_v1, "is_database_available", lambda: True)
+    motorista = Motorista(nome="Motorista KPI", ativo=True)
+    db_session.add(motorista)
+    db_session.flush()
+    inicio = datetime.utcnow() - timedelta(days=1)
+    for status, duracao in (("aprovado", 60), ("reprovado", 300)):
+        db_session.add(Checklist(
+            veiculo_id=veiculo_test.id, motorista_id=motorista.id,
+            modelo_id=checklist_modelo.id, tipo="pre", status=status,
+            dt_inicio=inicio, dt_fim=inicio + timedelta(seconds=duracao),
+        ))
+    db_session.commit()
+
+    response = client.get("/api/v1/dashboard/kpis", params={"dias": 7})
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["total_checklists"], data["aprovados"], data["reprovados"]) == (2, 1, 1)
+    assert data["taxa_aprovacao"] == 50.0
+    assert data["checklists_rapidos"] == 1
+    assert data["colaboradores_ativos"] == 1
+    assert data["duracao_media_segundos"] == 180.0
+    assert data["media_checklists_dia"] == round(2 / 7, 2)
+    assert len(data["evolucao_semanal"]) == 7
@@ -0,0 +1,72 @@
+# backend_fastapi/tests/test_maintenance_alerts.py
+"""
+Testes da formatação dos alertas de manutenção do dashboard
+(flask_dashboard/app/maintenance_alerts.py lê o estado gravado pela API)
+"""
+import importlib.util
+import os
+from datetime import datetime
+
+CAMINHO = os.path.join(
+    os.path.dirname(__file__), "..", "..", "flask_dashboard", "app", "maintenance_alerts.py"
+)
+_spec = importlib.util.spec_from_file_location("maintenance_alerts", CAMINHO)
+maintenance_alerts = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(maintenance_alerts)
+
+
+class _Cursor:
+    description = [("status",)]
+
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.params = None
+
+    def execute(self, sql, params=None):
+        self.params = params
+
+    def fetchall(self):
+        return self.linhas
+
+    def close(self):
+        pass
+
+
+class _Conexao:
+    def __init__(self, linhas=()):
+        self.cursor_ = _Cursor(list(linhas))
+
+    def cursor(self):
+        return self.cursor_
+
+
+def _linha(item_id, status, km_proxima):
+    return {
+        "plano_id": 1, "plano": "Plano", "item_id": item_id, "item": f"Item {item_id}",
+        "controle_por": "km", "veiculo_id": 1, "placa": "ABC1234", "km_atual": 10000,
+        "km_proxima_manutencao": km_proxima, "data_proxima_manutencao": None,
+        "status": status, "km_por_dia": 50,
+    }
+
+
+def test_pagina_de_alertas_inclui_vencidas():
+    """Itens vencidos aparecem na página de alertas junto com os urgentes"""
+    conexao = _Conexao()
+    maintenance_alerts.carregar_estado(conexao, status=maintenance_alerts.STATUS_ALERTAS)
+    assert sorted(conexao.cursor_.params[0]) == ["vencendo", "vencida"]
+
+    alertas = maintenance_alerts.calcular_alertas(
+        [_linha(1, "vencida", 9000), _linha(2, "vencendo", 10500), _linha(3, "em_dia", 20000)],
+        now=datetime(2026, 10, 17),
+    )
+    na_pagina = [a["item_id"] for a in alertas if a["status"] in maintenance_alerts.STATUS_ALERTAS]
+    previstos = [a["item_id"] for a in alertas if a["status"] in maintenance_alerts.STATUS_PREVISAO]
+    assert (na_pagina, previstos) == ([1, 2], [3])
+
+
+def test_veiculo_parado_nao_usa_media_padrao():
+    """km/dia 0 é uma média válida: sem previsão de data, e não os 100 km/dia padrão"""
+    parado = {**_linha(1, "em_dia", 12000), "km_por_dia": 0}
+    sem_media = {**_linha(2, "em_dia", 12000), "km_por_dia": None}
+    alertas = maintenance_alerts.calcular_alertas([parado, sem_media], now=datetime(2026, 10, 17))
+    assert [(a["km_por_dia"], a["previsao"]) for a in alertas] == [(0, "-"), (100, "06/11/2026")]
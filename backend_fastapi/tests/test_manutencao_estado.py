@@ -0,0 +1,106 @@
+# backend_fastapi/tests/test_manutencao_estado.py
+"""
+Testes do motor de estado da manutenção preventiva (manutencoes_controle)
+"""
+from datetime import date, datetime, timedelta
+
+from app import models
+from app.services import manutencao_estado, odometro
+
+
+def _plano(db_session, veiculo):
+    plano = models.PlanoManutencao(codigo="PLAN-TESTE", descricao="Plano teste", ativo=True)
+    db_session.add(plano)
+    db_session.flush()
+    por_km = models.PlanoManutencaoItem(
+        plano_id=plano.id, descricao="Troca de óleo", controle_por="km", intervalo_valor=10000, ordem=1,
+    )
+    por_dias = models.PlanoManutencaoItem(
+        plano_id=plano.id, descricao="Inspeção", controle_por="dias", intervalo_valor=30, ordem=2,
+    )
+    por_horas = models.PlanoManutencaoItem(
+        plano_id=plano.id, descricao="Bomba", controle_por="horas", intervalo_valor=500, ordem=3,
+    )
+    db_session.add_all([por_km, por_dias, por_horas])
+    db_session.add(models.VeiculoPlanoManutencao(
+        veiculo_id=veiculo.id, plano_id=plano.id, data_inicio=date.today() - timedelta(days=20),
+    ))
+    db_session.commit()
+    return por_km, por_dias
+
+
+def _estado(db_session, veiculo_id, item_id):
+    return (
+        db_session.query(models.ManutencaoControle)
+        .filter_by(veiculo_id=veiculo_id, plano_item_id=item_id)
+        .populate_existing()
+        .one()
+    )
+
+
+def test_estado_atualizado_por_eventos(db_session, veiculo_test):
+    """Leituras avançam o estado sem recomeçar o ciclo; OS preventiva dá baixa no item"""
+    veiculo_test.km_atual = 100000
+    db_session.commit()
+    por_km, por_dias = _plano(db_session, veiculo_test)
+
+    odometro.registrar_leitura(db_session, veiculo_test.id, 106000, "checklist")
+    db_session.commit()
+    estado = _estado(db_session, veiculo_test.id, por_km.id)
+    assert (estado.km_ultima_manutencao, estado.km_proxima_manutencao, estado.status) == (100000, 110000, "vencendo")
+    assert _estado(db_session, veiculo_test.id, por_dias.id).status == "vencendo"
+    assert db_session.query(models.ManutencaoControle).count() == 2  # itens por horas não são controlados
+
+    # Leitura menor não regride o odômetro; passar do vencimento não reinicia o ciclo
+    odometro.registrar_leitura(db_session, veiculo_test.id, 105000, "checklist")
+    odometro.registrar_leitura(db_session, veiculo_test.id, 111000, "checklist")
+    db_session.commit()
+    db_session.refresh(veiculo_test)
+    assert veiculo_test.km_atual == 111000
+    estado = _estado(db_session, veiculo_test.id, por_km.id)
+    assert (estado.km_proxima_manutencao, estado.status) == (110000, "vencida")
+
+    ordem = models.OrdemServico(
+        veiculo_id=veiculo_test.id, tipo_servico="Preventiva", status="Concluída",
+        odometro=111500, data_conclusao=datetime(2026, 10, 1), valor_total=350.0,
+    )
+    db_session.add(ordem)
+    db_session.flush()
+    manutencao_estado.registrar_manutencao(db_session, ordem)
+    db_session.commit()
+
+    estado = _estado(db_session, veiculo_test.id, por_km.id)
+    assert (estado.km_ultima_manutencao, estado.km_proxima_manutencao, estado.status) == (111500, 121500, "em_dia")
+    historico = db_session.query(models.ManutencaoHistorico).filter_by(ordem_servico_id=ordem.id).all()
+    assert {h.plano_item_id for h in historico} == {por_km.id, por_dias.id}
+    assert _estado(db_session, veiculo_test.id, por_dias.id).data_ultima_manutencao == date(2026, 10, 1)
+
+
+def test_edicao_do_plano_preserva_ultima_execucao(db_session, veiculo_test):
+    """Editar o plano não esquece manutenções feitas; sem estado gravado, vale o histórico"""
+    veiculo_test.km_atual = 112000
+    db_session.commit()
+    por_km, _ = _plano(db_session, veiculo_test)
+    ordem = models.OrdemServico(
+        veiculo_id=veiculo_test.id, tipo_servico="Preventiva", status="Concluída",
+        odometro=111500, data_conclusao=datetime(2026, 10, 1), valor_total=350.0,
+    )
+    db_session.add(ordem)
+    db_session.flush()
+    manutencao_estado.registrar_manutencao(db_session, ordem, [por_km.id])
+    db_session.commit()
+
+    # Edição do plano (dashboard): o item é atualizado no lugar e o plano recalculado
+    por_km.intervalo_valor = 15000
+    manutencao_estado.recalcular_plano(db_session, por_km.plano_id)
+    db_session.commit()
+    estado = _estado(db_session, veiculo_test.id, por_km.id)
+    assert (estado.km_ultima_manutencao, estado.km_proxima_manutencao, estado.status) == (111500, 126500, "em_dia")
+
+    # Estado perdido (ex.: itens recriados antes da correção): a última execução vem do histórico
+    db_session.query(models.ManutencaoControle).delete()
+    manutencao_estado.recalcular_veiculo(db_session, veiculo_test.id)
+    db_session.commit()
+    estado = _estado(db_session, veiculo_test.id, por_km.id)
+    assert (estado.km_ultima_manutencao, estado.data_ultima_manutencao) == (111500, date(2026, 10, 1))
+    assert estado.km_proxima_manutencao == 126500
@@ -0,0 +1,70 @@
+# backend_fastapi/tests/test_ocr_pool.py
+"""
+Testes do pool de OCR de cupons (limite de fila e consulta de jobs)
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.services import ocr_pool
+
+
+def test_fila_cheia_recusa_novos_jobs(monkeypatch):
+    """Com a fila no limite, novos cupons são recusados"""
+    monkeypatch.setattr(ocr_pool, "OCR_MAX_PENDING", 0)
+    with pytest.raises(ocr_pool.FilaOcrCheia):
+        ocr_pool.submeter(b"cupom")
+
+
+def test_job_com_erro_fica_consultavel():
+    """Falha no OCR é devolvida na consulta do job, sem derrubar o pool"""
+    job_id = ocr_pool.submeter(b"nao e uma imagem")
+    with pytest.raises(Exception):
+        asyncio.run(ocr_pool.aguardar(job_id, timeout=30))
+    assert ocr_pool.consultar(job_id)["status"] == "erro"
+    assert ocr_pool.consultar("inexistente") is None
+    ocr_pool.encerrar()
+
+
+def test_job_travado_expira_e_libera_a_fila(monkeypatch):
+    """Job acima do timeout sai da fila e o pool travado é reciclado"""
+    ocr_pool.encerrar()
+    monkeypatch.setattr(ocr_pool, "OCR_WORKERS", 1)
+    monkeypatch.setattr(ocr_pool, "OCR_MAX_PENDING", 1)
+    monkeypatch.setattr(ocr_pool, "OCR_TIMEOUT", 0.5)
+
+    travado = ocr_pool._submeter(time.sleep, 60)
+    with pytest.raises(ocr_pool.FilaOcrCheia):
+        ocr_pool._submeter(time.sleep, 0)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(ocr_pool.aguardar(travado))
+    assert ocr_pool.consultar(travado)["status"] == "expirado"
+    assert ocr_pool.pendentes() == 0
+
+    # Novo pool atende os próximos jobs
+    novo = ocr_pool._submeter(time.sleep, 0)
+    assert asyncio.run(ocr_pool.aguardar(novo, timeout=30)) is None
+    assert ocr_pool.consultar(novo)["status"] == "concluido"
+    ocr_pool.encerrar()
+
+
+def test_cache_ocr_por_conteudo(monkeypatch):
+    """Mesmo arquivo reaproveita o resultado; mesmo número de cupom é sinalizado"""
+    from app.services import ocr_cache
+
+    monkeypatch.setattr(ocr_cache, "OCR_CACHE_PERSIST", False)
+    monkeypatch.setattr(ocr_cache, "OCR_CACHE_SIZE", 2)
+    ocr_cache.limpar()
+
+    a, b, c = (ocr_cache.chave(x) for x in (b"foto-a", b"foto-b", b"foto-c"))
+    ocr_cache.guardar(a, {"numero_cupom": "000123", "litros": 40.0})
+    ocr_cache.guardar(b, {"numero_cupom": "000123"})
+    assert ocr_cache.obter(a)["litros"] == 40.0
+    assert ocr_cache.arquivos_com_numero("000123", exceto=a) == [b]
+
+    # LRU: "b" é o menos usado e sai ao inserir "c"
+    ocr_cache.guardar(c, {"numero_cupom": None})
+    assert ocr_cache.obter(b) is None
+    assert ocr_cache.obter(a) is not None
@@ -0,0 +1,63 @@
+# backend_fastapi/tests/test_odometro.py
+"""
+Testes da ingestão de leituras de odômetro (historico_odometro + cache)
+"""
+from datetime import datetime
+
+import pytest
+
+from app import models
+from app.services import odometro
+
+
+def test_leituras_avancam_e_regressao_rejeitada(db_session, veiculo_test):
+    veiculo_test.km_atual = 50000
+    db_session.commit()
+
+    odometro.registrar_leitura(db_session, veiculo_test.id, 50400, "abastecimento", 7)
+    odometro.registrar_leitura(db_session, veiculo_test.id, 50100, "checklist", 3)  # regressão ignorada
+    odometro.registrar_leitura(db_session, veiculo_test.id, 50400, "checklist", 4)  # igual: nada a gravar
+    db_session.commit()
+
+    with pytest.raises(odometro.LeituraRegressiva):
+        odometro.registrar_leitura(db_session, veiculo_test.id, 50300, "manual", estrito=True)
+    # Lançamento manual propaga também as demais falhas (não só regressão)
+    with pytest.raises(ValueError):
+        odometro.registrar_leitura(db_session, veiculo_test.id, 50500, "desconhecida", estrito=True)
+
+    leituras = db_session.query(models.HistoricoOdometro).filter_by(veiculo_id=veiculo_test.id).all()
+    assert [(l.km_atual, l.km_anterior, l.diferenca_km, l.fonte) for l in leituras] == [
+        (50400, 50000, 400, "abastecimento"),
+    ]
+    db_session.refresh(veiculo_test)
+    assert veiculo_test.km_atual == 50400
+    cache = db_session.get(models.OdometroAtual, veiculo_test.id)
+    assert (cache.km, cache.fonte, cache.referencia_id, cache.historico_id) == (50400, "abastecimento", 7, leituras[0].id)
+
+
+def test_carga_inicial_monta_historico_crescente(db_session, veiculo_test):
+    veiculo_test.km_atual = 1500
+    db_session.commit()
+
+    gravadas = odometro.carga_inicial(db_session, veiculo_test.id, [
+        (1200, datetime(2026, 9, 3), "abastecimento", 2),
+        (1000, datetime(2026, 9, 1), "checklist", 1),
+        (1100, datetime(2026, 9, 4), "checklist", 3),  # menor que a anterior: descartada
+        (None, datetime(2026, 9, 5), "checklist", 3),
+    ])
+    db_session.commit()
+
+    assert gravadas == 3
+    kms = [
+        (l.km_atual, l.fonte, l.diferenca_km, l.data_leitura) for l in db_session.query(models.HistoricoOdometro)
+        .filter_by(veiculo_id=veiculo_test.id).order_by(models.HistoricoOdometro.km_atual)
+    ]
+    # km do cadastro fica na data da última leitura, sem diferença (não é km rodado no período)
+    assert kms == [
+        (1000, "checklist", None, datetime(2026, 9, 1)),
+        (1200, "abastecimento", 200, datetime(2026, 9, 3)),
+        (1500, "manual", None, datetime(2026, 9, 3)),
+    ]
+    assert db_session.get(models.OdometroAtual, veiculo_test.id).km == 1500
+    # Veículo que já tem histórico não é recarregado
+    assert odometro.carga_inicial(db_session, veiculo_test.id, [(2000, datetime(2026, 10, 1), "checklist", 9)]) == 0
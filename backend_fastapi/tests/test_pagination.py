@@ -0,0 +1,51 @@
+# backend_fastapi/tests/test_pagination.py
+"""
+Testes da paginação por cursor (keyset)
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import encode_cursor, decode_cursor, keyset_filter
+from app.models import Checklist
+
+
+def test_cursor_roundtrip():
+    """Cursor deve ser opaco e reversível"""
+    dt = datetime(2025, 1, 10, 8, 30, 15)
+    cursor = encode_cursor(dt, 42)
+    assert "2025" not in cursor
+    assert decode_cursor(cursor) == (dt, 42)
+
+
+def test_cursor_invalido():
+    """Cursor malformado retorna 400"""
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("nao-e-um-cursor")
+    assert exc.value.status_code == 400
+
+
+def test_keyset_percorre_sem_repetir(db_session):
+    """Páginas por cursor cobrem todos os registros, inclusive empates de data"""
+    base = datetime(2025, 1, 1, 12, 0, 0)
+    for i in range(7):
+        db_session.add(Checklist(
+            codigo=f"PAG-{i}", veiculo_id=1, motorista_id=1, modelo_id=1,
+            tipo="pre", dt_inicio=base + timedelta(hours=i // 2), status="pendente",
+        ))
+    db_session.flush()
+
+    ordered = db_session.query(Checklist).filter(Checklist.codigo.like("PAG-%")).order_by(
+        Checklist.dt_inicio.desc(), Checklist.id.desc()
+    )
+    vistos, cursor = [], ""
+    while True:
+        query = keyset_filter(ordered, Checklist.dt_inicio, Checklist.id, cursor) if cursor else ordered
+        page = query.limit(3).all()
+        vistos.extend(c.id for c in page)
+        if len(page) < 3:
+            break
+        cursor = encode_cursor(page[-1].dt_inicio, page[-1].id)
+
+    assert vistos == [c.id for c in ordered.all()]
@@ -0,0 +1,62 @@
+# backend_fastapi/tests/test_principal_cache.py
+"""
+Testes do cache de principal (usuário autenticado por token)
+"""
+import time
+
+from app.core import principal_cache
+from app.models import Usuario
+
+
+def _usuario(uid=7):
+    return Usuario(id=uid, username="ana", email="ana@transpontual.com", password_hash="x",
+                   tipo_usuario="gestor", ativo=True)
+
+
+def test_principal_em_cache_e_invalidacao():
+    """Usuário volta do cache como instância nova e some ao ser invalidado"""
+    principal_cache.limpar()
+    usuario = _usuario()
+    principal_cache.guardar_usuario("token-a", usuario)
+    principal_cache.guardar_matriz(7, {"modulos": {"veiculos": 0b0101}})
+
+    em_cache = principal_cache.obter_usuario("token-a")
+    assert em_cache is not usuario
+    assert (em_cache.id, em_cache.papel) == (7, "gestor")
+    assert principal_cache.obter_matriz(7) == {"modulos": {"veiculos": 0b0101}}
+    assert principal_cache.obter_usuario("token-b") is None
+
+    principal_cache.invalidar_usuario(7)
+    assert principal_cache.obter_usuario("token-a") is None
+    assert principal_cache.obter_matriz(7) is None
+
+
+def test_principal_respeita_expiracao_do_token():
+    """A entrada não sobrevive ao vencimento do JWT"""
+    principal_cache.limpar()
+    principal_cache.guardar_usuario("token-c", _usuario(), expira_token=time.time() - 1)
+    assert principal_cache.obter_usuario("token-c") is None
+
+
+def test_matriz_de_permissoes(db_session):
+    """Papel, perfis e permissões específicas compilados em bitmaps por módulo"""
+    from app.models import PerfilAcesso, UsuarioPerfil, UsuarioPermissao
+    from app.security import BITS_ACAO, compilar_permissoes, permissao_na_matriz
+
+    usuario = _usuario(uid=None)
+    usuario.tipo_usuario = "operacional"
+    db_session.add(usuario)
+    db_session.flush()
+    perfil = PerfilAcesso(nome="Fiscal extra", permissoes={"fiscal": ["visualizar", "aprovar"]})
+    db_session.add(perfil)
+    db_session.flush()
+    db_session.add(UsuarioPerfil(usuario_id=usuario.id, perfil_id=perfil.id))
+    db_session.add(UsuarioPermissao(usuario_id=usuario.id, modulo="checklists", acao="editar", permitido=False))
+    db_session.flush()
+
+    matriz = compilar_permissoes(usuario, db_session)
+    assert matriz["modulos"]["checklists"] == BITS_ACAO["visualizar"] | BITS_ACAO["criar"]
+    assert permissao_na_matriz(matriz, "fiscal", "visualizar")
+    assert permissao_na_matriz(matriz, "fiscal", "aprovar")
+    assert not permissao_na_matriz(matriz, "checklists", "editar")
+    assert not permissao_na_matriz(matriz, "financeiro", "visualizar")
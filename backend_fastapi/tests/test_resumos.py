@@ -0,0 +1,92 @@
+# backend_fastapi/tests/test_resumos.py
+"""
+Testes dos resumos agregados no banco (abastecimentos e ordens de serviço)
+"""
+from datetime import datetime
+
+import pytest
+
+from app import models
+from app.services.analise_abastecimentos import analisar_abastecimentos
+from app.services.resumos import resumo_abastecimentos, resumo_ordens_servico
+
+
+def test_resumo_abastecimentos(db_session, veiculo_test):
+    """Totais, consumo (Σ km / Σ litros dos abastecimentos anteriores) e série mensal"""
+    motorista = models.Motorista(nome="Motorista Resumo", ativo=True)
+    db_session.add(motorista)
+    db_session.flush()
+    for data, odometro, litros, valor in [
+        (datetime(2026, 8, 10), 100000, 200.0, 1200.0),
+        (datetime(2026, 8, 20), 100500, 150.0, 900.0),
+        (datetime(2026, 9, 5), 101100, 100.0, 610.0),
+    ]:
+        db_session.add(models.Abastecimento(
+            veiculo_id=veiculo_test.id, motorista_id=motorista.id, data_abastecimento=data,
+            odometro=odometro, litros=litros, valor_litro=round(valor / litros, 3), valor_total=valor,
+        ))
+    db_session.commit()
+
+    dados = resumo_abastecimentos(
+        db_session, lambda q: q.filter(models.Abastecimento.veiculo_id == veiculo_test.id)
+    )
+
+    assert dados["total_abastecimentos"] == 3
+    assert dados["total_litros"] == pytest.approx(450)
+    assert dados["total_valor"] == pytest.approx(2710)
+    assert dados["media_preco_litro"] == pytest.approx(2710 / 450)
+    # (500 km + 600 km) / (200 L + 150 L)
+    veiculo = dados["por_veiculo"][0]
+    assert veiculo["veiculo"]["placa"] == veiculo_test.placa
+    assert veiculo["consumo_medio"] == pytest.approx(1100 / 350)
+    assert dados["consumo_medio_geral"] == pytest.approx(1100 / 350)
+    assert [m["mes"] for m in dados["por_mes"]] == ["2026-08", "2026-09"]
+    assert dados["por_mes"][0]["total_litros"] == pytest.approx(350)
+
+
+def test_resumo_e_analise_usam_o_mesmo_consumo(db_session, veiculo_test):
+    """/abastecimentos/resumo e /abastecimentos/analytics dão o mesmo km/L por veículo"""
+    motorista = models.Motorista(nome="Motorista Consumo", ativo=True)
+    db_session.add(motorista)
+    db_session.flush()
+    # Lançado fora de ordem e com um trecho absurdo (> 50 km/L), que não entra na média
+    for data, odometro, litros in [
+        (datetime(2026, 8, 1), 50000, 120.0),
+        (datetime(2026, 8, 20), 50900, 80.0),
+        (datetime(2026, 8, 10), 50350, 150.0),
+        (datetime(2026, 9, 1), 55000, 90.0),
+        (datetime(2026, 9, 15), 55300, 100.0),
+    ]:
+        db_session.add(models.Abastecimento(
+            veiculo_id=veiculo_test.id, motorista_id=motorista.id, data_abastecimento=data,
+            odometro=odometro, litros=litros, valor_litro=6.0, valor_total=litros * 6,
+        ))
+    db_session.commit()
+
+    def filtrar(q):
+        return q.filter(models.Abastecimento.veiculo_id == veiculo_test.id)
+
+    resumo = resumo_abastecimentos(db_session, filtrar)
+    analise = analisar_abastecimentos(db_session, filtrar)
+
+    # (350 + 550 + 300) km / (120 + 150 + 90) L
+    esperado = 1200 / 360
+    assert resumo["por_veiculo"][0]["consumo_medio"] == pytest.approx(esperado)
+    assert analise["por_veiculo"][0]["km_por_litro"] == pytest.approx(esperado, abs=0.005)
+    assert resumo["consumo_medio_geral"] == pytest.approx(analise["km_por_litro"], abs=0.005)
+
+
+def test_resumo_ordens_servico(db_session, veiculo_test):
+    for status, valor in [("Aberta", 100.5), ("Concluída", 250.25), ("Concluída", None)]:
+        db_session.add(models.OrdemServico(
+            veiculo_id=veiculo_test.id, tipo_servico="Preventiva", status=status,
+            data_abertura=datetime(2026, 9, 1), valor_total=valor,
+        ))
+    db_session.commit()
+
+    dados = resumo_ordens_servico(db_session)
+
+    assert dados["total_ordens"] == 3
+    assert dados["ordens_concluidas"] == 2
+    assert dados["valor_total"] == pytest.approx(350.75)
+    assert dados["por_mes"] == [{"mes": "2026-09", "abertas": 3, "concluidas": 2, "valor": pytest.approx(350.75)}]
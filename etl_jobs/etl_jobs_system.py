@@ -148,6 +148,9 @@ class ChecklistAggregatorJob:
         logger.info(f"Iniciando agregações para {target_date.date()}")
         
         try:
+            # 0. Atualizar agregados incrementais (dia, veículo, motorista, status)
+            await self.update_checklist_rollups()
+
             # 1. Agregar estatísticas diárias de checklist
             await self._aggregate_daily_checklist_stats(target_date)
             
@@ -159,11 +162,14 @@ class ChecklistAggregatorJob:
             
             # 4. Calcular KPIs de veículos
             await self._calculate_vehicle_kpis()
+
+            # 5. Média de km/dia por veículo (previsão de manutenção)
+            await self.update_vehicle_usage_rates()
             
-            # 5. Refresh das views materializadas
+            # 6. Refresh das views materializadas
             await self._refresh_materialized_views()
             
-            # 6. Gerar relatório de resumo
+            # 7. Gerar relatório de resumo
             summary = await self._generate_daily_summary(target_date)
             
             # Enviar notificação de sucesso
@@ -270,6 +276,83 @@ class ChecklistAggregatorJob:
         rows_affected = self.db.execute_update(stats_query, {"target_date": date_str})
         logger.info(f"Estatísticas diárias atualizadas: {rows_affected} registros")
     
+    ROLLUP_JOB = "checklist_rollup_diario"
+    # Margem para transações que gravaram antes da marca d'água mas commitaram depois
+    ROLLUP_LAG = timedelta(minutes=5)
+
+    async def update_checklist_rollups(self) -> int:
+        """
+        Atualizar agregados diários de forma incremental.
+
+        Só os dias com checklists alterados desde a última execução (marca
+        d'água em etl_watermarks) são recalculados. Tabelas e trigger:
+        sql/migration_checklist_rollups.sql.
+        """
+        with self.db.get_session() as session:
+            inicio_execucao, watermark = session.execute(text("""
+                SELECT NOW()::TIMESTAMP,
+                       (SELECT watermark FROM etl_watermarks WHERE job = :job)
+            """), {"job": self.ROLLUP_JOB}).one()
+            desde = (watermark - self.ROLLUP_LAG) if watermark else datetime(1970, 1, 1)
+
+            session.execute(text("""
+                CREATE TEMP TABLE _rollup_dias ON COMMIT DROP AS
+                SELECT DISTINCT DATE(dt_inicio) AS dia
+                FROM checklists
+                WHERE atualizado_em > :desde
+                UNION
+                SELECT dia FROM checklist_rollup_dias_pendentes
+            """), {"desde": desde})
+
+            dias = session.execute(text("SELECT COUNT(*) FROM _rollup_dias")).scalar()
+
+            session.execute(text("""
+                DELETE FROM checklist_rollup_diario r
+                USING _rollup_dias d
+                WHERE r.dia = d.dia
+            """))
+
+            session.execute(text("""
+                INSERT INTO checklist_rollup_diario (
+                    dia, veiculo_id, motorista_id, status,
+                    total, finalizados, rapidos, duracao_total_segundos, atualizado_em
+                )
+                SELECT
+                    d.dia,
+                    c.veiculo_id,
+                    c.motorista_id,
+                    c.status,
+                    COUNT(*),
+                    COUNT(*) FILTER (WHERE c.dt_fim IS NOT NULL),
+                    COUNT(*) FILTER (WHERE c.dt_fim IS NOT NULL
+                                     AND EXTRACT(EPOCH FROM c.dt_fim - c.dt_inicio) < 90),
+                    COALESCE(SUM(EXTRACT(EPOCH FROM c.dt_fim - c.dt_inicio))
+                             FILTER (WHERE c.dt_fim IS NOT NULL), 0),
+                    NOW()
+                FROM _rollup_dias d
+                JOIN checklists c ON c.dt_inicio >= d.dia AND c.dt_inicio < d.dia + 1
+                GROUP BY d.dia, c.veiculo_id, c.motorista_id, c.status
+            """))
+
+            session.execute(text("""
+                DELETE FROM checklist_rollup_dias_pendentes p
+                USING _rollup_dias d
+                WHERE p.dia = d.dia
+            """))
+
+            session.execute(text("""
+                INSERT INTO etl_watermarks (job, watermark, atualizado_em)
+                VALUES (:job, :watermark, NOW())
+                ON CONFLICT (job) DO UPDATE SET
+                    watermark = EXCLUDED.watermark,
+                    atualizado_em = NOW()
+            """), {"job": self.ROLLUP_JOB, "watermark": inicio_execucao})
+
+            session.commit()
+
+        logger.info(f"Agregados incrementais atualizados: {dias} dia(s) recalculado(s) desde {desde}")
+        return dias
+
     async def _update_driver_performance_metrics(self):
         """Atualizar métricas de performance dos motoristas"""
         
@@ -488,8 +571,7 @@ class ChecklistAggregatorJob:
                 v.id as veiculo_id,
                 COUNT(c.id) as total_checklists,
                 COUNT(*) FILTER (WHERE c.status = 'aprovado') * 100.0 / COUNT(c.id) as taxa_aprovacao,
-                COUNT(d.id) as total_defeitos,
-                MAX(c.odometro_fim) - MIN(c.odometro_ini) as km_rodados
+                COUNT(d.id) as total_defeitos
             FROM veiculos v
             LEFT JOIN checklists c ON c.veiculo_id = v.id 
                 AND c.dt_inicio >= :mes_referencia
@@ -498,6 +580,16 @@ class ChecklistAggregatorJob:
             WHERE v.ativo = true
             GROUP BY v.id
         ),
+        vehicle_km AS (
+            -- km rodados pelo histórico de odômetro (leituras só crescem)
+            SELECT
+                h.veiculo_id,
+                SUM(h.diferenca_km) as km_rodados
+            FROM historico_odometro h
+            WHERE h.data_leitura >= :mes_referencia
+              AND h.data_leitura < :mes_referencia + INTERVAL '1 month'
+            GROUP BY h.veiculo_id
+        ),
         vehicle_maintenance_stats AS (
             SELECT 
                 os.veiculo_id,
@@ -515,7 +607,7 @@ class ChecklistAggregatorJob:
                 ROUND(COALESCE(vcs.taxa_aprovacao, 100), 2) as taxa_aprovacao,
                 COALESCE(vcs.total_defeitos, 0) as total_defeitos,
                 COALESCE(vms.custo_manutencao, 0) as custo_manutencao,
-                COALESCE(vcs.km_rodados, 0) as km_rodados,
+                COALESCE(vkm.km_rodados, 0) as km_rodados,
                 ROUND(COALESCE(vms.tempo_imobilizado, 0), 2) as tempo_imobilizado,
                 -- Calcular disponibilidade (assumindo 24h/dia * 30 dias = 720h)
                 ROUND(100 - (COALESCE(vms.tempo_imobilizado, 0) / 720 * 100), 2) as disponibilidade,
@@ -527,6 +619,7 @@ class ChecklistAggregatorJob:
                 ), 2) as score_geral
             FROM vehicle_checklist_stats vcs
             FULL OUTER JOIN vehicle_maintenance_stats vms ON vms.veiculo_id = vcs.veiculo_id
+            LEFT JOIN vehicle_km vkm ON vkm.veiculo_id = vcs.veiculo_id
             WHERE vcs.veiculo_id IS NOT NULL OR vms.veiculo_id IS NOT NULL
         )
         INSERT INTO veiculo_kpis (
@@ -554,6 +647,69 @@ class ChecklistAggregatorJob:
         rows_affected = self.db.execute_update(vehicle_kpis_query, {"mes_referencia": mes_atual.strftime('%Y-%m-%d')})
         logger.info(f"KPIs de veículos calculados: {rows_affected} registros")
     
+    # Média de km/dia: peso das leituras cai pela metade a cada USO_MEIA_VIDA_DIAS
+    USO_MEIA_VIDA_DIAS = 30
+    USO_JANELA_DIAS = 180
+    # Intervalos acima disso são erro de digitação, não uso real
+    USO_KM_DIA_MAX = 2000
+    # Leitura semente da carga inicial (backend_fastapi/app/services/odometro.py)
+    USO_OBSERVACAO_CADASTRO = "Odômetro do cadastro"
+
+    async def update_vehicle_usage_rates(self) -> int:
+        """
+        Recalcular o km/dia de toda a frota em uma única consulta.
+
+        historico_odometro (checklists, abastecimentos, OS e lançamentos
+        manuais) é reduzido à maior leitura por dia; cada intervalo entre
+        dias com leitura é ponderado por 0,5^(idade / meia-vida), e a taxa é
+        Σ peso·km / Σ peso·dias. O resultado fica em odometro_atual
+        (colunas de sql/migration_km_por_dia.sql).
+        """
+        usage_query = """
+        WITH leituras AS (
+            SELECT veiculo_id, DATE(data_leitura) AS dia, MAX(km_atual) AS km
+            FROM historico_odometro
+            WHERE data_leitura >= CURRENT_DATE - CAST(:janela AS INTEGER)
+              -- km do cadastro na carga inicial: não é um trecho rodado no dia
+              AND observacoes IS DISTINCT FROM :observacao_cadastro
+            GROUP BY veiculo_id, DATE(data_leitura)
+        ),
+        intervalos AS (
+            SELECT
+                veiculo_id,
+                dia,
+                km - LAG(km) OVER w AS km,
+                dia - LAG(dia) OVER w AS dias
+            FROM leituras
+            WINDOW w AS (PARTITION BY veiculo_id ORDER BY dia)
+        ),
+        taxas AS (
+            SELECT
+                veiculo_id,
+                SUM(POWER(0.5, (CURRENT_DATE - dia) / CAST(:meia_vida AS NUMERIC)) * km)
+                    / NULLIF(SUM(POWER(0.5, (CURRENT_DATE - dia) / CAST(:meia_vida AS NUMERIC)) * dias), 0)
+                    AS km_por_dia
+            FROM intervalos
+            WHERE dias > 0 AND km >= 0 AND km <= dias * :km_dia_max
+            GROUP BY veiculo_id
+        )
+        UPDATE odometro_atual o
+        SET km_por_dia = ROUND(t.km_por_dia, 1),
+            km_por_dia_calculado_em = NOW()
+        FROM taxas t
+        WHERE t.veiculo_id = o.veiculo_id
+          AND t.km_por_dia IS NOT NULL
+        """
+
+        rows_affected = self.db.execute_update(usage_query, {
+            "janela": self.USO_JANELA_DIAS,
+            "meia_vida": self.USO_MEIA_VIDA_DIAS,
+            "km_dia_max": self.USO_KM_DIA_MAX,
+            "observacao_cadastro": self.USO_OBSERVACAO_CADASTRO,
+        })
+        logger.info(f"Média de km/dia atualizada: {rows_affected} veículo(s)")
+        return rows_affected
+
     async def _refresh_materialized_views(self):
         """Refresh das views materializadas"""
         
@@ -693,7 +849,126 @@ class AlertService:
     def __init__(self, db_manager: DatabaseManager, notification_service: NotificationService):
         self.db = db_manager
         self.notification = notification_service
-    
+
+    # Mesma janela de backend_fastapi/app/services/documentos_vencimento.py
+    DOCUMENTO_DIAS_ALERTA_PADRAO = 30
+    DOCUMENTO_DIAS_ALERTA_MAX = 180
+    CNH_DIAS_ALERTA = 60
+
+    async def scan_document_expiry(self) -> int:
+        """
+        Gravar em alertas_sistema os documentos e CNHs na janela de alerta.
+
+        Só lê as faixas dos índices parciais de vencimento (documentos ativos
+        até DOCUMENTO_DIAS_ALERTA_MAX dias, CNHs de motoristas ativos sem
+        documento 'cnh'). Há um alerta ativo por documento: o scan atualiza o
+        existente (vencendo -> vencido) e desativa os que saíram da janela
+        (renovados, cancelados ou com vencimento alterado). Índices e alvo do
+        ON CONFLICT: sql/migration_documentos_vencimento.sql.
+        """
+        scan_query = """
+        WITH vencendo AS (
+            SELECT
+                d.id AS referencia_id,
+                d.entidade_tipo,
+                d.entidade_id,
+                COALESCE(v.placa, m.nome) AS entidade_nome,
+                d.tipo_documento,
+                d.numero_documento,
+                d.data_vencimento
+            FROM documentos d
+            LEFT JOIN veiculos v ON d.entidade_tipo = 'veiculo' AND v.id = d.entidade_id
+            LEFT JOIN motoristas m ON d.entidade_tipo = 'motorista' AND m.id = d.entidade_id
+            WHERE d.alerta_vencimento IS true
+              AND d.status NOT IN ('renovado', 'cancelado')
+              AND d.data_vencimento IS NOT NULL
+              AND d.data_vencimento <= CURRENT_DATE + CAST(:dias_max AS INTEGER)
+              AND d.data_vencimento - COALESCE(d.dias_alerta, CAST(:dias_padrao AS INTEGER)) <= CURRENT_DATE
+            UNION ALL
+            SELECT
+                NULL,
+                'motorista',
+                m.id,
+                m.nome,
+                'cnh',
+                m.cnh,
+                DATE(m.validade_cnh)
+            FROM motoristas m
+            WHERE m.ativo IS true
+              AND m.validade_cnh IS NOT NULL
+              AND m.validade_cnh < CURRENT_DATE + CAST(:cnh_dias AS INTEGER) + 1
+              AND NOT EXISTS (
+                  SELECT 1 FROM documentos d
+                  WHERE d.entidade_tipo = 'motorista'
+                    AND d.entidade_id = m.id
+                    AND d.tipo_documento = 'cnh'
+                    AND d.status NOT IN ('renovado', 'cancelado')
+              )
+        ),
+        gravados AS (
+            INSERT INTO alertas_sistema (
+                tipo, categoria, entidade_tipo, entidade_id, referencia_id,
+                titulo, descricao, nivel, dados, data_vencimento
+            )
+            SELECT
+                CASE WHEN data_vencimento < CURRENT_DATE THEN 'documento_vencido' ELSE 'documento_vencendo' END,
+                'documento',
+                entidade_tipo,
+                entidade_id,
+                referencia_id,
+                LEFT(
+                    UPPER(tipo_documento) || ' ' || COALESCE(entidade_nome, entidade_tipo || ' ' || entidade_id)
+                    || CASE WHEN data_vencimento < CURRENT_DATE THEN ' vencido' ELSE ' vencendo' END,
+                    200
+                ),
+                UPPER(tipo_documento) || COALESCE(' ' || numero_documento, '')
+                    || ' vence em ' || TO_CHAR(data_vencimento, 'DD/MM/YYYY'),
+                CASE WHEN data_vencimento < CURRENT_DATE THEN 'danger' ELSE 'warning' END,
+                jsonb_build_object(
+                    'tipo_documento', tipo_documento,
+                    'numero_documento', numero_documento,
+                    'dias_restantes', data_vencimento - CURRENT_DATE
+                ),
+                data_vencimento
+            FROM vencendo
+            ON CONFLICT (entidade_tipo, entidade_id, (COALESCE(referencia_id, 0)))
+                WHERE categoria = 'documento' AND ativo
+            DO UPDATE SET
+                tipo = EXCLUDED.tipo,
+                titulo = EXCLUDED.titulo,
+                descricao = EXCLUDED.descricao,
+                nivel = EXCLUDED.nivel,
+                dados = EXCLUDED.dados,
+                data_vencimento = EXCLUDED.data_vencimento,
+                -- Ao vencer o alerta volta a aparecer como não visualizado
+                visualizado = alertas_sistema.visualizado AND alertas_sistema.tipo = EXCLUDED.tipo
+            RETURNING id
+        )
+        UPDATE alertas_sistema a
+        SET ativo = false
+        WHERE a.categoria = 'documento'
+          AND a.ativo
+          AND a.id NOT IN (SELECT id FROM gravados)
+        """
+
+        rows_affected = self.db.execute_update(scan_query, {
+            "dias_max": self.DOCUMENTO_DIAS_ALERTA_MAX,
+            "dias_padrao": self.DOCUMENTO_DIAS_ALERTA_PADRAO,
+            "cnh_dias": self.CNH_DIAS_ALERTA,
+        })
+        ativos = self.db.execute_query("""
+            SELECT nivel, COUNT(*) AS total
+            FROM alertas_sistema
+            WHERE categoria = 'documento' AND ativo
+            GROUP BY nivel
+        """)
+        por_nivel = {linha["nivel"]: linha["total"] for linha in ativos}
+        logger.info(
+            f"Vencimento de documentos: {por_nivel.get('warning', 0)} vencendo, "
+            f"{por_nivel.get('danger', 0)} vencidos, {rows_affected} alerta(s) desativado(s)"
+        )
+        return sum(por_nivel.values())
+
     async def check_critical_alerts(self):
         """Verificar alertas críticos"""
         
@@ -910,6 +1185,18 @@ async def main():
     elif job_type == "check_alerts":
         alert_service = AlertService(db_manager, notification_service)
         await alert_service.check_critical_alerts()
+
+    elif job_type == "document_expiry":
+        alert_service = AlertService(db_manager, notification_service)
+        await alert_service.scan_document_expiry()
+
+    elif job_type == "checklist_rollups":
+        aggregator = ChecklistAggregatorJob(db_manager, notification_service)
+        await aggregator.update_checklist_rollups()
+        
+    elif job_type == "vehicle_usage_rates":
+        aggregator = ChecklistAggregatorJob(db_manager, notification_service)
+        await aggregator.update_vehicle_usage_rates()
         
     elif job_type == "refresh_views":
         aggregator = ChecklistAggregatorJob(db_manager, notification_service)
@@ -0,0 +1,97 @@
+# flask_dashboard/app/audit_queue.py
+"""
+Envio assíncrono dos eventos de auditoria para a API
+
+Os decorators apenas enfileiram o evento; uma thread em segundo plano agrupa
+os eventos por token e os envia para /api/v1/users/activity/batch a cada
+AUDIT_BATCH_SIZE eventos ou AUDIT_FLUSH_MS milissegundos. A fila é limitada:
+se a API estiver lenta ou fora do ar, os eventos excedentes são descartados
+e contados, sem atrasar a página.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+
+from .utils.http_client import get_http_session
+
+logger = logging.getLogger(__name__)
+
+AUDIT_QUEUE_SIZE = int(os.getenv('AUDIT_QUEUE_SIZE', '5000'))
+AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', '100'))
+AUDIT_FLUSH_MS = int(os.getenv('AUDIT_FLUSH_MS', '1000'))
+
+_fila = queue.Queue(maxsize=AUDIT_QUEUE_SIZE)
+_lock = threading.Lock()
+_thread = None
+_contadores = {'enfileirados': 0, 'enviados': 0, 'descartados': 0, 'falhas': 0}
+
+
+def registrar(api_base_url, token, evento):
+    """Enfileira um evento sem bloquear; retorna False se ele foi descartado"""
+    _iniciar()
+    try:
+        _fila.put_nowait((api_base_url, token, evento))
+    except queue.Full:
+        with _lock:
+            _contadores['descartados'] += 1
+        return False
+    with _lock:
+        _contadores['enfileirados'] += 1
+    return True
+
+
+def _enviar(itens):
+    grupos = {}
+    for api_base_url, token, evento in itens:
+        grupos.setdefault((api_base_url, token), []).append(evento)
+
+    for (api_base_url, token), eventos in grupos.items():
+        try:
+            response = get_http_session().post(
+                f"{api_base_url}/api/v1/users/activity/batch",
+                headers={'Authorization': f"Bearer {token}"},
+                json={'eventos': eventos},
+                timeout=5
+            )
+            ok = response.status_code < 400
+        except Exception as e:
+            logger.error(f"Erro ao enviar eventos de auditoria: {e}")
+            ok = False
+        with _lock:
+            _contadores['enviados' if ok else 'falhas'] += len(eventos)
+
+
+def _loop():
+    while True:
+        itens = [_fila.get()]
+        prazo = time.monotonic() + AUDIT_FLUSH_MS / 1000
+        while len(itens) < AUDIT_BATCH_SIZE:
+            restante = prazo - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                itens.append(_fila.get(timeout=restante))
+            except queue.Empty:
+                break
+        _enviar(itens)
+
+
+def _iniciar():
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_loop, name='auditoria', daemon=True)
+            _thread.start()
+
+
+def estatisticas():
+    """Contadores deste processo (inclui os eventos descartados por fila cheia)"""
+    with _lock:
+        dados = dict(_contadores)
+    dados['pendentes'] = _fila.qsize()
+    dados['capacidade'] = AUDIT_QUEUE_SIZE
+    return dados
@@ -2,31 +2,144 @@
 Decorators avançados para autenticação e autorização
 """
 import functools
-import requests
-from flask import session, redirect, url_for, request, abort, flash, current_app
+import hashlib
+import os
+import threading
+import time
+from flask import session, redirect, url_for, request, abort, flash, current_app, g
 from datetime import datetime
 import logging
 
+from . import audit_queue
+from .utils.http_client import get_http_session
+
 logger = logging.getLogger(__name__)
 
+# Cache curto do usuário da sessão (chave: hash do token)
+PRINCIPAL_CACHE_TTL = int(os.getenv('DASHBOARD_PRINCIPAL_TTL', '30'))
+_principal_cache = {}
+_principal_lock = threading.Lock()
+
+
+def _chave_token(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+_permissoes_cache = {}
+
+# Mesma ordem de bits da API (/users/me/permissions)
+ACOES_PADRAO = ('visualizar', 'criar', 'editar', 'excluir')
+
+
+def invalidar_usuario_cache(user_id=None):
+    """Descarta usuário e permissões em cache (todos, se user_id for None) após alterações"""
+    with _principal_lock:
+        if user_id is None:
+            _principal_cache.clear()
+            _permissoes_cache.clear()
+            return
+        for cache in (_principal_cache, _permissoes_cache):
+            for chave in [c for c, (_, dados) in cache.items() if dados.get('usuario_id', dados.get('id')) == user_id]:
+                del cache[chave]
+
+
 def get_current_user():
-    """Obtém informações do usuário atual via API"""
+    """Obtém informações do usuário atual via API (com cache por token)"""
     if 'access_token' not in session:
         return None
+    if 'usuario_atual' in g:
+        return g.usuario_atual
+
+    chave = _chave_token(session['access_token'])
+    agora = time.time()
+    with _principal_lock:
+        entrada = _principal_cache.get(chave)
+        if entrada and entrada[0] > agora:
+            g.usuario_atual = entrada[1]
+            return entrada[1]
+        _principal_cache.pop(chave, None)
 
     try:
-        response = requests.get(
+        response = get_http_session().get(
             f"{current_app.config.get('API_BASE_URL', 'http://localhost:8051')}/api/v1/users/me",
             headers={'Authorization': f"Bearer {session['access_token']}"},
             timeout=5
         )
         if response.status_code == 200:
-            return response.json()
+            user = response.json()
+            with _principal_lock:
+                # Remover entradas vencidas antes de inserir
+                for c in [c for c, (expira, _) in _principal_cache.items() if expira <= agora]:
+                    del _principal_cache[c]
+                _principal_cache[chave] = (agora + PRINCIPAL_CACHE_TTL, user)
+            g.usuario_atual = user
+            return user
     except Exception as e:
         logger.error(f"Erro ao obter usuário atual: {e}")
 
     return None
 
+def get_current_permissions():
+    """
+    Matriz de permissões do usuário atual (uma chamada a /users/me/permissions
+    por token a cada PRINCIPAL_CACHE_TTL segundos)
+    """
+    if 'access_token' not in session:
+        return None
+    if 'permissoes_atual' in g:
+        return g.permissoes_atual
+
+    chave = _chave_token(session['access_token'])
+    agora = time.time()
+    with _principal_lock:
+        entrada = _permissoes_cache.get(chave)
+        if entrada and entrada[0] > agora:
+            g.permissoes_atual = entrada[1]
+            return entrada[1]
+        _permissoes_cache.pop(chave, None)
+
+    try:
+        response = get_http_session().get(
+            f"{current_app.config.get('API_BASE_URL', 'http://localhost:8051')}/api/v1/users/me/permissions",
+            headers={'Authorization': f"Bearer {session['access_token']}"},
+            timeout=5
+        )
+        if response.status_code == 200:
+            matriz = response.json()
+            with _principal_lock:
+                for c in [c for c, (expira, _) in _permissoes_cache.items() if expira <= agora]:
+                    del _permissoes_cache[c]
+                _permissoes_cache[chave] = (agora + PRINCIPAL_CACHE_TTL, matriz)
+            g.permissoes_atual = matriz
+            return matriz
+    except Exception as e:
+        logger.error(f"Erro ao obter permissões do usuário: {e}")
+
+    return None
+
+
+def tem_permissao(modulo, acao):
+    """Verifica localmente uma permissão na matriz do usuário atual"""
+    matriz = get_current_permissions()
+    if not matriz:
+        return False
+    acoes = matriz.get('acoes') or list(ACOES_PADRAO)
+    if acao not in acoes:
+        return f"{modulo}:{acao}" in matriz.get('extras', [])
+    return bool(matriz.get('modulos', {}).get(modulo, 0) & (1 << acoes.index(acao)))
+
+
+def registrar_auditoria(evento):
+    """Enfileira um evento de auditoria do usuário atual sem bloquear a página"""
+    if 'access_token' not in session:
+        return False
+    return audit_queue.registrar(
+        current_app.config.get('API_BASE_URL', 'http://localhost:8051'),
+        session['access_token'],
+        evento
+    )
+
+
 def get_client_ip():
     """Obtém o IP real do cliente considerando proxies"""
     if request.headers.getlist("X-Forwarded-For"):
@@ -120,21 +233,13 @@ def advanced_login_required(f):
             except Exception:
                 pass
 
-        # Registrar atividade
-        try:
-            requests.post(
-                f"{current_app.config.get('API_BASE_URL', 'http://localhost:8051')}/api/v1/users/activity",
-                headers={'Authorization': f"Bearer {session['access_token']}"},
-                json={
-                    'url': request.url,
-                    'method': request.method,
-                    'ip': get_client_ip(),
-                    'user_agent': request.headers.get('User-Agent', '')
-                },
-                timeout=2
-            )
-        except Exception:
-            pass  # Não falhar se não conseguir registrar atividade
+        # Registrar atividade (enviada em lote, fora da requisição)
+        registrar_auditoria({
+            'url': request.url,
+            'method': request.method,
+            'ip': get_client_ip(),
+            'user_agent': request.headers.get('User-Agent', '')
+        })
 
         return f(*args, **kwargs)
 
@@ -156,30 +261,21 @@ def permission_required(modulo, acao):
             if not user:
                 abort(401)
 
-            # Verificar permissão via API
-            try:
-                response = requests.get(
-                    f"{current_app.config.get('API_BASE_URL', 'http://localhost:8051')}/api/v1/users/permissions/{modulo}/{acao}",
-                    headers={'Authorization': f"Bearer {session['access_token']}"},
-                    timeout=5
-                )
-
-                if response.status_code == 200:
-                    result = response.json()
-                    if result.get('permitido'):
-                        return f(*args, **kwargs)
-
-                # Permissão negada
-                logger.warning(f"Acesso negado para usuário {user.get('email')} no módulo {modulo}, ação {acao}")
-                flash(f'Você não tem permissão para {acao} em {modulo}.', 'error')
-                return redirect(url_for('access_denied'))
-
-            except Exception as e:
-                logger.error(f"Erro ao verificar permissão: {e}")
+            # Verificar permissão na matriz local (carregada uma vez por token)
+            matriz = get_current_permissions()
+            if matriz is None:
                 # Em caso de erro, negar acesso por segurança
                 flash('Erro ao verificar permissões. Tente novamente.', 'error')
                 return redirect(url_for('dashboard'))
 
+            if tem_permissao(modulo, acao):
+                return f(*args, **kwargs)
+
+            # Permissão negada
+            logger.warning(f"Acesso negado para usuário {user.get('email')} no módulo {modulo}, ação {acao}")
+            flash(f'Você não tem permissão para {acao} em {modulo}.', 'error')
+            return redirect(url_for('access_denied'))
+
         return decorated_function
     return decorator
 
@@ -233,25 +329,15 @@ def log_user_action(acao, detalhes=None):
             # Executar a função primeiro
             result = f(*args, **kwargs)
 
-            # Registrar ação
-            try:
-                log_data = {
-                    'acao': acao,
-                    'url': request.url,
-                    'method': request.method,
-                    'ip': get_client_ip(),
-                    'user_agent': request.headers.get('User-Agent', ''),
-                    'detalhes': detalhes or {}
-                }
-
-                requests.post(
-                    f"{current_app.config.get('API_BASE_URL', 'http://localhost:8051')}/api/v1/users/log-action",
-                    headers={'Authorization': f"Bearer {session['access_token']}"},
-                    json=log_data,
-                    timeout=2
-                )
-            except Exception as e:
-                logger.error(f"Erro ao registrar ação: {e}")
+            # Registrar ação (enviada em lote, fora da requisição)
+            registrar_auditoria({
+                'acao': acao,
+                'url': request.url,
+                'method': request.method,
+                'ip': get_client_ip(),
+                'user_agent': request.headers.get('User-Agent', ''),
+                'detalhes': detalhes or {}
+            })
 
             return result
 
@@ -271,7 +357,7 @@ def session_required(f):
 
         # Verificar limite de sessões
         try:
-            response = requests.get(
+            response = get_http_session().get(
                 f"{current_app.config.get('API_BASE_URL', 'http://localhost:8051')}/api/v1/users/session-check",
                 headers={'Authorization': f"Bearer {session['access_token']}"},
                 timeout=5
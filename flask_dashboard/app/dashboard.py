@@ -6,7 +6,7 @@ Dashboard web completo para gestão de checklist veicular
 import os
 import sys
 import requests
-from datetime import datetime, timedelta
+from datetime import datetime
 from dotenv import load_dotenv
 
 # Forçar encoding UTF-8 no Windows
@@ -33,18 +33,11 @@ from functools import wraps
 from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, Response
 from flask import send_file, make_response, abort
 import json
-import csv
-from io import StringIO, BytesIO
-import pandas as pd
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
 import plotly.graph_objs as go
 import plotly.utils
-from openpyxl.styles import PatternFill, Font
-from openpyxl.utils import get_column_letter
+
+from .utils.http_client import get_http_session, get_latency_stats
+from .auth_decorators import invalidar_usuario_cache, tem_permissao
 
 def create_app():
     """Factory function para criar a aplicação Flask"""
@@ -146,9 +139,17 @@ def create_app():
             return '0%'
         return f'{value:.1f}%'
 
+    # Sessão HTTP compartilhada (keep-alive, pool e retries) para chamadas à API
+    http_session = get_http_session()
+
     # Funções auxiliares para API
-    def api_request(endpoint, method='GET', data=None, params=None):
-        """Fazer requisições para a API"""
+    def _api_call(endpoint, method='GET', data=None, params=None, token=''):
+        """
+        Requisição à API sem tocar em session/flash (pode rodar fora da thread do request).
+
+        Retorna (dados, aviso); ``aviso`` é None ou (mensagem, categoria, sessao_expirada)
+        e é aplicado por ``_aplicar_aviso`` na thread do request.
+        """
         url = f"{app.config['API_BASE_URL']}{endpoint}"
 
         headers = {
@@ -157,42 +158,38 @@ def create_app():
 
         # Only add auth for endpoints that need it (skip /drivers and /ordens-servico for now)
         if not endpoint.startswith('/drivers') and not endpoint.startswith('/api/v1/ordens-servico'):
-            headers['Authorization'] = f"Bearer {session.get('access_token', '')}"
+            headers['Authorization'] = f"Bearer {token}"
 
         print(f"API REQUEST: {method} {url} with headers: {headers} and params: {params}")
 
         try:
             if method == 'GET':
-                response = requests.get(url, headers=headers, params=params, timeout=(5, 30))
+                response = http_session.get(url, headers=headers, params=params, timeout=(5, 30))
             elif method == 'POST':
-                response = requests.post(url, headers=headers, json=data, timeout=(5, 30))
+                response = http_session.post(url, headers=headers, json=data, timeout=(5, 30))
             elif method == 'PUT':
-                response = requests.put(url, headers=headers, json=data, timeout=(5, 30))
+                response = http_session.put(url, headers=headers, json=data, timeout=(5, 30))
             elif method == 'DELETE':
-                response = requests.delete(url, headers=headers, timeout=(5, 30))
+                response = http_session.delete(url, headers=headers, timeout=(5, 30))
 
 
             if response.status_code == 401:
-                session.clear()
-                flash('Sessão expirada. Faça login novamente.', 'warning')
-                return None
+                return None, ('Sessão expirada. Faça login novamente.', 'warning', True)
 
             print(f"Response status: {response.status_code}")
             response.raise_for_status()
             data = response.json()
             print(f"API Data received: {type(data)} - {len(data) if isinstance(data, list) else 'object with keys:' + str(list(data.keys()) if isinstance(data, dict) else '')}")
-            return data
+            return data, None
             
         except requests.exceptions.Timeout as e:
-            flash(f'Timeout na comunicação com a API (>30s): Verifique a conexão com o banco de dados', 'warning')
-            return None
+            return None, ('Timeout na comunicação com a API (>30s): Verifique a conexão com o banco de dados', 'warning', False)
         except requests.exceptions.ConnectionError as e:
-            flash(f'Erro de conexão com a API: Verifique se o backend está rodando na porta 8005', 'danger')
-            return None
+            return None, ('Erro de conexão com a API: Verifique se o backend está rodando na porta 8005', 'danger', False)
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 404:
                 print(f"Recurso não encontrado: {url}")
-                return None
+                return None, None
             elif e.response.status_code == 422:
                 try:
                     error_detail = e.response.json()
@@ -206,20 +203,102 @@ def create_app():
                             errors.append(f"{field}: {message}")
                         error_message = '; '.join(errors)
                         print(f"[VALIDATION] Field errors: {error_message}")
-                        flash(f'Erro de validação: {error_message}', 'warning')
-                    else:
-                        flash('Erro de validação de dados', 'warning')
+                        return None, (f'Erro de validação: {error_message}', 'warning', False)
+                    return None, ('Erro de validação de dados', 'warning', False)
                 except:
-                    flash('Erro de validação de dados', 'warning')
-                return None
+                    return None, ('Erro de validação de dados', 'warning', False)
             else:
                 print(f"Erro HTTP {e.response.status_code}: {e.response.text}")
-                flash(f'Erro na comunicação com a API: {e.response.status_code}', 'danger')
-                return None
+                try:
+                    detalhe = e.response.json().get('detail')
+                except (ValueError, AttributeError):
+                    detalhe = None
+                if isinstance(detalhe, str) and e.response.status_code < 500:
+                    return None, (detalhe, 'warning', False)
+                return None, (f'Erro na comunicação com a API: {e.response.status_code}', 'danger', False)
         except requests.exceptions.RequestException as e:
             print(f"Erro de comunicação: {str(e)}")
-            flash(f'Erro na comunicação com a API: {str(e)}', 'danger')
+            return None, (f'Erro na comunicação com a API: {str(e)}', 'danger', False)
+
+    def _aplicar_aviso(aviso):
+        """Mostra o aviso de ``_api_call`` (e encerra a sessão expirada) na thread do request"""
+        mensagem, categoria, sessao_expirada = aviso
+        if sessao_expirada:
+            session.clear()
+        flash(mensagem, categoria)
+
+    def api_request(endpoint, method='GET', data=None, params=None):
+        """Fazer requisições para a API"""
+        dados, aviso = _api_call(endpoint, method, data, params, token=session.get('access_token', ''))
+        if aviso:
+            _aplicar_aviso(aviso)
+        return dados
+
+    def api_request_many(calls, deadline=None):
+        """
+        Faz várias requisições GET independentes em paralelo.
+
+        ``calls`` é {chave: endpoint} ou {chave: (endpoint, params)}; retorna
+        {chave: dados}. Chamadas com erro ou fora do prazo retornam None. Os
+        workers não tocam na sessão: avisos e expiração de sessão são
+        aplicados uma vez, aqui, depois que todas as chamadas terminam.
+        """
+        from functools import partial
+        from .utils.fanout import run_many
+
+        token = session.get('access_token', '')
+        tasks = {}
+        for key, spec in calls.items():
+            endpoint, params = (spec, None) if isinstance(spec, str) else spec
+            tasks[key] = partial(_api_call, endpoint, params=params, token=token)
+        respostas = run_many(tasks, deadline=deadline, default=(None, None))
+
+        avisos = []
+        for _dados, aviso in respostas.values():
+            if aviso and aviso not in avisos:
+                avisos.append(aviso)
+        for aviso in avisos:
+            _aplicar_aviso(aviso)
+        return {key: dados for key, (dados, _aviso) in respostas.items()}
+
+    def api_stream_response(endpoint, params=None):
+        """
+        Repassa ao navegador uma resposta da API em streaming (ex.: exportações CSV),
+        sem carregar o conteúdo em memória. Retorna None em caso de erro.
+        """
+        from flask import stream_with_context
+
+        url = f"{app.config['API_BASE_URL']}{endpoint}"
+        headers = {'Authorization': f"Bearer {session.get('access_token', '')}"}
+        try:
+            upstream = http_session.get(url, headers=headers, params=params, stream=True, timeout=(5, 60))
+        except requests.exceptions.RequestException as e:
+            flash(f'Erro de conexão com a API: {str(e)}', 'danger')
+            return None
+
+        if upstream.status_code == 401:
+            upstream.close()
+            session.clear()
+            flash('Sessão expirada. Faça login novamente.', 'warning')
             return None
+        if upstream.status_code >= 400:
+            upstream.close()
+            flash(f'Erro ao exportar dados: HTTP {upstream.status_code}', 'danger')
+            return None
+
+        def repassar():
+            try:
+                for chunk in upstream.iter_content(chunk_size=64 * 1024):
+                    if chunk:
+                        yield chunk
+            finally:
+                upstream.close()
+
+        response = Response(stream_with_context(repassar()),
+                            content_type=upstream.headers.get('Content-Type', 'application/octet-stream'))
+        if upstream.headers.get('Content-Disposition'):
+            response.headers['Content-Disposition'] = upstream.headers['Content-Disposition']
+        return response
 
     def auto_login():
         """Realizar login automático usando credenciais configuradas"""
@@ -354,7 +433,7 @@ def create_app():
         try:
             # Testar endpoint de health sem autenticação
             import requests
-            response = requests.get(f"{app.config['API_BASE_URL']}/health", timeout=(3, 10))
+            response = http_session.get(f"{app.config['API_BASE_URL']}/health", timeout=(3, 10))
 
             if response.status_code == 200:
                 data = response.json()
@@ -375,8 +454,7 @@ def create_app():
     def api_status():
         """Endpoint JSON para verificar status da API"""
         try:
-            import requests
-            response = requests.get(f"{app.config['API_BASE_URL']}/health", timeout=(2, 5))
+            response = http_session.get(f"{app.config['API_BASE_URL']}/health", timeout=(2, 5))
 
             if response.status_code == 200:
                 api_data = response.json()
@@ -402,6 +480,15 @@ def create_app():
                 "timestamp": datetime.now().isoformat()
             }), 503
 
+    @app.route('/api/status/latency')
+    @role_required(['admin', 'gestor'])
+    def api_latency_stats():
+        """Contadores de latência das chamadas dashboard -> API, por endpoint"""
+        return jsonify({
+            "endpoints": get_latency_stats(),
+            "timestamp": datetime.now().isoformat()
+        })
+
     # ==============================
     # DASHBOARD PRINCIPAL
     # ==============================
@@ -512,24 +599,25 @@ def create_app():
                 kpis_params['veiculo_id'] = veiculo_id
             logger.info(f"Fazendo chamada API com parâmetros: {kpis_params}")
 
-            try:
-                kpis_data = api_request('/api/v1/checklist/stats/resumo', params=kpis_params)
-                logger.info(f"Dados KPIs recebidos: {type(kpis_data)} - {bool(kpis_data)}")
-            except Exception as e:
-                logger.error(f"Erro na chamada API KPIs: {e}")
-                kpis_data = None
+            # Chamadas independentes em paralelo (latência = a mais lenta, não a soma)
+            respostas = api_request_many({
+                'kpis': ('/api/v1/dashboard/kpis', kpis_params),
+                'veiculos': '/api/v1/vehicles',
+                'top_itens': ('/api/v1/metrics/top-itens-reprovados', {'dias': days}),
+                'performance': ('/api/v1/metrics/performance-motoristas', {'dias': days}),
+                'bloqueios': ('/api/v1/checklist/bloqueios', {'dias': 7}),
+                'health': '/health',
+            })
+
+            kpis_data = respostas.get('kpis') or {}
+            logger.info(f"Dados KPIs recebidos: {type(kpis_data)} - {bool(kpis_data)}")
 
             # Buscar veículos inativos para "placas bloqueadas"
             logger.info("Iniciando busca de veículos inativos...")
             vehicles_response = None
             if kpis_data:
-                logger.info("Fazendo chamada API para veículos...")
-                try:
-                    vehicles_response = api_request('/api/v1/vehicles')
-                    logger.info(f"Resposta de veículos: {type(vehicles_response)} - {bool(vehicles_response)}")
-                except Exception as e:
-                    logger.error(f"Erro na chamada API de veículos: {e}")
-                    vehicles_response = None
+                vehicles_response = respostas.get('veiculos')
+                logger.info(f"Resposta de veículos: {type(vehicles_response)} - {bool(vehicles_response)}")
             placas_bloqueadas = []
 
             if vehicles_response:
@@ -547,42 +635,10 @@ def create_app():
             # Adicionar placas bloqueadas aos KPIs
             kpis_data['placas_bloqueadas'] = placas_bloqueadas
 
-            # Calcular análises rápidas
-            # 1. Checklists realizados em menos de 1min 30s
-            checklists_response = api_request('/api/v1/checklist', params=kpis_params)
-            checklists_rapidos = 0
-            total_checklists = 0
-            colaboradores_unicos = set()
-            total_duracao_segundos = 0
-
-            if checklists_response and 'checklists' in checklists_response:
-                checklists = checklists_response['checklists']
-                total_checklists = len(checklists)
-
-                for checklist in checklists:
-                    # Contar colaboradores únicos
-                    if checklist.get('motorista_id'):
-                        colaboradores_unicos.add(checklist['motorista_id'])
-
-                    # Calcular duração do checklist se tiver dt_inicio e dt_fim
-                    if checklist.get('dt_inicio') and checklist.get('dt_fim'):
-                        try:
-                            from datetime import datetime
-                            inicio = datetime.fromisoformat(checklist['dt_inicio'].replace('Z', '+00:00'))
-                            fim = datetime.fromisoformat(checklist['dt_fim'].replace('Z', '+00:00'))
-                            duracao_segundos = (fim - inicio).total_seconds()
-                            total_duracao_segundos += duracao_segundos
-
-                            # Checklist realizado em menos de 1min 30s (90 segundos)
-                            if duracao_segundos < 90:
-                                checklists_rapidos += 1
-                        except:
-                            pass
-
-            # Calcular métricas
-            kpis_data['checklists_rapidos'] = checklists_rapidos
-            kpis_data['colaboradores_ativos'] = len(colaboradores_unicos)
-            kpis_data['media_checklists_dia'] = total_checklists / days if days > 0 else 0
+            # Garantir chaves usadas pelo template quando a API não responde
+            for chave in ('total_checklists', 'aprovados', 'reprovados', 'taxa_aprovacao',
+                          'checklists_rapidos', 'colaboradores_ativos', 'media_checklists_dia'):
+                kpis_data.setdefault(chave, 0)
 
             # Calcular métricas de multas
             try:
@@ -599,12 +655,8 @@ def create_app():
 
             # Buscar dados para gráficos
             logger.info("Buscando dados de top itens reprovados...")
-            try:
-                top_itens_response = api_request('/api/v1/metrics/top-itens-reprovados', params={'dias': days})
-                logger.info(f"Resposta top itens: {type(top_itens_response)} - {bool(top_itens_response)}")
-            except Exception as e:
-                logger.error(f"Erro ao buscar top itens: {e}")
-                top_itens_response = None
+            top_itens_response = respostas.get('top_itens')
+            logger.info(f"Resposta top itens: {type(top_itens_response)} - {bool(top_itens_response)}")
             if isinstance(top_itens_response, dict):
                 top_itens = top_itens_response.get('itens_reprovados', [])
             elif isinstance(top_itens_response, list):
@@ -614,12 +666,8 @@ def create_app():
             logger.info(f"Top itens processados: {len(top_itens) if top_itens else 0}")
 
             logger.info("Buscando dados de performance de motoristas...")
-            try:
-                performance_response = api_request('/api/v1/metrics/performance-motoristas', params={'dias': days})
-                logger.info(f"Resposta performance: {type(performance_response)} - {bool(performance_response)}")
-            except Exception as e:
-                logger.error(f"Erro ao buscar performance: {e}")
-                performance_response = None
+            performance_response = respostas.get('performance')
+            logger.info(f"Resposta performance: {type(performance_response)} - {bool(performance_response)}")
 
             if isinstance(performance_response, dict):
                 performance_motoristas = performance_response.get('motoristas', [])
@@ -630,12 +678,8 @@ def create_app():
             logger.info(f"Performance motoristas: {len(performance_motoristas) if performance_motoristas else 0}")
 
             logger.info("Buscando dados de bloqueios...")
-            try:
-                bloqueios_response = api_request('/api/v1/checklist/bloqueios', params={'dias': 7})
-                logger.info(f"Resposta bloqueios: {type(bloqueios_response)} - {bool(bloqueios_response)}")
-            except Exception as e:
-                logger.error(f"Erro ao buscar bloqueios: {e}")
-                bloqueios_response = None
+            bloqueios_response = respostas.get('bloqueios')
+            logger.info(f"Resposta bloqueios: {type(bloqueios_response)} - {bool(bloqueios_response)}")
 
             if isinstance(bloqueios_response, dict):
                 bloqueios = bloqueios_response.get('bloqueios', [])
@@ -647,24 +691,15 @@ def create_app():
 
             # Buscar veículos para filtro
             logger.info("Buscando lista de veículos...")
-            try:
-                veiculos = api_request('/api/v1/vehicles') or []
-                logger.info(f"Veículos encontrados: {len(veiculos) if veiculos else 0}")
-            except Exception as e:
-                logger.error(f"Erro ao buscar veículos: {e}")
-                veiculos = []
+            veiculos = respostas.get('veiculos') or []
+            logger.info(f"Veículos encontrados: {len(veiculos) if veiculos else 0}")
 
             # Buscar dados de saúde da API
             logger.info("Buscando dados de saúde da API...")
-            try:
-                health_data = api_request('/health')
-                if not health_data:
-                    health_data = {"status": "error", "database": "disconnected"}
-                logger.info(f"Health data: {health_data}")
-            except Exception as e:
-                logger.error(f"Erro ao buscar health: {e}")
-                print(f"Erro ao buscar health: {e}")
+            health_data = respostas.get('health')
+            if not health_data:
                 health_data = {"status": "error", "database": "disconnected"}
+            logger.info(f"Health data: {health_data}")
 
             # Gerar alertas de exemplo com proteção extra contra KeyError
             logger.info("Gerando alertas de exemplo...")
@@ -1127,7 +1162,6 @@ def create_app():
     def ui_checklist_answer():
         """Save checklist answers - direct implementation"""
         body = request.get_json() or {}
-        import requests
         try:
             checklist_id = body.get('checklist_id')
             respostas = body.get('respostas', [])
@@ -1140,7 +1174,7 @@ def create_app():
                     "valor": resposta.get('valor'),
                     "observacao": resposta.get('observacao', '')
                 }
-                resp = requests.post("http://localhost:8005/checklist/answer", json=data, timeout=10)
+                resp = http_session.post("http://localhost:8005/checklist/answer", json=data, timeout=10)
                 if resp.status_code == 200:
                     results.append(resp.json())
                 else:
@@ -1157,7 +1191,6 @@ def create_app():
     def ui_checklist_approve(checklist_id):
         """Approve checklist"""
         body = request.get_json() or {}
-        import requests
         try:
             # Incluir token de autenticação
             headers = {
@@ -1168,7 +1201,7 @@ def create_app():
             # Adicionar action="aprovar" ao body
             body["action"] = "aprovar"
 
-            resp = requests.post(
+            resp = http_session.post(
                 f"http://localhost:8005/api/v1/checklist/{checklist_id}/approve",
                 json=body,
                 headers=headers,
@@ -1203,7 +1236,6 @@ def create_app():
     def ui_checklist_reject(checklist_id):
         """Reject checklist"""
         body = request.get_json() or {}
-        import requests
         try:
             # Incluir token de autenticação
             headers = {
@@ -1214,7 +1246,7 @@ def create_app():
             # Modificar o body para incluir action="reprovar"
             body["action"] = "reprovar"
 
-            resp = requests.post(
+            resp = http_session.post(
                 f"http://localhost:8005/api/v1/checklist/{checklist_id}/approve",
                 json=body,
                 headers=headers,
@@ -1260,7 +1292,7 @@ def create_app():
             print(f"Making request to checklist {checklist_id} with token: {session.get('access_token')[:10] if session.get('access_token') else 'None'}...")
 
             # Buscar dados do checklist
-            response = requests.get(
+            response = http_session.get(
                 f"http://localhost:8005/api/v1/checklist/{checklist_id}",
                 headers=headers,
                 timeout=20
@@ -1281,21 +1313,21 @@ def create_app():
             checklist_data = response.json()
 
             # Buscar veículos e motoristas para seleção
-            veiculos_response = requests.get(
+            veiculos_response = http_session.get(
                 "http://localhost:8005/api/v1/vehicles",
                 headers=headers,
                 timeout=20
             )
             veiculos = veiculos_response.json() if veiculos_response.status_code == 200 else []
 
-            motoristas_response = requests.get(
+            motoristas_response = http_session.get(
                 "http://localhost:8005/api/v1/drivers",
                 headers=headers,
                 timeout=20
             )
             motoristas = motoristas_response.json() if motoristas_response.status_code == 200 else []
 
-            modelos_response = requests.get(
+            modelos_response = http_session.get(
                 "http://localhost:8005/api/v1/checklist/modelos",
                 headers=headers,
                 timeout=20
@@ -1335,7 +1367,7 @@ def create_app():
             }
 
             # Fazer chamada para API de atualização
-            response = requests.patch(
+            response = http_session.patch(
                 f"http://localhost:8005/api/v1/checklist/{checklist_id}",
                 json=data,
                 headers=headers,
@@ -1367,7 +1399,7 @@ def create_app():
             if session.get('access_token'):
                 headers['Authorization'] = f"Bearer {session.get('access_token')}"
 
-            response = requests.patch(
+            response = http_session.patch(
                 f"http://localhost:8005/api/v1/checklist/{checklist_id}/items/batch",
                 json=data,
                 headers=headers,
@@ -1401,8 +1433,7 @@ def create_app():
             data = request.get_json() or {}
 
             # Call API to finish checklist
-            import requests
-            response = requests.post(
+            response = http_session.post(
                 f"http://localhost:8005/api/v1/checklist/{checklist_id}/finish",
                 json={"odometro_fim": data.get("odometro_fim")},
                 timeout=20
@@ -1570,7 +1601,6 @@ def create_app():
                 print("⚠️  psycopg2 não instalado, tentando via REST API...")
 
                 # Fallback para REST API (código anterior)
-                import requests
                 supabase_url = os.getenv('SUPABASE_URL')
                 supabase_key = os.getenv('SUPABASE_ANON_KEY')
 
@@ -1582,7 +1612,7 @@ def create_app():
                     }
 
                     url = f'{supabase_url}/rest/v1/veiculos?ativo=eq.true&select=*'
-                    response = requests.get(url, headers=headers, timeout=10)
+                    response = http_session.get(url, headers=headers, timeout=10)
 
                     if response.status_code == 200:
                         veiculos_data = response.json()
@@ -1718,246 +1748,40 @@ def create_app():
             return []
 
     def generate_maintenance_plans():
-        """Busca planos de manutenção do banco de dados"""
+        """Busca planos de manutenção do banco de dados (com cache em processo)"""
         try:
-            # Buscar planos reais do Supabase
-            import psycopg2
-            database_url = os.getenv('DATABASE_URL')
+            from .db_pool import get_connection
+            from .maintenance_plans import obter_planos
 
-            # Conectar com configurações UTF-8
-            conn = psycopg2.connect(database_url, client_encoding='utf8')
-            cursor = conn.cursor()
-
-            # Buscar planos com seus itens
-            cursor.execute('''
-                SELECT p.id, p.codigo, p.descricao, p.ativo, p.repeticao, p.quando, p.observacoes,
-                       p.criado_em
-                FROM planos_manutencao p
-                WHERE p.ativo = true
-                ORDER BY p.criado_em DESC
-            ''')
-
-            planos_data = cursor.fetchall()
-            planos = []
-
-            for plano_row in planos_data:
-                plano_id = plano_row[0]
-
-                # Buscar itens do plano
-                cursor.execute('''
-                    SELECT id, descricao, tipo, controle_por, intervalo_valor, km_inicial,
-                           alerta_antecipacao, alerta_tolerancia, ordem
-                    FROM planos_manutencao_itens
-                    WHERE plano_id = %s AND ativo = true
-                    ORDER BY ordem
-                ''', (plano_id,))
-
-                itens_data = cursor.fetchall()
-                itens = []
-
-                for item_row in itens_data:
-                    controle_por = item_row[3]
-                    intervalo_valor = item_row[4] or 0
-                    km_inicial = item_row[5] or 0
-
-                    # Formatear o campo "quando" para exibição
-                    if controle_por and intervalo_valor:
-                        unidade = "km" if controle_por.lower() == "km" else f"{controle_por}"
-                        if km_inicial > 0:
-                            quando_texto = f"A cada {intervalo_valor:,.2f} {unidade} a partir de {km_inicial:,.2f} {unidade}"
-                        else:
-                            quando_texto = f"A cada {intervalo_valor:,.2f} {unidade}"
-                    else:
-                        quando_texto = "Não definido"
-
-                    item = {
-                        "id": item_row[0],
-                        "descricao": item_row[1],
-                        "tipo": item_row[2],
-                        "controle_por": controle_por,
-                        "intervalo_valor": intervalo_valor,
-                        "km_inicial": km_inicial,
-                        "alerta_antecipacao": item_row[6] or 0,
-                        "alerta_tolerancia": item_row[7] or 0,
-                        "ordem": item_row[8],
-                        "quando": quando_texto
-                    }
-                    itens.append(item)
-
-                # Buscar veículos vinculados
-                cursor.execute('''
-                    SELECT v.id, v.placa
-                    FROM veiculos_planos_manutencao vpm
-                    JOIN veiculos v ON vpm.veiculo_id = v.id
-                    WHERE vpm.plano_id = %s AND vpm.ativo = true AND v.ativo = true
-                ''', (plano_id,))
-
-                veiculos_data = cursor.fetchall()
-                veiculos_vinculados = [{"id": v[0], "placa": v[1]} for v in veiculos_data]
-
-                plano = {
-                    "id": plano_row[0],
-                    "codigo": plano_row[1],
-                    "descricao": plano_row[2],
-                    "ativo": plano_row[3],
-                    "repeticao": plano_row[4] or "Definida nos itens",
-                    "quando": plano_row[5] or "Definida nos itens",
-                    "observacoes": plano_row[6] or "",
-                    "tipos_equipamento": [],  # TODO: implementar depois
-                    "veiculos_vinculados": veiculos_vinculados,
-                    "itens": itens,
-                    "criado_em": plano_row[7]
-                }
-                planos.append(plano)
-
-            conn.close()
-
-            return planos
+            return obter_planos(get_connection)
         except Exception as e:
             print(f"Erro ao buscar planos de manutenção: {str(e)}")
             return []
 
-    def calcular_km_restante_real(veiculo_id, item_manutencao):
-        """Calcula km restante baseado em dados reais do veículo"""
-        try:
-            import psycopg2
-            database_url = os.getenv('DATABASE_URL')
-            conn = psycopg2.connect(database_url, client_encoding='utf8')
-            cursor = conn.cursor()
-
-            # Buscar km atual do veículo
-            cursor.execute('SELECT km_atual FROM veiculos WHERE id = %s', (veiculo_id,))
-            result = cursor.fetchone()
-            km_atual = result[0] if result and result[0] else 0
+    def generate_maintenance_alerts(status=None):
+        """
+        Alertas de manutenção a partir do estado mantido pela API
+        (manutencoes_controle); ``status`` filtra pelos status de página
+        """
+        from .maintenance_alerts import STATUS_CONTROLE, calcular_alertas, gerar_alertas
 
-            # Buscar última leitura de odômetro dos checklists (mais recente)
-            cursor.execute('''
-                SELECT MAX(GREATEST(COALESCE(odometro_ini, 0), COALESCE(odometro_fim, 0))) as ultimo_km
-                FROM checklists
-                WHERE veiculo_id = %s
-                AND (odometro_ini IS NOT NULL OR odometro_fim IS NOT NULL)
-            ''', (veiculo_id,))
-
-            checklist_result = cursor.fetchone()
-            ultimo_km_checklist = checklist_result[0] if checklist_result and checklist_result[0] else 0
-
-            # Usar o maior valor entre km_atual da tabela veiculos e checklists
-            km_veiculo_atual = max(km_atual, ultimo_km_checklist)
-
-            # Se não temos dados de km, simular
-            if km_veiculo_atual <= 0:
-                import random
-                return random.randint(5000, 30000)
-
-            # Buscar se existe histórico de manutenção deste item para este veículo
-            # Por enquanto, vamos assumir que nunca foi feita manutenção deste item
-            # Em um sistema completo, haveria uma tabela historico_manutencoes
-            ultima_manutencao_km = item_manutencao.get('km_inicial', 0)
-            intervalo_km = item_manutencao.get('intervalo_valor', 15000)
-
-            # Calcular quantos km se passaram desde a última manutenção
-            km_desde_ultima_manutencao = km_veiculo_atual - ultima_manutencao_km
-
-            # Calcular km restante até a próxima manutenção
-            km_restante = intervalo_km - (km_desde_ultima_manutencao % intervalo_km)
-
-            conn.close()
-            return max(km_restante, 0)  # Não retornar valores negativos
-
-        except Exception as e:
-            print(f"Erro ao calcular km restante: {str(e)}")
-            # Fallback para simulação em caso de erro
-            import random
-            return random.randint(5000, 30000)
-
-    def estimar_dias_para_manutencao(km_restante):
-        """Estima quantos dias faltam baseado em km restante"""
-        # Assumir média de 100 km/dia (pode ser configurável por frota)
-        km_por_dia = 100
-        if km_restante <= 0:
-            return 0
-        return max(1, int(km_restante / km_por_dia))
-
-    def generate_maintenance_alerts():
-        """Busca alertas de manutenção baseados nos dados reais do banco"""
         try:
-            # Tentar buscar alertas da API primeiro
-            alertas_response = api_request('/api/v1/maintenance/alerts-data')
-            if alertas_response and isinstance(alertas_response, list):
-                return alertas_response
-
-            # Se API não disponível, calcular alertas baseados nos planos reais
-            alertas = []
-            planos = generate_maintenance_plans()
-
-            if not planos:
-                return []
-
-            alert_id = 1
-            now = datetime.now()
-
-            # Para cada plano de manutenção
-            for plano in planos:
-                if not plano.get('ativo', True):
-                    continue
-
-                veiculos_vinculados = plano.get('veiculos_vinculados', [])
-                itens = plano.get('itens', [])
-
-                # Para cada veículo vinculado ao plano
-                for veiculo in veiculos_vinculados:
-                    # Para cada item de manutenção
-                    for item in itens:
-                        if not item.get('intervalo_valor') or item.get('intervalo_valor') <= 0:
-                            continue
-
-                        # Calcular km restante baseado em dados reais do veículo
-                        km_restante = calcular_km_restante_real(veiculo.get('id'), item)
-                        dias_previsao = estimar_dias_para_manutencao(km_restante)
-
-                        # Determinar status baseado na quilometragem restante
-                        if km_restante <= 2000:
-                            status = "vencida"
-                            alerta_texto = f"Vencida há {abs(km_restante - 2000)} km"
-                            dias_atraso = max(1, abs(dias_previsao))
-                            previsao_data = (now - timedelta(days=dias_atraso)).strftime("%d/%m/%Y")
-                        elif km_restante <= 5000:
-                            status = "urgente"
-                            alerta_texto = f"Faltam {km_restante} km(s)"
-                            previsao_data = (now + timedelta(days=dias_previsao)).strftime("%d/%m/%Y")
-                        else:
-                            status = "previsto"
-                            alerta_texto = f"Faltam {km_restante} km(s)"
-                            previsao_data = (now + timedelta(days=dias_previsao)).strftime("%d/%m/%Y")
-
-                        alerta = {
-                            "id": alert_id,
-                            "tipo_equipamento": "VEÍCULO",  # Ajustar conforme tipo real
-                            "equipamento": veiculo.get('placa', 'N/A'),
-                            "plano": plano.get('descricao', 'Plano sem nome'),
-                            "item": item.get('descricao', 'Item sem descrição'),
-                            "alerta": alerta_texto,
-                            "previsao": previsao_data,
-                            "status": status
-                        }
-                        alertas.append(alerta)
-                        alert_id += 1
-
-                        # Limitar número de alertas para não sobrecarregar
-                        if len(alertas) >= 20:
-                            break
-
-                    if len(alertas) >= 20:
-                        break
-
-                if len(alertas) >= 20:
-                    break
+            from .db_pool import get_connection
 
-            return alertas
+            with get_connection() as conn:
+                return gerar_alertas(conn, status=status)
+        except Exception as e:
+            print(f"Erro ao ler estado de manutenção no banco: {str(e)}")
 
+        try:
+            # Banco indisponível: mesmo estado lido pela API
+            params = {'status': ','.join(STATUS_CONTROLE.get(s, s) for s in status)} if status else None
+            estado = api_request('/api/v1/maintenance/estado', params=params)
+            if estado and isinstance(estado, list):
+                return calcular_alertas(estado)
         except Exception as e:
             print(f"Erro ao gerar alertas de manutenção: {str(e)}")
-            return []
+        return []
 
     def generate_fines_data():
         """Gera dados de multas para relatórios"""
@@ -2154,6 +1978,7 @@ def create_app():
             item_categories = request.form.getlist('item_categoria[]')
             item_controls = request.form.getlist('item_controle[]')
             item_intervals = request.form.getlist('item_intervalo[]')
+            item_ids = request.form.getlist('item_id[]')
 
             for i in range(len(item_descriptions)):
                 if item_descriptions[i]:  # Se descrição não está vazia
@@ -2164,6 +1989,7 @@ def create_app():
                         intervalo_valor = 0
 
                     plan_data['itens'].append({
+                        'id': int(item_ids[i]) if i < len(item_ids) and item_ids[i].isdigit() else None,
                         'descricao': item_descriptions[i],
                         'tipo': item_types[i] if i < len(item_types) else 'Troca',
                         'categoria': item_categories[i] if i < len(item_categories) else '',
@@ -2173,6 +1999,7 @@ def create_app():
 
             # Salvar no banco de dados
             import psycopg2
+            from .maintenance_plans import invalidar_cache_planos, salvar_itens
             database_url = os.getenv('DATABASE_URL')
             conn = psycopg2.connect(database_url, client_encoding='utf8')
             cursor = conn.cursor()
@@ -2184,9 +2011,6 @@ def create_app():
                         SET descricao = %s, ativo = %s
                         WHERE id = %s
                     ''', (plan_data['descricao'], plan_data['ativo'], plan_data['id']))
-
-                    # Remover itens existentes para evitar conflito de constraint
-                    cursor.execute('DELETE FROM planos_manutencao_itens WHERE plano_id = %s', (plan_data['id'],))
                     plano_id = plan_data['id']
                 else:  # Criar novo plano
                     cursor.execute('''
@@ -2201,20 +2025,8 @@ def create_app():
                     ))
                     plano_id = cursor.fetchone()[0]
 
-                # Inserir itens do plano
-                for i, item in enumerate(plan_data['itens']):
-                    cursor.execute('''
-                        INSERT INTO planos_manutencao_itens
-                        (plano_id, descricao, tipo, controle_por, intervalo_valor, ordem, ativo)
-                        VALUES (%s, %s, %s, %s, %s, %s, true)
-                    ''', (
-                        plano_id,
-                        item['descricao'],
-                        item['tipo'],
-                        item['controle_por'],
-                        item['intervalo_valor'],
-                        i + 1
-                    ))
+                # Itens existentes são atualizados no lugar: preserva o estado de manutenção
+                salvar_itens(cursor, plano_id, plan_data['itens'])
 
                 # Gerenciar vinculação de veículos
                 # Primeiro, remover todas as vinculações existentes para este plano
@@ -2229,6 +2041,10 @@ def create_app():
                         ''', (veiculo_id, plano_id))
 
                 conn.commit()
+                invalidar_cache_planos()
+
+                # Itens/vínculos alterados: recalcular o estado de manutenção
+                api_request('/api/v1/maintenance/estado/recalcular', method='POST', data={'plano_id': plano_id})
 
                 if plan_data['id']:
                     flash('Plano de manutenção atualizado com sucesso!', 'success')
@@ -2271,6 +2087,9 @@ def create_app():
             cursor.execute('DELETE FROM planos_manutencao WHERE id = %s', (plan_id,))
             conn.commit()
 
+            from .maintenance_plans import invalidar_cache_planos
+            invalidar_cache_planos()
+
             cursor.close()
             conn.close()
 
@@ -2378,8 +2197,10 @@ def create_app():
     def maintenance_alerts():
         """Alertas de manutenção vencida"""
         try:
-            alertas = generate_maintenance_alerts()
-            vencidos = [a for a in alertas if a["status"] == "urgente"]
+            from .maintenance_alerts import STATUS_ALERTAS
+
+            alertas = generate_maintenance_alerts(status=STATUS_ALERTAS)
+            vencidos = [a for a in alertas if a["status"] in STATUS_ALERTAS]
             return render_template('maintenance/alerts.html', alertas=vencidos)
         except Exception as e:
             flash(f'Erro ao carregar alertas de manutenção: {str(e)}', 'danger')
@@ -2399,14 +2220,16 @@ def create_app():
             filtro_data = request.args.get('data', '')
 
             # Gerar alertas de manutenção
-            alertas = generate_maintenance_alerts()
+            from .maintenance_alerts import STATUS_PREVISAO
+
+            alertas = generate_maintenance_alerts(status=STATUS_PREVISAO)
 
             # Validar que alertas seja uma lista
             if not isinstance(alertas, list):
                 print(f"Erro: alertas não é uma lista, tipo: {type(alertas)}, valor: {alertas}")
                 alertas = []
 
-            previstos = [a for a in alertas if isinstance(a, dict) and a.get("status") == "previsto"]
+            previstos = [a for a in alertas if isinstance(a, dict) and a.get("status") in STATUS_PREVISAO]
 
             # Buscar todos os planos para os filtros
             planos = generate_maintenance_plans()
@@ -2427,26 +2250,24 @@ def create_app():
                 # Filtrar por equipamento - buscar veículos pelo tipo especificado
                 veiculos_do_tipo = []
                 try:
-                    import psycopg2
-                    database_url = os.getenv('DATABASE_URL')
-                    conn = psycopg2.connect(database_url, client_encoding='utf8')
-                    cursor = conn.cursor()
-
-                    # Buscar por categoria ou tipo
-                    if filtro_equipamento == 'CAVALOMECANICO':
-                        cursor.execute('''
-                            SELECT placa FROM veiculos
-                            WHERE UPPER(categoria) LIKE '%CAVALO%' OR UPPER(modelo) LIKE '%CAVALO%'
-                        ''')
-                    else:
-                        cursor.execute('''
-                            SELECT placa FROM veiculos
-                            WHERE UPPER(categoria) = %s OR UPPER(modelo) LIKE %s OR UPPER(tipo) LIKE %s
-                        ''', (filtro_equipamento.upper(), f'%{filtro_equipamento.upper()}%', f'%{filtro_equipamento.upper()}%'))
+                    from .db_pool import get_connection
+                    with get_connection() as conn:
+                        cursor = conn.cursor()
+
+                        # Buscar por categoria ou tipo
+                        if filtro_equipamento == 'CAVALOMECANICO':
+                            cursor.execute('''
+                                SELECT placa FROM veiculos
+                                WHERE UPPER(categoria) LIKE '%CAVALO%' OR UPPER(modelo) LIKE '%CAVALO%'
+                            ''')
+                        else:
+                            cursor.execute('''
+                                SELECT placa FROM veiculos
+                                WHERE UPPER(categoria) = %s OR UPPER(modelo) LIKE %s OR UPPER(tipo) LIKE %s
+                            ''', (filtro_equipamento.upper(), f'%{filtro_equipamento.upper()}%', f'%{filtro_equipamento.upper()}%'))
 
-                    veiculos_do_tipo = [row[0] for row in cursor.fetchall()]
-                    cursor.close()
-                    conn.close()
+                        veiculos_do_tipo = [row[0] for row in cursor.fetchall()]
+                        cursor.close()
                     print(f"Veículos do tipo {filtro_equipamento}: {veiculos_do_tipo}")
                 except Exception as e:
                     print(f"Erro ao buscar veículos por tipo: {e}")
@@ -2545,23 +2366,15 @@ def create_app():
 
             km_atual = int(km_atual.replace(',', '').replace('.', ''))
 
-            # Atualizar na tabela veículos
-            import psycopg2
-            database_url = os.getenv('DATABASE_URL')
-            conn = psycopg2.connect(database_url, client_encoding='utf8')
-            cursor = conn.cursor()
-
-            cursor.execute('''
-                UPDATE veiculos
-                SET km_atual = %s
-                WHERE id = %s
-            ''', (km_atual, veiculo_id))
-
-            conn.commit()
-            cursor.close()
-            conn.close()
-
-            flash('Odômetro atualizado com sucesso!', 'success')
+            # Leitura manual passa pela ingestão da API (histórico + km_atual, sem regressão)
+            response = api_request(
+                f'/api/v1/vehicles/{veiculo_id}/odometro',
+                method='POST',
+                data={'km': km_atual, 'observacoes': observacoes or None},
+            )
+            # Em caso de erro, api_request já exibiu o motivo retornado pela API
+            if response:
+                flash('Odômetro atualizado com sucesso!', 'success')
             return redirect(url_for('vehicles_odometer'))
 
         except Exception as e:
@@ -2582,513 +2395,122 @@ def create_app():
     @app.route('/reports/checklists/csv')
     @login_required
     def export_checklists_csv():
-        """Exportar checklists para CSV"""
-        # Buscar dados
-        params = dict(request.args)
-        params['limit'] = 1000  # Limite maior para exportação
-        
-        checklists = api_request('/api/v1/checklist', params=params) or []
-        
-        # Criar CSV
-        output = StringIO()
-        writer = csv.writer(output)
-        
-        # Cabeçalhos
-        headers = [
-            'ID', 'Código', 'Veículo', 'Motorista', 'Tipo', 'Status',
-            'Data Início', 'Data Fim', 'Score', 'Itens OK', 'Itens NOK',
-            'Tem Bloqueios', 'Observações'
-        ]
-        writer.writerow(headers)
-        
-        # Dados
-        for checklist in checklists:
-            row = [
-                checklist.get('id', ''),
-                checklist.get('codigo', ''),
-                checklist.get('veiculo_placa', ''),
-                checklist.get('motorista_nome', ''),
-                checklist.get('tipo', ''),
-                checklist.get('status', ''),
-                checklist.get('dt_inicio', ''),
-                checklist.get('dt_fim', ''),
-                checklist.get('score_aprovacao', ''),
-                checklist.get('itens_ok', 0),
-                checklist.get('itens_nok', 0),
-                'Sim' if checklist.get('tem_bloqueios') else 'Não',
-                checklist.get('observacoes_gerais', '')
-            ]
-            writer.writerow(row)
-        
-        # Preparar resposta
-        output.seek(0)
-        response = make_response(output.getvalue())
-        response.headers['Content-Type'] = 'text/csv; charset=utf-8'
-        response.headers['Content-Disposition'] = f'attachment; filename=checklists_{datetime.now().strftime("%Y%m%d_%H%M")}.csv'
-        
+        """Exportar checklists para CSV (streaming a partir da API, sem limite de linhas)"""
+        params = {k: v for k, v in request.args.items() if v}
+        response = api_stream_response('/api/v1/checklist/export.csv', params=params)
+        if response is None:
+            return redirect(request.referrer or url_for('reports'))
         return response
 
+    def enfileirar_relatorio(tipo, carregar, renderizar, nome_arquivo, mimetype, voltar, contexto=None):
+        """
+        Envia o relatório para a fila de geração. Se ficar pronto em poucos
+        segundos o arquivo é devolvido direto; senão o usuário acompanha o job.
+        """
+        from . import report_jobs
+
+        try:
+            job_id = report_jobs.submeter(tipo, carregar, renderizar, nome_arquivo, mimetype,
+                                          dono=session.get('user_id'), contexto=contexto)
+        except report_jobs.FilaRelatoriosCheia:
+            flash('Muitos relatórios em geração no momento. Tente novamente em instantes.', 'warning')
+            return redirect(voltar)
+
+        job = report_jobs.aguardar(job_id, report_jobs.REPORT_INLINE_WAIT)
+        if job and job['status'] == 'concluido':
+            return enviar_relatorio(job)
+        if job and job['status'] == 'erro':
+            flash(f"Erro ao gerar relatório: {job.get('erro')}", 'error')
+            return redirect(voltar)
+        return redirect(url_for('report_job_status', job_id=job_id))
+
+    def enviar_relatorio(job):
+        return send_file(job['arquivo'], mimetype=job['mimetype'], as_attachment=True,
+                         download_name=job['nome_arquivo'], max_age=0)
+
+    def job_do_usuario(job_id):
+        from . import report_jobs
+
+        job = report_jobs.consultar(job_id)
+        if not job or job.get('dono') != session.get('user_id'):
+            abort(404)
+        return job
+
+    @app.route('/reports/jobs/<job_id>')
+    @login_required
+    def report_job_status(job_id):
+        """Acompanhamento de um relatório na fila (HTML ou JSON com ?formato=json)"""
+        job = job_do_usuario(job_id)
+        situacao = {
+            'id': job['id'],
+            'status': job['status'],
+            'nome_arquivo': job['nome_arquivo'],
+            'erro': job.get('erro'),
+            'download_url': url_for('report_job_download', job_id=job_id) if job['status'] == 'concluido' else None,
+        }
+        if request.args.get('formato') == 'json':
+            return jsonify(situacao)
+        return render_template('reports/job_status.html', job=situacao)
+
+    @app.route('/reports/jobs/<job_id>/download')
+    @login_required
+    def report_job_download(job_id):
+        """Download do arquivo gerado por um job concluído"""
+        job = job_do_usuario(job_id)
+        if job['status'] != 'concluido':
+            return redirect(url_for('report_job_status', job_id=job_id))
+        return enviar_relatorio(job)
+
     @app.route('/reports/checklists/pdf')
     @login_required
     def export_checklists_pdf():
-        """Exportar checklists para PDF"""
-        # Buscar dados
-        params = dict(request.args)
-        params['limit'] = 100  # Limite para PDF
-        
-        checklists = api_request('/api/v1/checklist', params=params) or []
-        
-        # Criar PDF
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        elements = []
-        
-        # Estilos
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            spaceAfter=30,
-            alignment=1
+        """Exportar checklists para PDF (gerado na fila de relatórios, sem limite de linhas)"""
+        from functools import partial
+        from . import report_renderers
+
+        return enfileirar_relatorio(
+            'checklists_pdf',
+            partial(report_renderers.carregar_checklists, app.config['API_BASE_URL'],
+                    session.get('access_token', ''), dict(request.args)),
+            report_renderers.pdf_checklists,
+            f'checklists_{datetime.now().strftime("%Y%m%d_%H%M")}.pdf',
+            'application/pdf',
+            voltar=request.referrer or url_for('reports'),
         )
-        
-        # Título
-        title = Paragraph("Relatório de Checklists", title_style)
-        elements.append(title)
-        elements.append(Spacer(1, 20))
-        
-        # Informações do relatório
-        info = f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}<br/>"
-        info += f"Total de registros: {len(checklists)}"
-        info_para = Paragraph(info, styles['Normal'])
-        elements.append(info_para)
-        elements.append(Spacer(1, 20))
-        
-        # Tabela de dados
-        if checklists:
-            data = [['Código', 'Veículo', 'Motorista', 'Tipo', 'Status', 'Data', 'Score']]
-            
-            for checklist in checklists:
-                row = [
-                    checklist.get('codigo', '')[:15],
-                    checklist.get('veiculo_placa', ''),
-                    checklist.get('motorista_nome', '')[:20],
-                    checklist.get('tipo', ''),
-                    checklist.get('status', ''),
-                    checklist.get('dt_inicio', '')[:10],
-                    f"{checklist.get('score_aprovacao', 0):.1f}%"
-                ]
-                data.append(row)
-            
-            table = Table(data, repeatRows=1)
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            elements.append(table)
-        
-        # Construir PDF
-        doc.build(elements)
-        buffer.seek(0)
-        
-        # Preparar resposta
-        response = make_response(buffer.getvalue())
-        response.headers['Content-Type'] = 'application/pdf'
-        response.headers['Content-Disposition'] = f'attachment; filename=checklists_{datetime.now().strftime("%Y%m%d_%H%M")}.pdf'
-        
-        return response
 
     @app.route('/reports/checklist/<int:checklist_id>/pdf')
     @login_required
     def export_checklist_pdf(checklist_id):
         """Exportar checklist individual para PDF"""
-        try:
-            # Buscar dados do checklist específico
-            checklist = api_request(f'/api/v1/checklist/{checklist_id}')
-
-            if not checklist:
-                flash('Checklist não encontrado', 'error')
-                return redirect(url_for('checklists_list'))
-
-            # Criar PDF
-            buffer = BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=50, bottomMargin=50)
-            elements = []
-
-            # Estilos
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=18,
-                spaceAfter=30,
-                alignment=1
-            )
-
-            subtitle_style = ParagraphStyle(
-                'CustomSubtitle',
-                parent=styles['Heading2'],
-                fontSize=14,
-                spaceAfter=15,
-                alignment=0
-            )
-
-            # Título
-            title = Paragraph(f"Checklist - {checklist.get('codigo', '')}", title_style)
-            elements.append(title)
-            elements.append(Spacer(1, 20))
-
-            # Informações do checklist
-            info = f"<b>Veículo:</b> {checklist.get('veiculo_placa', '')}<br/>"
-            info += f"<b>Motorista:</b> {checklist.get('motorista_nome', '')}<br/>"
-            info += f"<b>Tipo:</b> {checklist.get('tipo', '')}<br/>"
-            info += f"<b>Status:</b> {checklist.get('status', '')}<br/>"
-            info += f"<b>Data Início:</b> {checklist.get('dt_inicio', '')}<br/>"
-            info += f"<b>Data Fim:</b> {checklist.get('dt_fim', '')}<br/>"
-            info += f"<b>Score:</b> {checklist.get('score_aprovacao', 0):.1f}%<br/>"
-            info += f"<b>Itens OK:</b> {checklist.get('itens_ok', 0)}<br/>"
-            info += f"<b>Itens NOK:</b> {checklist.get('itens_nok', 0)}<br/>"
-            info += f"<b>Tem Bloqueios:</b> {'Sim' if checklist.get('tem_bloqueios') else 'Não'}<br/>"
-
-            if checklist.get('observacoes_gerais'):
-                info += f"<b>Observações:</b> {checklist.get('observacoes_gerais', '')}<br/>"
-
-            # Convert UTC to Brazil timezone for PDF generation
-            from datetime import timedelta
-            brazil_now = datetime.utcnow() - timedelta(hours=3)
-            info += f"<br/><b>Gerado em:</b> {brazil_now.strftime('%d/%m/%Y %H:%M')}"
-
-            info_para = Paragraph(info, styles['Normal'])
-            elements.append(info_para)
-            elements.append(Spacer(1, 20))
-
-            # Título da seção de itens
-            items_title = Paragraph("Detalhes dos Itens do Checklist", subtitle_style)
-            elements.append(items_title)
-            elements.append(Spacer(1, 10))
-
-            # Mapear respostas por item_id
-            respostas_map = {r['item_id']: r for r in checklist.get('respostas', [])}
-
-            # Preparar dados da tabela de itens
-            items_data = [['Ordem', 'Descrição', 'Resultado', 'Criticidade', 'Bloqueia Viagem', 'Observações']]
-
-            # Ordenar itens por ordem
-            itens = sorted(checklist.get('itens', []), key=lambda x: x.get('ordem', 0))
-
-            for item in itens:
-                resposta = respostas_map.get(item['id'], {})
-
-                # Formatar resultado
-                valor = resposta.get('valor', 'N/R')
-                if valor == 'ok':
-                    resultado = 'OK'
-                elif valor == 'nao_ok':
-                    resultado = 'NOK'
-                elif valor == 'na':
-                    resultado = 'N/A'
-                else:
-                    resultado = 'N/R'
-
-                # Formatar criticidade
-                criticidade = item.get('criticidade', 'N/A')
-                if criticidade == 'baixa':
-                    criticidade = 'Baixa'
-                elif criticidade == 'media':
-                    criticidade = 'Média'
-                elif criticidade == 'alta':
-                    criticidade = 'Alta'
-                elif criticidade == 'critica':
-                    criticidade = 'Crítica'
-
-                # Bloqueia viagem
-                bloqueia = 'Sim' if item.get('bloqueia_viagem') else 'Não'
-
-                # Observações (limitar tamanho para não quebrar o layout)
-                observacoes = resposta.get('observacao', '') or ''
-                if len(observacoes) > 50:
-                    observacoes = observacoes[:47] + '...'
-
-                # Quebrar descrição se muito longa
-                descricao = item.get('descricao', '')
-                if len(descricao) > 60:
-                    descricao = descricao[:57] + '...'
-
-                items_data.append([
-                    str(item.get('ordem', '')),
-                    descricao,
-                    resultado,
-                    criticidade,
-                    bloqueia,
-                    observacoes
-                ])
-
-            # Criar tabela de itens
-            items_table = Table(items_data, colWidths=[0.8*inch, 2.5*inch, 0.8*inch, 1*inch, 1*inch, 1.5*inch])
-
-            # Estilo da tabela
-            items_table.setStyle(TableStyle([
-                # Cabeçalho
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-
-                # Corpo da tabela
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-
-                # Colorir resultados
-                ('ALIGN', (1, 1), (1, -1), 'LEFT'),  # Descrição alinhada à esquerda
-                ('ALIGN', (5, 1), (5, -1), 'LEFT'),  # Observações alinhadas à esquerda
-            ]))
-
-            # Aplicar cores condicionais nos resultados
-            for i, row in enumerate(items_data[1:], 1):
-                if row[2] == 'NOK':
-                    items_table.setStyle(TableStyle([
-                        ('BACKGROUND', (2, i), (2, i), colors.red),
-                        ('TEXTCOLOR', (2, i), (2, i), colors.white),
-                    ]))
-                elif row[2] == 'OK':
-                    items_table.setStyle(TableStyle([
-                        ('BACKGROUND', (2, i), (2, i), colors.green),
-                        ('TEXTCOLOR', (2, i), (2, i), colors.white),
-                    ]))
-                elif row[2] == 'N/A':
-                    items_table.setStyle(TableStyle([
-                        ('BACKGROUND', (2, i), (2, i), colors.yellow),
-                    ]))
-
-            elements.append(items_table)
-            elements.append(Spacer(1, 20))
-
-            # Construir PDF
-            doc.build(elements)
-            buffer.seek(0)
-
-            # Preparar resposta
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'application/pdf'
-            response.headers['Content-Disposition'] = f'attachment; filename=checklist_{checklist.get("codigo", checklist_id)}_{datetime.now().strftime("%Y%m%d_%H%M")}.pdf'
-
-            return response
-
-        except Exception as e:
-            flash(f'Erro ao exportar checklist: {str(e)}', 'error')
-            return redirect(url_for('checklists_list'))
+        from functools import partial
+        from . import report_renderers
+
+        return enfileirar_relatorio(
+            'checklist_pdf',
+            partial(report_renderers.carregar_checklist, app.config['API_BASE_URL'],
+                    session.get('access_token', ''), checklist_id),
+            report_renderers.pdf_checklist,
+            f'checklist_{checklist_id}_{datetime.now().strftime("%Y%m%d_%H%M")}.pdf',
+            'application/pdf',
+            voltar=url_for('checklists_list'),
+        )
 
     @app.route('/reports/checklist/<int:checklist_id>/excel')
     @login_required
     def export_checklist_excel(checklist_id):
         """Exportar checklist individual para Excel"""
-        try:
-            # Buscar dados do checklist específico
-            checklist = api_request(f'/api/v1/checklist/{checklist_id}')
-
-            if not checklist:
-                flash('Checklist não encontrado', 'error')
-                return redirect(url_for('checklists_list'))
-
-            # Criar arquivo Excel em memória
-            buffer = BytesIO()
-            with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-
-                # Aba 1: Resumo do Checklist
-                summary_data = {
-                    'Campo': ['ID', 'Código', 'Veículo', 'Motorista', 'Tipo', 'Status',
-                             'Data Início', 'Data Fim', 'Score (%)', 'Itens OK', 'Itens NOK',
-                             'Tem Bloqueios', 'Observações Gerais', 'Gerado em'],
-                    'Valor': [
-                        checklist.get('id', ''),
-                        checklist.get('codigo', ''),
-                        checklist.get('veiculo_placa', ''),
-                        checklist.get('motorista_nome', ''),
-                        checklist.get('tipo', ''),
-                        checklist.get('status', ''),
-                        checklist.get('dt_inicio', ''),
-                        checklist.get('dt_fim', ''),
-                        checklist.get('score_aprovacao', 0),
-                        checklist.get('itens_ok', 0),
-                        checklist.get('itens_nok', 0),
-                        'Sim' if checklist.get('tem_bloqueios') else 'Não',
-                        checklist.get('observacoes_gerais', ''),
-                        datetime.now().strftime('%d/%m/%Y %H:%M')
-                    ]
-                }
-
-                summary_df = pd.DataFrame(summary_data)
-                summary_df.to_excel(writer, sheet_name='Resumo', index=False)
-
-                # Aba 2: Detalhes dos Itens
-                # Mapear respostas por item_id
-                respostas_map = {r['item_id']: r for r in checklist.get('respostas', [])}
-
-                # Preparar dados dos itens
-                items_data = []
-
-                # Ordenar itens por ordem
-                itens = sorted(checklist.get('itens', []), key=lambda x: x.get('ordem', 0))
-
-                for item in itens:
-                    resposta = respostas_map.get(item['id'], {})
-
-                    # Formatar resultado
-                    valor = resposta.get('valor', 'N/R')
-                    if valor == 'ok':
-                        resultado = 'OK'
-                    elif valor == 'nao_ok':
-                        resultado = 'NOK'
-                    elif valor == 'na':
-                        resultado = 'N/A'
-                    else:
-                        resultado = 'Não Respondido'
-
-                    # Formatar criticidade
-                    criticidade = item.get('criticidade', 'N/A')
-                    if criticidade == 'baixa':
-                        criticidade = 'Baixa'
-                    elif criticidade == 'media':
-                        criticidade = 'Média'
-                    elif criticidade == 'alta':
-                        criticidade = 'Alta'
-                    elif criticidade == 'critica':
-                        criticidade = 'Crítica'
-
-                    items_data.append({
-                        'Ordem': item.get('ordem', ''),
-                        'ID Item': item.get('id', ''),
-                        'Descrição': item.get('descricao', ''),
-                        'Resultado': resultado,
-                        'Criticidade': criticidade,
-                        'Bloqueia Viagem': 'Sim' if item.get('bloqueia_viagem') else 'Não',
-                        'Observações': resposta.get('observacao', ''),
-                        'Data Resposta': resposta.get('created_at', ''),
-                        'Tem Foto': 'Sim' if resposta.get('fotos') and len(resposta.get('fotos', [])) > 0 else 'Não',
-                        'Qtd Fotos': len(resposta.get('fotos', [])) if resposta.get('fotos') else 0
-                    })
-
-                items_df = pd.DataFrame(items_data)
-                items_df.to_excel(writer, sheet_name='Itens Detalhado', index=False)
-
-                # Aba 3: Análise por Criticidade
-                if items_data:
-                    criticidade_analysis = {}
-                    for item in items_data:
-                        crit = item['Criticidade']
-                        resultado = item['Resultado']
-
-                        if crit not in criticidade_analysis:
-                            criticidade_analysis[crit] = {'Total': 0, 'OK': 0, 'NOK': 0, 'N/A': 0, 'Não Respondido': 0}
-
-                        criticidade_analysis[crit]['Total'] += 1
-                        criticidade_analysis[crit][resultado] += 1
-
-                    analysis_data = []
-                    for crit, stats in criticidade_analysis.items():
-                        analysis_data.append({
-                            'Criticidade': crit,
-                            'Total de Itens': stats['Total'],
-                            'Itens OK': stats['OK'],
-                            'Itens NOK': stats['NOK'],
-                            'Itens N/A': stats['N/A'],
-                            'Não Respondidos': stats['Não Respondido'],
-                            'Taxa de Aprovação (%)': round((stats['OK'] / stats['Total']) * 100, 2) if stats['Total'] > 0 else 0
-                        })
-
-                    analysis_df = pd.DataFrame(analysis_data)
-                    analysis_df.to_excel(writer, sheet_name='Análise por Criticidade', index=False)
-
-                # Aba 4: Itens com Problemas (NOK e com bloqueio)
-                problem_items = [item for item in items_data if item['Resultado'] == 'NOK' or item['Bloqueia Viagem'] == 'Sim']
-
-                if problem_items:
-                    problem_df = pd.DataFrame(problem_items)
-                    problem_df.to_excel(writer, sheet_name='Itens com Problemas', index=False)
-
-                # Formatação das planilhas
-
-                # Formatar aba Resumo
-                ws_summary = writer.sheets['Resumo']
-                header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-                header_font = Font(color='FFFFFF', bold=True)
-
-                for cell in ws_summary[1]:
-                    cell.fill = header_fill
-                    cell.font = header_font
-
-                # Formatar aba Itens Detalhado
-                ws_items = writer.sheets['Itens Detalhado']
-
-                # Cabeçalho
-                for cell in ws_items[1]:
-                    cell.fill = header_fill
-                    cell.font = header_font
-
-                # Colorir resultados
-                ok_fill = PatternFill(start_color='92D050', end_color='92D050', fill_type='solid')
-                nok_fill = PatternFill(start_color='FF0000', end_color='FF0000', fill_type='solid')
-                na_fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-
-                resultado_col = None
-                for col in range(1, ws_items.max_column + 1):
-                    if ws_items.cell(1, col).value == 'Resultado':
-                        resultado_col = col
-                        break
-
-                if resultado_col:
-                    for row in range(2, ws_items.max_row + 1):
-                        cell = ws_items.cell(row, resultado_col)
-                        if cell.value == 'OK':
-                            cell.fill = ok_fill
-                            cell.font = Font(color='FFFFFF', bold=True)
-                        elif cell.value == 'NOK':
-                            cell.fill = nok_fill
-                            cell.font = Font(color='FFFFFF', bold=True)
-                        elif cell.value == 'N/A':
-                            cell.fill = na_fill
-
-                # Ajustar largura das colunas em todas as abas
-                for sheet_name in writer.sheets:
-                    worksheet = writer.sheets[sheet_name]
-                    for column in worksheet.columns:
-                        max_length = 0
-                        column_letter = get_column_letter(column[0].column)
-                        for cell in column:
-                            try:
-                                if len(str(cell.value)) > max_length:
-                                    max_length = len(str(cell.value))
-                            except:
-                                pass
-                        adjusted_width = min(max_length + 3, 80)
-                        worksheet.column_dimensions[column_letter].width = adjusted_width
-
-            buffer.seek(0)
-
-            # Preparar resposta
-            response = make_response(buffer.getvalue())
-            response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            response.headers['Content-Disposition'] = f'attachment; filename=checklist_auditoria_{checklist.get("codigo", checklist_id)}_{datetime.now().strftime("%Y%m%d_%H%M")}.xlsx'
-
-            return response
-
-        except Exception as e:
-            flash(f'Erro ao exportar checklist: {str(e)}', 'error')
-            return redirect(url_for('checklists_list'))
+        from functools import partial
+        from . import report_renderers
+
+        return enfileirar_relatorio(
+            'checklist_excel',
+            partial(report_renderers.carregar_checklist, app.config['API_BASE_URL'],
+                    session.get('access_token', ''), checklist_id),
+            report_renderers.excel_checklist,
+            f'checklist_auditoria_{checklist_id}_{datetime.now().strftime("%Y%m%d_%H%M")}.xlsx',
+            'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            voltar=url_for('checklists_list'),
+        )
 
     # ==============================
     # GESTÃO DE VEÍCULOS
@@ -4601,9 +4023,7 @@ def create_app():
     @login_required
     def reports_abastecimentos():
         """Relatório de abastecimentos"""
-        from datetime import datetime, timedelta
-        from io import StringIO
-        import csv
+        from datetime import datetime
 
         # Parâmetros de filtro
         veiculo_id = request.args.get('veiculo_id', type=int)
@@ -4630,7 +4050,14 @@ def create_app():
             params['data_fim'] = data_fim
 
         # Buscar dados da API
-        abastecimentos_data = api_request('/api/v1/abastecimentos', params=params) or []
+        filtros = {k: v for k, v in params.items() if k != 'limit'}
+        respostas = api_request_many({
+            'abastecimentos': ('/api/v1/abastecimentos', params),
+            'resumo': ('/api/v1/abastecimentos/resumo', filtros),
+            'veiculos': '/api/v1/vehicles',
+            'motoristas': '/api/v1/drivers',
+        })
+        abastecimentos_data = respostas.get('abastecimentos') or []
 
         # Converter dicionários em objetos que permitem acesso por atributo
         class DictAsAttr:
@@ -4655,8 +4082,8 @@ def create_app():
                 return None  # Retorna None para outros atributos
 
         # Buscar dados para filtros e para popular dados faltantes
-        veiculos = api_request('/api/v1/vehicles') or []
-        motoristas = api_request('/api/v1/drivers') or []
+        veiculos = respostas.get('veiculos') or []
+        motoristas = respostas.get('motoristas') or []
 
         # Criar mapas para lookup rápido
         veiculos_map = {v.get('id'): v for v in veiculos}
@@ -4694,106 +4121,24 @@ def create_app():
 
         abastecimentos = [DictAsAttr(a) for a in abastecimentos_data]
 
-        # Calcular estatísticas
-        total_abastecimentos = len(abastecimentos)
-        total_litros = sum(float(a.get('litros', 0)) for a in abastecimentos)
-        total_valor = sum(float(a.get('valor_total', 0)) for a in abastecimentos)
-        media_preco_litro = total_valor / total_litros if total_litros > 0 else 0
-
-        # Agrupar por veículo e calcular consumo
-        por_veiculo = {}
-        abastecimentos_por_veiculo = {}
-
-        # Agrupar abastecimentos por veículo
-        for abastecimento in abastecimentos:
-            veiculo = abastecimento.get('veiculo', {})
-            placa = veiculo.get('placa', 'N/A')
-
-            if placa not in abastecimentos_por_veiculo:
-                abastecimentos_por_veiculo[placa] = []
-            abastecimentos_por_veiculo[placa].append(abastecimento)
-
-        # Calcular estatísticas por veículo
-        for placa, veic_abastecimentos in abastecimentos_por_veiculo.items():
-            veiculo_obj = veic_abastecimentos[0].get('veiculo', {})
-
-            # Converter DictAsAttr para dict simples se necessário
-            if hasattr(veiculo_obj, '__dict__'):
-                veiculo = {k: v for k, v in veiculo_obj.__dict__.items() if not k.startswith('_')}
-            else:
-                veiculo = veiculo_obj if isinstance(veiculo_obj, dict) else {}
-
-            # Ordenar por odômetro
-            veic_abastecimentos_ordenados = sorted(
-                veic_abastecimentos,
-                key=lambda x: float(x.get('odometro', 0))
-            )
-
-            total_litros = sum(float(a.get('litros', 0)) for a in veic_abastecimentos)
-            total_valor = sum(float(a.get('valor_total', 0)) for a in veic_abastecimentos)
-
-            # Calcular consumo médio (km/L)
-            consumos = []
-            for i in range(1, len(veic_abastecimentos_ordenados)):
-                abast_anterior = veic_abastecimentos_ordenados[i-1]
-                abast_atual = veic_abastecimentos_ordenados[i]
-
-                km_anterior = float(abast_anterior.get('odometro', 0))
-                km_atual = float(abast_atual.get('odometro', 0))
-                litros = float(abast_anterior.get('litros', 0))
-
-                if litros > 0 and km_atual > km_anterior:
-                    km_rodados = km_atual - km_anterior
-                    consumo = km_rodados / litros
-                    # Filtrar consumos absurdos (< 0.5 km/L ou > 50 km/L)
-                    if 0.5 <= consumo <= 50:
-                        consumos.append(consumo)
-
-            consumo_medio = sum(consumos) / len(consumos) if consumos else 0
-
-            por_veiculo[placa] = {
-                'veiculo': veiculo,
-                'total_litros': total_litros,
-                'total_valor': total_valor,
-                'total_abastecimentos': len(veic_abastecimentos),
-                'consumo_medio': consumo_medio
-            }
-
-        # Agrupar por mês
-        por_mes = {}
-        for abastecimento in abastecimentos:
-            data_str = abastecimento.get('data_abastecimento', '')
-            if data_str:
-                try:
-                    data = datetime.fromisoformat(data_str.replace('Z', '+00:00'))
-                    mes_key = data.strftime('%Y-%m')
-
-                    if mes_key not in por_mes:
-                        por_mes[mes_key] = {
-                            'mes': data.strftime('%B %Y'),
-                            'total_litros': 0,
-                            'total_valor': 0,
-                            'total_abastecimentos': 0
-                        }
-
-                    por_mes[mes_key]['total_litros'] += float(abastecimento.get('litros', 0))
-                    por_mes[mes_key]['total_valor'] += float(abastecimento.get('valor_total', 0))
-                    por_mes[mes_key]['total_abastecimentos'] += 1
-                except:
-                    pass
-
-        # Calcular consumo médio geral
-        todos_consumos = [v['consumo_medio'] for v in por_veiculo.values() if v['consumo_medio'] > 0]
-        consumo_medio_geral = sum(todos_consumos) / len(todos_consumos) if todos_consumos else 0
+        # Estatísticas agregadas pela API (SQL), sobre todos os registros do filtro
+        resumo = respostas.get('resumo') or {}
+        por_mes = []
+        for item in resumo.get('por_mes', []):
+            try:
+                rotulo = datetime.strptime(item['mes'], '%Y-%m').strftime('%B %Y')
+            except (KeyError, TypeError, ValueError):
+                rotulo = item.get('mes')
+            por_mes.append({**item, 'mes': rotulo})
 
         estatisticas = {
-            'total_abastecimentos': total_abastecimentos,
-            'total_litros': total_litros,
-            'total_valor': total_valor,
-            'media_preco_litro': media_preco_litro,
-            'consumo_medio_geral': consumo_medio_geral,
-            'por_veiculo': list(por_veiculo.values()),
-            'por_mes': list(por_mes.values())
+            'total_abastecimentos': resumo.get('total_abastecimentos', 0),
+            'total_litros': resumo.get('total_litros', 0),
+            'total_valor': resumo.get('total_valor', 0),
+            'media_preco_litro': resumo.get('media_preco_litro', 0),
+            'consumo_medio_geral': resumo.get('consumo_medio_geral', 0),
+            'por_veiculo': resumo.get('por_veiculo', []),
+            'por_mes': por_mes
         }
 
         return render_template('reports/abastecimentos.html',
@@ -4807,72 +4152,16 @@ def create_app():
     @app.route('/reports/abastecimentos/export/csv')
     @login_required
     def reports_abastecimentos_csv():
-        """Exportar relatório de abastecimentos para CSV"""
-        from datetime import datetime
-        from io import StringIO
-        import csv
-
+        """Exportar relatório de abastecimentos para CSV (streaming a partir da API)"""
         # Parâmetros de filtro (mesmo que o relatório)
-        veiculo_id = request.args.get('veiculo_id', type=int)
-        motorista_id = request.args.get('motorista_id', type=int)
-        data_inicio = request.args.get('data_inicio')
-        data_fim = request.args.get('data_fim')
-
-        # Montar parâmetros da API
         params = {}
-        if veiculo_id:
-            params['veiculo_id'] = veiculo_id
-        if motorista_id:
-            params['motorista_id'] = motorista_id
-        if data_inicio:
-            params['data_inicio'] = data_inicio
-        if data_fim:
-            params['data_fim'] = data_fim
-
-        abastecimentos = api_request('/api/v1/abastecimentos', params=params) or []
-
-        output = StringIO()
-        writer = csv.writer(output)
-
-        # Headers
-        writer.writerow([
-            "Data", "Veículo", "Placa", "Motorista", "Posto",
-            "Odômetro", "Litros", "Valor/Litro", "Valor Total",
-            "Tipo Combustível", "Observações"
-        ])
-
-        # Dados
-        for abastecimento in abastecimentos:
-            veiculo = abastecimento.get('veiculo', {})
-            motorista = abastecimento.get('motorista', {})
-
-            data_formatted = ""
-            if abastecimento.get('data_abastecimento'):
-                try:
-                    data = datetime.fromisoformat(abastecimento['data_abastecimento'].replace('Z', '+00:00'))
-                    data_formatted = data.strftime('%d/%m/%Y %H:%M')
-                except:
-                    data_formatted = abastecimento.get('data_abastecimento', '')
-
-            writer.writerow([
-                data_formatted,
-                f"{veiculo.get('marca', '')} {veiculo.get('modelo', '')}".strip(),
-                veiculo.get('placa', ''),
-                motorista.get('nome', ''),
-                abastecimento.get('posto', ''),
-                abastecimento.get('odometro', ''),
-                abastecimento.get('litros', ''),
-                abastecimento.get('valor_litro', ''),
-                abastecimento.get('valor_total', ''),
-                abastecimento.get('tipo_combustivel', ''),
-                abastecimento.get('observacoes', '')
-            ])
-
-        filename = f"relatorio_abastecimentos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        response = make_response(output.getvalue())
-        response.headers["Content-Disposition"] = f"attachment; filename={filename}"
-        response.headers["Content-type"] = "text/csv"
+        for campo in ('veiculo_id', 'motorista_id', 'data_inicio', 'data_fim'):
+            if request.args.get(campo):
+                params[campo] = request.args.get(campo)
 
+        response = api_stream_response('/api/v1/abastecimentos/export.csv', params=params)
+        if response is None:
+            return redirect(request.referrer or url_for('reports_abastecimentos'))
         return response
 
     @app.route('/reports/abastecimentos/export/excel')
@@ -4966,119 +4255,25 @@ def create_app():
     @app.route('/reports/abastecimentos/export/pdf')
     @login_required
     def reports_abastecimentos_pdf():
-        """Exportar relatório de abastecimentos para PDF"""
-        from datetime import datetime
-        from io import BytesIO
-        from reportlab.lib.pagesizes import letter, A4
-        from reportlab.lib import colors
-        from reportlab.lib.styles import getSampleStyleSheet
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-        from reportlab.lib.units import inch
+        """Exportar relatório de abastecimentos para PDF (gerado na fila de relatórios)"""
+        from functools import partial
+        from . import report_renderers
 
         # Parâmetros de filtro (mesmo que o relatório)
-        veiculo_id = request.args.get('veiculo_id', type=int)
-        motorista_id = request.args.get('motorista_id', type=int)
-        data_inicio = request.args.get('data_inicio')
-        data_fim = request.args.get('data_fim')
-
-        # Montar parâmetros da API
-        params = {}
-        if veiculo_id:
-            params['veiculo_id'] = veiculo_id
-        if motorista_id:
-            params['motorista_id'] = motorista_id
-        if data_inicio:
-            params['data_inicio'] = data_inicio
-        if data_fim:
-            params['data_fim'] = data_fim
-
-        abastecimentos_data = api_request('/api/v1/abastecimentos', params=params) or []
-
-        # Buscar dados para popular informações faltantes
-        veiculos = api_request('/api/v1/vehicles') or []
-        motoristas = api_request('/api/v1/drivers') or []
-        veiculos_map = {v.get('id'): v for v in veiculos}
-        motoristas_map = {m.get('id'): m for m in motoristas}
-
-        # Popular dados faltantes
-        for abast in abastecimentos_data:
-            if not abast.get('veiculo') and abast.get('veiculo_id'):
-                veiculo_data = veiculos_map.get(abast['veiculo_id'])
-                if veiculo_data:
-                    abast['veiculo'] = veiculo_data
-            if not abast.get('motorista') and abast.get('motorista_id'):
-                motorista_data = motoristas_map.get(abast['motorista_id'])
-                if motorista_data:
-                    abast['motorista'] = motorista_data
-
-        # Criar PDF
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        styles = getSampleStyleSheet()
-
-        # Conteúdo do PDF
-        story = []
-
-        # Título
-        title = Paragraph("Relatório de Abastecimentos", styles['Title'])
-        story.append(title)
-        story.append(Spacer(1, 12))
-
-        # Período
-        if data_inicio and data_fim:
-            periodo = Paragraph(f"Período: {data_inicio} a {data_fim}", styles['Normal'])
-            story.append(periodo)
-            story.append(Spacer(1, 12))
-
-        # Dados da tabela
-        data = [['Data', 'Veículo', 'Motorista', 'Posto', 'Litros', 'Total']]
-
-        for abastecimento in abastecimentos_data:
-            veiculo = abastecimento.get('veiculo', {})
-            motorista = abastecimento.get('motorista', {})
-
-            data_formatted = ""
-            if abastecimento.get('data_abastecimento'):
-                try:
-                    data_obj = datetime.fromisoformat(abastecimento['data_abastecimento'].replace('Z', '+00:00'))
-                    data_formatted = data_obj.strftime('%d/%m/%Y')
-                except:
-                    data_formatted = abastecimento.get('data_abastecimento', '')[:10]
-
-            data.append([
-                data_formatted,
-                f"{veiculo.get('placa', 'N/A')}",
-                motorista.get('nome', 'N/A')[:15],
-                abastecimento.get('posto', 'N/A')[:15],
-                f"{abastecimento.get('litros', 0)}L",
-                f"R$ {abastecimento.get('valor_total', 0)}"
-            ])
-
-        # Criar tabela
-        table = Table(data)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-
-        story.append(table)
-        doc.build(story)
-
-        buffer.seek(0)
-        filename = f"relatorio_abastecimentos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-
-        response = make_response(buffer.getvalue())
-        response.headers["Content-Disposition"] = f"attachment; filename={filename}"
-        response.headers["Content-Type"] = "application/pdf"
-
-        return response
+        filtros = {campo: request.args.get(campo)
+                   for campo in ('veiculo_id', 'motorista_id', 'data_inicio', 'data_fim')
+                   if request.args.get(campo)}
+
+        return enfileirar_relatorio(
+            'abastecimentos_pdf',
+            partial(report_renderers.carregar_abastecimentos, app.config['API_BASE_URL'],
+                    session.get('access_token', ''), filtros),
+            report_renderers.pdf_abastecimentos,
+            f"relatorio_abastecimentos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+            'application/pdf',
+            voltar=request.referrer or url_for('reports_abastecimentos'),
+            contexto={'data_inicio': filtros.get('data_inicio'), 'data_fim': filtros.get('data_fim')},
+        )
 
     # ==============================
     # ORDENS DE SERVIÇO
@@ -5099,8 +4294,6 @@ def create_app():
         # BUSCAR DADOS REAIS DA API
         ordens_servico = []
         try:
-            import requests
-
             # Montar parâmetros de filtro para a API
             params = {}
             if veiculo_id:
@@ -5115,7 +4308,7 @@ def create_app():
                 params['data_fim'] = data_fim
 
             print(f"🔍 Buscando ordens com filtros: {params}")
-            response = requests.get('http://localhost:8005/api/v1/ordens-servico', params=params, timeout=5)
+            response = http_session.get('http://localhost:8005/api/v1/ordens-servico', params=params, timeout=5)
             if response.status_code == 200:
                 ordens_servico = response.json()
                 print(f"✅ API funcionou! Carregadas {len(ordens_servico)} ordens de serviço")
@@ -5172,7 +4365,7 @@ def create_app():
         # BUSCAR VEÍCULOS REAIS PARA OS FILTROS
         veiculos = []
         try:
-            veiculos_response = requests.get('http://localhost:8005/api/v1/vehicles', timeout=5)
+            veiculos_response = http_session.get('http://localhost:8005/api/v1/vehicles', timeout=5)
             if veiculos_response.status_code == 200:
                 veiculos = veiculos_response.json()
                 print(f"✅ Carregados {len(veiculos)} veículos para filtros")
@@ -5308,7 +4501,6 @@ def create_app():
         if request.method == 'POST':
             # PRIMEIRO TENTAR ATUALIZAR VIA API
             try:
-                import requests
                 ordem_data = {
                     'veiculo_id': int(request.form['veiculo_id']),
                     'tipo_servico': request.form['tipo_servico'],
@@ -5331,7 +4523,7 @@ def create_app():
                     ordem_data['data_conclusao'] = data_conclusao
 
                 print(f"🔄 Enviando dados para API: {ordem_data}")
-                response = requests.put(f'http://localhost:8005/api/v1/ordens-servico/{ordem_id}',
+                response = http_session.put(f'http://localhost:8005/api/v1/ordens-servico/{ordem_id}',
                                       json=ordem_data, timeout=5)
                 print(f"📡 Resposta da API: {response.status_code} - {response.text}")
 
@@ -5355,10 +4547,8 @@ def create_app():
 
         # GET - PRIMEIRO TENTAR BUSCAR DADOS REAIS
         try:
-            import requests
-
             print(f"🔍 Tentando buscar ordem {ordem_id} da API...")
-            ordem_response = requests.get(f'http://localhost:8005/api/v1/ordens-servico/{ordem_id}', timeout=5)
+            ordem_response = http_session.get(f'http://localhost:8005/api/v1/ordens-servico/{ordem_id}', timeout=5)
 
             if ordem_response.status_code == 200:
                 ordem = ordem_response.json()
@@ -5366,7 +4556,7 @@ def create_app():
 
                 # Buscar veículos
                 try:
-                    veiculos_response = requests.get('http://localhost:8005/api/v1/vehicles', timeout=5)
+                    veiculos_response = http_session.get('http://localhost:8005/api/v1/vehicles', timeout=5)
                     veiculos = veiculos_response.json() if veiculos_response.status_code == 200 else []
                 except:
                     veiculos = []
@@ -5391,8 +4581,7 @@ def create_app():
 
         # PRIMEIRO TENTAR EXCLUIR VIA API
         try:
-            import requests
-            response = requests.delete(f'http://localhost:8005/api/v1/ordens-servico/{ordem_id}', timeout=5)
+            response = http_session.delete(f'http://localhost:8005/api/v1/ordens-servico/{ordem_id}', timeout=5)
 
             if response.status_code == 200:
                 flash(f'✅ Ordem de serviço {ordem_id} excluída com sucesso!', 'success')
@@ -5414,44 +4603,30 @@ def create_app():
     def reports_service_orders():
         """Relatórios de ordens de serviço"""
         try:
-            # Buscar dados da API
-            ordens = api_request('/api/v1/ordens-servico')
-            veiculos = api_request('/api/v1/vehicles')
-
-            # Calcular estatísticas
-            total_ordens = len(ordens)
-            ordens_abertas = len([o for o in ordens if o.get('status') == 'Aberta'])
-            ordens_em_andamento = len([o for o in ordens if o.get('status') == 'Em Andamento'])
-            ordens_concluidas = len([o for o in ordens if o.get('status') == 'Concluída'])
-
-            valor_total = sum([float(o.get('valor_total', 0)) for o in ordens if o.get('valor_total')])
+            # Buscar dados da API (estatísticas agregadas no banco)
+            respostas = api_request_many({
+                'ordens': '/api/v1/ordens-servico',
+                'resumo': '/api/v1/ordens-servico/resumo',
+                'veiculos': '/api/v1/vehicles',
+            })
+            ordens = respostas.get('ordens') or []
+            veiculos = respostas.get('veiculos') or []
+            resumo = respostas.get('resumo') or {}
 
             estatisticas = {
-                'total_ordens': total_ordens,
-                'ordens_abertas': ordens_abertas,
-                'ordens_em_andamento': ordens_em_andamento,
-                'ordens_concluidas': ordens_concluidas,
-                'valor_total': valor_total,
-                'taxa_conclusao': (ordens_concluidas / total_ordens * 100) if total_ordens > 0 else 0
+                'total_ordens': resumo.get('total_ordens', 0),
+                'ordens_abertas': resumo.get('ordens_abertas', 0),
+                'ordens_em_andamento': resumo.get('ordens_em_andamento', 0),
+                'ordens_concluidas': resumo.get('ordens_concluidas', 0),
+                'valor_total': resumo.get('valor_total', 0),
+                'taxa_conclusao': resumo.get('taxa_conclusao', 0)
             }
 
             # Dados mensais para gráfico
-            dados_mensais = {}
-            for ordem in ordens:
-                data_abertura = ordem.get('data_abertura')
-                if data_abertura:
-                    try:
-                        data_obj = datetime.fromisoformat(data_abertura.replace('Z', '+00:00'))
-                        mes_ano = data_obj.strftime('%Y-%m')
-                        if mes_ano not in dados_mensais:
-                            dados_mensais[mes_ano] = {'abertas': 0, 'concluidas': 0, 'valor': 0}
-                        dados_mensais[mes_ano]['abertas'] += 1
-                        if ordem.get('status') == 'Concluída':
-                            dados_mensais[mes_ano]['concluidas'] += 1
-                        if ordem.get('valor_total'):
-                            dados_mensais[mes_ano]['valor'] += float(ordem.get('valor_total', 0))
-                    except:
-                        pass
+            dados_mensais = {
+                item['mes']: {'abertas': item['abertas'], 'concluidas': item['concluidas'], 'valor': item['valor']}
+                for item in resumo.get('por_mes', [])
+            }
 
             return render_template('reports/service_orders.html',
                                    ordens=ordens,
@@ -5496,7 +4671,7 @@ def create_app():
             print(f"Making request to: {app.config['API_BASE_URL']}/api/v1/users")
             print(f"Token: {session.get('access_token', 'NONE')[:20]}...")
 
-            response = requests.get(
+            response = http_session.get(
                 f"{app.config['API_BASE_URL']}/api/v1/users",
                 headers={'Authorization': f"Bearer {session['access_token']}"},
                 params=params,
@@ -5692,7 +4867,7 @@ def create_app():
             print(f"API URL: {app.config['API_BASE_URL']}/api/v1/users")
             print(f"Authorization header exists: {'access_token' in session}")
 
-            response = requests.post(
+            response = http_session.post(
                 f"{app.config['API_BASE_URL']}/api/v1/users",
                 headers={'Authorization': f"Bearer {session['access_token']}"},
                 json=clean_data,
@@ -5731,7 +4906,7 @@ def create_app():
     def user_detail(user_id):
         """Detalhes do usuário"""
         try:
-            response = requests.get(
+            response = http_session.get(
                 f"{app.config['API_BASE_URL']}/api/v1/users/{user_id}",
                 headers={'Authorization': f"Bearer {session['access_token']}"},
                 timeout=10
@@ -5755,7 +4930,7 @@ def create_app():
         if request.method == 'GET':
             try:
                 # Buscar dados básicos do usuário
-                response = requests.get(
+                response = http_session.get(
                     f"{app.config['API_BASE_URL']}/api/v1/users/{user_id}",
                     headers={'Authorization': f"Bearer {session['access_token']}"},
                     timeout=10
@@ -5766,7 +4941,7 @@ def create_app():
 
                     # Buscar permissões específicas do usuário
                     try:
-                        permissions_response = requests.get(
+                        permissions_response = http_session.get(
                             f"{app.config['API_BASE_URL']}/api/v1/users/{user_id}/permissions",
                             headers={'Authorization': f"Bearer {session['access_token']}"},
                             timeout=10
@@ -5940,7 +5115,7 @@ def create_app():
 
             clean_data = api_compatible_data
 
-            response = requests.put(
+            response = http_session.put(
                 f"{app.config['API_BASE_URL']}/api/v1/users/{user_id}",
                 headers={'Authorization': f"Bearer {session['access_token']}"},
                 json=clean_data,
@@ -5948,6 +5123,7 @@ def create_app():
             )
 
             if response.status_code == 200:
+                invalidar_usuario_cache(user_id)
                 flash('Usuário atualizado com sucesso!', 'success')
                 return redirect(url_for('users_list'))
             else:
@@ -5975,7 +5151,7 @@ def create_app():
         """Gerenciar permissões do usuário"""
         try:
             # Buscar dados do usuário
-            user_response = requests.get(
+            user_response = http_session.get(
                 f"{app.config['API_BASE_URL']}/api/v1/users/{user_id}",
                 headers={'Authorization': f"Bearer {session['access_token']}"},
                 timeout=10
@@ -5998,7 +5174,7 @@ def create_app():
                         permissions_data[key] = True
 
                 # Enviar para a API
-                response = requests.post(
+                response = http_session.post(
                     f"{app.config['API_BASE_URL']}/api/v1/users/{user_id}/permissions",
                     headers={'Authorization': f"Bearer {session['access_token']}"},
                     json=permissions_data,
@@ -6006,6 +5182,7 @@ def create_app():
                 )
 
                 if response.status_code == 200:
+                    invalidar_usuario_cache(user_id)
                     flash('Permissões atualizadas com sucesso!', 'success')
                 else:
                     flash('Erro ao atualizar permissões', 'error')
@@ -6013,7 +5190,7 @@ def create_app():
                 return redirect(url_for('user_permissions', user_id=user_id))
 
             # Buscar permissões específicas do usuário
-            permissions_response = requests.get(
+            permissions_response = http_session.get(
                 f"{app.config['API_BASE_URL']}/api/v1/users/{user_id}/permissions",
                 headers={'Authorization': f"Bearer {session['access_token']}"},
                 timeout=10
@@ -6034,13 +5211,14 @@ def create_app():
     def user_delete(user_id):
         """Excluir usuário"""
         try:
-            response = requests.delete(
+            response = http_session.delete(
                 f"{app.config['API_BASE_URL']}/api/v1/users/{user_id}",
                 headers={'Authorization': f"Bearer {session['access_token']}"},
                 timeout=10
             )
 
             if response.status_code == 200:
+                invalidar_usuario_cache(user_id)
                 result = response.json()
                 flash(result.get('message', 'Usuário excluído com sucesso!'), 'success')
             else:
@@ -6136,7 +5314,6 @@ def create_app():
     def manager_reports():
         """Dashboard com KPIs importantes para gestores"""
         try:
-            import psycopg2
             database_url = os.getenv('DATABASE_URL')
             print(f"DEBUG: DATABASE_URL para KPIs: {database_url}")
 
@@ -6144,184 +5321,189 @@ def create_app():
                 print("ERROR: DATABASE_URL não encontrada para KPIs!")
                 return render_template('manager_reports.html', error="DATABASE_URL não configurada")
 
-            conn = psycopg2.connect(database_url)
-            cursor = conn.cursor()
-
-            # KPI 1: Total de Veículos e Status
-            cursor.execute('''
-                SELECT
-                    COUNT(*) as total,
-                    COUNT(*) FILTER (WHERE ativo = true) as ativos,
-                    COUNT(*) FILTER (WHERE ativo = false) as inativos,
-                    COUNT(*) FILTER (WHERE em_manutencao = true) as em_manutencao
-                FROM veiculos
-            ''')
-            veiculos_stats = cursor.fetchone()
-
-            # KPI 2: Total de Motoristas e Status
-            cursor.execute('''
-                SELECT
-                    COUNT(*) as total,
-                    COUNT(*) FILTER (WHERE ativo = true) as ativos,
-                    COUNT(*) FILTER (WHERE ativo = false) as inativos
-                FROM motoristas
-            ''')
-            motoristas_stats = cursor.fetchone()
-
-            # KPI 3: Checklists por Status
-            cursor.execute('''
-                SELECT
-                    COUNT(*) as total,
-                    COUNT(*) FILTER (WHERE status = 'pendente') as pendentes,
-                    COUNT(*) FILTER (WHERE status = 'aprovado') as aprovados,
-                    COUNT(*) FILTER (WHERE status = 'reprovado') as reprovados
-                FROM checklists
-                WHERE dt_inicio >= CURRENT_DATE - INTERVAL '30 days'
-            ''')
-            checklists_stats = cursor.fetchone()
-
-            # KPI 4: Multas por Status e Valores
-            cursor.execute('''
-                SELECT
-                    COUNT(*) as total,
-                    COUNT(*) FILTER (WHERE situacao = 'Pendente') as pendentes,
-                    COUNT(*) FILTER (WHERE situacao = 'Paga') as pagas,
-                    COALESCE(SUM(CAST(valor AS NUMERIC)), 0) as valor_total,
-                    COALESCE(SUM(CAST(valor AS NUMERIC)) FILTER (WHERE situacao = 'Pendente'), 0) as valor_pendente
-                FROM multas
-            ''')
-            multas_stats = cursor.fetchone()
-
-            # KPI 5: Abastecimentos do mês
-            cursor.execute('''
-                SELECT
-                    COUNT(*) as total,
-                    COALESCE(SUM(CAST(valor_total AS NUMERIC)), 0) as valor_total,
-                    COALESCE(SUM(CAST(litros AS NUMERIC)), 0) as litros_total,
-                    COALESCE(AVG(CASE WHEN CAST(litros AS NUMERIC) > 0 THEN CAST(valor_total AS NUMERIC)/CAST(litros AS NUMERIC) END), 0) as preco_medio_litro
-                FROM abastecimentos
-                WHERE data_abastecimento >= DATE_TRUNC('month', CURRENT_DATE)
-            ''')
-            abastecimentos_stats = cursor.fetchone()
-
-            # KPI 6: Ordens de Serviço
-            cursor.execute('''
-                SELECT
-                    COUNT(*) as total,
-                    COUNT(*) FILTER (WHERE status = 'Aberta') as abertas,
-                    COUNT(*) FILTER (WHERE status = 'Em Andamento') as em_andamento,
-                    COUNT(*) FILTER (WHERE status = 'Concluída') as concluidas,
-                    COALESCE(SUM(CAST(valor_total AS NUMERIC)), 0) as valor_total
-                FROM ordens_servico
-                WHERE data_abertura >= CURRENT_DATE - INTERVAL '30 days'
-            ''')
-            ordens_stats = cursor.fetchone()
-
-            # KPI 7: Usuários Ativos
-            cursor.execute('''
-                SELECT
-                    COUNT(*) as total,
-                    COUNT(*) FILTER (WHERE ativo = true) as ativos,
-                    COUNT(*) FILTER (WHERE ultimo_acesso >= CURRENT_DATE - INTERVAL '7 days') as ativos_semana
-                FROM usuarios
-            ''')
-            usuarios_stats = cursor.fetchone()
-
-            # KPI 8: Performance de Checklists por Veículo (Top 5)
-            cursor.execute('''
-                SELECT
-                    v.placa,
-                    v.modelo,
-                    COUNT(c.id) as total_checklists,
-                    COUNT(*) FILTER (WHERE c.status = 'aprovado') as aprovados,
-                    ROUND(
-                        COUNT(*) FILTER (WHERE c.status = 'aprovado') * 100.0 / COUNT(c.id),
-                        2
-                    ) as percentual_aprovacao
-                FROM veiculos v
-                LEFT JOIN checklists c ON v.id = c.veiculo_id
-                    AND c.dt_inicio >= CURRENT_DATE - INTERVAL '30 days'
-                WHERE v.ativo = true
-                GROUP BY v.id, v.placa, v.modelo
-                HAVING COUNT(c.id) > 0
-                ORDER BY percentual_aprovacao DESC, total_checklists DESC
-                LIMIT 5
-            ''')
-            top_veiculos = cursor.fetchall()
-
-            # KPI 9: Alertas e Notificações
-            cursor.execute('''
-                SELECT
-                    COUNT(*) FILTER (WHERE m.validade_cnh <= CURRENT_DATE + INTERVAL '30 days') as cnh_vencendo,
-                    COUNT(*) FILTER (WHERE m.validade_cnh <= CURRENT_DATE) as cnh_vencida
-                FROM motoristas m
-                WHERE m.ativo = true AND m.validade_cnh IS NOT NULL
-            ''')
-            alertas_cnh = cursor.fetchone()
-
-            cursor.execute('''
-                SELECT COUNT(*)
-                FROM multas
-                WHERE situacao = 'Pendente'
-                    AND data_vencimento <= CURRENT_DATE + INTERVAL '7 days'
-            ''')
-            multas_vencendo = cursor.fetchone()[0]
-
-            # Dados para gráficos - Checklists dos últimos 30 dias
-            cursor.execute('''
-                SELECT
-                    DATE(dt_inicio) as data,
-                    COUNT(*) as total,
-                    COUNT(*) FILTER (WHERE status = 'aprovado') as aprovados,
-                    COUNT(*) FILTER (WHERE status = 'reprovado') as reprovados
-                FROM checklists
-                WHERE dt_inicio >= CURRENT_DATE - INTERVAL '30 days'
-                GROUP BY DATE(dt_inicio)
-                ORDER BY data
-            ''')
-            checklist_timeline = cursor.fetchall()
-
-            # Dados para gráfico - Abastecimentos dos últimos 30 dias
-            cursor.execute('''
-                SELECT
-                    DATE(data_abastecimento) as data,
-                    COALESCE(SUM(CAST(valor_total AS NUMERIC)), 0) as valor_total,
-                    COALESCE(SUM(CAST(litros AS NUMERIC)), 0) as litros_total
-                FROM abastecimentos
-                WHERE data_abastecimento >= CURRENT_DATE - INTERVAL '30 days'
-                GROUP BY DATE(data_abastecimento)
-                ORDER BY data
-            ''')
-            abastecimento_timeline = cursor.fetchall()
-
-            # Dados para gráfico - Multas por mês (últimos 6 meses)
-            cursor.execute('''
-                SELECT
-                    DATE_TRUNC('month', data_ocorrencia) as mes,
-                    COUNT(*) as total,
-                    COALESCE(SUM(CAST(valor AS NUMERIC)), 0) as valor_total
-                FROM multas
-                WHERE data_ocorrencia >= CURRENT_DATE - INTERVAL '6 months'
-                GROUP BY DATE_TRUNC('month', data_ocorrencia)
-                ORDER BY mes
-            ''')
-            multas_timeline = cursor.fetchall()
-
-            # Dados para gráfico - Distribuição de veículos por status
-            cursor.execute('''
-                SELECT
-                    CASE
-                        WHEN ativo = true AND em_manutencao = false THEN 'Ativo'
-                        WHEN ativo = true AND em_manutencao = true THEN 'Em Manutenção'
-                        ELSE 'Inativo'
-                    END as status,
-                    COUNT(*) as quantidade
-                FROM veiculos
-                GROUP BY status
-            ''')
-            veiculos_distribuicao = cursor.fetchall()
-
-            conn.close()
+            from .db_pool import get_connection
+            from .utils.fanout import run_many
+
+            def consulta(sql, fetch='one'):
+                """Tarefa que executa uma consulta em uma conexão do pool"""
+                def _executar():
+                    with get_connection() as conn:
+                        cursor = conn.cursor()
+                        cursor.execute(sql)
+                        resultado = cursor.fetchone() if fetch == 'one' else cursor.fetchall()
+                        cursor.close()
+                        return resultado
+                return _executar
+
+            # Consultas independentes executadas em paralelo no pool de conexões
+            resultados = run_many({
+                # KPI 1: Total de Veículos e Status
+                'veiculos_stats': consulta('''
+                    SELECT
+                        COUNT(*) as total,
+                        COUNT(*) FILTER (WHERE ativo = true) as ativos,
+                        COUNT(*) FILTER (WHERE ativo = false) as inativos,
+                        COUNT(*) FILTER (WHERE em_manutencao = true) as em_manutencao
+                    FROM veiculos
+                ''', 'one'),
+                # KPI 2: Total de Motoristas e Status
+                'motoristas_stats': consulta('''
+                    SELECT
+                        COUNT(*) as total,
+                        COUNT(*) FILTER (WHERE ativo = true) as ativos,
+                        COUNT(*) FILTER (WHERE ativo = false) as inativos
+                    FROM motoristas
+                ''', 'one'),
+                # KPI 3: Checklists por Status
+                'checklists_stats': consulta('''
+                    SELECT
+                        COUNT(*) as total,
+                        COUNT(*) FILTER (WHERE status = 'pendente') as pendentes,
+                        COUNT(*) FILTER (WHERE status = 'aprovado') as aprovados,
+                        COUNT(*) FILTER (WHERE status = 'reprovado') as reprovados
+                    FROM checklists
+                    WHERE dt_inicio >= CURRENT_DATE - INTERVAL '30 days'
+                ''', 'one'),
+                # KPI 4: Multas por Status e Valores
+                'multas_stats': consulta('''
+                    SELECT
+                        COUNT(*) as total,
+                        COUNT(*) FILTER (WHERE situacao = 'Pendente') as pendentes,
+                        COUNT(*) FILTER (WHERE situacao = 'Paga') as pagas,
+                        COALESCE(SUM(CAST(valor AS NUMERIC)), 0) as valor_total,
+                        COALESCE(SUM(CAST(valor AS NUMERIC)) FILTER (WHERE situacao = 'Pendente'), 0) as valor_pendente
+                    FROM multas
+                ''', 'one'),
+                # KPI 5: Abastecimentos do mês
+                'abastecimentos_stats': consulta('''
+                    SELECT
+                        COUNT(*) as total,
+                        COALESCE(SUM(valor_total), 0) as valor_total,
+                        COALESCE(SUM(litros), 0) as litros_total,
+                        COALESCE(AVG(CASE WHEN litros > 0 THEN valor_total/litros END), 0) as preco_medio_litro
+                    FROM abastecimentos
+                    WHERE data_abastecimento >= DATE_TRUNC('month', CURRENT_DATE)
+                ''', 'one'),
+                # KPI 6: Ordens de Serviço
+                'ordens_stats': consulta('''
+                    SELECT
+                        COUNT(*) as total,
+                        COUNT(*) FILTER (WHERE status = 'Aberta') as abertas,
+                        COUNT(*) FILTER (WHERE status = 'Em Andamento') as em_andamento,
+                        COUNT(*) FILTER (WHERE status = 'Concluída') as concluidas,
+                        COALESCE(SUM(valor_total), 0) as valor_total
+                    FROM ordens_servico
+                    WHERE data_abertura >= CURRENT_DATE - INTERVAL '30 days'
+                ''', 'one'),
+                # KPI 7: Usuários Ativos
+                'usuarios_stats': consulta('''
+                    SELECT
+                        COUNT(*) as total,
+                        COUNT(*) FILTER (WHERE ativo = true) as ativos,
+                        COUNT(*) FILTER (WHERE ultimo_acesso >= CURRENT_DATE - INTERVAL '7 days') as ativos_semana
+                    FROM usuarios
+                ''', 'one'),
+                # KPI 8: Performance de Checklists por Veículo (Top 5)
+                'top_veiculos': consulta('''
+                    SELECT
+                        v.placa,
+                        v.modelo,
+                        COUNT(c.id) as total_checklists,
+                        COUNT(*) FILTER (WHERE c.status = 'aprovado') as aprovados,
+                        ROUND(
+                            COUNT(*) FILTER (WHERE c.status = 'aprovado') * 100.0 / COUNT(c.id),
+                            2
+                        ) as percentual_aprovacao
+                    FROM veiculos v
+                    LEFT JOIN checklists c ON v.id = c.veiculo_id
+                        AND c.dt_inicio >= CURRENT_DATE - INTERVAL '30 days'
+                    WHERE v.ativo = true
+                    GROUP BY v.id, v.placa, v.modelo
+                    HAVING COUNT(c.id) > 0
+                    ORDER BY percentual_aprovacao DESC, total_checklists DESC
+                    LIMIT 5
+                ''', 'all'),
+                # KPI 9: Alertas e Notificações
+                'alertas_cnh': consulta('''
+                    SELECT
+                        COUNT(*) FILTER (WHERE m.validade_cnh <= CURRENT_DATE + INTERVAL '30 days') as cnh_vencendo,
+                        COUNT(*) FILTER (WHERE m.validade_cnh <= CURRENT_DATE) as cnh_vencida
+                    FROM motoristas m
+                    WHERE m.ativo = true AND m.validade_cnh IS NOT NULL
+                ''', 'one'),
+                'multas_vencendo': consulta('''
+                    SELECT COUNT(*)
+                    FROM multas
+                    WHERE situacao = 'Pendente'
+                        AND data_vencimento <= CURRENT_DATE + INTERVAL '7 days'
+                ''', 'one'),
+                # Dados para gráficos - Checklists dos últimos 30 dias
+                'checklist_timeline': consulta('''
+                    SELECT
+                        DATE(dt_inicio) as data,
+                        COUNT(*) as total,
+                        COUNT(*) FILTER (WHERE status = 'aprovado') as aprovados,
+                        COUNT(*) FILTER (WHERE status = 'reprovado') as reprovados
+                    FROM checklists
+                    WHERE dt_inicio >= CURRENT_DATE - INTERVAL '30 days'
+                    GROUP BY DATE(dt_inicio)
+                    ORDER BY data
+                ''', 'all'),
+                # Dados para gráfico - Abastecimentos dos últimos 30 dias
+                'abastecimento_timeline': consulta('''
+                    SELECT
+                        DATE(data_abastecimento) as data,
+                        COALESCE(SUM(valor_total), 0) as valor_total,
+                        COALESCE(SUM(litros), 0) as litros_total
+                    FROM abastecimentos
+                    WHERE data_abastecimento >= CURRENT_DATE - INTERVAL '30 days'
+                    GROUP BY DATE(data_abastecimento)
+                    ORDER BY data
+                ''', 'all'),
+                # Dados para gráfico - Multas por mês (últimos 6 meses)
+                'multas_timeline': consulta('''
+                    SELECT
+                        DATE_TRUNC('month', data_ocorrencia) as mes,
+                        COUNT(*) as total,
+                        COALESCE(SUM(CAST(valor AS NUMERIC)), 0) as valor_total
+                    FROM multas
+                    WHERE data_ocorrencia >= CURRENT_DATE - INTERVAL '6 months'
+                    GROUP BY DATE_TRUNC('month', data_ocorrencia)
+                    ORDER BY mes
+                ''', 'all'),
+                # Dados para gráfico - Distribuição de veículos por status
+                'veiculos_distribuicao': consulta('''
+                    SELECT
+                        CASE
+                            WHEN ativo = true AND em_manutencao = false THEN 'Ativo'
+                            WHEN ativo = true AND em_manutencao = true THEN 'Em Manutenção'
+                            ELSE 'Inativo'
+                        END as status,
+                        COUNT(*) as quantidade
+                    FROM veiculos
+                    GROUP BY status
+                ''', 'all'),
+            }, db=True)
+
+            if all(r is None for r in resultados.values()):
+                raise Exception("Nenhuma consulta de KPI retornou dados")
+
+            # Consultas que falharam ou excederam o prazo não derrubam a página
+            sem_dados = (0,) * 5
+            veiculos_stats = resultados['veiculos_stats'] or sem_dados
+            motoristas_stats = resultados['motoristas_stats'] or sem_dados
+            checklists_stats = resultados['checklists_stats'] or sem_dados
+            multas_stats = resultados['multas_stats'] or sem_dados
+            abastecimentos_stats = resultados['abastecimentos_stats'] or sem_dados
+            ordens_stats = resultados['ordens_stats'] or sem_dados
+            usuarios_stats = resultados['usuarios_stats'] or sem_dados
+            top_veiculos = resultados['top_veiculos'] or []
+            alertas_cnh = resultados['alertas_cnh'] or sem_dados
+            multas_vencendo = (resultados['multas_vencendo'] or (0,))[0]
+            checklist_timeline = resultados['checklist_timeline'] or []
+            abastecimento_timeline = resultados['abastecimento_timeline'] or []
+            multas_timeline = resultados['multas_timeline'] or []
+            veiculos_distribuicao = resultados['veiculos_distribuicao'] or []
 
             # Organizar dados para o template
             kpis = {
@@ -6396,7 +5578,8 @@ def create_app():
             'current_user': session.get('user_info', {}),
             'current_time': datetime.now(),
             'app_version': '1.0.0',
-            'perfil_permite': perfil_permite
+            'perfil_permite': perfil_permite,
+            'tem_permissao': tem_permissao
         }
 
     # ==============================
@@ -6421,7 +5604,7 @@ def create_app():
     def backend_status():
         """Check FastAPI backend status"""
         try:
-            response = requests.get("http://127.0.0.1:8005/health", timeout=5)
+            response = http_session.get("http://127.0.0.1:8005/health", timeout=5)
             return jsonify({
                 "fastapi_status": "online",
                 "status_code": response.status_code,
@@ -6447,7 +5630,7 @@ def create_app():
     def health_proxy():
         """Proxy health check to FastAPI backend"""
         try:
-            response = requests.get("http://127.0.0.1:8005/health", timeout=10)
+            response = http_session.get("http://127.0.0.1:8005/health", timeout=10)
             return Response(
                 response.content,
                 status=response.status_code,
@@ -6472,24 +5655,24 @@ def create_app():
 
             # Make the request to FastAPI
             if request.method == 'GET':
-                response = requests.get(fastapi_url, headers=headers, params=request.args, timeout=30)
+                response = http_session.get(fastapi_url, headers=headers, params=request.args, timeout=30)
             elif request.method == 'POST':
                 if request.is_json:
-                    response = requests.post(fastapi_url, headers=headers, json=request.get_json(), params=request.args, timeout=30)
+                    response = http_session.post(fastapi_url, headers=headers, json=request.get_json(), params=request.args, timeout=30)
                 else:
-                    response = requests.post(fastapi_url, headers=headers, data=request.get_data(), params=request.args, timeout=30)
+                    response = http_session.post(fastapi_url, headers=headers, data=request.get_data(), params=request.args, timeout=30)
             elif request.method == 'PUT':
                 if request.is_json:
-                    response = requests.put(fastapi_url, headers=headers, json=request.get_json(), params=request.args, timeout=30)
+                    response = http_session.put(fastapi_url, headers=headers, json=request.get_json(), params=request.args, timeout=30)
                 else:
-                    response = requests.put(fastapi_url, headers=headers, data=request.get_data(), params=request.args, timeout=30)
+                    response = http_session.put(fastapi_url, headers=headers, data=request.get_data(), params=request.args, timeout=30)
             elif request.method == 'DELETE':
-                response = requests.delete(fastapi_url, headers=headers, params=request.args, timeout=30)
+                response = http_session.delete(fastapi_url, headers=headers, params=request.args, timeout=30)
             elif request.method == 'PATCH':
                 if request.is_json:
-                    response = requests.patch(fastapi_url, headers=headers, json=request.get_json(), params=request.args, timeout=30)
+                    response = http_session.patch(fastapi_url, headers=headers, json=request.get_json(), params=request.args, timeout=30)
                 else:
-                    response = requests.patch(fastapi_url, headers=headers, data=request.get_data(), params=request.args, timeout=30)
+                    response = http_session.patch(fastapi_url, headers=headers, data=request.get_data(), params=request.args, timeout=30)
 
             # Return the response from FastAPI
             return Response(
@@ -0,0 +1,60 @@
+# flask_dashboard/app/db_pool.py
+"""
+Pool de conexões PostgreSQL compartilhado pelo dashboard
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+POOL_MAX = int(os.getenv('DB_POOL_MAX', '5'))
+# Espera máxima por uma conexão livre antes de desistir
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+
+_pool = None
+_pool_lock = threading.Lock()
+# ThreadedConnectionPool não bloqueia quando esgotado: limitar os empréstimos
+_pool_slots = threading.BoundedSemaphore(POOL_MAX)
+
+
+class PoolEsgotado(Exception):
+    """Nenhuma conexão do pool ficou livre dentro de DB_POOL_TIMEOUT"""
+
+
+def _get_pool():
+    """Cria o pool sob demanda (psycopg2 só é importado quando necessário)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from psycopg2.pool import ThreadedConnectionPool
+                _pool = ThreadedConnectionPool(
+                    minconn=1,
+                    maxconn=POOL_MAX,
+                    dsn=os.getenv('DATABASE_URL'),
+                    client_encoding='utf8',
+                )
+    return _pool
+
+
+@contextmanager
+def get_connection():
+    """Empresta uma conexão do pool e a devolve ao final (rollback em caso de erro)"""
+    pool = _get_pool()
+    if not _pool_slots.acquire(timeout=POOL_TIMEOUT):
+        raise PoolEsgotado(f"Nenhuma das {POOL_MAX} conexões ficou livre em {POOL_TIMEOUT}s")
+    try:
+        conn = pool.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            # Conexões quebradas são descartadas em vez de voltarem ao pool
+            pool.putconn(conn, close=bool(conn.closed))
+    finally:
+        _pool_slots.release()
@@ -0,0 +1,153 @@
+# flask_dashboard/app/maintenance_alerts.py
+"""
+Alertas de manutenção preventiva
+
+O estado de cada item de plano por veículo (próximo km/data e status) é
+mantido pela API em manutencoes_controle sempre que há leitura de odômetro,
+OS concluída ou alteração de plano. Aqui só lemos esse estado em uma
+consulta indexada e o formatamos para as páginas de alertas e previsão.
+
+A data prevista dos itens por km usa o km/dia de cada veículo (média
+exponencial das leituras de odômetro, gravada em odometro_atual pelo ETL
+diário); sem histórico, vale KM_POR_DIA_PADRAO.
+"""
+from datetime import datetime, timedelta
+
+KM_POR_DIA_PADRAO = 100
+
+# Status do motor (manutencoes_controle) -> status exibido nas páginas
+STATUS_PAGINA = {"vencida": "vencida", "vencendo": "urgente", "em_dia": "previsto"}
+STATUS_CONTROLE = {pagina: controle for controle, pagina in STATUS_PAGINA.items()}
+
+# Status exibidos em cada página (vencidas aparecem junto com as urgentes)
+STATUS_ALERTAS = ("vencida", "urgente")
+STATUS_PREVISAO = ("previsto",)
+
+SQL_ESTADO = '''
+    SELECT p.id AS plano_id, p.descricao AS plano, i.id AS item_id, i.descricao AS item,
+           i.controle_por, v.id AS veiculo_id, v.placa, COALESCE(v.km_atual, 0) AS km_atual,
+           mc.km_proxima_manutencao, mc.data_proxima_manutencao, mc.status, o.km_por_dia
+    FROM manutencoes_controle mc
+    JOIN planos_manutencao_itens i ON i.id = mc.plano_item_id AND i.ativo = true
+    JOIN planos_manutencao p ON p.id = i.plano_id AND p.ativo = true
+    JOIN veiculos v ON v.id = mc.veiculo_id AND v.ativo = true
+    LEFT JOIN odometro_atual o ON o.veiculo_id = mc.veiculo_id
+    {filtro}
+    ORDER BY p.criado_em DESC, p.id, v.placa, i.ordem
+'''
+
+
+def carregar_estado(conn, status=None):
+    """Estado gravado dos itens (opcionalmente só os status de página informados)"""
+    filtro, params = '', None
+    if status:
+        filtro = 'WHERE mc.status = ANY(%s)'
+        params = ([STATUS_CONTROLE.get(s, s) for s in status],)
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SQL_ESTADO.format(filtro=filtro), params)
+        colunas = [coluna[0] for coluna in cursor.description]
+        return [dict(zip(colunas, linha)) for linha in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def estimar_dias(km_restante, km_por_dia=KM_POR_DIA_PADRAO):
+    """
+    Estima dias até a manutenção pela média de km rodados por dia
+    (None para veículo parado, sem km/dia: não há como prever)
+    """
+    if km_restante <= 0:
+        return 0
+    if km_por_dia <= 0:
+        return None
+    return max(1, int(km_restante / km_por_dia))
+
+
+def _data(valor):
+    if isinstance(valor, str):
+        return datetime.fromisoformat(valor)
+    if valor is not None and not isinstance(valor, datetime):
+        return datetime(valor.year, valor.month, valor.day)
+    return valor
+
+
+def calcular_alertas(linhas, now=None, km_por_dia=None):
+    """
+    Formata o estado gravado como alertas das páginas.
+
+    ``linhas``: dicts de ``carregar_estado`` (ou de /api/v1/maintenance/estado).
+    O km/dia de cada linha tem precedência; ``km_por_dia`` (número ou dict
+    {veiculo_id: km/dia}) vale para veículos sem média calculada. Só é usado
+    para estimar a data dos itens controlados por km.
+    """
+    now = now or datetime.now()
+    alertas = []
+
+    for linha in linhas:
+        veiculo_id = linha["veiculo_id"]
+        status = STATUS_PAGINA.get(linha["status"], "previsto")
+        base = {
+            "id": len(alertas) + 1,
+            "plano_id": linha["plano_id"],
+            "item_id": linha["item_id"],
+            "veiculo_id": veiculo_id,
+            "tipo_equipamento": "VEÍCULO",
+            "equipamento": linha.get("placa") or 'N/A',
+            "plano": linha.get("plano") or 'Plano sem nome',
+            "item": linha.get("item") or 'Item sem descrição',
+            "status": status,
+        }
+
+        if linha.get("controle_por") == "dias":
+            previsao_data = _data(linha.get("data_proxima_manutencao"))
+            if previsao_data is None:
+                continue
+            dias_restantes = (previsao_data.date() - now.date()).days
+            if dias_restantes <= 0:
+                alerta_texto = f"Vencida há {abs(dias_restantes)} dia(s)"
+            else:
+                alerta_texto = f"Faltam {dias_restantes} dia(s)"
+            base.update({"alerta": alerta_texto, "previsao": previsao_data.strftime("%d/%m/%Y")})
+            alertas.append(base)
+            continue
+
+        km_atual = linha.get("km_atual") or 0
+        km_proxima = linha.get("km_proxima_manutencao")
+        if km_atual <= 0 or km_proxima is None:
+            # Sem leitura de odômetro não há como prever a manutenção
+            base.update({"alerta": "Sem leitura de odômetro", "previsao": "-", "status": "previsto"})
+            alertas.append(base)
+            continue
+
+        # km/dia 0 (veículo parado) é uma média válida; só a ausência cai no padrão
+        media = linha.get("km_por_dia")
+        if media is None:
+            media = km_por_dia.get(veiculo_id) if isinstance(km_por_dia, dict) else km_por_dia
+        media = float(media if media is not None else KM_POR_DIA_PADRAO)
+
+        km_restante = km_proxima - km_atual
+        if km_restante <= 0:
+            alerta_texto = f"Vencida há {abs(km_restante)} km"
+            dias = estimar_dias(abs(km_restante), media)
+            previsao_data = now - timedelta(days=dias) if dias is not None else None
+        else:
+            alerta_texto = f"Faltam {km_restante} km(s)"
+            dias = estimar_dias(km_restante, media)
+            previsao_data = now + timedelta(days=dias) if dias is not None else None
+
+        base.update({
+            "alerta": alerta_texto,
+            "previsao": previsao_data.strftime("%d/%m/%Y") if previsao_data else "-",
+            "km_restante": km_restante,
+            "km_por_dia": round(media, 1),
+        })
+        alertas.append(base)
+
+    return alertas
+
+
+def gerar_alertas(conn, now=None, km_por_dia=None, status=None):
+    """Lê o estado gravado e formata os alertas de manutenção"""
+    return calcular_alertas(carregar_estado(conn, status=status), now=now, km_por_dia=km_por_dia)
@@ -0,0 +1,192 @@
+# flask_dashboard/app/maintenance_plans.py
+"""
+Repositório de planos de manutenção
+
+Carrega planos, itens, tipos de equipamento e veículos vinculados em quatro
+consultas e monta a estrutura em memória. Mantém um cache em processo
+versionado, invalidado pelas rotas que alteram planos.
+"""
+import copy
+import os
+import threading
+import time
+
+CACHE_TTL_SEGUNDOS = int(os.getenv('MAINTENANCE_PLANS_CACHE_TTL', '300'))
+
+_cache_lock = threading.Lock()
+_cache = {"versao": 0, "versao_carregada": None, "carregado_em": 0.0, "planos": None}
+
+
+def _formatar_quando(controle_por, intervalo_valor, km_inicial):
+    """Texto de periodicidade exibido nas telas de planos"""
+    if controle_por and intervalo_valor:
+        unidade = "km" if controle_por.lower() == "km" else f"{controle_por}"
+        if km_inicial > 0:
+            return f"A cada {intervalo_valor:,.2f} {unidade} a partir de {km_inicial:,.2f} {unidade}"
+        return f"A cada {intervalo_valor:,.2f} {unidade}"
+    return "Não definido"
+
+
+def carregar_planos(conn):
+    """Busca planos ativos, itens, tipos de equipamento e veículos vinculados (4 consultas)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            SELECT p.id, p.codigo, p.descricao, p.ativo, p.repeticao, p.quando, p.observacoes,
+                   p.criado_em
+            FROM planos_manutencao p
+            WHERE p.ativo = true
+            ORDER BY p.criado_em DESC
+        ''')
+        planos_data = cursor.fetchall()
+        plano_ids = [row[0] for row in planos_data]
+        if not plano_ids:
+            return []
+
+        cursor.execute('''
+            SELECT plano_id, id, descricao, tipo, controle_por, intervalo_valor, km_inicial,
+                   alerta_antecipacao, alerta_tolerancia, ordem
+            FROM planos_manutencao_itens
+            WHERE plano_id = ANY(%s) AND ativo = true
+            ORDER BY plano_id, ordem
+        ''', (plano_ids,))
+        itens_data = cursor.fetchall()
+
+        cursor.execute('''
+            SELECT pte.plano_id, t.nome
+            FROM planos_tipos_equipamento pte
+            JOIN tipos_equipamento t ON t.id = pte.tipo_equipamento_id
+            WHERE pte.plano_id = ANY(%s) AND t.ativo = true
+            ORDER BY pte.plano_id, t.nome
+        ''', (plano_ids,))
+        tipos_data = cursor.fetchall()
+
+        cursor.execute('''
+            SELECT vpm.plano_id, v.id, v.placa
+            FROM veiculos_planos_manutencao vpm
+            JOIN veiculos v ON vpm.veiculo_id = v.id
+            WHERE vpm.plano_id = ANY(%s) AND vpm.ativo = true AND v.ativo = true
+        ''', (plano_ids,))
+        veiculos_data = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    itens_por_plano = {}
+    for row in itens_data:
+        controle_por = row[4]
+        intervalo_valor = row[5] or 0
+        km_inicial = row[6] or 0
+        itens_por_plano.setdefault(row[0], []).append({
+            "id": row[1],
+            "descricao": row[2],
+            "tipo": row[3],
+            "controle_por": controle_por,
+            "intervalo_valor": intervalo_valor,
+            "km_inicial": km_inicial,
+            "alerta_antecipacao": row[7] or 0,
+            "alerta_tolerancia": row[8] or 0,
+            "ordem": row[9],
+            "quando": _formatar_quando(controle_por, intervalo_valor, km_inicial)
+        })
+
+    tipos_por_plano = {}
+    for plano_id, nome in tipos_data:
+        tipos_por_plano.setdefault(plano_id, []).append(nome)
+
+    veiculos_por_plano = {}
+    for plano_id, veiculo_id, placa in veiculos_data:
+        veiculos_por_plano.setdefault(plano_id, []).append({"id": veiculo_id, "placa": placa})
+
+    return [
+        {
+            "id": row[0],
+            "codigo": row[1],
+            "descricao": row[2],
+            "ativo": row[3],
+            "repeticao": row[4] or "Definida nos itens",
+            "quando": row[5] or "Definida nos itens",
+            "observacoes": row[6] or "",
+            "tipos_equipamento": tipos_por_plano.get(row[0], []),
+            "veiculos_vinculados": veiculos_por_plano.get(row[0], []),
+            "itens": itens_por_plano.get(row[0], []),
+            "criado_em": row[7]
+        }
+        for row in planos_data
+    ]
+
+
+def salvar_itens(cursor, plano_id, itens):
+    """
+    Grava os itens do formulário no plano, atualizando no lugar os já existentes
+
+    Itens com ``id`` mantêm a linha (e com ela o estado em manutencoes_controle
+    e o histórico); itens sem ``id`` são inseridos; itens retirados do
+    formulário são excluídos, ou desativados quando já têm histórico.
+    """
+    mantidos = []
+    for ordem, item in enumerate(itens, start=1):
+        valores = (item['descricao'], item['tipo'], item['controle_por'], item['intervalo_valor'], ordem)
+        if item.get('id'):
+            cursor.execute('''
+                UPDATE planos_manutencao_itens
+                SET descricao = %s, tipo = %s, controle_por = %s, intervalo_valor = %s,
+                    ordem = %s, ativo = true
+                WHERE id = %s AND plano_id = %s
+                RETURNING id
+            ''', (*valores, item['id'], plano_id))
+            linha = cursor.fetchone()
+            if linha:
+                mantidos.append(linha[0])
+                continue
+        cursor.execute('''
+            INSERT INTO planos_manutencao_itens
+            (plano_id, descricao, tipo, controle_por, intervalo_valor, ordem, ativo)
+            VALUES (%s, %s, %s, %s, %s, %s, true)
+            RETURNING id
+        ''', (plano_id, *valores))
+        mantidos.append(cursor.fetchone()[0])
+
+    cursor.execute('''
+        DELETE FROM planos_manutencao_itens i
+        WHERE i.plano_id = %s AND NOT (i.id = ANY(%s))
+          AND NOT EXISTS (SELECT 1 FROM manutencoes_historico h WHERE h.plano_item_id = i.id)
+    ''', (plano_id, mantidos))
+    cursor.execute('''
+        UPDATE planos_manutencao_itens SET ativo = false
+        WHERE plano_id = %s AND NOT (id = ANY(%s))
+    ''', (plano_id, mantidos))
+    return mantidos
+
+
+def obter_planos(conn_factory):
+    """
+    Retorna os planos do cache ou recarrega do banco.
+
+    ``conn_factory`` é um context manager que fornece a conexão (ex.: db_pool.get_connection).
+    O TTL limita a defasagem entre processos (workers) diferentes.
+    """
+    with _cache_lock:
+        versao = _cache["versao"]
+        valido = (
+            _cache["planos"] is not None
+            and _cache["versao_carregada"] == versao
+            and time.monotonic() - _cache["carregado_em"] < CACHE_TTL_SEGUNDOS
+        )
+        if valido:
+            return copy.deepcopy(_cache["planos"])
+
+    with conn_factory() as conn:
+        planos = carregar_planos(conn)
+
+    with _cache_lock:
+        # Só grava se ninguém invalidou o cache durante a carga
+        if _cache["versao"] == versao:
+            _cache.update(versao_carregada=versao, carregado_em=time.monotonic(), planos=planos)
+    return copy.deepcopy(planos)
+
+
+def invalidar_cache_planos():
+    """Invalida o cache após criação, edição ou exclusão de planos"""
+    with _cache_lock:
+        _cache["versao"] += 1
+        _cache["planos"] = None
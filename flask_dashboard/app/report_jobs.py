@@ -0,0 +1,164 @@
+# flask_dashboard/app/report_jobs.py
+"""
+Fila de geração de relatórios PDF/Excel
+
+Os relatórios são carregados e renderizados em um pool local de threads, fora
+do worker que atendeu a requisição. O estado de cada job e os arquivos
+gerados ficam em disco (REPORT_CACHE_DIR), então qualquer worker do gunicorn
+consegue responder à consulta de status e ao download. Os arquivos são
+nomeados por uma chave de conteúdo (tipo + parâmetros + dados): relatórios
+com os mesmos dados não são renderizados de novo enquanto estiverem no cache.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+
+REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', '2'))
+REPORT_MAX_PENDING = int(os.getenv('REPORT_MAX_PENDING', '20'))
+REPORT_CACHE_DIR = os.getenv('REPORT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'frotas_relatorios'))
+REPORT_CACHE_TTL = int(os.getenv('REPORT_CACHE_TTL', '3600'))
+REPORT_INLINE_WAIT = float(os.getenv('REPORT_INLINE_WAIT', '3'))
+
+# Incrementar quando o layout de algum relatório mudar (invalida o cache)
+VERSAO_LAYOUT = 1
+
+_JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+_EXTENSOES = {
+    'application/pdf': '.pdf',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': '.xlsx',
+}
+
+_executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix='relatorios')
+_futures = {}
+_lock = threading.Lock()
+_ultima_limpeza = 0.0
+
+
+class FilaRelatoriosCheia(Exception):
+    """Limite de relatórios pendentes neste processo atingido"""
+
+
+def _dir_jobs():
+    caminho = os.path.join(REPORT_CACHE_DIR, 'jobs')
+    os.makedirs(caminho, exist_ok=True)
+    return caminho
+
+
+def _gravar_atomico(caminho, conteudo):
+    tmp = f"{caminho}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(conteudo)
+    os.replace(tmp, caminho)
+
+
+def _salvar_estado(job):
+    job['atualizado_em'] = time.time()
+    _gravar_atomico(os.path.join(_dir_jobs(), f"{job['id']}.json"), json.dumps(job).encode('utf-8'))
+
+
+def _atualizar(job, **campos):
+    job.update(campos)
+    _salvar_estado(job)
+
+
+def chave_conteudo(tipo, contexto, dados):
+    """Chave do arquivo gerado: muda sempre que os dados ou parâmetros mudam"""
+    payload = json.dumps([tipo, VERSAO_LAYOUT, contexto, dados], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _limpar_expirados():
+    """Remove artefatos e estados de job mais antigos que REPORT_CACHE_TTL (no máximo 1x/min)"""
+    global _ultima_limpeza
+    agora = time.time()
+    if agora - _ultima_limpeza < 60:
+        return
+    _ultima_limpeza = agora
+    for pasta in (REPORT_CACHE_DIR, _dir_jobs()):
+        for nome in os.listdir(pasta):
+            caminho = os.path.join(pasta, nome)
+            try:
+                if os.path.isfile(caminho) and agora - os.path.getmtime(caminho) > REPORT_CACHE_TTL:
+                    os.remove(caminho)
+            except OSError:
+                pass
+
+
+def _executar(job, carregar, renderizar, contexto):
+    try:
+        _atualizar(job, status='carregando')
+        dados = carregar()
+
+        chave = chave_conteudo(job['tipo'], contexto, dados)
+        arquivo = os.path.join(REPORT_CACHE_DIR, f"{chave}{_EXTENSOES.get(job['mimetype'], '')}")
+        if os.path.exists(arquivo):
+            os.utime(arquivo)
+            _atualizar(job, status='concluido', chave=chave, arquivo=arquivo, cache=True)
+            return
+
+        _atualizar(job, status='renderizando', chave=chave)
+        _gravar_atomico(arquivo, renderizar(dados, **contexto))
+        _atualizar(job, status='concluido', arquivo=arquivo, cache=False)
+    except Exception as e:
+        print(f"[RELATORIOS] Erro no job {job['id']} ({job['tipo']}): {e}")
+        _atualizar(job, status='erro', erro=str(e))
+    finally:
+        with _lock:
+            _futures.pop(job['id'], None)
+
+
+def submeter(tipo, carregar, renderizar, nome_arquivo, mimetype, dono, contexto=None):
+    """
+    Enfileira um relatório e retorna o id do job.
+
+    ``carregar()`` busca os dados (sem contexto Flask) e
+    ``renderizar(dados, **contexto)`` devolve os bytes do arquivo.
+    """
+    os.makedirs(REPORT_CACHE_DIR, exist_ok=True)
+    _limpar_expirados()
+    contexto = contexto or {}
+
+    with _lock:
+        if len(_futures) >= REPORT_MAX_PENDING:
+            raise FilaRelatoriosCheia()
+        job = {
+            'id': uuid.uuid4().hex,
+            'tipo': tipo,
+            'status': 'na_fila',
+            'dono': dono,
+            'nome_arquivo': nome_arquivo,
+            'mimetype': mimetype,
+            'criado_em': time.time(),
+        }
+        _salvar_estado(job)
+        _futures[job['id']] = _executor.submit(_executar, job, carregar, renderizar, contexto)
+    return job['id']
+
+
+def consultar(job_id):
+    """Estado do job (lido do disco), ou None se inexistente/expirado"""
+    if not job_id or not _JOB_ID.match(job_id):
+        return None
+    try:
+        with open(os.path.join(_dir_jobs(), f"{job_id}.json"), encoding='utf-8') as f:
+            job = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if job.get('status') == 'concluido' and not os.path.exists(job.get('arquivo', '')):
+        return None
+    return job
+
+
+def aguardar(job_id, timeout):
+    """Espera até ``timeout`` segundos por um job deste processo e retorna seu estado"""
+    with _lock:
+        future = _futures.get(job_id)
+    if future is not None:
+        wait([future], timeout=timeout)
+    return consultar(job_id)
@@ -0,0 +1,462 @@
+# flask_dashboard/app/report_renderers.py
+"""
+Renderização dos relatórios PDF/Excel e carga dos dados na API
+
+As funções não dependem do contexto da requisição Flask, então podem rodar
+nos workers da fila de relatórios (report_jobs).
+"""
+from datetime import datetime, timedelta
+from io import BytesIO
+
+import pandas as pd
+from openpyxl.styles import PatternFill, Font
+from openpyxl.utils import get_column_letter
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+from .utils.http_client import get_http_session
+
+PAGINA_CHECKLISTS = 500
+PAGINA_ABASTECIMENTOS = 1000
+
+CRITICIDADES = {'baixa': 'Baixa', 'media': 'Média', 'alta': 'Alta', 'critica': 'Crítica'}
+
+
+# ------------------------------------------------------------------
+# Carga dos dados (sem limite de linhas)
+# ------------------------------------------------------------------
+
+def _api_get(base_url, token, endpoint, params=None):
+    response = get_http_session().get(
+        f"{base_url}{endpoint}",
+        headers={'Authorization': f"Bearer {token}"},
+        params=params,
+        timeout=(5, 60),
+    )
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+
+def carregar_checklists(base_url, token, filtros):
+    """Todos os checklists do filtro, percorrendo a paginação por cursor"""
+    params = {k: v for k, v in filtros.items() if v and k not in ('page', 'per_page', 'limit', 'offset', 'cursor')}
+    params.update({'per_page': PAGINA_CHECKLISTS, 'cursor': '', 'total_mode': 'none'})
+    checklists = []
+    while True:
+        pagina = _api_get(base_url, token, '/api/v1/checklist', params) or {}
+        checklists.extend(pagina.get('checklists', []))
+        proximo = (pagina.get('pagination') or {}).get('next_cursor')
+        if not proximo:
+            return checklists
+        params['cursor'] = proximo
+
+
+def carregar_checklist(base_url, token, checklist_id):
+    """Checklist completo (itens e respostas)"""
+    checklist = _api_get(base_url, token, f'/api/v1/checklist/{checklist_id}')
+    if not checklist:
+        raise LookupError('Checklist não encontrado')
+    return checklist
+
+
+def carregar_abastecimentos(base_url, token, filtros):
+    """Todos os abastecimentos do filtro, em páginas de PAGINA_ABASTECIMENTOS"""
+    params = {k: v for k, v in filtros.items() if v}
+    abastecimentos = []
+    skip = 0
+    while True:
+        pagina = _api_get(base_url, token, '/api/v1/abastecimentos',
+                          {**params, 'skip': skip, 'limit': PAGINA_ABASTECIMENTOS}) or []
+        abastecimentos.extend(pagina)
+        if len(pagina) < PAGINA_ABASTECIMENTOS:
+            return abastecimentos
+        skip += PAGINA_ABASTECIMENTOS
+
+
+# ------------------------------------------------------------------
+# Renderização
+# ------------------------------------------------------------------
+
+def _resultado(valor, nao_respondido='N/R'):
+    return {'ok': 'OK', 'nao_ok': 'NOK', 'na': 'N/A'}.get(valor, nao_respondido)
+
+
+def pdf_checklists(checklists):
+    """Relatório PDF com a lista de checklists"""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    elements = []
+
+    # Estilos
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        spaceAfter=30,
+        alignment=1
+    )
+
+    # Título
+    elements.append(Paragraph("Relatório de Checklists", title_style))
+    elements.append(Spacer(1, 20))
+
+    # Informações do relatório
+    info = f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}<br/>"
+    info += f"Total de registros: {len(checklists)}"
+    elements.append(Paragraph(info, styles['Normal']))
+    elements.append(Spacer(1, 20))
+
+    # Tabela de dados
+    if checklists:
+        data = [['Código', 'Veículo', 'Motorista', 'Tipo', 'Status', 'Data', 'Score']]
+
+        for checklist in checklists:
+            data.append([
+                (checklist.get('codigo') or '')[:15],
+                checklist.get('veiculo_placa') or '',
+                (checklist.get('motorista_nome') or '')[:20],
+                checklist.get('tipo') or '',
+                checklist.get('status') or '',
+                (checklist.get('dt_inicio') or '')[:10],
+                f"{checklist.get('score_aprovacao') or 0:.1f}%"
+            ])
+
+        table = Table(data, repeatRows=1)
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+
+        elements.append(table)
+
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def pdf_checklist(checklist):
+    """PDF de um checklist com o detalhamento dos itens"""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=50, bottomMargin=50)
+    elements = []
+
+    # Estilos
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        spaceAfter=30,
+        alignment=1
+    )
+
+    subtitle_style = ParagraphStyle(
+        'CustomSubtitle',
+        parent=styles['Heading2'],
+        fontSize=14,
+        spaceAfter=15,
+        alignment=0
+    )
+
+    # Título
+    elements.append(Paragraph(f"Checklist - {checklist.get('codigo', '')}", title_style))
+    elements.append(Spacer(1, 20))
+
+    # Informações do checklist
+    info = f"<b>Veículo:</b> {checklist.get('veiculo_placa', '')}<br/>"
+    info += f"<b>Motorista:</b> {checklist.get('motorista_nome', '')}<br/>"
+    info += f"<b>Tipo:</b> {checklist.get('tipo', '')}<br/>"
+    info += f"<b>Status:</b> {checklist.get('status', '')}<br/>"
+    info += f"<b>Data Início:</b> {checklist.get('dt_inicio', '')}<br/>"
+    info += f"<b>Data Fim:</b> {checklist.get('dt_fim', '')}<br/>"
+    info += f"<b>Score:</b> {checklist.get('score_aprovacao') or 0:.1f}%<br/>"
+    info += f"<b>Itens OK:</b> {checklist.get('itens_ok', 0)}<br/>"
+    info += f"<b>Itens NOK:</b> {checklist.get('itens_nok', 0)}<br/>"
+    info += f"<b>Tem Bloqueios:</b> {'Sim' if checklist.get('tem_bloqueios') else 'Não'}<br/>"
+
+    if checklist.get('observacoes_gerais'):
+        info += f"<b>Observações:</b> {checklist.get('observacoes_gerais', '')}<br/>"
+
+    # Convert UTC to Brazil timezone for PDF generation
+    brazil_now = datetime.utcnow() - timedelta(hours=3)
+    info += f"<br/><b>Gerado em:</b> {brazil_now.strftime('%d/%m/%Y %H:%M')}"
+
+    elements.append(Paragraph(info, styles['Normal']))
+    elements.append(Spacer(1, 20))
+
+    # Título da seção de itens
+    elements.append(Paragraph("Detalhes dos Itens do Checklist", subtitle_style))
+    elements.append(Spacer(1, 10))
+
+    # Mapear respostas por item_id
+    respostas_map = {r['item_id']: r for r in checklist.get('respostas', [])}
+
+    # Preparar dados da tabela de itens
+    items_data = [['Ordem', 'Descrição', 'Resultado', 'Criticidade', 'Bloqueia Viagem', 'Observações']]
+
+    # Ordenar itens por ordem
+    itens = sorted(checklist.get('itens', []), key=lambda x: x.get('ordem', 0))
+
+    for item in itens:
+        resposta = respostas_map.get(item['id'], {})
+        criticidade = item.get('criticidade', 'N/A')
+
+        # Observações (limitar tamanho para não quebrar o layout)
+        observacoes = resposta.get('observacao', '') or ''
+        if len(observacoes) > 50:
+            observacoes = observacoes[:47] + '...'
+
+        # Quebrar descrição se muito longa
+        descricao = item.get('descricao', '')
+        if len(descricao) > 60:
+            descricao = descricao[:57] + '...'
+
+        items_data.append([
+            str(item.get('ordem', '')),
+            descricao,
+            _resultado(resposta.get('valor', 'N/R')),
+            CRITICIDADES.get(criticidade, criticidade),
+            'Sim' if item.get('bloqueia_viagem') else 'Não',
+            observacoes
+        ])
+
+    # Criar tabela de itens
+    items_table = Table(items_data, colWidths=[0.8*inch, 2.5*inch, 0.8*inch, 1*inch, 1*inch, 1.5*inch])
+
+    # Estilo da tabela
+    items_table.setStyle(TableStyle([
+        # Cabeçalho
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+
+        # Corpo da tabela
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+
+        ('ALIGN', (1, 1), (1, -1), 'LEFT'),  # Descrição alinhada à esquerda
+        ('ALIGN', (5, 1), (5, -1), 'LEFT'),  # Observações alinhadas à esquerda
+    ]))
+
+    # Aplicar cores condicionais nos resultados
+    for i, row in enumerate(items_data[1:], 1):
+        if row[2] == 'NOK':
+            items_table.setStyle(TableStyle([
+                ('BACKGROUND', (2, i), (2, i), colors.red),
+                ('TEXTCOLOR', (2, i), (2, i), colors.white),
+            ]))
+        elif row[2] == 'OK':
+            items_table.setStyle(TableStyle([
+                ('BACKGROUND', (2, i), (2, i), colors.green),
+                ('TEXTCOLOR', (2, i), (2, i), colors.white),
+            ]))
+        elif row[2] == 'N/A':
+            items_table.setStyle(TableStyle([
+                ('BACKGROUND', (2, i), (2, i), colors.yellow),
+            ]))
+
+    elements.append(items_table)
+    elements.append(Spacer(1, 20))
+
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def excel_checklist(checklist):
+    """Planilha de auditoria de um checklist (resumo, itens, criticidade, problemas)"""
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+
+        # Aba 1: Resumo do Checklist
+        summary_data = {
+            'Campo': ['ID', 'Código', 'Veículo', 'Motorista', 'Tipo', 'Status',
+                      'Data Início', 'Data Fim', 'Score (%)', 'Itens OK', 'Itens NOK',
+                      'Tem Bloqueios', 'Observações Gerais', 'Gerado em'],
+            'Valor': [
+                checklist.get('id', ''),
+                checklist.get('codigo', ''),
+                checklist.get('veiculo_placa', ''),
+                checklist.get('motorista_nome', ''),
+                checklist.get('tipo', ''),
+                checklist.get('status', ''),
+                checklist.get('dt_inicio', ''),
+                checklist.get('dt_fim', ''),
+                checklist.get('score_aprovacao', 0),
+                checklist.get('itens_ok', 0),
+                checklist.get('itens_nok', 0),
+                'Sim' if checklist.get('tem_bloqueios') else 'Não',
+                checklist.get('observacoes_gerais', ''),
+                datetime.now().strftime('%d/%m/%Y %H:%M')
+            ]
+        }
+        pd.DataFrame(summary_data).to_excel(writer, sheet_name='Resumo', index=False)
+
+        # Aba 2: Detalhes dos Itens
+        respostas_map = {r['item_id']: r for r in checklist.get('respostas', [])}
+        items_data = []
+        itens = sorted(checklist.get('itens', []), key=lambda x: x.get('ordem', 0))
+
+        for item in itens:
+            resposta = respostas_map.get(item['id'], {})
+            criticidade = item.get('criticidade', 'N/A')
+
+            items_data.append({
+                'Ordem': item.get('ordem', ''),
+                'ID Item': item.get('id', ''),
+                'Descrição': item.get('descricao', ''),
+                'Resultado': _resultado(resposta.get('valor'), 'Não Respondido'),
+                'Criticidade': CRITICIDADES.get(criticidade, criticidade),
+                'Bloqueia Viagem': 'Sim' if item.get('bloqueia_viagem') else 'Não',
+                'Observações': resposta.get('observacao', ''),
+                'Data Resposta': resposta.get('created_at', ''),
+                'Tem Foto': 'Sim' if resposta.get('fotos') and len(resposta.get('fotos', [])) > 0 else 'Não',
+                'Qtd Fotos': len(resposta.get('fotos', [])) if resposta.get('fotos') else 0
+            })
+
+        pd.DataFrame(items_data).to_excel(writer, sheet_name='Itens Detalhado', index=False)
+
+        # Aba 3: Análise por Criticidade
+        if items_data:
+            criticidade_analysis = {}
+            for item in items_data:
+                stats = criticidade_analysis.setdefault(
+                    item['Criticidade'], {'Total': 0, 'OK': 0, 'NOK': 0, 'N/A': 0, 'Não Respondido': 0}
+                )
+                stats['Total'] += 1
+                stats[item['Resultado']] += 1
+
+            analysis_data = []
+            for crit, stats in criticidade_analysis.items():
+                analysis_data.append({
+                    'Criticidade': crit,
+                    'Total de Itens': stats['Total'],
+                    'Itens OK': stats['OK'],
+                    'Itens NOK': stats['NOK'],
+                    'Itens N/A': stats['N/A'],
+                    'Não Respondidos': stats['Não Respondido'],
+                    'Taxa de Aprovação (%)': round((stats['OK'] / stats['Total']) * 100, 2) if stats['Total'] > 0 else 0
+                })
+
+            pd.DataFrame(analysis_data).to_excel(writer, sheet_name='Análise por Criticidade', index=False)
+
+        # Aba 4: Itens com Problemas (NOK e com bloqueio)
+        problem_items = [item for item in items_data if item['Resultado'] == 'NOK' or item['Bloqueia Viagem'] == 'Sim']
+        if problem_items:
+            pd.DataFrame(problem_items).to_excel(writer, sheet_name='Itens com Problemas', index=False)
+
+        # Formatação das planilhas
+        header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
+        header_font = Font(color='FFFFFF', bold=True)
+
+        for sheet_name in ('Resumo', 'Itens Detalhado'):
+            for cell in writer.sheets[sheet_name][1]:
+                cell.fill = header_fill
+                cell.font = header_font
+
+        # Colorir resultados
+        ws_items = writer.sheets['Itens Detalhado']
+        ok_fill = PatternFill(start_color='92D050', end_color='92D050', fill_type='solid')
+        nok_fill = PatternFill(start_color='FF0000', end_color='FF0000', fill_type='solid')
+        na_fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
+
+        resultado_col = None
+        for col in range(1, ws_items.max_column + 1):
+            if ws_items.cell(1, col).value == 'Resultado':
+                resultado_col = col
+                break
+
+        if resultado_col:
+            for row in range(2, ws_items.max_row + 1):
+                cell = ws_items.cell(row, resultado_col)
+                if cell.value == 'OK':
+                    cell.fill = ok_fill
+                    cell.font = Font(color='FFFFFF', bold=True)
+                elif cell.value == 'NOK':
+                    cell.fill = nok_fill
+                    cell.font = Font(color='FFFFFF', bold=True)
+                elif cell.value == 'N/A':
+                    cell.fill = na_fill
+
+        # Ajustar largura das colunas em todas as abas
+        for worksheet in writer.sheets.values():
+            for column in worksheet.columns:
+                max_length = max((len(str(cell.value)) for cell in column if cell.value is not None), default=0)
+                worksheet.column_dimensions[get_column_letter(column[0].column)].width = min(max_length + 3, 80)
+
+    return buffer.getvalue()
+
+
+def pdf_abastecimentos(abastecimentos, data_inicio=None, data_fim=None):
+    """Relatório PDF de abastecimentos"""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    styles = getSampleStyleSheet()
+    story = []
+
+    # Título
+    story.append(Paragraph("Relatório de Abastecimentos", styles['Title']))
+    story.append(Spacer(1, 12))
+
+    # Período
+    if data_inicio and data_fim:
+        story.append(Paragraph(f"Período: {data_inicio} a {data_fim}", styles['Normal']))
+        story.append(Spacer(1, 12))
+
+    # Dados da tabela
+    data = [['Data', 'Veículo', 'Motorista', 'Posto', 'Litros', 'Total']]
+
+    for abastecimento in abastecimentos:
+        veiculo = abastecimento.get('veiculo') or {}
+        motorista = abastecimento.get('motorista') or {}
+
+        data_formatted = ""
+        if abastecimento.get('data_abastecimento'):
+            try:
+                data_obj = datetime.fromisoformat(abastecimento['data_abastecimento'].replace('Z', '+00:00'))
+                data_formatted = data_obj.strftime('%d/%m/%Y')
+            except ValueError:
+                data_formatted = abastecimento.get('data_abastecimento', '')[:10]
+
+        data.append([
+            data_formatted,
+            f"{veiculo.get('placa', 'N/A')}",
+            (motorista.get('nome') or 'N/A')[:15],
+            (abastecimento.get('posto') or 'N/A')[:15],
+            f"{abastecimento.get('litros', 0)}L",
+            f"R$ {abastecimento.get('valor_total', 0)}"
+        ])
+
+    table = Table(data, repeatRows=1)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+
+    story.append(table)
+    doc.build(story)
+    return buffer.getvalue()
@@ -3,6 +3,7 @@
 Cliente simples para comunicação com a API
 """
 import requests
+from .http_client import get_http_session
 from flask import current_app, session
 
 class APIClient:
@@ -23,7 +24,7 @@ class APIClient:
             return
         try:
             url = f"{self.base_url}/api/v1/auth/login"
-            resp = requests.post(url, json={"email": email, "senha": password}, timeout=self.timeout)
+            resp = get_http_session().post(url, json={"email": email, "senha": password}, timeout=self.timeout)
             resp.raise_for_status()
             data = resp.json()
             self._token = data.get("access_token")
@@ -42,7 +43,7 @@ class APIClient:
         """GET request"""
         try:
             url = f"{self.base_url}{endpoint}"
-            response = requests.get(url, params=params, headers=self._headers(), timeout=self.timeout)
+            response = get_http_session().get(url, params=params, headers=self._headers(), timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -53,7 +54,7 @@ class APIClient:
         """POST request"""
         try:
             url = f"{self.base_url}{endpoint}"
-            response = requests.post(url, json=data, headers=self._headers(), timeout=self.timeout)
+            response = get_http_session().post(url, json=data, headers=self._headers(), timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -0,0 +1,46 @@
+# flask_dashboard/app/utils/fanout.py
+"""
+Execução concorrente de chamadas independentes com prazo por página
+
+Tarefas que usam o banco (``db=True``) rodam em um executor próprio com o
+mesmo tamanho do pool de conexões: elas esperam na fila do executor, onde
+ainda podem ser canceladas no prazo, em vez de ocupar workers das chamadas
+à API bloqueadas no semáforo do pool.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from ..db_pool import POOL_MAX
+
+FANOUT_WORKERS = int(os.getenv('FANOUT_WORKERS', '8'))
+FANOUT_DEADLINE = float(os.getenv('FANOUT_DEADLINE', '15'))
+
+_executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix='fanout')
+_db_executor = ThreadPoolExecutor(max_workers=POOL_MAX, thread_name_prefix='fanout-db')
+
+
+def run_many(tasks, deadline=None, default=None, db=False):
+    """
+    Executa ``tasks`` ({chave: callable}) em paralelo e retorna {chave: resultado}.
+
+    Tarefas que falham ou não terminam até ``deadline`` segundos recebem
+    ``default``; a página segue com os dados que chegaram a tempo. Com
+    ``db=True`` as tarefas usam o executor limitado ao pool de conexões.
+    """
+    executor = _db_executor if db else _executor
+    futures = {key: executor.submit(fn) for key, fn in tasks.items()}
+    done, _pending = wait(futures.values(), timeout=deadline or FANOUT_DEADLINE)
+
+    results = {}
+    for key, future in futures.items():
+        if future not in done:
+            future.cancel()
+            print(f"Fan-out: '{key}' excedeu o prazo de {deadline or FANOUT_DEADLINE}s")
+            results[key] = default
+            continue
+        try:
+            results[key] = future.result()
+        except Exception as e:
+            print(f"Fan-out: erro em '{key}': {e}")
+            results[key] = default
+    return results
@@ -0,0 +1,107 @@
+# flask_dashboard/app/utils/http_client.py
+"""
+Sessão HTTP compartilhada (pool keep-alive + retries) para chamadas à API,
+com contadores de latência por endpoint
+"""
+import os
+import re
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+POOL_CONNECTIONS = int(os.getenv('API_POOL_CONNECTIONS', '10'))
+POOL_MAXSIZE = int(os.getenv('API_POOL_MAXSIZE', '20'))
+MAX_RETRIES = int(os.getenv('API_MAX_RETRIES', '2'))
+RETRY_BACKOFF = float(os.getenv('API_RETRY_BACKOFF', '0.3'))
+
+_ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+_session = None
+_session_lock = threading.Lock()
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _endpoint_key(method, url):
+    """Normaliza 'GET /api/v1/checklist/123' para 'GET /api/v1/checklist/{id}'"""
+    path = urlsplit(url).path or '/'
+    return f"{method.upper()} {_ID_SEGMENT.sub('/{id}', path)}"
+
+
+def _record(key, elapsed_ms, status_code):
+    with _stats_lock:
+        stat = _stats.setdefault(key, {
+            "endpoint": key, "count": 0, "errors": 0,
+            "total_ms": 0.0, "max_ms": 0.0, "last_status": None,
+        })
+        stat["count"] += 1
+        stat["total_ms"] += elapsed_ms
+        stat["max_ms"] = max(stat["max_ms"], elapsed_ms)
+        stat["last_status"] = status_code
+        if status_code is None or status_code >= 500:
+            stat["errors"] += 1
+
+
+class InstrumentedSession(requests.Session):
+    """requests.Session que mede a latência de cada chamada"""
+
+    def request(self, method, url, *args, **kwargs):
+        start = time.perf_counter()
+        status_code = None
+        try:
+            response = super().request(method, url, *args, **kwargs)
+            status_code = response.status_code
+            return response
+        finally:
+            _record(_endpoint_key(method, url), (time.perf_counter() - start) * 1000, status_code)
+
+
+def get_http_session():
+    """Sessão única por processo, reaproveitando conexões TCP/TLS com a API"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                http = InstrumentedSession()
+                retry = Retry(
+                    total=MAX_RETRIES,
+                    connect=MAX_RETRIES,
+                    read=MAX_RETRIES,
+                    backoff_factor=RETRY_BACKOFF,
+                    status_forcelist=(502, 503, 504),
+                    allowed_methods=frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}),
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=POOL_CONNECTIONS,
+                    pool_maxsize=POOL_MAXSIZE,
+                    max_retries=retry,
+                )
+                http.mount('http://', adapter)
+                http.mount('https://', adapter)
+                # Sessão compartilhada entre usuários: nunca guardar cookies da API
+                http.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                _session = http
+    return _session
+
+
+def get_latency_stats():
+    """Contadores por endpoint, ordenados pelo tempo total gasto"""
+    with _stats_lock:
+        stats = [dict(s) for s in _stats.values()]
+    for s in stats:
+        s["avg_ms"] = round(s["total_ms"] / s["count"], 2) if s["count"] else 0.0
+        s["total_ms"] = round(s["total_ms"], 2)
+        s["max_ms"] = round(s["max_ms"], 2)
+    return sorted(stats, key=lambda s: s["total_ms"], reverse=True)
+
+
+def reset_latency_stats():
+    """Zera os contadores de latência"""
+    with _stats_lock:
+        _stats.clear()
@@ -160,6 +160,14 @@ CREATE TABLE IF NOT EXISTS checklists (
     observacoes_gerais TEXT,
     score_final INTEGER, -- Score calculado baseado nas respostas
     
+    -- Métricas persistidas pela API (ver migration_checklist_metricas.sql)
+    score_aprovacao NUMERIC(5,2), -- Percentual de itens OK
+    total_itens INTEGER,
+    itens_ok INTEGER,
+    itens_nok INTEGER,
+    itens_na INTEGER,
+    tem_bloqueios BOOLEAN DEFAULT FALSE,
+    
     -- Auditoria
     ip_inicio INET,
     ip_fim INET,
@@ -499,16 +507,13 @@ CREATE INDEX IF NOT EXISTS idx_viagens_data_partida ON viagens(data_partida);
 
 -- Checklists
 CREATE INDEX IF NOT EXISTS idx_checklists_codigo ON checklists(codigo);
-CREATE INDEX IF NOT EXISTS idx_checklists_veiculo_id ON checklists(veiculo_id);
 CREATE INDEX IF NOT EXISTS idx_checklists_motorista_id ON checklists(motorista_id);
 CREATE INDEX IF NOT EXISTS idx_checklists_modelo_id ON checklists(modelo_id);
-CREATE INDEX IF NOT EXISTS idx_checklists_status ON checklists(status);
 CREATE INDEX IF NOT EXISTS idx_checklists_tipo ON checklists(tipo);
 CREATE INDEX IF NOT EXISTS idx_checklists_dt_inicio ON checklists(dt_inicio);
 CREATE INDEX IF NOT EXISTS idx_checklists_dt_fim ON checklists(dt_fim);
 
 -- Checklist Respostas
-CREATE INDEX IF NOT EXISTS idx_checklist_respostas_checklist_id ON checklist_respostas(checklist_id);
 CREATE INDEX IF NOT EXISTS idx_checklist_respostas_item_id ON checklist_respostas(item_id);
 CREATE INDEX IF NOT EXISTS idx_checklist_respostas_valor ON checklist_respostas(valor);
 
@@ -539,6 +544,14 @@ CREATE INDEX IF NOT EXISTS idx_checklists_data_status ON checklists(dt_inicio, s
 CREATE INDEX IF NOT EXISTS idx_defeitos_veiculo_status ON defeitos(veiculo_id, status);
 CREATE INDEX IF NOT EXISTS idx_os_veiculo_status ON ordens_servico(veiculo_id, status);
 
+-- Índices no formato das listagens (ver migration_indices_consultas.sql)
+CREATE INDEX IF NOT EXISTS ix_checklists_veiculo_dt_inicio ON checklists(veiculo_id, dt_inicio DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_checklists_status_dt_inicio ON checklists(status, dt_inicio DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_checklists_aguardando_aprovacao ON checklists(dt_inicio DESC) WHERE status = 'aguardando_aprovacao';
+CREATE INDEX IF NOT EXISTS ix_abastecimentos_veiculo_data ON abastecimentos(veiculo_id, data_abastecimento DESC, id DESC);
+-- Data de abertura da OS: abertura_dt neste esquema (data_abertura em app/models.py)
+CREATE INDEX IF NOT EXISTS ix_ordens_servico_veiculo_abertura ON ordens_servico(veiculo_id, abertura_dt DESC);
+
 -- ========== TRIGGERS ==========
 
 -- Trigger para atualizar campo 'atualizado_em'
@@ -0,0 +1,15 @@
+-- Migration: Métricas persistidas em checklists (score, contadores e bloqueios)
+-- Data: 2026-10-17
+-- Preenchidas pela API ao finalizar/responder; histórico via
+-- backend_fastapi/backfill_checklist_scores.py
+
+ALTER TABLE checklists
+ADD COLUMN IF NOT EXISTS score_aprovacao NUMERIC(5,2),
+ADD COLUMN IF NOT EXISTS total_itens INTEGER,
+ADD COLUMN IF NOT EXISTS itens_ok INTEGER,
+ADD COLUMN IF NOT EXISTS itens_nok INTEGER,
+ADD COLUMN IF NOT EXISTS itens_na INTEGER,
+ADD COLUMN IF NOT EXISTS tem_bloqueios BOOLEAN DEFAULT FALSE;
+
+COMMENT ON COLUMN checklists.score_aprovacao IS 'Percentual de itens OK sobre o total de itens do modelo';
+COMMENT ON COLUMN checklists.total_itens IS 'Itens do modelo no momento do cálculo (NULL = ainda não calculado)';
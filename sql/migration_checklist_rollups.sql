@@ -0,0 +1,64 @@
+-- Migration: Agregados diários incrementais de checklist
+-- Data: 2026-10-17
+--
+-- Estrutura usada pelo ETL (etl_jobs/etl_jobs_system.py,
+-- JOB_TYPE=checklist_rollups ou daily_aggregation) e lida pela API
+-- (app/services/checklist_rollups.py). Só os dias com checklists alterados
+-- desde a marca d'água em etl_watermarks são recalculados. Até a próxima
+-- execução, a API agrega ao vivo os dias com checklists alterados depois da
+-- marca d'água (atualizado_em) ou marcados em checklist_rollup_dias_pendentes.
+--
+-- O índice em checklists usa CONCURRENTLY para não bloquear escritas e não
+-- roda dentro de transação: executar com psql (autocommit), ex.:
+-- psql "$DATABASE_URL" -f sql/migration_checklist_rollups.sql
+
+ALTER TABLE checklists ADD COLUMN IF NOT EXISTS atualizado_em TIMESTAMP NOT NULL DEFAULT NOW();
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_checklists_atualizado_em ON checklists (atualizado_em);
+
+CREATE TABLE IF NOT EXISTS checklist_rollup_diario (
+    dia DATE NOT NULL,
+    veiculo_id INT NOT NULL,
+    motorista_id INT NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    total INT NOT NULL DEFAULT 0,
+    finalizados INT NOT NULL DEFAULT 0,
+    rapidos INT NOT NULL DEFAULT 0,
+    duracao_total_segundos NUMERIC(14,2) NOT NULL DEFAULT 0,
+    atualizado_em TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (dia, veiculo_id, motorista_id, status)
+);
+
+CREATE INDEX IF NOT EXISTS idx_checklist_rollup_veiculo_dia ON checklist_rollup_diario (veiculo_id, dia);
+
+-- Dias que deixaram de ter checklists (exclusão ou mudança de data)
+CREATE TABLE IF NOT EXISTS checklist_rollup_dias_pendentes (dia DATE PRIMARY KEY);
+
+CREATE TABLE IF NOT EXISTS etl_watermarks (
+    job VARCHAR(100) PRIMARY KEY,
+    watermark TIMESTAMP NOT NULL,
+    atualizado_em TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION checklists_marcar_alteracao()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Exclusões e mudanças de data invalidam o dia antigo no agregado
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO checklist_rollup_dias_pendentes (dia)
+        VALUES (DATE(OLD.dt_inicio)) ON CONFLICT DO NOTHING;
+        RETURN OLD;
+    END IF;
+    IF DATE(OLD.dt_inicio) <> DATE(NEW.dt_inicio) THEN
+        INSERT INTO checklist_rollup_dias_pendentes (dia)
+        VALUES (DATE(OLD.dt_inicio)) ON CONFLICT DO NOTHING;
+    END IF;
+    NEW.atualizado_em = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_checklists_marcar_alteracao ON checklists;
+CREATE TRIGGER trg_checklists_marcar_alteracao
+    BEFORE UPDATE OR DELETE ON checklists
+    FOR EACH ROW EXECUTE FUNCTION checklists_marcar_alteracao();
@@ -0,0 +1,40 @@
+-- Migration: Vencimento de documentos e CNHs
+-- Data: 2026-10-17
+--
+-- Índices parciais com só os documentos que ainda geram alerta e as CNHs de
+-- motoristas ativos: a listagem /api/v1/documentos/vencendo e o job do ETL
+-- (etl_jobs/etl_jobs_system.py, JOB_TYPE=document_expiry) leem apenas a
+-- faixa de vencimentos da janela, sem varrer as tabelas.
+--
+-- O job mantém um alerta ativo por documento em alertas_sistema
+-- (categoria 'documento'); o índice único abaixo é o alvo do ON CONFLICT.
+-- Agendar diariamente, ex.: JOB_TYPE=document_expiry python etl_jobs_system.py
+
+CREATE INDEX IF NOT EXISTS idx_documentos_vencimento_ativos
+    ON documentos (data_vencimento)
+    WHERE alerta_vencimento IS true
+      AND status NOT IN ('renovado', 'cancelado')
+      AND data_vencimento IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_motoristas_validade_cnh_ativos
+    ON motoristas (validade_cnh)
+    WHERE ativo IS true AND validade_cnh IS NOT NULL;
+
+-- Alertas duplicados de execuções anteriores impediriam o índice único
+UPDATE alertas_sistema a
+SET ativo = false
+WHERE a.categoria = 'documento'
+  AND a.ativo
+  AND EXISTS (
+      SELECT 1 FROM alertas_sistema b
+      WHERE b.categoria = 'documento'
+        AND b.ativo
+        AND b.entidade_tipo = a.entidade_tipo
+        AND b.entidade_id = a.entidade_id
+        AND COALESCE(b.referencia_id, 0) = COALESCE(a.referencia_id, 0)
+        AND b.id > a.id
+  );
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_alertas_sistema_documento_ativo
+    ON alertas_sistema (entidade_tipo, entidade_id, (COALESCE(referencia_id, 0)))
+    WHERE categoria = 'documento' AND ativo;
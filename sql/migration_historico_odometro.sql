@@ -0,0 +1,83 @@
+-- Migration: Ingestão única de leituras de odômetro
+-- Data: 2026-10-17
+--
+-- Toda leitura (checklist, abastecimento, OS, lançamento manual) passa pela
+-- API (app/services/odometro.py): é anexada a historico_odometro, leituras
+-- menores que a última são rejeitadas e veiculos.km_atual avança junto com
+-- o cache da última leitura por veículo (odometro_atual).
+--
+-- Após aplicar, carregar o histórico a partir das leituras já existentes:
+--   cd backend_fastapi && python recalcular_manutencoes.py --odometro
+
+-- Última leitura aceita por veículo
+CREATE TABLE IF NOT EXISTS odometro_atual (
+    veiculo_id INTEGER PRIMARY KEY REFERENCES veiculos(id) ON DELETE CASCADE,
+    km BIGINT NOT NULL,
+    data_leitura TIMESTAMP NOT NULL,
+    fonte VARCHAR(20) NOT NULL,
+    referencia_id INTEGER,
+    historico_id INTEGER REFERENCES historico_odometro(id) ON DELETE SET NULL,
+    atualizado_em TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- Leituras por veículo em ordem cronológica (km rodados, média km/dia)
+CREATE INDEX IF NOT EXISTS idx_historico_odometro_veiculo_data
+    ON historico_odometro (veiculo_id, data_leitura);
+
+-- km_atual, km_anterior e diferença passam a ser gravados pela API junto com
+-- a leitura. O trigger antigo sobrescrevia km_atual com qualquer leitura,
+-- inclusive menores (e impediria a carga do histórico antigo).
+DROP TRIGGER IF EXISTS trigger_atualizar_km_veiculo ON historico_odometro;
+DROP FUNCTION IF EXISTS atualizar_km_veiculo();
+
+-- Lançamento via SQL (ex.: sql/maintenance_seed.sql) com as mesmas regras da API
+CREATE OR REPLACE FUNCTION inserir_leitura_odometro(
+    p_veiculo_id INTEGER,
+    p_km_atual BIGINT,
+    p_fonte VARCHAR(20),
+    p_referencia_id INTEGER DEFAULT NULL,
+    p_observacoes TEXT DEFAULT NULL,
+    p_usuario_id INTEGER DEFAULT NULL
+)
+RETURNS INTEGER AS $$
+DECLARE
+    v_km_anterior BIGINT;
+    v_historico_id INTEGER;
+BEGIN
+    SELECT km_atual INTO v_km_anterior
+    FROM veiculos
+    WHERE id = p_veiculo_id
+    FOR UPDATE;
+
+    IF p_km_atual < COALESCE(v_km_anterior, 0) THEN
+        RAISE EXCEPTION 'Odômetro % menor que a última leitura (%) do veículo %',
+            p_km_atual, v_km_anterior, p_veiculo_id;
+    END IF;
+    IF p_km_atual = v_km_anterior THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO historico_odometro (
+        veiculo_id, km_atual, km_anterior, diferenca_km, fonte,
+        referencia_id, observacoes, registrado_por
+    ) VALUES (
+        p_veiculo_id, p_km_atual, NULLIF(v_km_anterior, 0),
+        CASE WHEN v_km_anterior > 0 THEN p_km_atual - v_km_anterior END, p_fonte,
+        p_referencia_id, p_observacoes, p_usuario_id
+    ) RETURNING id INTO v_historico_id;
+
+    UPDATE veiculos SET km_atual = p_km_atual WHERE id = p_veiculo_id;
+
+    INSERT INTO odometro_atual (veiculo_id, km, data_leitura, fonte, referencia_id, historico_id, atualizado_em)
+    VALUES (p_veiculo_id, p_km_atual, NOW(), p_fonte, p_referencia_id, v_historico_id, NOW())
+    ON CONFLICT (veiculo_id) DO UPDATE SET
+        km = EXCLUDED.km,
+        data_leitura = EXCLUDED.data_leitura,
+        fonte = EXCLUDED.fonte,
+        referencia_id = EXCLUDED.referencia_id,
+        historico_id = EXCLUDED.historico_id,
+        atualizado_em = EXCLUDED.atualizado_em;
+
+    RETURN v_historico_id;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,46 @@
+-- Migration: Índices compostos e parciais no formato das consultas de listagem
+-- Data: 2026-10-17
+--
+-- Cada listagem filtra por uma coluna e ordena pela data decrescente (com id
+-- como desempate na paginação por cursor). Os índices abaixo atendem filtro
+-- e ordenação juntos, sem sort. Mesmo conjunto declarado em app/models.py.
+--
+-- CONCURRENTLY não bloqueia escritas, mas não roda dentro de transação:
+-- executar com psql (autocommit), ex.: psql "$DATABASE_URL" -f sql/migration_indices_consultas.sql
+--
+-- checklist_respostas(checklist_id, item_id) já é atendido pela restrição
+-- única uk_checklist_resposta (sql/ddl.sql).
+
+-- Checklists por veículo (listagem, histórico do veículo, exportação)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_checklists_veiculo_dt_inicio
+    ON checklists (veiculo_id, dt_inicio DESC, id DESC);
+
+-- Checklists por status
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_checklists_status_dt_inicio
+    ON checklists (status, dt_inicio DESC, id DESC);
+
+-- Fila de aprovação (/checklist/pending): parcial, só as linhas aguardando
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_checklists_aguardando_aprovacao
+    ON checklists (dt_inicio DESC)
+    WHERE status = 'aguardando_aprovacao';
+
+-- Abastecimentos por veículo, mais recentes primeiro
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_abastecimentos_veiculo_data
+    ON abastecimentos (veiculo_id, data_abastecimento DESC, id DESC);
+
+-- Ordens de serviço por veículo, mais recentes primeiro
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ordens_servico_veiculo_abertura
+    ON ordens_servico (veiculo_id, data_abertura DESC);
+
+-- Índices de coluna única cobertos pelo prefixo dos compostos acima
+DROP INDEX CONCURRENTLY IF EXISTS idx_checklists_veiculo_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_checklists_status;
+DROP INDEX CONCURRENTLY IF EXISTS idx_checklist_respostas_checklist_id;
+
+-- Duplicava a restrição uk_checklist_resposta (bancos onde já foi criado)
+DROP INDEX CONCURRENTLY IF EXISTS uq_checklist_respostas_checklist_item;
+
+ANALYZE checklists;
+ANALYZE checklist_respostas;
+ANALYZE abastecimentos;
+ANALYZE ordens_servico;
@@ -0,0 +1,11 @@
+-- Migration: Média de km/dia por veículo para a previsão de manutenção
+-- Data: 2026-10-17
+--
+-- Média exponencial de km/dia calculada pelo ETL diário
+-- (etl_jobs/etl_jobs_system.py, JOB_TYPE=daily_aggregation ou
+-- vehicle_usage_rates) a partir de historico_odometro e gravada no cache de
+-- última leitura. A previsão de manutenção usa esse valor por veículo no
+-- lugar dos 100 km/dia fixos.
+
+ALTER TABLE odometro_atual ADD COLUMN IF NOT EXISTS km_por_dia NUMERIC(8,1);
+ALTER TABLE odometro_atual ADD COLUMN IF NOT EXISTS km_por_dia_calculado_em TIMESTAMP;
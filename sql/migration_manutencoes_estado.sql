@@ -0,0 +1,22 @@
+-- Migration: Estado de manutenção preventiva mantido por eventos
+-- Data: 2026-10-17
+--
+-- manutencoes_controle (sql/maintenance_system.sql) passa a ser gravada pela
+-- API (app/services/manutencao_estado.py) a cada leitura de odômetro, OS
+-- concluída ou alteração de plano; alertas e previsão leem a tabela pelo
+-- índice de status já existente (idx_manutencoes_controle_status).
+--
+-- Após aplicar, fazer a carga inicial do estado:
+--   cd backend_fastapi && python recalcular_manutencoes.py --odometro
+-- e agendar `make manutencao-estado` diariamente (itens controlados por dias).
+
+-- O status passa a ser calculado só pela API, com a antecipação de cada item;
+-- o trigger antigo reescrevia todos os itens com a regra fixa de 1000 km
+DROP TRIGGER IF EXISTS trigger_recalcular_manutencoes ON historico_odometro;
+DROP FUNCTION IF EXISTS recalcular_manutencoes();
+
+-- Itens já registrados por OS (consultado antes de gravar o histórico, para
+-- a mesma OS concluída de novo não duplicar as linhas)
+CREATE INDEX IF NOT EXISTS idx_manutencoes_historico_ordem_servico
+    ON manutencoes_historico (ordem_servico_id)
+    WHERE ordem_servico_id IS NOT NULL;
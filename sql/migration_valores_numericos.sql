@@ -0,0 +1,164 @@
+-- Migration: Valores e volumes de abastecimentos e ordens de serviço em NUMERIC
+-- Data: 2026-10-17
+--
+-- litros, valor_litro e valor_total (abastecimentos), valor_total
+-- (ordens_servico) e quantidade/valor_unitario/valor_total
+-- (ordem_servico_itens) eram VARCHAR(20), o que impedia SUM/AVG e índices
+-- no banco. A conversão é feita sem reescrever a tabela sob lock exclusivo:
+--
+--   1. coluna nova <coluna>_num + trigger que a mantém em dia nas escritas;
+--   2. preenchimento em lotes por id, com COMMIT a cada lote;
+--   3. troca curta (drop da coluna texto + rename) em uma transação.
+--
+-- Executar com psql em autocommit (o passo 2 usa COMMIT dentro do DO):
+--   psql "$DATABASE_URL" -f sql/migration_valores_numericos.sql
+-- Idempotente: colunas que já são numéricas são ignoradas. Textos que não
+-- representam número ficam NULL e são listados no passo 2.
+
+-- Conversão tolerante: aceita "1234.56", "1234,56" e "1.234,56"
+CREATE OR REPLACE FUNCTION fn_texto_para_numeric(v TEXT) RETURNS NUMERIC AS $$
+DECLARE
+    t TEXT := btrim(v);
+BEGIN
+    IF t IS NULL OR t = '' THEN
+        RETURN NULL;
+    END IF;
+    IF position(',' IN t) > 0 THEN
+        t := replace(replace(t, '.', ''), ',', '.');
+    END IF;
+    IF t !~ '^-?[0-9]+(\.[0-9]+)?$' THEN
+        RETURN NULL;
+    END IF;
+    RETURN t::NUMERIC;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+CREATE TEMP TABLE _colunas_numericas (tabela TEXT, coluna TEXT, tipo TEXT, obrigatoria BOOLEAN);
+INSERT INTO _colunas_numericas VALUES
+    ('abastecimentos',      'litros',         'NUMERIC(10,3)', TRUE),
+    ('abastecimentos',      'valor_litro',    'NUMERIC(10,3)', TRUE),
+    ('abastecimentos',      'valor_total',    'NUMERIC(12,2)', TRUE),
+    ('ordens_servico',      'valor_total',    'NUMERIC(12,2)', FALSE),
+    ('ordem_servico_itens', 'quantidade',     'NUMERIC(10,3)', FALSE),
+    ('ordem_servico_itens', 'valor_unitario', 'NUMERIC(12,2)', FALSE),
+    ('ordem_servico_itens', 'valor_total',    'NUMERIC(12,2)', FALSE);
+
+-- Só entram as colunas que ainda são texto
+DELETE FROM _colunas_numericas c
+WHERE NOT EXISTS (
+    SELECT 1 FROM information_schema.columns i
+    WHERE i.table_schema = current_schema()
+      AND i.table_name = c.tabela
+      AND i.column_name = c.coluna
+      AND i.data_type IN ('character varying', 'text')
+);
+
+-- ========== 1. Colunas novas e triggers de sincronização ==========
+DO $$
+DECLARE
+    c RECORD;
+    t RECORD;
+    atribuicoes TEXT;
+BEGIN
+    FOR c IN SELECT * FROM _colunas_numericas LOOP
+        EXECUTE format('ALTER TABLE %I ADD COLUMN IF NOT EXISTS %I %s', c.tabela, c.coluna || '_num', c.tipo);
+    END LOOP;
+
+    FOR t IN SELECT DISTINCT tabela FROM _colunas_numericas LOOP
+        SELECT string_agg(format('NEW.%I := fn_texto_para_numeric(NEW.%I);', coluna || '_num', coluna), ' ')
+          INTO atribuicoes
+          FROM _colunas_numericas WHERE tabela = t.tabela;
+
+        EXECUTE format(
+            'CREATE OR REPLACE FUNCTION %I() RETURNS TRIGGER AS $f$ BEGIN %s RETURN NEW; END; $f$ LANGUAGE plpgsql',
+            'fn_sync_numeric_' || t.tabela, atribuicoes
+        );
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', 'trg_sync_numeric_' || t.tabela, t.tabela);
+        EXECUTE format(
+            'CREATE TRIGGER %I BEFORE INSERT OR UPDATE ON %I FOR EACH ROW EXECUTE FUNCTION %I()',
+            'trg_sync_numeric_' || t.tabela, t.tabela, 'fn_sync_numeric_' || t.tabela
+        );
+    END LOOP;
+END $$;
+
+-- ========== 2. Preenchimento em lotes (COMMIT por lote) ==========
+DO $$
+DECLARE
+    t RECORD;
+    atribuicoes TEXT;
+    invalidos TEXT;
+    ultimo_id BIGINT;
+    maior_id BIGINT;
+    lote CONSTANT INTEGER := 5000;
+BEGIN
+    FOR t IN SELECT DISTINCT tabela FROM _colunas_numericas LOOP
+        SELECT string_agg(format('%I = fn_texto_para_numeric(%I)', coluna || '_num', coluna), ', ')
+          INTO atribuicoes
+          FROM _colunas_numericas WHERE tabela = t.tabela;
+
+        EXECUTE format('SELECT COALESCE(MAX(id), 0) FROM %I', t.tabela) INTO maior_id;
+        ultimo_id := 0;
+        WHILE ultimo_id < maior_id LOOP
+            EXECUTE format('UPDATE %I SET %s WHERE id > $1 AND id <= $2', t.tabela, atribuicoes)
+              USING ultimo_id, ultimo_id + lote;
+            ultimo_id := ultimo_id + lote;
+            COMMIT;
+        END LOOP;
+        RAISE NOTICE '% preenchida até id %', t.tabela, maior_id;
+    END LOOP;
+
+    -- Valores que não puderam ser convertidos (ficarão NULL)
+    FOR t IN SELECT * FROM _colunas_numericas LOOP
+        EXECUTE format(
+            'SELECT string_agg(id::TEXT, '', '') FROM %I WHERE %I IS NOT NULL AND btrim(%I) <> '''' AND %I IS NULL',
+            t.tabela, t.coluna, t.coluna, t.coluna || '_num'
+        ) INTO invalidos;
+        IF invalidos IS NOT NULL THEN
+            RAISE WARNING '%.% sem conversão numérica nos ids: %', t.tabela, t.coluna, invalidos;
+        END IF;
+    END LOOP;
+END $$;
+
+-- ========== 3. Troca das colunas ==========
+BEGIN;
+
+DO $$
+DECLARE
+    c RECORD;
+BEGIN
+    FOR c IN SELECT DISTINCT tabela FROM _colunas_numericas LOOP
+        EXECUTE format('LOCK TABLE %I IN SHARE ROW EXCLUSIVE MODE', c.tabela);
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', 'trg_sync_numeric_' || c.tabela, c.tabela);
+        EXECUTE format('DROP FUNCTION IF EXISTS %I()', 'fn_sync_numeric_' || c.tabela);
+    END LOOP;
+
+    FOR c IN SELECT * FROM _colunas_numericas LOOP
+        EXECUTE format('ALTER TABLE %I DROP COLUMN %I', c.tabela, c.coluna);
+        EXECUTE format('ALTER TABLE %I RENAME COLUMN %I TO %I', c.tabela, c.coluna || '_num', c.coluna);
+    END LOOP;
+END $$;
+
+COMMIT;
+
+-- NOT NULL das colunas de abastecimentos: a constraint NOT VALID é validada
+-- sem lock exclusivo e permite que o SET NOT NULL não varra a tabela de novo
+DO $$
+DECLARE
+    c RECORD;
+BEGIN
+    FOR c IN SELECT * FROM _colunas_numericas WHERE obrigatoria LOOP
+        EXECUTE format(
+            'ALTER TABLE %I ADD CONSTRAINT %I CHECK (%I IS NOT NULL) NOT VALID',
+            c.tabela, 'ck_' || c.tabela || '_' || c.coluna || '_nn', c.coluna
+        );
+        EXECUTE format('ALTER TABLE %I VALIDATE CONSTRAINT %I', c.tabela, 'ck_' || c.tabela || '_' || c.coluna || '_nn');
+        EXECUTE format('ALTER TABLE %I ALTER COLUMN %I SET NOT NULL', c.tabela, c.coluna);
+        EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', c.tabela, 'ck_' || c.tabela || '_' || c.coluna || '_nn');
+    END LOOP;
+EXCEPTION WHEN check_violation THEN
+    RAISE WARNING 'NOT NULL não aplicado: há linhas sem valor numérico (ver avisos do passo 2)';
+END $$;
+
+ANALYZE abastecimentos;
+ANALYZE ordens_servico;
+ANALYZE ordem_servico_itens;